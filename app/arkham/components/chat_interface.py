@@ -1,11 +1,10 @@
 import reflex as rx
 import sys
 import logging
+import time
 from pathlib import Path
 from typing import List, Dict, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from ..services.llm_service import chat_with_llm
+from ..services.anomaly_service import RagMetrics, stream_rag_response
 from ..services.search_service import hybrid_search
 
 logger = logging.getLogger(__name__)
@@ -14,12 +13,43 @@ logger = logging.getLogger(__name__)
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 from app.arkham.services.db.models import Document
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 # Database setup from central config
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
+
+STREAM_UPDATE_INTERVAL = 0.05  # Seconds between UI updates while an answer streams
+CONTEXT_CHUNKS = 5  # Search hits given to the LLM as context
+
+CHAT_SYSTEM_PROMPT = (
+    "You are an expert forensic investigator analyzing a database of documents. "
+    "Your goal is to answer questions accurately based ONLY on the provided context snippets. "
+    "CRITICAL INSTRUCTION: When you cite information, you MUST include BOTH the Document Title and the Chunk ID. "
+    "Format your citations exactly like this: [Source: Document Title | Chunk ID: 123]. "
+    "If the answer is not in the context, say 'I cannot find that information in the provided documents.'"
+)
+
+
+def _document_context(query: str, doc_ids: Optional[List[int]] = None) -> str:
+    """Hybrid search hits for the question, each headed by its citation."""
+    if not query.strip():
+        return ""
+    chunks = hybrid_search(query=query, allowed_doc_ids=doc_ids, limit=CONTEXT_CHUNKS)
+    return "\n\n".join(
+        f"[Source: {chunk['metadata'].get('title', 'Unknown Document')} | "
+        f"Chunk ID: {chunk.get('id', '?')}]\n{chunk.get('text', '')}"
+        for chunk in chunks
+    )
+
+
+def _chat_messages(query: str, context: str) -> List[Dict[str, str]]:
+    question = f"Context:\n{context}\n\nQuestion: {query}" if context else query
+    return [
+        {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
 
 
 class ChatState(rx.State):
@@ -31,6 +61,7 @@ class ChatState(rx.State):
     selected_doc_id: Optional[int] = None
     selected_doc_label: str = "All Files"
     document_options: Dict[str, Optional[int]] = {"All Files": None}
+    last_answer_metrics: str = ""  # Latency of the last answer
 
     @rx.var
     def document_option_labels(self) -> List[str]:
@@ -64,6 +95,7 @@ class ChatState(rx.State):
         self.current_input = val
 
     async def send_message(self):
+        """Answer the question with RAG, showing the answer as it streams in."""
         if not self.current_input:
             return
 
@@ -75,103 +107,43 @@ class ChatState(rx.State):
         self.messages.append(user_msg)
         self.current_input = ""
         self.is_typing = True
+        self.last_answer_metrics = ""
 
         # Yield to update UI
         yield
 
+        answer = ""
+        self.messages.append({"role": "assistant", "content": answer})
+        metrics = RagMetrics()
         try:
-            # Phase 1.5: RAG Integration - Search for relevant context
-            context_chunks = []
-            context_text = ""
-
-            if user_query.strip():
-                # Build allowed_doc_ids filter
-                allowed_doc_ids = None
-                if self.selected_doc_id:
-                    allowed_doc_ids = [self.selected_doc_id]
-
-                # Perform hybrid search
-                context_chunks = hybrid_search(
-                    query=user_query, allowed_doc_ids=allowed_doc_ids, limit=5
-                )
-
-                # Format context with citations
-                if context_chunks:
-                    session = Session()
-                    try:
-                        # Fetch document titles for citations
-                        doc_ids = {
-                            chunk.get("doc_id")
-                            for chunk in context_chunks
-                            if chunk.get("doc_id")
-                        }
-                        doc_titles = {}
-                        if doc_ids:
-                            docs = (
-                                session.query(Document.id, Document.title)
-                                .filter(Document.id.in_(doc_ids))
-                                .all()
-                            )
-                            doc_titles = {doc_id: title for doc_id, title in docs}
-                    finally:
-                        session.close()
-
-                    # Build context text with citations
-                    context_parts = []
-                    for chunk in context_chunks:
-                        doc_title = doc_titles.get(
-                            chunk.get("doc_id"), "Unknown Document"
-                        )
-                        chunk_id = chunk.get("id", "?")
-                        chunk_text = chunk.get("text", "")
-                        context_parts.append(
-                            f"[Source: {doc_title} | Chunk ID: {chunk_id}]\n{chunk_text}"
-                        )
-                    context_text = "\n\n".join(context_parts)
-
-            # Build message with forensic investigator system prompt
-            system_prompt = (
-                "You are an expert forensic investigator analyzing a database of documents. "
-                "Your goal is to answer questions accurately based ONLY on the provided context snippets. "
-                "CRITICAL INSTRUCTION: When you cite information, you MUST include BOTH the Document Title and the Chunk ID. "
-                "Format your citations exactly like this: [Source: Document Title | Chunk ID: 123]. "
-                "If the answer is not in the context, say 'I cannot find that information in the provided documents.'"
-            )
-
-            # Construct messages for LLM
-            llm_messages = [{"role": "system", "content": system_prompt}]
-
-            # Add context if available
-            if context_text:
-                llm_messages.append(
-                    {
-                        "role": "user",
-                        "content": f"Context:\n{context_text}\n\nQuestion: {user_query}",
-                    }
-                )
-            else:
-                llm_messages.append({"role": "user", "content": user_query})
-
-            # Call LLM
-            response_content = chat_with_llm(
-                llm_messages, temperature=0.3, max_tokens=1000
-            )
-
-            # Handle generator response
-            if hasattr(response_content, "__iter__") and not isinstance(
-                response_content, str
+            doc_ids = [self.selected_doc_id] if self.selected_doc_id else None
+            last_update = time.monotonic()
+            async for token in stream_rag_response(
+                user_query,
+                doc_ids,
+                metrics,
+                get_context=_document_context,
+                build_messages=_chat_messages,
+                max_tokens=1000,
+                feature="chat",
             ):
-                full_response = ""
-                for chunk in response_content:
-                    full_response += chunk
-                response_content = full_response
-
-            self.messages.append(
-                {"role": "assistant", "content": str(response_content)}
-            )
+                answer += token
+                # Push to the UI at most every STREAM_UPDATE_INTERVAL seconds
+                if time.monotonic() - last_update >= STREAM_UPDATE_INTERVAL:
+                    self.messages[-1] = {"role": "assistant", "content": answer}
+                    last_update = time.monotonic()
+                    yield
+            self.messages[-1] = {"role": "assistant", "content": answer}
+            self.last_answer_metrics = metrics.summary()
 
         except Exception as e:
-            self.messages.append({"role": "system", "content": f"Error: {str(e)}"})
+            error = {"role": "system", "content": f"Error: {str(e)}"}
+            if answer:
+                self.messages[-1] = {"role": "assistant", "content": answer}
+                self.messages.append(error)
+            else:
+                # No empty assistant bubble left behind
+                self.messages[-1] = error
 
         self.is_typing = False
 
@@ -226,6 +198,10 @@ def chat_interface() -> rx.Component:
             bg="gray.900",
             border_radius="md",
         ),
+        rx.cond(
+            ChatState.last_answer_metrics != "",
+            rx.text(ChatState.last_answer_metrics, size="1", color="gray"),
+        ),
         # Input area
         rx.hstack(
             rx.input(
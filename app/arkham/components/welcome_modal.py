@@ -18,10 +18,10 @@ class WelcomeState(rx.State):
     async def check_first_run(self):
         """Check if this is a first run (no documents)."""
         try:
-            from sqlalchemy import create_engine, text
-            from config import DATABASE_URL
+            from sqlalchemy import text
+            from app.arkham.services.db.connection import get_engine
 
-            engine = create_engine(DATABASE_URL)
+            engine = get_engine()
             with engine.connect() as conn:
                 result = conn.execute(text("SELECT COUNT(*) FROM documents")).scalar()
                 self.document_count = result or 0
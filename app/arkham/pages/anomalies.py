@@ -290,6 +290,10 @@ def chat_interface() -> rx.Component:
             height="100%",
             flex="1",
         ),
+        rx.cond(
+            AnomalyState.last_answer_metrics != "",
+            rx.text(AnomalyState.last_answer_metrics, size="1", color="gray"),
+        ),
         rx.form(
             rx.hstack(
                 rx.input(
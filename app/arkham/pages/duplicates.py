@@ -1032,6 +1032,10 @@ def duplicates_page() -> rx.Component:
                 width="100%",
                 align_items="end",
             ),
+            rx.cond(
+                DuplicatesState.fingerprint_status != "",
+                rx.text(DuplicatesState.fingerprint_status, size="1", color="orange"),
+            ),
             # Stats
             rx.cond(
                 DuplicatesState.has_results,
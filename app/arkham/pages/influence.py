@@ -580,6 +580,10 @@ def influence_page() -> rx.Component:
                         "Analyze power dynamics, central actors, and hidden relationships.",
                         color="gray",
                     ),
+                    rx.cond(
+                        InfluenceState.metrics_status != "",
+                        rx.text(InfluenceState.metrics_status, size="1", color="orange"),
+                    ),
                     align_items="start",
                 ),
                 rx.spacer(),
@@ -106,63 +106,85 @@ def search_tab() -> rx.Component:
             color="gray",
             margin_bottom="4",
         ),
-        rx.button(
-            rx.icon(tag="search", size=16),
-            "Run Search",
-            on_click=RegexState.run_search,
-            disabled=RegexState.selected_patterns.length() == 0,
-            loading=RegexState.is_searching,
-            size="3",
+        rx.hstack(
+            rx.button(
+                rx.icon(tag="search", size=16),
+                "Run Search",
+                on_click=RegexState.run_search,
+                disabled=RegexState.selected_patterns.length() == 0,
+                loading=RegexState.is_searching,
+                size="3",
+            ),
+            rx.cond(
+                RegexState.is_searching,
+                rx.button(
+                    rx.icon(tag="x", size=16),
+                    "Cancel",
+                    on_click=RegexState.cancel_search,
+                    variant="soft",
+                    color_scheme="gray",
+                    size="3",
+                ),
+            ),
+            spacing="2",
         ),
-        # Results
+        # Results (filled in page by page while the search runs)
         rx.cond(
-            RegexState.is_searching,
-            rx.spinner(size="3"),
-            rx.cond(
-                RegexState.search_results.length() > 0,
-                rx.vstack(
+            RegexState.search_results.length() > 0,
+            rx.vstack(
+                rx.text(
+                    f"Found {RegexState.search_results.length()} matches",
+                    size="3",
+                    weight="bold",
+                    margin_top="4",
+                ),
+                rx.cond(
+                    RegexState.search_truncated,
                     rx.text(
-                        f"Found {RegexState.search_results.length()} matches",
-                        size="3",
-                        weight="bold",
-                        margin_top="4",
+                        "Result limit reached; narrow the search to see more.",
+                        size="2",
+                        color="orange",
                     ),
-                    # Group results by pattern type
-                    rx.foreach(
-                        # Get unique pattern types
-                        RegexState.search_results,
-                        lambda result: rx.card(
-                            rx.vstack(
-                                rx.hstack(
-                                    confidence_badge(result["confidence"]),
-                                    rx.text(
-                                        result["document"],
-                                        weight="bold",
-                                        size="2",
-                                    ),
-                                    rx.code(result["match_text"]),
-                                    rx.text(
-                                        f"(Strength: {result['confidence']:.2f})",
-                                        size="1",
-                                        color="gray",
-                                    ),
-                                    spacing="2",
-                                    align="center",
+                ),
+                # Group results by pattern type
+                rx.foreach(
+                    # Get unique pattern types
+                    RegexState.search_results,
+                    lambda result: rx.card(
+                        rx.vstack(
+                            rx.hstack(
+                                confidence_badge(result["confidence"]),
+                                rx.text(
+                                    result["document"],
+                                    weight="bold",
+                                    size="2",
                                 ),
+                                rx.code(result["match_text"]),
                                 rx.text(
-                                    result["context"],
+                                    f"(Strength: {result['confidence']:.2f})",
                                     size="1",
                                     color="gray",
                                 ),
                                 spacing="2",
-                                width="100%",
+                                align="center",
                             ),
-                            margin_y="2",
+                            rx.text(
+                                result["context"],
+                                size="1",
+                                color="gray",
+                            ),
+                            spacing="2",
+                            width="100%",
                         ),
+                        margin_y="2",
                     ),
-                    spacing="3",
-                    width="100%",
                 ),
+                spacing="3",
+                width="100%",
+            ),
+            rx.cond(
+                RegexState.is_searching,
+                rx.spinner(size="3"),
                 rx.box(),  # Empty when no results
             ),
         ),
@@ -40,12 +40,24 @@ def search_tab():
             "This searches through ALL text in the database using real-time pattern matching.",
             color="gray.11",
         ),
-        rx.button(
-            "Run Search",
-            on_click=RegexState.run_search,
-            loading=RegexState.is_searching,
+        rx.hstack(
+            rx.button(
+                "Run Search",
+                on_click=RegexState.run_search,
+                loading=RegexState.is_searching,
+                flex="1",
+                color_scheme="blue",
+            ),
+            rx.cond(
+                RegexState.is_searching,
+                rx.button(
+                    "Cancel",
+                    on_click=RegexState.cancel_search,
+                    variant="soft",
+                    color_scheme="gray",
+                ),
+            ),
             width="100%",
-            color_scheme="blue",
         ),
         rx.divider(),
         rx.cond(
@@ -55,6 +67,13 @@ def search_tab():
                     f"Found {RegexState.search_results.length()} matches",
                     color="green.9",
                 ),
+                rx.cond(
+                    RegexState.search_truncated,
+                    rx.text(
+                        "Result limit reached; narrow the search to see more.",
+                        color="orange.9",
+                    ),
+                ),
                 rx.foreach(RegexState.search_results, result_card),
                 width="100%",
             ),
@@ -23,10 +23,6 @@ import pandas as pd
 # This opts into the future behavior where downcasting is not automatic
 pd.set_option("future.no_silent_downcasting", True)
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from config.settings import DATABASE_URL
 from app.arkham.services.db.models import (
     ACHAnalysis,
     ACHHypothesis,
@@ -35,6 +31,8 @@ from app.arkham.services.db.models import (
     ACHMilestone,
     ACHAnalysisSnapshot,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.llm_scheduler import get_llm_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -71,8 +69,8 @@ class ACHService:
 
     def __init__(self):
         """Initialize with database connection."""
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     # =========================================================================
     # STEP 1: IDENTIFY HYPOTHESES - Analysis CRUD
@@ -2443,7 +2441,8 @@ Return JSON only:
         """
         Use LLM to suggest ratings for a specific evidence item against all hypotheses.
 
-        Makes individual requests per hypothesis for reliability.
+        Makes individual requests per hypothesis for reliability, sent
+        concurrently through the LLM scheduler.
 
         Args:
             analysis_id: The ACH analysis ID
@@ -2452,8 +2451,6 @@ Return JSON only:
         Returns:
             List of rating suggestions for each hypothesis with explanation
         """
-        from app.arkham.services.llm_service import chat_with_llm
-
         session = self.Session()
         try:
             analysis = session.query(ACHAnalysis).filter_by(id=analysis_id).first()
@@ -2472,86 +2469,11 @@ Return JSON only:
             if not hypotheses:
                 return []
 
-            # Make individual requests for each hypothesis for reliability
-            all_ratings = []
-            for h in hypotheses:
-                prompt = f"""You are an intelligence analyst helping with Analysis of Competing Hypotheses (ACH).
-
-FOCUS QUESTION:
-{analysis.focus_question}
-
-HYPOTHESIS TO EVALUATE:
-{h.label}: {h.description}
-
-EVIDENCE TO RATE:
-Description: {evidence.description}
-Type: {evidence.evidence_type}
-Reliability: {evidence.reliability}
-{f"Source: {evidence.source}" if evidence.source else ""}
-
-Rate how CONSISTENT or INCONSISTENT this evidence is with the hypothesis above:
-
-Rating Scale:
-- CC (Very Consistent): If hypothesis is true, we would strongly expect to see this evidence
-- C (Consistent): If hypothesis is true, this evidence is likely
-- N (Neutral): Evidence neither supports nor contradicts the hypothesis
-- I (Inconsistent): If hypothesis is true, this evidence is unlikely
-- II (Very Inconsistent): If hypothesis is true, this evidence is very unlikely
-
-KEY PRINCIPLE: Ask "If this hypothesis is TRUE, how likely would we be to observe this evidence?"
-
-Return JSON only:
-{{
-  "rating": "CC|C|N|I|II",
-  "explanation": "Brief explanation of why this rating"
-}}"""
-
-                try:
-                    response = chat_with_llm(
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.3,
-                        max_tokens=300,  # Much smaller for single rating
-                        json_mode=True,
-                        use_cache=True,  # Can cache individual ratings
-                    )
-
-                    # Parse response
-                    cleaned = response
-                    if "```json" in cleaned:
-                        cleaned = cleaned.split("```json")[1].split("```")[0]
-                    elif "```" in cleaned:
-                        parts = cleaned.split("```")
-                        if len(parts) > 1:
-                            cleaned = parts[1]
-
-                    data = json.loads(cleaned.strip())
-                    rating = data.get("rating", "N")
-                    explanation = data.get("explanation", "")
-
-                    # Validate rating
-                    if rating not in ["CC", "C", "N", "I", "II"]:
-                        rating = "N"
-
-                    all_ratings.append(
-                        {
-                            "hypothesis_label": h.label,
-                            "hypothesis_id": h.id,
-                            "rating": rating,
-                            "explanation": explanation,
-                        }
-                    )
-
-                except Exception as e:
-                    logger.warning(f"Failed to get rating for {h.label}: {e}")
-                    # Add neutral as fallback
-                    all_ratings.append(
-                        {
-                            "hypothesis_label": h.label,
-                            "hypothesis_id": h.id,
-                            "rating": "N",
-                            "explanation": "Could not generate suggestion",
-                        }
-                    )
+            prompts = [
+                (h.id, h.label, _rating_prompt(analysis.focus_question, h, evidence))
+                for h in hypotheses
+            ]
+            all_ratings = get_llm_scheduler().map(_suggest_rating, prompts)
 
             logger.info(
                 f"Generated {len(all_ratings)} rating suggestions for evidence {evidence_id}"
@@ -2571,22 +2493,42 @@ Return JSON only:
         """
         Use LLM to suggest ratings for ALL unrated evidence items.
 
+        Every (evidence, hypothesis) prompt goes into one concurrent batch.
+
         Returns:
             Dict mapping evidence_id to list of rating suggestions
         """
         session = self.Session()
         try:
+            analysis = session.query(ACHAnalysis).filter_by(id=analysis_id).first()
+            if not analysis:
+                return {}
+
             # Get all evidence with unrated cells
             evidence_list = (
                 session.query(ACHEvidence).filter_by(analysis_id=analysis_id).all()
             )
+            hypotheses = (
+                session.query(ACHHypothesis)
+                .filter_by(analysis_id=analysis_id)
+                .order_by(ACHHypothesis.display_order)
+                .all()
+            )
+            if not hypotheses:
+                return {}
 
-            results = {}
-            for e in evidence_list:
-                suggestions = self.suggest_ratings(analysis_id, e.id)
-                if suggestions:
-                    results[e.id] = suggestions
+            pairs = [(e, h) for e in evidence_list for h in hypotheses]
+            ratings = get_llm_scheduler().map(
+                _suggest_rating,
+                [
+                    (h.id, h.label, _rating_prompt(analysis.focus_question, h, e))
+                    for e, h in pairs
+                ],
+            )
 
+            results = {}
+            for (e, _), rating in zip(pairs, ratings):
+                results.setdefault(e.id, []).append(rating)
             return results
         except Exception as e:
             logger.error(f"Error suggesting all ratings: {e}")
@@ -3293,10 +3235,102 @@ Return JSON only:
             session.close()
 
 
+# =============================================================================
+# RATING SUGGESTIONS
+# =============================================================================
+
+def _rating_prompt(focus_question: str, hypothesis, evidence) -> str:
+    """Prompt asking how consistent one evidence item is with one hypothesis."""
+    return f"""You are an intelligence analyst helping with Analysis of Competing Hypotheses (ACH).
+
+FOCUS QUESTION:
+{focus_question}
+
+HYPOTHESIS TO EVALUATE:
+{hypothesis.label}: {hypothesis.description}
+
+EVIDENCE TO RATE:
+Description: {evidence.description}
+Type: {evidence.evidence_type}
+Reliability: {evidence.reliability}
+{f"Source: {evidence.source}" if evidence.source else ""}
+
+Rate how CONSISTENT or INCONSISTENT this evidence is with the hypothesis above:
+
+Rating Scale:
+- CC (Very Consistent): If hypothesis is true, we would strongly expect to see this evidence
+- C (Consistent): If hypothesis is true, this evidence is likely
+- N (Neutral): Evidence neither supports nor contradicts the hypothesis
+- I (Inconsistent): If hypothesis is true, this evidence is unlikely
+- II (Very Inconsistent): If hypothesis is true, this evidence is very unlikely
+
+KEY PRINCIPLE: Ask "If this hypothesis is TRUE, how likely would we be to observe this evidence?"
+
+Return JSON only:
+{{
+  "rating": "CC|C|N|I|II",
+  "explanation": "Brief explanation of why this rating"
+}}"""
+
+
+def _suggest_rating(request) -> Dict[str, Any]:
+    """
+    One LLM rating for (hypothesis_id, hypothesis_label, prompt); neutral
+    when the answer cannot be used.
+    """
+    from app.arkham.services.llm_service import chat_with_llm
+
+    hypothesis_id, hypothesis_label, prompt = request
+    try:
+        response = chat_with_llm(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=300,  # Much smaller for single rating
+            json_mode=True,
+            use_cache=True,  # Can cache individual ratings
+            feature="ach_ratings",
+        )
+
+        # Parse response
+        cleaned = response
+        if "```json" in cleaned:
+            cleaned = cleaned.split("```json")[1].split("```")[0]
+        elif "```" in cleaned:
+            parts = cleaned.split("```")
+            if len(parts) > 1:
+                cleaned = parts[1]
+
+        data = json.loads(cleaned.strip())
+        rating = data.get("rating", "N")
+        explanation = data.get("explanation", "")
+
+        # Validate rating
+        if rating not in ["CC", "C", "N", "I", "II"]:
+            rating = "N"
+
+        return {
+            "hypothesis_label": hypothesis_label,
+            "hypothesis_id": hypothesis_id,
+            "rating": rating,
+            "explanation": explanation,
+        }
+
+    except Exception as e:
+        logger.warning(f"Failed to get rating for {hypothesis_label}: {e}")
+        # Add neutral as fallback
+        return {
+            "hypothesis_label": hypothesis_label,
+            "hypothesis_id": hypothesis_id,
+            "rating": "N",
+            "explanation": "Could not generate suggestion",
+        }
+
+
 # =============================================================================
 # SINGLETON PATTERN
 # =============================================================================
 
+
 _ach_service_instance = None
 
 
@@ -1,24 +1,30 @@
+import asyncio
 import logging
-from config.settings import DATABASE_URL, QDRANT_URL, LM_STUDIO_URL
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
 
 from app.arkham.services.db.models import Anomaly, Chunk, Document
+from app.arkham.services.db.connection import (
+    get_engine,
+    get_session_factory,
+    get_qdrant_client,
+)
 from app.arkham.services.embedding_services import embed_hybrid
 from app.arkham.services.config import get_config
-from qdrant_client import QdrantClient, models
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from app.arkham.services.llm_client import astream_chat, complete
+from qdrant_client import models
+from qdrant_client.http.models import Filter, FieldCondition, MatchAny
 from app.arkham.services.utils.security_utils import sanitize_for_llm
 
 logger = logging.getLogger(__name__)
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 
 # Qdrant setup
-qdrant_client = QdrantClient(url=QDRANT_URL)
+qdrant_client = get_qdrant_client()
 COLLECTION_NAME = "arkham_mirror_hybrid"
 
 
@@ -149,6 +155,44 @@ def get_document_text(doc_id: int) -> str:
         session.close()
 
 
+RAG_SYSTEM_PROMPT = (
+    "You are an expert forensic investigator analyzing a database of leaked documents. "
+    "Your goal is to answer the user's questions accurately based ONLY on the provided context snippets. "
+    "CRITICAL INSTRUCTION: When you cite information, you MUST include BOTH the Document Title and the Chunk ID in your citation. "
+    "Format your citations exactly like this: [Source: Document Title | Chunk ID: 123]. "
+    "\n\n"
+    "If the answer is not in the context, say 'I cannot find that information in the provided documents.'"
+)
+
+
+@dataclass
+class RagMetrics:
+    """Latency of one RAG answer, in seconds from when the question was asked."""
+
+    retrieval: float = 0.0
+    time_to_first_token: Optional[float] = None
+    total: float = 0.0
+    chunks: int = 0  # Streamed content deltas
+
+    def summary(self) -> str:
+        first = (
+            f"{self.time_to_first_token:.2f}s"
+            if self.time_to_first_token is not None
+            else "n/a"
+        )
+        return f"first token {first} · total {self.total:.2f}s"
+
+
+def _rag_messages(query: str, context: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": RAG_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"Context:\n{sanitize_for_llm(context)}\n\nQuestion: {sanitize_for_llm(query)}",
+        },
+    ]
+
+
 def get_rag_response(query: str, doc_ids: Optional[List[int]] = None) -> str:
     """
     Get RAG-based response to a query using vector search and LLM.
@@ -166,39 +210,13 @@ def get_rag_response(query: str, doc_ids: Optional[List[int]] = None) -> str:
 
         # Use LM Studio for response (or fallback to simple context return)
         try:
-            from openai import OpenAI
-
-            llm_client = OpenAI(
-                base_url=LM_STUDIO_URL,
-                api_key="lm-studio",
-            )
-
-            system_msg = (
-                "You are an expert forensic investigator analyzing a database of leaked documents. "
-                "Your goal is to answer the user's questions accurately based ONLY on the provided context snippets. "
-                "CRITICAL INSTRUCTION: When you cite information, you MUST include BOTH the Document Title and the Chunk ID in your citation. "
-                "Format your citations exactly like this: [Source: Document Title | Chunk ID: 123]. "
-                "\n\n"
-                "If the answer is not in the context, say 'I cannot find that information in the provided documents.'"
-            )
-
-            messages = [
-                {"role": "system", "content": system_msg},
-                {
-                    "role": "user",
-                    "content": f"Context:\n{sanitize_for_llm(context)}\n\nQuestion: {sanitize_for_llm(query)}",
-                },
-            ]
-
-            response = llm_client.chat.completions.create(
-                model="local-model",
-                messages=messages,
+            return complete(
+                _rag_messages(query, context),
                 temperature=get_config("ui.llm.temperature", 0.3),
-                stream=False,
+                max_tokens=None,
+                feature="rag",
             )
 
-            return response.choices[0].message.content
-
         except Exception as llm_error:
             # Fallback: return context directly if LLM not available
             logger.warning(f"LLM not available: {llm_error}")
@@ -208,6 +226,67 @@ def get_rag_response(query: str, doc_ids: Optional[List[int]] = None) -> str:
         return f"Error processing question: {str(e)}"
 
 
+async def stream_rag_response(
+    query: str,
+    doc_ids: Optional[List[int]] = None,
+    metrics: Optional[RagMetrics] = None,
+    get_context: Optional[Callable[[str, Optional[List[int]]], str]] = None,
+    build_messages: Optional[Callable[[str, str], List[Dict[str, str]]]] = None,
+    max_tokens: Optional[int] = None,
+    feature: str = "rag",
+) -> AsyncIterator[str]:
+    """
+    Streaming get_rag_response(): yields the answer text as the LLM produces it.
+
+    Args:
+        query: User's question
+        doc_ids: Optional list of document IDs to restrict search to (None means all)
+        metrics: Filled in with the answer's latencies; they are also logged
+        get_context: (query, doc_ids) -> context text; defaults to the
+            anomaly-aware search (_get_relevant_context)
+        build_messages: (query, context) -> LLM messages; defaults to the
+            anomaly RAG prompt (_rag_messages)
+    """
+    metrics = metrics if metrics is not None else RagMetrics()
+    get_context = get_context or _get_relevant_context
+    build_messages = build_messages or _rag_messages
+    start = time.perf_counter()
+    try:
+        try:
+            # Embedding and Qdrant calls are blocking
+            context = await asyncio.to_thread(get_context, query, doc_ids)
+        except Exception as e:
+            yield f"Error processing question: {str(e)}"
+            return
+        metrics.retrieval = time.perf_counter() - start
+
+        try:
+            async for token in astream_chat(
+                build_messages(query, context),
+                temperature=get_config("ui.llm.temperature", 0.3),
+                max_tokens=max_tokens,
+                feature=feature,
+            ):
+                if metrics.time_to_first_token is None:
+                    metrics.time_to_first_token = time.perf_counter() - start
+                metrics.chunks += 1
+                yield token
+        except Exception as llm_error:
+            if metrics.chunks:
+                logger.warning(f"LLM stream interrupted: {llm_error}")
+                yield "\n\n[Response interrupted]"
+            else:
+                # Fallback: return context directly if LLM not available
+                logger.warning(f"LLM not available: {llm_error}")
+                yield f"LLM not available. Here's the relevant context:\n\n{context}"
+    finally:
+        metrics.total = time.perf_counter() - start
+        logger.info(
+            f"RAG answer: retrieval {metrics.retrieval:.2f}s, {metrics.summary()}, "
+            f"{metrics.chunks} chunks"
+        )
+
+
 def _get_relevant_context(query: str, doc_ids: Optional[List[int]] = None) -> str:
     """
     Retrieve relevant chunks and anomaly info based on the query.
@@ -224,14 +303,8 @@ def _get_relevant_context(query: str, doc_ids: Optional[List[int]] = None) -> st
 
         search_filter = None
         if doc_ids:
-            # Use 'any' match for multiple doc IDs
-            from qdrant_client.http.models import HasIdCondition
-
             search_filter = Filter(
-                should=[
-                    FieldCondition(key="doc_id", match=MatchValue(value=doc_id))
-                    for doc_id in doc_ids
-                ]
+                must=[FieldCondition(key="doc_id", match=MatchAny(any=list(doc_ids)))]
             )
 
         # Prepare sparse vector
@@ -265,16 +338,16 @@ def _get_relevant_context(query: str, doc_ids: Optional[List[int]] = None) -> st
 
         if hits:
             # Fetch document titles
-            doc_ids = {
+            hit_doc_ids = {
                 hit.payload.get("doc_id") for hit in hits if "doc_id" in hit.payload
             }
             doc_titles = {}
-            if doc_ids:
+            if hit_doc_ids:
                 session = Session()
                 try:
                     docs = (
                         session.query(Document.id, Document.title)
-                        .filter(Document.id.in_(doc_ids))
+                        .filter(Document.id.in_(hit_doc_ids))
                         .all()
                     )
                     doc_titles = {doc_id: title for doc_id, title in docs}
@@ -12,12 +12,9 @@ import json
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Document,
@@ -25,6 +22,8 @@ from app.arkham.services.db.models import (
     EntityMention,
     EntityRelationship,
 )
+from app.arkham.services.corpus_stats import read_corpus_stats
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.llm_service import (
     chat_with_llm,
     BIG_PICTURE_SCHEMA,
@@ -42,35 +41,20 @@ class BigPictureService:
     """Service for corpus-wide synthesis and analysis."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_corpus_stats(self) -> Dict[str, Any]:
         """Get basic statistics about the corpus."""
         session = self.Session()
         try:
-            doc_count = session.query(func.count(Document.id)).scalar()
-            chunk_count = session.query(func.count(Chunk.id)).scalar()
-            entity_count = session.query(func.count(CanonicalEntity.id)).scalar()
-            relationship_count = session.query(
-                func.count(EntityRelationship.id)
-            ).scalar()
-
-            # Get entity type breakdown
-            entity_types = (
-                session.query(CanonicalEntity.label, func.count(CanonicalEntity.id))
-                .group_by(CanonicalEntity.label)
-                .all()
-            )
-
+            stats = read_corpus_stats(session)
             return {
-                "documents": doc_count or 0,
-                "chunks": chunk_count or 0,
-                "entities": entity_count or 0,
-                "relationships": relationship_count or 0,
-                "entity_types": {
-                    label: count for label, count in entity_types if label
-                },
+                "documents": stats["documents"],
+                "chunks": stats["chunks"],
+                "entities": stats["entities"],
+                "relationships": stats["relationships"],
+                "entity_types": stats["entity_types"],
             }
         finally:
             session.close()
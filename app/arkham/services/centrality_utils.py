@@ -0,0 +1,396 @@
+"""
+Centrality metrics for the entity influence map.
+
+Computes degree, betweenness, closeness, PageRank and eigenvector centrality
+plus Louvain communities for an EntityGraph snapshot (see graph_cache.py).
+refresh_centrality() stores them as EntityCentrality rows; it is run by the
+background centrality job (workers/centrality_worker.py), and the Influence
+page only reads the stored results.
+
+Two knobs keep large graphs tractable:
+
+- sample_size: exact betweenness is O(V*E) and exact closeness is a BFS from
+  every node. With a sample size, both are estimated from k random pivot
+  nodes instead (NetworkX's k-sample betweenness, and pivot-based closeness).
+- backend="scipy": degree, closeness, PageRank and eigenvector centrality are
+  computed with SciPy sparse matrices instead of NetworkX's Python loops.
+  Betweenness has no sparse-matrix formulation and always uses NetworkX.
+"""
+
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import networkx as nx
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .config import get_config
+from .db.models import EntityCentrality
+from .graph_cache import EntityGraph, get_entity_graph_cache
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("degree_centrality", "betweenness", "closeness", "pagerank", "eigenvector")
+BACKENDS = ("networkx", "scipy")
+
+# Composite influence score weights (scaled to 0-100)
+INFLUENCE_WEIGHTS = {
+    "degree_centrality": 0.2,
+    "betweenness": 0.3,
+    "pagerank": 0.3,
+    "eigenvector": 0.2,
+}
+
+# Source nodes per block when computing exact closeness with SciPy
+CLOSENESS_BLOCK_SIZE = 256
+
+
+def influence_score(metrics: Dict[str, float]) -> float:
+    """Weighted composite of the centrality metrics, scaled to 0-100."""
+    return (
+        sum(metrics.get(name, 0) * weight for name, weight in INFLUENCE_WEIGHTS.items())
+        * 100
+    )
+
+
+def compute_centrality(
+    graph: EntityGraph,
+    min_weight: float = 0.1,
+    backend: str = "networkx",
+    sample_size: Optional[int] = None,
+    seed: int = 42,
+) -> Dict:
+    """
+    Compute all influence metrics for a graph snapshot.
+
+    Args:
+        graph: Snapshot to analyse
+        min_weight: Minimum aggregated relationship strength for an edge
+        backend: "networkx" or "scipy"
+        sample_size: Pivot count for approximate betweenness/closeness
+            (None or >= node count means exact)
+        seed: Random seed for pivot sampling and community detection
+
+    Returns:
+        {
+            "node_ids": [entity ids],
+            "degree": {id: int},
+            "metrics": {metric name: {id: float}},
+            "community": {id: int},
+            "method": description of how the metrics were computed,
+        }
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown centrality backend: {backend}")
+
+    G = graph.to_networkx(min_weight=min_weight)
+    n = G.number_of_nodes()
+    node_ids = list(G.nodes)
+    if sample_size is not None and sample_size >= n:
+        sample_size = None
+
+    if backend == "scipy":
+        try:
+            import scipy.sparse  # noqa: F401
+        except ImportError:
+            logger.warning("SciPy not installed, computing centrality with NetworkX")
+            backend = "networkx"
+
+    pivots = None
+    if sample_size:
+        pivots = random.Random(seed).sample(node_ids, sample_size)
+
+    if backend == "scipy":
+        metrics = _scipy_metrics(graph, G, min_weight, pivots)
+    else:
+        metrics = _networkx_metrics(G, pivots)
+
+    # Betweenness (who controls information flow); NetworkX in both backends
+    try:
+        metrics["betweenness"] = nx.betweenness_centrality(
+            G, k=sample_size, weight="weight", seed=seed
+        )
+    except Exception as e:
+        logger.warning(f"Betweenness centrality failed: {e}")
+        metrics["betweenness"] = {node: 0.0 for node in node_ids}
+
+    # Community detection
+    try:
+        import community.community_louvain as community_louvain
+
+        community = community_louvain.best_partition(
+            G, weight="weight", random_state=seed
+        )
+    except Exception as e:
+        logger.warning(f"Community detection failed: {e}")
+        community = {node: 0 for node in node_ids}
+
+    method = f"{backend}, " + (f"sampled k={sample_size}" if sample_size else "exact")
+    return {
+        "node_ids": node_ids,
+        "degree": dict(G.degree()),
+        "metrics": metrics,
+        "community": community,
+        "method": method,
+    }
+
+
+def stored_graph_version(session: Session) -> Optional[int]:
+    """Graph version of the stored metrics, or None if none are stored."""
+    return (
+        session.query(EntityCentrality.graph_version)
+        .order_by(EntityCentrality.computed_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def store_centrality(session: Session, graph_version: int, result: Dict) -> int:
+    """Replace the stored metrics with a new run (caller commits)."""
+    computed_at = datetime.utcnow()
+    rows = []
+    for entity_id in result["node_ids"]:
+        metrics = {name: result["metrics"][name].get(entity_id, 0.0) for name in METRICS}
+        rows.append(
+            {
+                "canonical_entity_id": entity_id,
+                "degree": result["degree"].get(entity_id, 0),
+                "community": result["community"].get(entity_id, 0),
+                "influence_score": influence_score(metrics),
+                "graph_version": graph_version,
+                "method": result["method"],
+                "computed_at": computed_at,
+                **metrics,
+            }
+        )
+
+    session.query(EntityCentrality).delete(synchronize_session=False)
+    if rows:
+        session.execute(EntityCentrality.__table__.insert(), rows)
+    return len(rows)
+
+
+def refresh_centrality(
+    session: Session,
+    force: bool = False,
+    backend: Optional[str] = None,
+    sample_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compute and store metrics for the current entity graph, then commit.
+
+    Args:
+        session: Session to read the graph and write EntityCentrality rows
+        force: Recompute even if the stored metrics match the graph version
+        backend: "networkx" or "scipy" (default: influence.backend)
+        sample_size: Pivots for approximate betweenness/closeness. Defaults to
+            influence.sample_size when the graph has more than
+            influence.exact_max_nodes nodes, exact otherwise.
+
+    Returns:
+        Summary dict (graph_version, entities, method, elapsed_seconds, skipped)
+    """
+    graph = get_entity_graph_cache().get(session)
+    if not force and stored_graph_version(session) == graph.version:
+        logger.info(f"Centrality already current for graph v{graph.version}")
+        return {"graph_version": graph.version, "skipped": True}
+
+    backend = backend or get_config("influence.backend", "networkx")
+    if sample_size is None and graph.num_nodes > int(
+        get_config("influence.exact_max_nodes", 5000)
+    ):
+        sample_size = int(get_config("influence.sample_size", 500))
+
+    start = time.perf_counter()
+    result = compute_centrality(
+        graph,
+        min_weight=float(get_config("influence.min_strength", 0.1)),
+        backend=backend,
+        sample_size=sample_size,
+    )
+    stored = store_centrality(session, graph.version, result)
+    session.commit()
+    elapsed = time.perf_counter() - start
+
+    logger.info(
+        f"Stored centrality for {stored} entities (graph v{graph.version}, "
+        f"{result['method']}) in {elapsed:.1f}s"
+    )
+    return {
+        "graph_version": graph.version,
+        "entities": stored,
+        "method": result["method"],
+        "elapsed_seconds": round(elapsed, 2),
+        "skipped": False,
+    }
+
+
+def _networkx_metrics(G: nx.Graph, pivots: Optional[List[int]]) -> Dict:
+    n = G.number_of_nodes()
+    metrics = {"degree_centrality": nx.degree_centrality(G)}
+
+    # Closeness (who can reach others quickly)
+    try:
+        if pivots is None:
+            metrics["closeness"] = nx.closeness_centrality(G)
+        else:
+            index = {node: i for i, node in enumerate(G.nodes)}
+            distances = np.full((len(pivots), n), np.inf)
+            for row, pivot in enumerate(pivots):
+                for node, dist in nx.single_source_shortest_path_length(G, pivot).items():
+                    distances[row, index[node]] = dist
+            pivot_index = np.array([index[p] for p in pivots])
+            values = _sampled_closeness(distances, pivot_index)
+            metrics["closeness"] = dict(zip(G.nodes, values.tolist()))
+    except Exception as e:
+        logger.warning(f"Closeness centrality failed: {e}")
+        metrics["closeness"] = {node: 0.0 for node in G.nodes}
+
+    # PageRank (overall importance)
+    try:
+        metrics["pagerank"] = nx.pagerank(G, weight="weight")
+    except Exception as e:
+        logger.warning(f"PageRank failed: {e}")
+        metrics["pagerank"] = {node: 1 / n for node in G.nodes}
+
+    # Eigenvector centrality (connected to important nodes)
+    try:
+        metrics["eigenvector"] = nx.eigenvector_centrality(
+            G, max_iter=1000, weight="weight"
+        )
+    except Exception as e:
+        logger.warning(f"Eigenvector centrality failed: {e}")
+        metrics["eigenvector"] = {node: 0.0 for node in G.nodes}
+
+    return metrics
+
+
+def _scipy_metrics(
+    graph: EntityGraph, G: nx.Graph, min_weight: float, pivots: Optional[List[int]]
+) -> Dict:
+    import scipy.sparse as sp
+    from scipy.sparse import csgraph
+    from scipy.sparse.linalg import eigsh
+
+    # Sparse weighted adjacency over the nodes of G, in G's node order
+    node_ids = np.fromiter(G.nodes, dtype=np.int64, count=G.number_of_nodes())
+    n = len(node_ids)
+    positions = np.searchsorted(graph.node_ids, node_ids)
+    local = np.full(graph.num_nodes, -1, dtype=np.int64)
+    local[positions] = np.arange(n)
+
+    node_mask = np.zeros(graph.num_nodes, dtype=bool)
+    node_mask[positions] = True
+    edges = graph.edge_mask(min_weight, node_mask)
+    u = local[graph.edge_u[edges]]
+    v = local[graph.edge_v[edges]]
+    w = graph.edge_weight[edges]
+    A = sp.csr_matrix(
+        (np.concatenate([w, w]), (np.concatenate([u, v]), np.concatenate([v, u]))),
+        shape=(n, n),
+    )
+
+    def as_dict(values):
+        return dict(zip(node_ids.tolist(), np.asarray(values, dtype=float).tolist()))
+
+    degree = np.diff(A.indptr)
+    metrics = {
+        "degree_centrality": as_dict(degree / (n - 1) if n > 1 else np.ones(n)),
+    }
+
+    # Closeness: unweighted BFS distances, from pivots or from every node in blocks
+    try:
+        if pivots is not None:
+            pivot_index = local[np.searchsorted(graph.node_ids, pivots)]
+            distances = csgraph.shortest_path(
+                A, directed=False, unweighted=True, indices=pivot_index
+            )
+            closeness = _sampled_closeness(distances, pivot_index)
+        else:
+            closeness = np.zeros(n)
+            for start in range(0, n, CLOSENESS_BLOCK_SIZE):
+                rows = np.arange(start, min(start + CLOSENESS_BLOCK_SIZE, n))
+                distances = csgraph.shortest_path(
+                    A, directed=False, unweighted=True, indices=rows
+                )
+                finite = np.isfinite(distances)
+                reachable = finite.sum(axis=1) - 1
+                totals = np.where(finite, distances, 0).sum(axis=1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    closeness[rows] = np.where(
+                        totals > 0,
+                        (reachable / totals) * (reachable / max(n - 1, 1)),
+                        0.0,
+                    )
+        metrics["closeness"] = as_dict(closeness)
+    except Exception as e:
+        logger.warning(f"Closeness centrality failed: {e}")
+        metrics["closeness"] = as_dict(np.zeros(n))
+
+    # PageRank: power iteration on the row-normalised weight matrix
+    try:
+        metrics["pagerank"] = as_dict(_pagerank(A))
+    except Exception as e:
+        logger.warning(f"PageRank failed: {e}")
+        metrics["pagerank"] = as_dict(np.full(n, 1 / n))
+
+    # Eigenvector centrality: principal eigenvector of the weighted adjacency
+    try:
+        if A.nnz == 0:
+            raise ValueError("graph has no edges")
+        if n > 2:
+            _, vectors = eigsh(A.astype(float), k=1, which="LA")
+        else:
+            _, vectors = np.linalg.eigh(A.toarray())
+        vector = np.abs(vectors[:, -1])
+        metrics["eigenvector"] = as_dict(vector / np.linalg.norm(vector))
+    except Exception as e:
+        logger.warning(f"Eigenvector centrality failed: {e}")
+        metrics["eigenvector"] = as_dict(np.zeros(n))
+
+    return metrics
+
+
+def _pagerank(A, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-6):
+    """Weighted PageRank matching nx.pagerank's defaults."""
+    import scipy.sparse as sp
+
+    n = A.shape[0]
+    out_weight = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    with np.errstate(divide="ignore"):
+        inverse = np.where(dangling, 0.0, 1.0 / out_weight)
+    M = sp.diags(inverse) @ A
+
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = x
+        x = alpha * (x @ M + previous[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            return x
+    raise RuntimeError(f"PageRank did not converge in {max_iter} iterations")
+
+
+def _sampled_closeness(distances: np.ndarray, pivot_index: np.ndarray) -> np.ndarray:
+    """
+    Estimate closeness from BFS distances to k pivot nodes (k x n matrix).
+
+    For a node u, exact (Wasserman-Faust) closeness is
+    ((r - 1) / (n - 1)) * ((r - 1) / total_distance), with r the size of u's
+    component. Scaling both the reachable count and the distance total by the
+    same pivot sampling rate cancels out, leaving (c / k) * (c / s), where c
+    and s are the number of reachable pivots and their summed distance.
+    """
+    k, n = distances.shape
+    finite = np.isfinite(distances)
+    finite[np.arange(k), pivot_index] = False  # A pivot's distance to itself
+    reached = finite.sum(axis=0)
+    totals = np.where(finite, distances, 0).sum(axis=0)
+    # Pivots only see the other k - 1 pivots
+    sampled = np.full(n, k, dtype=float)
+    sampled[pivot_index] = max(k - 1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, (reached / sampled) * (reached / totals), 0.0)
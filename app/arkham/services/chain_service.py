@@ -7,18 +7,16 @@ import json
 import logging
 import hashlib
 from typing import List, Dict, Optional, Any
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     Contradiction,
     ContradictionEvidence,
     CanonicalEntity,
     Document,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 
@@ -38,8 +36,8 @@ class ChainService:
     """Service for generating contradiction chain visualization data."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_chain_data(
         self,
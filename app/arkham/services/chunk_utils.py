@@ -0,0 +1,179 @@
+"""
+Bulk persistence of chunks and the rows derived from them.
+
+The parser and the text passthrough used to insert chunks one at a time
+(add + flush per chunk, for its id) and add every date mention, timeline
+event and sensitive-data match as its own ORM object. persist_chunks()
+instead:
+
+1. runs timeline and sensitive-data extraction over all chunk texts in one
+   pass, on a process pool when processing.extraction_workers > 1 (the
+   extraction only needs the text, not the chunk id). Each chunk is scanned
+   once for the date and sensitive-data patterns together;
+2. inserts all chunks with one multi-row INSERT ... RETURNING id;
+3. inserts the derived rows with one executemany per table.
+
+This module must not import the RQ workers: pool processes re-import it.
+"""
+
+import atexit
+import dataclasses
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .config import get_config
+from .corpus_stats import record_rows
+from .db.models import Chunk, DateMention, SensitiveDataMatch, TimelineEvent
+from .timeline_service import DATE_REGEXES, extract_timeline_from_chunk
+from .utils.pattern_detector import get_detector
+from .utils.pattern_scanner import MultiPatternScanner
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+_chunk_scanner: Optional[MultiPatternScanner] = None
+
+
+def _get_chunk_scanner() -> MultiPatternScanner:
+    global _chunk_scanner
+    if _chunk_scanner is None:
+        _chunk_scanner = MultiPatternScanner({**get_detector().regexes(), **DATE_REGEXES})
+    return _chunk_scanner
+
+
+def analyze_chunk(chunk_text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Date mentions, timeline events and sensitive-data matches of one chunk,
+    as row dicts without chunk_id/doc_id. A failing extractor yields no rows
+    rather than failing the chunk.
+    """
+    result = {"date_mentions": [], "timeline_events": [], "sensitive_matches": []}
+    scan = _get_chunk_scanner().scan(chunk_text)
+    try:
+        date_mentions, timeline_events = extract_timeline_from_chunk(
+            chunk_text, None, None, scan=scan
+        )
+        result["date_mentions"] = date_mentions
+        result["timeline_events"] = timeline_events
+    except Exception as e:
+        logger.warning(f"Timeline extraction failed for chunk: {e}")
+
+    try:
+        result["sensitive_matches"] = [
+            dataclasses.asdict(match)
+            for match in get_detector().detect_patterns(chunk_text, scan=scan)
+        ]
+    except Exception as e:
+        logger.warning(f"Sensitive data detection failed for chunk: {e}")
+    return result
+
+
+def extraction_workers() -> int:
+    return max(1, int(get_config("processing.extraction_workers", 1)))
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_size = workers
+        return _pool
+
+
+def shutdown_extraction_pool(wait: bool = True):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_extraction_pool)
+
+
+def analyze_chunks(
+    chunk_texts: Sequence[str], workers: Optional[int] = None
+) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """analyze_chunk() over all texts, in order, on `workers` processes."""
+    workers = workers or extraction_workers()
+    if workers <= 1 or len(chunk_texts) <= 1:
+        return [analyze_chunk(text) for text in chunk_texts]
+    chunksize = max(1, len(chunk_texts) // (workers * 4))
+    return list(_get_pool(workers).map(analyze_chunk, chunk_texts, chunksize=chunksize))
+
+
+def insert_chunks(
+    session: Session, doc_id: int, chunk_texts: Sequence[str], chunk_indexes: Iterable[int]
+) -> List[int]:
+    """Insert chunks in one multi-row INSERT ... RETURNING; ids in input order."""
+    rows = [
+        {"doc_id": doc_id, "text": text, "chunk_index": chunk_index}
+        for text, chunk_index in zip(chunk_texts, chunk_indexes)
+    ]
+    if not rows:
+        return []
+    return list(
+        session.scalars(
+            insert(Chunk).returning(Chunk.id, sort_by_parameter_order=True), rows
+        )
+    )
+
+
+def persist_chunks(
+    session: Session,
+    doc_id: int,
+    chunk_texts: Sequence[str],
+    chunk_indexes: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+) -> List[int]:
+    """
+    Store chunks with their date mentions, timeline events and sensitive-data
+    matches. Returns the chunk ids in order. The caller commits.
+    """
+    if not chunk_texts:
+        return []
+    if chunk_indexes is None:
+        chunk_indexes = range(len(chunk_texts))
+
+    analyses = analyze_chunks(chunk_texts, workers)
+    chunk_ids = insert_chunks(session, doc_id, chunk_texts, chunk_indexes)
+
+    derived = {"date_mentions": [], "timeline_events": [], "sensitive_matches": []}
+    for chunk_id, analysis in zip(chunk_ids, analyses):
+        for key, rows in derived.items():
+            rows.extend(
+                {**row, "chunk_id": chunk_id, "doc_id": doc_id} for row in analysis[key]
+            )
+
+    for model, key in (
+        (DateMention, "date_mentions"),
+        (TimelineEvent, "timeline_events"),
+        (SensitiveDataMatch, "sensitive_matches"),
+    ):
+        if derived[key]:
+            session.execute(insert(model), derived[key])
+    record_rows(
+        session,
+        doc_id,
+        chunks=len(chunk_ids),
+        timeline_events=len(derived["timeline_events"]),
+    )
+
+    logger.info(
+        f"Stored {len(chunk_ids)} chunks for doc {doc_id}: "
+        f"{len(derived['date_mentions'])} date mentions, "
+        f"{len(derived['timeline_events'])} timeline events, "
+        f"{len(derived['sensitive_matches'])} sensitive pattern(s)"
+    )
+    return chunk_ids
@@ -0,0 +1,401 @@
+"""
+Document clustering: stored centroids, HDBSCAN and LLM cluster naming.
+
+Each document's centroid (the mean dense vector of its chunks) is stored as
+a DocumentCentroid row when the document finishes embedding, so a clustering
+run reads one row per document in a single streamed query instead of
+retrieving every chunk vector from Qdrant. Documents embedded before
+centroids were stored are backfilled on the next clustering run, never by a
+page request. A centroid records how many chunk rows it was computed over
+(chunks_total), so a chunk that never got a vector, or a document with no
+vectors at all (stored as an empty marker row), is not retried on every run.
+
+run_clustering() is shared by the clustering worker and the Visualizations
+page. HDBSCAN parallelism and optional dimensionality reduction come from
+the `clustering:` section of config.yaml; clusters are named concurrently
+within the shared LLM window (llm_scheduler.py, llm.max_concurrency).
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from .config import get_config
+from .db.models import Chunk, Cluster, Document, DocumentCentroid
+from .llm_client import complete
+from .llm_scheduler import get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "arkham_mirror_hybrid"
+RETRIEVE_BATCH_SIZE = 1000  # Chunk ids per Qdrant retrieve
+SAMPLE_DOCS_PER_CLUSTER = 5  # First-chunk snippets sent to the LLM per cluster
+
+NAMING_PROMPT = (
+    "You are a helpful librarian. Read the following document snippets and "
+    "generate a short, specific topic name (max 5 words) that describes them "
+    "all. Do not use quotes."
+)
+
+
+def _dense_vector(point) -> Optional[List[float]]:
+    vector = point.vector
+    if isinstance(vector, dict):
+        return vector.get("dense")
+    return vector or None
+
+
+def compute_document_centroids(
+    session: Session, qdrant_client, doc_ids: Iterable[int]
+) -> Dict[int, Tuple[Optional[np.ndarray], int, int]]:
+    """
+    Mean dense chunk vector per document with chunks -> (centroid, chunk
+    vectors used, chunk rows). The centroid is None when no chunk has a vector.
+    """
+    doc_ids = list(doc_ids)
+    chunk_doc = {}
+    for i in range(0, len(doc_ids), 500):
+        chunk_doc.update(
+            session.query(Chunk.id, Chunk.doc_id)
+            .filter(Chunk.doc_id.in_(doc_ids[i : i + 500]))
+            .all()
+        )
+
+    rows: Dict[int, int] = defaultdict(int)
+    for doc_id in chunk_doc.values():
+        rows[doc_id] += 1
+
+    sums: Dict[int, np.ndarray] = {}
+    counts: Dict[int, int] = defaultdict(int)
+    chunk_ids = list(chunk_doc)
+    for i in range(0, len(chunk_ids), RETRIEVE_BATCH_SIZE):
+        points = qdrant_client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=chunk_ids[i : i + RETRIEVE_BATCH_SIZE],
+            with_vectors=["dense"],
+            with_payload=False,
+        )
+        for point in points:
+            vector = _dense_vector(point)
+            if not vector:
+                continue
+            doc_id = chunk_doc[int(point.id)]
+            vector = np.asarray(vector, dtype=np.float64)
+            if doc_id in sums:
+                sums[doc_id] += vector
+            else:
+                sums[doc_id] = vector
+            counts[doc_id] += 1
+
+    return {
+        doc_id: (
+            (sums[doc_id] / counts[doc_id]).astype(np.float32)
+            if doc_id in sums
+            else None,
+            counts[doc_id],
+            chunk_rows,
+        )
+        for doc_id, chunk_rows in rows.items()
+    }
+
+
+def store_document_centroids(
+    session: Session, qdrant_client, doc_ids: Iterable[int]
+) -> int:
+    """
+    Compute and store centroids for the given documents; documents whose
+    chunks have no vectors get an empty marker row. Returns the number of
+    centroids stored. The caller commits.
+    """
+    stored = 0
+    centroids = compute_document_centroids(session, qdrant_client, doc_ids)
+    for doc_id, (centroid, chunk_count, chunks_total) in centroids.items():
+        session.merge(
+            DocumentCentroid(
+                doc_id=doc_id,
+                vector=centroid.astype("<f4").tobytes() if centroid is not None else b"",
+                dimension=len(centroid) if centroid is not None else 0,
+                chunk_count=chunk_count,
+                chunks_total=chunks_total,
+            )
+        )
+        stored += centroid is not None
+    return stored
+
+
+def stale_centroid_doc_ids(
+    session: Session,
+    doc_ids: Optional[Iterable[int]] = None,
+    project_id: Optional[int] = None,
+    missing_vectors: bool = False,
+) -> List[int]:
+    """
+    Documents with chunks whose centroid is missing or was computed before
+    some of their chunk rows existed. With missing_vectors, also those whose
+    centroid averaged fewer vectors than they have chunks: the embed worker
+    passes it for the documents of the batch it just upserted, whose vectors
+    may have arrived after the centroid was stored. Without it, a chunk that
+    never got a vector does not make a document stale again.
+    """
+    chunk_counts = session.query(
+        Chunk.doc_id, func.count(Chunk.id).label("chunks")
+    )
+    if doc_ids is not None:
+        chunk_counts = chunk_counts.filter(Chunk.doc_id.in_(list(doc_ids)))
+    if project_id:
+        chunk_counts = chunk_counts.join(Document, Document.id == Chunk.doc_id).filter(
+            Document.project_id == project_id
+        )
+    chunk_counts = chunk_counts.group_by(Chunk.doc_id).subquery()
+
+    stale = [
+        DocumentCentroid.doc_id.is_(None),
+        DocumentCentroid.chunks_total < chunk_counts.c.chunks,
+    ]
+    if missing_vectors:
+        stale.append(DocumentCentroid.chunk_count < chunk_counts.c.chunks)
+    query = (
+        session.query(chunk_counts.c.doc_id)
+        .outerjoin(DocumentCentroid, DocumentCentroid.doc_id == chunk_counts.c.doc_id)
+        .filter(or_(*stale))
+    )
+    return [doc_id for (doc_id,) in query.order_by(chunk_counts.c.doc_id)]
+
+
+def backfill_document_centroids(
+    session: Session, qdrant_client, project_id: Optional[int] = None
+) -> int:
+    """
+    Store centroids for documents with chunks but no centroid, or one computed
+    before all their chunk rows existed.
+    """
+    doc_ids = stale_centroid_doc_ids(session, project_id=project_id)
+
+    stored = 0
+    for i in range(0, len(doc_ids), 500):
+        stored += store_document_centroids(
+            session, qdrant_client, doc_ids[i : i + 500]
+        )
+        session.commit()
+    if doc_ids:
+        logger.info(f"Backfilled centroids for {stored} of {len(doc_ids)} documents")
+    return stored
+
+
+def load_document_centroids(
+    session: Session, project_id: Optional[int] = None, limit: Optional[int] = None
+) -> Tuple[List[int], np.ndarray]:
+    """All stored centroids (optionally for one project) as (doc_ids, matrix)."""
+    query = session.query(DocumentCentroid.doc_id, DocumentCentroid.vector).filter(
+        DocumentCentroid.dimension > 0  # Not the marker of a document without vectors
+    )
+    if project_id:
+        query = query.join(Document, Document.id == DocumentCentroid.doc_id).filter(
+            Document.project_id == project_id
+        )
+    query = query.order_by(DocumentCentroid.doc_id)
+    if limit:
+        query = query.limit(limit)
+
+    doc_ids, vectors = [], []
+    for doc_id, data in query.yield_per(1000):
+        doc_ids.append(doc_id)
+        vectors.append(np.frombuffer(data, dtype="<f4"))
+    if not vectors:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return doc_ids, np.vstack(vectors)
+
+
+def reduce_dimensions(
+    X: np.ndarray, n_components: int, method: str = "pca"
+) -> np.ndarray:
+    """Project vectors to n_components dimensions (no-op if already smaller)."""
+    n_components = min(n_components, X.shape[1], len(X) - 1)
+    if n_components < 2 or n_components >= X.shape[1]:
+        return X
+    if method == "umap":
+        import umap.umap_ as umap
+
+        return umap.UMAP(
+            n_components=n_components,
+            n_neighbors=min(15, len(X) - 1),
+            metric="cosine",
+            random_state=42,
+        ).fit_transform(X)
+
+    from sklearn.decomposition import PCA
+
+    return PCA(n_components=n_components, random_state=42).fit_transform(X)
+
+
+def cluster_vectors(
+    X: np.ndarray,
+    min_cluster_size: Optional[int] = None,
+    min_samples: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    reduce_to: Optional[int] = None,
+    reduction_method: Optional[str] = None,
+) -> np.ndarray:
+    """HDBSCAN labels for the rows of X (-1 is noise)."""
+    import hdbscan
+
+    if reduce_to is None:
+        reduce_to = get_config("clustering.reduce_dimensions", 0)
+    if reduce_to:
+        method = reduction_method or get_config("clustering.reduction_method", "pca")
+        X = reduce_dimensions(X, reduce_to, method)
+
+    # min_cluster_size: smallest size grouping that we consider a cluster
+    # min_samples: how conservative the clustering is (larger = more noise points)
+    clusterer = hdbscan.HDBSCAN(
+        min_cluster_size=(
+            min_cluster_size or get_config("clustering.min_cluster_size", 3)
+        ),
+        min_samples=min_samples or get_config("clustering.min_samples", 2),
+        metric="euclidean",
+        core_dist_n_jobs=n_jobs or get_config("clustering.n_jobs", -1),
+    )
+    return clusterer.fit_predict(X)
+
+
+def save_clusters(
+    session: Session,
+    doc_ids: List[int],
+    labels: np.ndarray,
+    project_id: Optional[int] = None,
+) -> Dict[int, Cluster]:
+    """
+    Create a Cluster per label and assign documents in one bulk UPDATE
+    (noise documents get cluster_id NULL). Returns label -> Cluster.
+    """
+    cluster_map = {}
+    for label in sorted(set(labels.tolist()) - {-1}):
+        cluster = Cluster(
+            project_id=project_id,
+            label=int(label),
+            name=f"Cluster {label}",  # Placeholder until named
+            size=int(np.sum(labels == label)),
+        )
+        session.add(cluster)
+        cluster_map[label] = cluster
+    session.flush()  # Cluster ids
+
+    session.execute(
+        update(Document),
+        [
+            {
+                "id": doc_id,
+                "cluster_id": cluster_map[label].id if label != -1 else None,
+            }
+            for doc_id, label in zip(doc_ids, labels.tolist())
+        ],
+    )
+    return cluster_map
+
+
+def sample_cluster_texts(
+    session: Session, doc_ids: List[int], labels: np.ndarray
+) -> Dict[int, List[str]]:
+    """First-chunk text of up to SAMPLE_DOCS_PER_CLUSTER documents per cluster."""
+    sampled = defaultdict(list)
+    for doc_id, label in zip(doc_ids, labels.tolist()):
+        if label != -1 and len(sampled[label]) < SAMPLE_DOCS_PER_CLUSTER:
+            sampled[label].append(doc_id)
+
+    sample_ids = [doc_id for ids in sampled.values() for doc_id in ids]
+    first_chunk = (
+        session.query(func.min(Chunk.id))
+        .filter(Chunk.doc_id.in_(sample_ids))
+        .group_by(Chunk.doc_id)
+    )
+    texts = dict(
+        session.query(Chunk.doc_id, Chunk.text).filter(Chunk.id.in_(first_chunk)).all()
+    )
+    return {
+        label: [texts[doc_id] for doc_id in ids if doc_id in texts]
+        for label, ids in sampled.items()
+    }
+
+
+def generate_cluster_name(texts: List[str]) -> str:
+    """Generates a short name for a cluster based on a sample of its texts."""
+    if not texts:
+        return "Unknown Cluster"
+
+    # Take a sample of texts (first 500 chars of first 5 docs)
+    context = "\n---\n".join([t[:500] for t in texts[:5]])
+
+    try:
+        name = complete(
+            [
+                {"role": "system", "content": NAMING_PROMPT},
+                {"role": "user", "content": f"Snippets:\n{context}\n\nTopic Name:"},
+            ],
+            temperature=0.3,
+            max_tokens=None,
+            feature="cluster_naming",
+        )
+        return name.strip()
+    except Exception as e:
+        logger.error(f"LLM Error generating cluster name: {e}")
+        return "Unnamed Cluster"
+
+
+def name_clusters(cluster_texts: Dict[int, List[str]]) -> Dict[int, str]:
+    """Name every cluster concurrently, within the shared LLM window."""
+    if not cluster_texts:
+        return {}
+    labels = list(cluster_texts)
+    names = get_llm_scheduler().map(
+        lambda label: generate_cluster_name(cluster_texts[label]), labels
+    )
+    return dict(zip(labels, names))
+
+
+def run_clustering(
+    session: Session,
+    qdrant_client=None,
+    project_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Cluster documents by their stored centroids, save the clusters and name
+    them. Returns {"success", "message", "clusters", "documents"}.
+    """
+    if qdrant_client is not None:
+        backfill_document_centroids(session, qdrant_client, project_id)
+
+    doc_ids, X = load_document_centroids(session, project_id)
+    if not doc_ids:
+        return {
+            "success": False,
+            "message": "No document vectors found.",
+            "clusters": 0,
+            "documents": 0,
+        }
+
+    logger.info(f"Clustering {len(doc_ids)} document vectors...")
+    labels = cluster_vectors(X)
+    cluster_map = save_clusters(session, doc_ids, labels, project_id)
+    cluster_texts = sample_cluster_texts(session, doc_ids, labels)
+    session.commit()
+
+    logger.info(f"Found {len(cluster_map)} clusters. Naming clusters...")
+    names = name_clusters(cluster_texts)
+    for label, cluster in cluster_map.items():
+        cluster.name = names.get(label, cluster.name)
+        logger.info(f"   - Cluster {label}: {cluster.name} ({cluster.size} docs)")
+    session.commit()
+
+    return {
+        "success": True,
+        "message": (
+            f"Clustering complete! Found {len(cluster_map)} clusters "
+            f"from {len(doc_ids)} documents."
+        ),
+        "clusters": len(cluster_map),
+        "documents": len(doc_ids),
+    }
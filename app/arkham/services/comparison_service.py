@@ -11,18 +11,15 @@ import os
 import logging
 import difflib
 from typing import Dict, Any, List
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     Document,
     Chunk,
     EntityMention,
     CanonicalEntity,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.utils.security_utils import get_display_filename
 
 load_dotenv()
@@ -35,8 +32,8 @@ class ComparisonService:
     """Service for comparing documents."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_document_content(self, doc_id: int) -> Dict[str, Any]:
         """Get document content and metadata."""
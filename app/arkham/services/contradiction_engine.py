@@ -0,0 +1,386 @@
+"""
+Candidate selection for contradiction detection.
+
+Contradiction detection used to send the first 10 chunks of an entity's
+documents to the LLM (300-character excerpts, whatever they were about) and
+resolve every involved-entity name with two ILIKE queries, one of them a
+'%name%' scan of the canonical entity table. Detection now narrows the work
+before the LLM sees anything:
+
+- load_entity_chunks() reads up to contradictions.max_chunks chunks that
+  mention the entity (through its mention rows, or its name and aliases);
+- select_candidate_pairs() scores every pair of those chunks by embedding
+  similarity (the dense vectors already stored in Qdrant; token overlap when
+  a chunk has none) and by whether they state different dates or numbers.
+  Only the best contradictions.max_pairs pairs go into the prompt, and an
+  entity without a candidate pair makes no LLM call at all;
+- EntityNameIndex resolves the names the LLM returns in memory, loaded once
+  per detection run and shared by the entities analysed concurrently.
+"""
+
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import or_
+
+from .config import get_config
+from .db.models import CanonicalEntity, Chunk, Entity
+from .extraction_utils import extract_dates, extract_money
+
+logger = logging.getLogger(__name__)
+
+ENTITY_DOC_LIMIT = 20  # Documents searched for chunks naming the entity
+RETRIEVE_BATCH_SIZE = 1000  # Chunk ids per Qdrant retrieve
+
+CONFLICT_BONUS = 0.25  # Added to a pair's score per kind of value it disagrees on
+
+# Bare numbers ("1,250", "14", "3.5") that are not part of a word
+_NUMBER = re.compile(r"(?<![\w.,])(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?!\w)")
+_WORD = re.compile(r"[a-z0-9]{3,}")
+
+
+def _setting(name: str, default):
+    return get_config(f"contradictions.{name}", default)
+
+
+# ==================== CHUNKS & VECTORS ====================
+
+
+def entity_doc_ids(
+    session, entity_id: int, doc_ids_filter: Optional[Iterable[int]] = None
+) -> List[int]:
+    """Documents an entity is mentioned in, restricted to doc_ids_filter if given."""
+    query = session.query(Entity.doc_id).filter(
+        Entity.canonical_entity_id == entity_id, Entity.doc_id.isnot(None)
+    )
+    if doc_ids_filter:
+        query = query.filter(Entity.doc_id.in_(list(doc_ids_filter)))
+    return sorted(
+        doc_id for (doc_id,) in query.distinct().limit(ENTITY_DOC_LIMIT)
+    )
+
+
+def entity_names(entity: CanonicalEntity) -> List[str]:
+    """Canonical name and known aliases of an entity."""
+    names = [entity.canonical_name] if entity.canonical_name else []
+    try:
+        aliases = json.loads(entity.aliases) if entity.aliases else []
+    except (TypeError, ValueError):
+        aliases = []
+    for alias in aliases:
+        if isinstance(alias, str) and alias.strip() and alias not in names:
+            names.append(alias)
+    return names
+
+
+def _escape_like(literal: str) -> str:
+    return literal.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def load_entity_chunks(
+    session,
+    entity: CanonicalEntity,
+    doc_ids_filter: Optional[Iterable[int]] = None,
+    max_chunks: Optional[int] = None,
+) -> List[Chunk]:
+    """
+    Chunks detection considers for an entity, up to max_chunks
+    (contradictions.max_chunks), in id order: the chunks its mentions were
+    extracted from, then (for mentions saved without a chunk) chunks of its
+    documents that contain its name or an alias.
+    """
+    limit = max_chunks or int(_setting("max_chunks", 40))
+    doc_ids_filter = list(doc_ids_filter) if doc_ids_filter else None
+
+    mentioned = session.query(Entity.chunk_id).filter(
+        Entity.canonical_entity_id == entity.id, Entity.chunk_id.isnot(None)
+    )
+    query = session.query(Chunk).filter(Chunk.id.in_(mentioned))
+    if doc_ids_filter:
+        query = query.filter(Chunk.doc_id.in_(doc_ids_filter))
+    chunks = query.order_by(Chunk.id).limit(limit).all()
+
+    names = entity_names(entity)
+    if len(chunks) < limit and names:
+        doc_ids = entity_doc_ids(session, entity.id, doc_ids_filter)
+        if doc_ids:
+            query = session.query(Chunk).filter(
+                Chunk.doc_id.in_(doc_ids),
+                or_(
+                    *(
+                        Chunk.text.ilike(f"%{_escape_like(name)}%", escape="\\")
+                        for name in names
+                    )
+                ),
+            )
+            if chunks:
+                query = query.filter(Chunk.id.notin_([c.id for c in chunks]))
+            chunks += query.order_by(Chunk.id).limit(limit - len(chunks)).all()
+    return sorted(chunks, key=lambda c: c.id)
+
+
+def _dense_vector(point) -> Optional[List[float]]:
+    vector = point.vector
+    if isinstance(vector, dict):
+        return vector.get("dense")
+    return vector or None
+
+
+def load_chunk_vectors(qdrant_client, chunk_ids: Sequence[int]) -> Dict[int, np.ndarray]:
+    """
+    Stored dense vectors of the given chunks, unit-normalised. Chunks that
+    were never embedded are missing; Qdrant errors return what was read.
+    """
+    if qdrant_client is None or not chunk_ids:
+        return {}
+    collection = get_config("vector_store.collection_name", "arkham_mirror_hybrid")
+    vectors = {}
+    chunk_ids = list(chunk_ids)
+    try:
+        for start in range(0, len(chunk_ids), RETRIEVE_BATCH_SIZE):
+            points = qdrant_client.retrieve(
+                collection_name=collection,
+                ids=chunk_ids[start : start + RETRIEVE_BATCH_SIZE],
+                with_vectors=["dense"],
+                with_payload=False,
+            )
+            for point in points:
+                vector = _dense_vector(point)
+                if vector:
+                    array = np.asarray(vector, dtype=np.float32)
+                    norm = np.linalg.norm(array)
+                    if norm:
+                        vectors[int(point.id)] = array / norm
+    except Exception as e:
+        logger.warning(f"Could not load chunk vectors for contradiction candidates: {e}")
+    return vectors
+
+
+# ==================== CLAIM VALUES ====================
+
+
+def extract_claim_values(text: str) -> Dict[str, FrozenSet[str]]:
+    """
+    Dates and numbers a chunk states, normalised for comparison:
+    {"dates": {"2023-01-15", ...}, "numbers": {"1500000", ...}}.
+    Years and day/month digits that belong to a date are not counted as
+    numbers.
+    """
+    text = text or ""
+    dates, numbers = set(), set()
+    covered = []
+    for mention in extract_dates(text):
+        parsed = mention["parsed_date"]
+        dates.add(parsed[:10] if parsed else mention["date_text"].lower())
+        covered.append((mention["start_pos"], mention["end_pos"]))
+    for amount in extract_money(text):
+        if amount["normalized_value"] is not None:
+            numbers.add(f"{amount['normalized_value']:g}")
+        covered.append((amount["start_pos"], amount["end_pos"]))
+
+    for match in _NUMBER.finditer(text):
+        start, end = match.span()
+        if any(s <= start < e for s, e in covered):
+            continue
+        numbers.add(f"{float(match.group().replace(',', '')):g}")
+    return {"dates": frozenset(dates), "numbers": frozenset(numbers)}
+
+
+def value_conflicts(
+    a: Dict[str, FrozenSet[str]], b: Dict[str, FrozenSet[str]]
+) -> List[str]:
+    """Kinds of value ("dates", "numbers") both texts state but disagree on."""
+    return [
+        kind
+        for kind in ("dates", "numbers")
+        if a.get(kind) and b.get(kind) and a[kind] != b[kind]
+    ]
+
+
+# ==================== CANDIDATE PAIRS ====================
+
+
+@dataclass
+class CandidatePair:
+    chunk_a: Chunk
+    chunk_b: Chunk
+    similarity: float
+    conflicts: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        return self.similarity + CONFLICT_BONUS * len(self.conflicts)
+
+    def describe(self) -> str:
+        line = f"Chunk {self.chunk_a.id} vs Chunk {self.chunk_b.id}"
+        if self.conflicts:
+            line += f" (different {' and '.join(self.conflicts)})"
+        return line
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_WORD.findall((text or "").lower()))
+
+
+def select_candidate_pairs(
+    chunks: Sequence[Chunk],
+    vectors: Dict[int, np.ndarray],
+    max_pairs: Optional[int] = None,
+    min_similarity: Optional[float] = None,
+    min_overlap: Optional[float] = None,
+) -> List[CandidatePair]:
+    """
+    The chunk pairs most likely to hold a contradiction, best first.
+
+    A pair qualifies when its chunks are about the same thing: cosine
+    similarity of their dense vectors >= min_similarity, or (when either
+    chunk has no stored vector) Jaccard token overlap >= min_overlap.
+    Qualifying pairs are ranked by similarity plus a bonus for each kind of
+    value (dates, numbers) the two chunks state differently.
+    """
+    max_pairs = max_pairs or int(_setting("max_pairs", 8))
+    if min_similarity is None:
+        min_similarity = float(_setting("min_similarity", 0.55))
+    if min_overlap is None:
+        min_overlap = float(_setting("min_overlap", 0.15))
+
+    chunks = [c for c in chunks if (c.text or "").strip()]
+    if len(chunks) < 2:
+        return []
+    values = [extract_claim_values(c.text) for c in chunks]
+    tokens = [_tokens(c.text) for c in chunks]
+
+    with_vectors = [i for i, c in enumerate(chunks) if c.id in vectors]
+    similarity = {}
+    if len(with_vectors) > 1:
+        matrix = np.stack([vectors[chunks[i].id] for i in with_vectors])
+        scores = matrix @ matrix.T
+        for a, i in enumerate(with_vectors):
+            for b in range(a + 1, len(with_vectors)):
+                similarity[(i, with_vectors[b])] = float(scores[a, b])
+
+    pairs = []
+    for i in range(len(chunks)):
+        for j in range(i + 1, len(chunks)):
+            if (i, j) in similarity:
+                score, threshold = similarity[(i, j)], min_similarity
+            else:
+                union = tokens[i] | tokens[j]
+                score = len(tokens[i] & tokens[j]) / len(union) if union else 0.0
+                threshold = min_overlap
+            if score < threshold:
+                continue
+            pairs.append(
+                CandidatePair(chunks[i], chunks[j], score, value_conflicts(values[i], values[j]))
+            )
+
+    pairs.sort(key=lambda p: (-p.score, p.chunk_a.id, p.chunk_b.id))
+    return pairs[:max_pairs]
+
+
+def pair_chunks(pairs: Iterable[CandidatePair]) -> List[Chunk]:
+    """Distinct chunks of the given pairs, in order of first appearance."""
+    seen = {}
+    for pair in pairs:
+        for chunk in (pair.chunk_a, pair.chunk_b):
+            seen.setdefault(chunk.id, chunk)
+    return list(seen.values())
+
+
+def excerpt(text: str, name: str, width: Optional[int] = None) -> str:
+    """`width` characters of text (contradictions.excerpt_chars), centred on the first mention of name."""
+    width = width or int(_setting("excerpt_chars", 400))
+    text = text or ""
+    if len(text) <= width:
+        return text
+    position = text.lower().find(name.lower()) if name else -1
+    start = 0 if position < 0 else max(0, min(position - width // 3, len(text) - width))
+    snippet = text[start : start + width]
+    return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
+
+
+# ==================== ENTITY NAMES ====================
+
+
+class EntityNameIndex:
+    """
+    Canonical entity names held in memory. A name resolves to the entity
+    called exactly that (case-insensitive), else to one whose name contains
+    it as whole words, else to one whose name contains it at all; the most
+    mentioned entity wins ties.
+    """
+
+    def __init__(self, entities: Iterable[Tuple[int, str, Optional[int]]]):
+        ranked = sorted(
+            ((eid, name, mentions or 0) for eid, name, mentions in entities if name),
+            key=lambda e: (-e[2], e[0]),
+        )
+        self._names: List[Tuple[int, str]] = [(eid, name.lower()) for eid, name, _ in ranked]
+        self._exact: Dict[str, int] = {}
+        self._by_token: Dict[str, List[int]] = {}
+        for position, (eid, lowered) in enumerate(self._names):
+            self._exact.setdefault(lowered, eid)
+            for token in set(_WORD.findall(lowered)):
+                self._by_token.setdefault(token, []).append(position)
+        self._resolved: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, session) -> "EntityNameIndex":
+        """Index every canonical entity (one query)."""
+        return cls(
+            session.query(
+                CanonicalEntity.id,
+                CanonicalEntity.canonical_name,
+                CanonicalEntity.total_mentions,
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _find(self, lowered: str) -> Optional[int]:
+        if lowered in self._exact:
+            return self._exact[lowered]
+        # Names containing every word of the query are looked up by token;
+        # a partial word needs the full scan
+        words = _WORD.findall(lowered)
+        if words and all(w in self._by_token for w in words):
+            positions = set.intersection(*(set(self._by_token[w]) for w in words))
+            for position in sorted(positions):
+                eid, name = self._names[position]
+                if lowered in name:
+                    return eid
+        for eid, name in self._names:
+            if lowered in name:
+                return eid
+        return None
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Id of the entity called `name`, else of one whose name contains it."""
+        if not isinstance(name, str):
+            return None
+        lowered = " ".join(name.lower().split())
+        if not lowered:
+            return None
+        with self._lock:
+            if lowered in self._resolved:
+                return self._resolved[lowered]
+        found = self._find(lowered)
+        with self._lock:
+            self._resolved[lowered] = found
+        return found
+
+    def resolve_all(self, names: Iterable[str]) -> List[int]:
+        """Distinct ids of the names that resolve, in order."""
+        ids = []
+        for name in names or []:
+            eid = self.resolve(name)
+            if eid is not None and eid not in ids:
+                ids.append(eid)
+        return ids
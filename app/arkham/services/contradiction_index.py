@@ -0,0 +1,238 @@
+"""
+Qdrant index of contradiction descriptions, for semantic search.
+
+Semantic search used to load a new SentenceTransformer("BAAI/bge-m3") on
+every call and, the first time, embed every contradiction one at a time
+into a "contradictions" collection that was never updated after that.
+The index now:
+
+- embeds with the shared provider (embedding_services), in batches of
+  processing.embed_batch_size; query vectors go through the query
+  embedding cache;
+- is kept in sync as contradictions change: detection adds the ones it
+  saves (add()), resolving one updates its status payload (set_status()),
+  and clearing contradictions drops the collection (drop());
+- reconciles itself with the contradictions table once per process
+  (sync()): missing contradictions are embedded, deleted ones removed, and
+  the collection is recreated when the provider's vector size changed.
+
+A search is then one embedding-cache lookup and one Qdrant query. Index
+failures are logged; they never fail detection or resolution.
+"""
+
+import logging
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .db.connection import get_qdrant_client, get_session_factory
+from .db.models import Contradiction
+from .embedding_services import embed_hybrid, get_provider, iter_embed_hybrid
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "contradictions"
+UPSERT_BATCH = 256  # Points per Qdrant upsert
+SCROLL_BATCH = 1000  # Point ids read per scroll while reconciling
+
+
+def _payload(contradiction: Contradiction) -> dict:
+    return {
+        "entity_id": contradiction.entity_id,
+        "severity": contradiction.severity,
+        "status": contradiction.status,
+        "category": contradiction.category or "factual",
+    }
+
+
+class ContradictionIndex:
+    """The "contradictions" Qdrant collection, one point per contradiction id."""
+
+    def __init__(self, session_factory=None, qdrant_client=None):
+        self.Session = session_factory or get_session_factory()
+        self._client = qdrant_client
+        self._synced = False
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_qdrant_client()
+        return self._client
+
+    # ==================== SYNC ====================
+
+    def _ensure_collection(self) -> None:
+        from qdrant_client.models import Distance, VectorParams
+
+        size = get_provider().dense_dimension
+        if self.client.collection_exists(COLLECTION_NAME):
+            vectors = self.client.get_collection(COLLECTION_NAME).config.params.vectors
+            if getattr(vectors, "size", None) == size:
+                return
+            # Embedded by another provider: those vectors can't be queried
+            logger.info("Contradiction index vector size changed, rebuilding")
+            self.client.delete_collection(COLLECTION_NAME)
+        self.client.create_collection(
+            collection_name=COLLECTION_NAME,
+            vectors_config=VectorParams(size=size, distance=Distance.COSINE),
+        )
+
+    def _indexed_ids(self) -> set:
+        ids, offset = set(), None
+        while True:
+            points, offset = self.client.scroll(
+                COLLECTION_NAME,
+                limit=SCROLL_BATCH,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            ids.update(int(point.id) for point in points)
+            if offset is None:
+                return ids
+
+    def _upsert(self, contradictions: Sequence[Contradiction]) -> int:
+        from qdrant_client.models import PointStruct
+
+        embeddings = iter_embed_hybrid(c.description or "" for c in contradictions)
+        points = []
+        for contradiction, embedding in zip(contradictions, embeddings):
+            points.append(
+                PointStruct(
+                    id=contradiction.id,
+                    vector=embedding["dense"],
+                    payload=_payload(contradiction),
+                )
+            )
+            if len(points) >= UPSERT_BATCH:
+                self.client.upsert(collection_name=COLLECTION_NAME, points=points)
+                points = []
+        if points:
+            self.client.upsert(collection_name=COLLECTION_NAME, points=points)
+        return len(contradictions)
+
+    def sync(self) -> int:
+        """
+        Reconcile the collection with the contradictions table. Returns the
+        number of contradictions embedded.
+        """
+        with self._lock:
+            self._ensure_collection()
+            indexed = self._indexed_ids()
+            session = self.Session()
+            try:
+                stored = {cid for (cid,) in session.query(Contradiction.id)}
+                stale = sorted(indexed - stored)
+                if stale:
+                    self.remove(stale)
+                missing = sorted(stored - indexed)
+                added = 0
+                for start in range(0, len(missing), UPSERT_BATCH):
+                    added += self._upsert(
+                        session.query(Contradiction)
+                        .filter(Contradiction.id.in_(missing[start : start + UPSERT_BATCH]))
+                        .all()
+                    )
+            finally:
+                session.close()
+            self._synced = True
+            if added or stale:
+                logger.info(
+                    f"Contradiction index synced: {added} embedded, {len(stale)} removed"
+                )
+            return added
+
+    # ==================== UPDATES ====================
+
+    def add(self, contradiction_ids: Iterable[int]) -> int:
+        """Embed and index the given (newly saved) contradictions."""
+        contradiction_ids = list(contradiction_ids)
+        if not contradiction_ids:
+            return 0
+        try:
+            if not self._synced:
+                # First write in this process: reconciling covers these too
+                return self.sync()
+            session = self.Session()
+            try:
+                contradictions = (
+                    session.query(Contradiction)
+                    .filter(Contradiction.id.in_(contradiction_ids))
+                    .all()
+                )
+                try:
+                    return self._upsert(contradictions)
+                except Exception:
+                    # Collection dropped elsewhere (contradictions cleared)
+                    if self.client.collection_exists(COLLECTION_NAME):
+                        raise
+                    return self.sync()
+            finally:
+                session.close()
+        except Exception as e:
+            logger.warning(f"Could not index contradictions {contradiction_ids}: {e}")
+            return 0
+
+    def set_status(self, contradiction_id: int, status: str) -> None:
+        """Update the status payload of an indexed contradiction."""
+        try:
+            if self.client.collection_exists(COLLECTION_NAME):
+                self.client.set_payload(
+                    collection_name=COLLECTION_NAME,
+                    payload={"status": status},
+                    points=[contradiction_id],
+                )
+        except Exception as e:
+            logger.warning(f"Could not update indexed contradiction {contradiction_id}: {e}")
+
+    def remove(self, contradiction_ids: Sequence[int]) -> None:
+        from qdrant_client.models import PointIdsList
+
+        self.client.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=PointIdsList(points=list(contradiction_ids)),
+        )
+
+    def drop(self) -> None:
+        """Delete the collection (all contradictions were deleted)."""
+        try:
+            if self.client.collection_exists(COLLECTION_NAME):
+                self.client.delete_collection(COLLECTION_NAME)
+        except Exception as e:
+            logger.warning(f"Could not drop the contradiction index: {e}")
+        self._synced = False
+
+    # ==================== SEARCH ====================
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """(contradiction id, score) of the closest descriptions, best first."""
+        if not self._synced:
+            self.sync()
+        vector = embed_hybrid(query)["dense"]
+        try:
+            hits = self.client.query_points(
+                collection_name=COLLECTION_NAME,
+                query=vector,
+                limit=limit,
+                with_payload=False,
+            ).points
+        except Exception:
+            if self.client.collection_exists(COLLECTION_NAME):
+                raise
+            # Dropped by another process since this one synced
+            self.sync()
+            return self.search(query, limit)
+        return [(int(hit.id), hit.score) for hit in hits]
+
+
+_index: Optional[ContradictionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_contradiction_index() -> ContradictionIndex:
+    """The process-wide contradiction index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ContradictionIndex()
+        return _index
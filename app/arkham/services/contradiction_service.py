@@ -2,11 +2,10 @@ import os
 import json
 import logging
 from typing import List, Dict, Optional
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL, REDIS_URL
+from config.settings import REDIS_URL
 
 from app.arkham.services.db.models import (
     Contradiction,
@@ -16,18 +15,37 @@ from app.arkham.services.db.models import (
     Chunk,
     CanonicalEntity,
 )
+from app.arkham.services.db.connection import (
+    get_engine,
+    get_session_factory,
+    get_qdrant_client,
+)
 from app.arkham.services.llm_service import chat_with_llm, CONTRADICTIONS_SCHEMA
+from app.arkham.services.llm_cache import get_llm_cache
+from app.arkham.services.llm_scheduler import get_llm_scheduler
+from app.arkham.services.contradiction_index import get_contradiction_index
+from app.arkham.services.contradiction_engine import (
+    EntityNameIndex,
+    excerpt,
+    load_chunk_vectors,
+    load_entity_chunks,
+    pair_chunks,
+    select_candidate_pairs,
+)
 from app.arkham.utils.service_logging import logged_service_call
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# LLM cache feature of the background worker's per-entity scans
+ENTITY_CACHE_FEATURE = "contradiction_entities"
+
 
 class ContradictionService:
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     @logged_service_call()
     def detect_contradictions(
@@ -49,30 +67,45 @@ class ContradictionService:
             if entity_ids:
                 # Use specified entities
                 entities = (
-                    session.query(CanonicalEntity)
+                    session.query(CanonicalEntity.id)
                     .filter(CanonicalEntity.id.in_(entity_ids))
                     .all()
                 )
             else:
                 # Top 5 entities by mention count
                 entities = (
-                    session.query(CanonicalEntity)
+                    session.query(CanonicalEntity.id)
                     .order_by(desc(CanonicalEntity.total_mentions))
                     .limit(5)
                     .all()
                 )
+            name_index = EntityNameIndex.load(session)
+        finally:
+            session.close()
 
-            results = []
-            for entity in entities:
-                if not entity:
-                    continue
-
-                contradictions = self._analyze_entity_contradictions(
-                    session, entity, doc_ids
-                )
-                results.extend(contradictions)
+        # Entities are analysed concurrently (each in its own session),
+        # bounded by the shared LLM window
+        found = get_llm_scheduler().map(
+            lambda entity_id: self.analyze_entity(entity_id, doc_ids, name_index),
+            [entity_id for (entity_id,) in entities],
+        )
+        return [c for contradictions in found for c in contradictions]
 
-            return results
+    def analyze_entity(
+        self,
+        entity_id: int,
+        doc_ids: Optional[List[int]] = None,
+        name_index: Optional[EntityNameIndex] = None,
+    ) -> List[Dict]:
+        """Run _analyze_entity_contradictions for one entity in its own session."""
+        session = self.Session()
+        try:
+            entity = session.get(CanonicalEntity, entity_id)
+            if not entity:
+                return []
+            return self._analyze_entity_contradictions(
+                session, entity, doc_ids, name_index
+            )
         finally:
             session.close()
 
@@ -127,56 +160,42 @@ class ContradictionService:
         session,
         entity: CanonicalEntity,
         doc_ids_filter: Optional[List[int]] = None,
+        name_index: Optional[EntityNameIndex] = None,
     ) -> List[Dict]:
         """
         Analyze text chunks related to an entity for contradictions.
 
+        Only candidate chunk pairs (contradiction_engine.select_candidate_pairs:
+        similar chunks, preferably stating different dates or numbers) are
+        sent to the LLM; without candidates no LLM call is made.
+
         Args:
             session: DB session
             entity: The canonical entity to analyze
             doc_ids_filter: Optional list of document IDs to restrict search.
                            If None, searches all documents where entity appears.
+            name_index: Entity names to resolve involved entities against
+                        (loaded here if not given)
         """
-        # Get chunks where the entity is mentioned.
-        # Entity table links to Document. We need chunks from those documents.
-        # Better: Find Entity records for this CanonicalEntity, get doc_ids.
-
-        entity_records = (
-            session.query(Entity)
-            .filter(Entity.canonical_entity_id == entity.id)
-            .limit(20)
-            .all()
-        )
-        entity_doc_ids = list(set(e.doc_id for e in entity_records))
-
-        if not entity_doc_ids:
+        candidates = load_entity_chunks(session, entity, doc_ids_filter)
+        if len(candidates) < 2:
             return []
 
-        # If doc_ids_filter provided, intersect with entity's doc_ids
-        if doc_ids_filter:
-            search_doc_ids = [d for d in entity_doc_ids if d in doc_ids_filter]
-            if not search_doc_ids:
-                # Entity doesn't appear in the filtered documents
-                return []
-        else:
-            search_doc_ids = entity_doc_ids
-
-        # Get chunks from these documents.
-        # Limit to 10 chunks to avoid context overflow with 18k token model
-        chunks = (
-            session.query(Chunk)
-            .filter(Chunk.doc_id.in_(search_doc_ids))
-            .limit(10)
-            .all()
+        vectors = load_chunk_vectors(
+            get_qdrant_client(), [c.id for c in candidates]
         )
-
-        if len(chunks) < 2:
+        pairs = select_candidate_pairs(candidates, vectors)
+        if not pairs:
+            logger.info(f"No candidate chunk pairs for {entity.canonical_name}")
             return []
+        chunks = pair_chunks(pairs)
 
-        # Prepare prompt - use shorter excerpts to fit within context window
-        # 18k token model ~ 72k chars, but we need room for response
-        chunk_texts = [f"[Chunk {c.id}]: {c.text[:300]}" for c in chunks]
+        # Excerpts are centred on the entity's mention to fit the context window
+        chunk_texts = [
+            f"[Chunk {c.id}]: {excerpt(c.text, entity.canonical_name)}" for c in chunks
+        ]
         combined_text = "\n\n".join(chunk_texts)
+        pair_lines = "\n".join(f"- {pair.describe()}" for pair in pairs)
 
         prompt = f"""You are an investigative analyst. Analyze the following text excerpts related to the entity '{entity.canonical_name}'. 
 Identify any factual contradictions or conflicting statements. Focus on:
@@ -203,11 +222,15 @@ Example format:
 Text Excerpts:
 {combined_text}
 
+Pairs of excerpts most likely to conflict:
+{pair_lines}
+
 If no contradictions found, return {{"contradictions": []}}."""
 
         # Log prompt size for debugging
         logger.info(
-            f"Contradiction prompt for {entity.canonical_name}: {len(prompt)} chars, {len(chunks)} chunks"
+            f"Contradiction prompt for {entity.canonical_name}: {len(prompt)} chars, "
+            f"{len(chunks)} chunks, {len(pairs)} candidate pairs"
         )
 
         # Call LLM with higher max_tokens to prevent output truncation
@@ -216,6 +239,7 @@ If no contradictions found, return {{"contradictions": []}}."""
                 [{"role": "user", "content": prompt}],
                 max_tokens=3000,  # Increased to prevent truncation
                 json_schema=CONTRADICTIONS_SCHEMA,
+                feature="contradictions",
             )
 
             # Clean response
@@ -274,33 +298,13 @@ If no contradictions found, return {{"contradictions": []}}."""
                     except ValueError:
                         llm_confidence = 0.8
 
-                # NEW: Extract involved_entities and map to IDs
-                involved_entity_names = item.get("involved_entities", [])
-                involved_entity_ids = []
-                if involved_entity_names:
-                    # Look up canonical entity IDs for each name
-                    for name in involved_entity_names:
-                        if not isinstance(name, str):
-                            continue
-                        # Try exact match first
-                        ce = (
-                            session.query(CanonicalEntity)
-                            .filter(CanonicalEntity.canonical_name.ilike(name))
-                            .first()
-                        )
-                        if ce:
-                            involved_entity_ids.append(ce.id)
-                        else:
-                            # Try partial match
-                            ce = (
-                                session.query(CanonicalEntity)
-                                .filter(
-                                    CanonicalEntity.canonical_name.ilike(f"%{name}%")
-                                )
-                                .first()
-                            )
-                            if ce:
-                                involved_entity_ids.append(ce.id)
+                # Map involved_entities to canonical entity IDs (exact name,
+                # else a name containing it)
+                if name_index is None:
+                    name_index = EntityNameIndex.load(session)
+                involved_entity_ids = name_index.resolve_all(
+                    item.get("involved_entities", [])
+                )
 
                 # Always include the primary entity
                 if entity.id not in involved_entity_ids:
@@ -392,6 +396,8 @@ If no contradictions found, return {{"contradictions": []}}."""
                 )
 
             session.commit()
+            # Keep semantic search in step with detection
+            get_contradiction_index().add(c["id"] for c in saved_contradictions)
             return saved_contradictions
 
         except Exception as e:
@@ -461,74 +467,47 @@ If no contradictions found, return {{"contradictions": []}}."""
         """
         Search contradictions by semantic similarity using Qdrant embeddings.
 
-        Phase 4: Uses the embedded descriptions to find semantically similar contradictions.
+        Phase 4: Uses the embedded descriptions (contradiction_index.py) to find
+        semantically similar contradictions.
         """
-        from qdrant_client import QdrantClient
-        from sentence_transformers import SentenceTransformer
-        from config.settings import QDRANT_URL
-
         try:
-            # Get embedding for query
-            model = SentenceTransformer("BAAI/bge-m3")
-            query_embedding = model.encode(query).tolist()
-
-            # Search in Qdrant - contradictions collection
-            qdrant_client = QdrantClient(url=QDRANT_URL)
-
-            # First, try to create a collection for contradictions if it doesn't exist
-            collections = [c.name for c in qdrant_client.get_collections().collections]
-
-            if "contradictions" not in collections:
-                # Build the collection from existing contradictions
-                self._build_contradiction_embeddings(qdrant_client, model)
-
-            # Search
-            results = qdrant_client.search(
-                collection_name="contradictions",
-                query_vector=query_embedding,
-                limit=limit,
-            )
-
-            # Get contradiction IDs from results
-            contradiction_ids = [int(r.id) for r in results]
-
-            if not contradiction_ids:
+            hits = get_contradiction_index().search(query, limit)
+            if not hits:
                 return []
+            contradiction_ids = [cid for cid, _ in hits]
+            id_to_score = dict(hits)
 
             # Fetch full contradiction data
             session = self.Session()
             try:
-                contradictions = (
-                    session.query(Contradiction)
-                    .filter(Contradiction.id.in_(contradiction_ids))
-                    .all()
+                id_to_contradiction = {
+                    c.id: c
+                    for c in session.query(Contradiction).filter(
+                        Contradiction.id.in_(contradiction_ids)
+                    )
+                }
+                evidence_by_id = {}
+                for e in session.query(ContradictionEvidence).filter(
+                    ContradictionEvidence.contradiction_id.in_(contradiction_ids)
+                ):
+                    evidence_by_id.setdefault(e.contradiction_id, []).append(e)
+                entity_names = dict(
+                    session.query(CanonicalEntity.id, CanonicalEntity.canonical_name).filter(
+                        CanonicalEntity.id.in_(
+                            {c.entity_id for c in id_to_contradiction.values()}
+                        )
+                    )
                 )
 
                 # Order by search result order
-                id_to_score = {int(r.id): r.score for r in results}
-                id_to_contradiction = {c.id: c for c in contradictions}
-
                 results_list = []
                 for cid in contradiction_ids:
                     c = id_to_contradiction.get(cid)
                     if c:
-                        evidence = (
-                            session.query(ContradictionEvidence)
-                            .filter(ContradictionEvidence.contradiction_id == c.id)
-                            .all()
-                        )
-                        entity = (
-                            session.query(CanonicalEntity)
-                            .filter(CanonicalEntity.id == c.entity_id)
-                            .first()
-                        )
-
                         results_list.append(
                             {
                                 "id": c.id,
-                                "entity_name": entity.canonical_name
-                                if entity
-                                else "Unknown",
+                                "entity_name": entity_names.get(c.entity_id, "Unknown"),
                                 "description": c.description,
                                 "severity": c.severity,
                                 "status": c.status,
@@ -539,7 +518,7 @@ If no contradictions found, return {{"contradictions": []}}."""
                                 "category": c.category or "factual",
                                 "evidence": [
                                     {"text": e.text_chunk, "document_id": e.document_id}
-                                    for e in evidence
+                                    for e in evidence_by_id.get(cid, [])
                                 ],
                                 "search_score": id_to_score.get(cid, 0.0),
                             }
@@ -553,52 +532,6 @@ If no contradictions found, return {{"contradictions": []}}."""
             logger.error(f"Semantic search error: {e}")
             return []
 
-    def _build_contradiction_embeddings(self, qdrant_client, model):
-        """Build Qdrant collection for contradiction embeddings."""
-        from qdrant_client.models import VectorParams, Distance, PointStruct
-
-        logger.info("Building contradiction embeddings collection...")
-
-        session = self.Session()
-        try:
-            contradictions = session.query(Contradiction).all()
-
-            if not contradictions:
-                return
-
-            # Create collection
-            qdrant_client.create_collection(
-                collection_name="contradictions",
-                vectors_config=VectorParams(size=1024, distance=Distance.COSINE),
-            )
-
-            # Embed and upsert
-            points = []
-            for c in contradictions:
-                embedding = model.encode(c.description).tolist()
-                points.append(
-                    PointStruct(
-                        id=c.id,
-                        vector=embedding,
-                        payload={
-                            "severity": c.severity,
-                            "status": c.status,
-                            "category": c.category or "factual",
-                        },
-                    )
-                )
-
-            # Batch upsert
-            qdrant_client.upsert(
-                collection_name="contradictions",
-                points=points,
-            )
-
-            logger.info(f"Built embeddings for {len(points)} contradictions")
-
-        finally:
-            session.close()
-
     def resolve_contradiction(self, contradiction_id: int, status: str, note: str = ""):
         """
         Update status of a contradiction.
@@ -614,6 +547,7 @@ If no contradictions found, return {{"contradictions": []}}."""
                 c.status = status
                 c.resolution_note = note
                 session.commit()
+                get_contradiction_index().set_status(contradiction_id, status)
                 return True
             return False
         finally:
@@ -634,13 +568,12 @@ If no contradictions found, return {{"contradictions": []}}."""
             contradiction_count = session.query(Contradiction).delete()
             logger.info(f"Deleted {contradiction_count} contradictions")
 
-            # Also clear analysis cache so meaningful detection happens next time
-            from app.arkham.services.db.models import EntityAnalysisCache
+            session.commit()
+            get_contradiction_index().drop()
 
-            cache_count = session.query(EntityAnalysisCache).delete()
+            # Also clear analysis cache so meaningful detection happens next time
+            cache_count = get_llm_cache().clear(ENTITY_CACHE_FEATURE)
             logger.info(f"Deleted {cache_count} entity analysis cache records")
-
-            session.commit()
             return contradiction_count
         except Exception as e:
             session.rollback()
@@ -0,0 +1,350 @@
+"""
+Materialised corpus statistics for the dashboards.
+
+The Overview, Big Picture, filter and project pages used to run COUNT and
+GROUP BY queries over documents, chunks, entities, anomalies, tables and
+timeline events on every page load. They now read the corpus_stats table:
+a few rows per project, whatever the size of the corpus.
+
+- Document metrics (documents, documents by type and by day, chunks,
+  anomalies, tables, timeline events) are kept per project. The pipeline
+  bumps them in the same transaction as the rows they count (record_rows,
+  record_document), and deleting or moving a document takes its share back.
+- Entity graph metrics (canonical entities by label, mentions,
+  relationships) are corpus-wide, since entities are not per project. They
+  are a snapshot stamped with the graph_version it was computed at; a reader
+  recomputes it once the version has moved, at most every
+  corpus_stats.graph_refresh_seconds.
+
+rebuild_corpus_stats() recomputes everything from the source tables. It runs
+at startup when the table is empty (db_init), and after bulk deletes.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .config import get_config
+from .db.models import (
+    Anomaly,
+    CanonicalEntity,
+    Chunk,
+    CorpusStat,
+    Document,
+    EntityRelationship,
+    ExtractedTable,
+    GraphVersion,
+    TimelineEvent,
+)
+from .relationship_utils import _insert_for
+
+logger = logging.getLogger(__name__)
+
+NO_PROJECT = 0  # Documents without a project
+CORPUS_WIDE = -1  # Entity graph snapshot
+RECENT_DAYS = 30
+
+# Per-document row counts, keyed as in record_rows()
+ROW_METRICS = ("chunks", "anomalies", "tables", "timeline_events")
+
+StatKey = Tuple[str, str]  # (metric, key)
+
+
+def _scope(project_id: Optional[int]) -> int:
+    return NO_PROJECT if project_id is None else project_id
+
+
+def _upsert(
+    session: Session, project_id: int, counts: Mapping[StatKey, int], add: bool = True
+) -> None:
+    rows = [
+        {"project_id": project_id, "metric": metric, "key": key, "value": value,
+         "updated_at": datetime.utcnow()}
+        # Sorted, so concurrent writers lock the counter rows in the same order
+        for (metric, key), value in sorted(counts.items())
+        if value or not add
+    ]
+    if not rows:
+        return
+    table = CorpusStat.__table__
+    stmt = _insert_for(session)(table)
+    value = table.c.value + stmt.excluded.value if add else stmt.excluded.value
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.project_id, table.c.metric, table.c.key],
+        set_={"value": value, "updated_at": stmt.excluded.updated_at},
+    )
+    session.execute(stmt, rows)
+
+
+def bump_stats(
+    session: Session, project_id: Optional[int], counts: Mapping[StatKey, int]
+) -> None:
+    """
+    Add {(metric, key): delta} to a project's counters in the caller's
+    transaction. Bump just before committing, so the counter rows are only
+    locked briefly.
+    """
+    _upsert(session, _scope(project_id), counts)
+
+
+def _document_keys(doc: Document) -> Counter:
+    keys = Counter({("documents", ""): 1, ("doc_type", doc.doc_type or "unknown"): 1})
+    day = (doc.created_at or datetime.utcnow()).date().isoformat()
+    keys[("documents_by_day", day)] += 1
+    return keys
+
+
+def _negate(counts: Mapping[StatKey, int]) -> Counter:
+    return Counter({k: -v for k, v in counts.items()})
+
+
+def record_document(session: Session, doc: Document) -> None:
+    """Count a new document (total, type, creation day) for its project."""
+    bump_stats(session, doc.project_id, _document_keys(doc))
+
+
+def record_rows(session: Session, doc_id: int, **counts: int) -> None:
+    """
+    Count rows added for a document, e.g. record_rows(session, doc_id,
+    chunks=40, timeline_events=3). Names are ROW_METRICS.
+    """
+    counts = {name: n for name, n in counts.items() if n}
+    if not counts:
+        return
+    unknown = set(counts) - set(ROW_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown corpus stats metric(s): {sorted(unknown)}")
+    project_id = session.query(Document.project_id).filter(Document.id == doc_id).scalar()
+    bump_stats(session, project_id, {(name, ""): n for name, n in counts.items()})
+
+
+def document_row_counts(session: Session, doc_id: int) -> Dict[str, int]:
+    """The ROW_METRICS counts one document contributes."""
+    return {
+        "chunks": session.query(func.count(Chunk.id)).filter(Chunk.doc_id == doc_id).scalar(),
+        "anomalies": session.query(func.count(Anomaly.id))
+        .join(Chunk, Anomaly.chunk_id == Chunk.id)
+        .filter(Chunk.doc_id == doc_id)
+        .scalar(),
+        "tables": session.query(func.count(ExtractedTable.id))
+        .filter(ExtractedTable.doc_id == doc_id)
+        .scalar(),
+        "timeline_events": session.query(func.count(TimelineEvent.id))
+        .filter(TimelineEvent.doc_id == doc_id)
+        .scalar(),
+    }
+
+
+def _contribution(doc: Document, row_counts: Mapping[str, int]) -> Counter:
+    counts = _document_keys(doc)
+    counts.update({(name, ""): row_counts.get(name) or 0 for name in ROW_METRICS})
+    return counts
+
+
+def forget_document(session: Session, doc: Document, **row_counts: int) -> None:
+    """
+    Take a deleted document's share back out of its project's counters.
+    row_counts are the ROW_METRICS rows deleted with it.
+    """
+    bump_stats(session, doc.project_id, _negate(_contribution(doc, row_counts)))
+
+
+def move_document(
+    session: Session, doc: Document, from_project_id: Optional[int], to_project_id: Optional[int]
+) -> None:
+    """Move a document's share of the counters from one project to another."""
+    if _scope(from_project_id) == _scope(to_project_id):
+        return
+    counts = _contribution(doc, document_row_counts(session, doc.id))
+    bump_stats(session, from_project_id, _negate(counts))
+    bump_stats(session, to_project_id, counts)
+
+
+def merge_project_stats(session: Session, from_project_id: int, to_project_id: int) -> None:
+    """Fold every counter of one project into another (when a project is deleted)."""
+    rows = session.query(CorpusStat).filter(CorpusStat.project_id == from_project_id).all()
+    bump_stats(session, to_project_id, {(r.metric, r.key): r.value for r in rows})
+    session.query(CorpusStat).filter(CorpusStat.project_id == from_project_id).delete(
+        synchronize_session=False
+    )
+
+
+def _graph_version(session: Session) -> int:
+    version = session.query(GraphVersion.version).filter(GraphVersion.id == 1).scalar()
+    return version or 0
+
+
+def refresh_graph_stats(session: Session, version: Optional[int] = None) -> None:
+    """Recompute the corpus-wide entity graph snapshot. The caller commits."""
+    if version is None:
+        version = _graph_version(session)
+    counts: Dict[StatKey, int] = {}
+    total = mentions = 0
+    lows, highs = [], []
+    for label, n, total_mentions, low, high in session.query(
+        CanonicalEntity.label,
+        func.count(CanonicalEntity.id),
+        func.sum(CanonicalEntity.total_mentions),
+        func.min(CanonicalEntity.total_mentions),
+        func.max(CanonicalEntity.total_mentions),
+    ).group_by(CanonicalEntity.label):
+        if label:
+            counts[("entity_type", label)] = n
+        total += n
+        mentions += total_mentions or 0
+        lows.append(low or 0)
+        highs.append(high or 0)
+    counts.update({
+        ("entities", ""): total,
+        ("entity_mentions", ""): mentions,
+        ("entity_mentions_min", ""): min(lows, default=0),
+        ("entity_mentions_max", ""): max(highs, default=0),
+        ("relationships", ""): session.query(func.count(EntityRelationship.id)).scalar() or 0,
+        ("graph_version", ""): version,
+    })
+    session.query(CorpusStat).filter(CorpusStat.project_id == CORPUS_WIDE).delete(
+        synchronize_session=False
+    )
+    _upsert(session, CORPUS_WIDE, counts, add=False)
+
+
+def rebuild_corpus_stats(session: Session) -> None:
+    """
+    Recompute every counter from the source tables. Counts written by the
+    pipeline while this runs can be lost, so run it while ingestion is idle.
+    The caller commits.
+    """
+    per_project: Dict[int, Counter] = defaultdict(Counter)
+    for project_id, doc_type, day, n in session.query(
+        Document.project_id,
+        Document.doc_type,
+        func.date(Document.created_at),
+        func.count(Document.id),
+    ).group_by(Document.project_id, Document.doc_type, func.date(Document.created_at)):
+        counts = per_project[_scope(project_id)]
+        counts[("documents", "")] += n
+        counts[("doc_type", doc_type or "unknown")] += n
+        if day is not None:
+            counts[("documents_by_day", str(day))] += n
+
+    for name, model, join_chunks in (
+        ("chunks", Chunk, False),
+        ("anomalies", Anomaly, True),
+        ("tables", ExtractedTable, False),
+        ("timeline_events", TimelineEvent, False),
+    ):
+        query = session.query(Document.project_id, func.count(model.id)).select_from(model)
+        if join_chunks:
+            query = query.join(Chunk, model.chunk_id == Chunk.id).join(
+                Document, Chunk.doc_id == Document.id
+            )
+        else:
+            query = query.join(Document, model.doc_id == Document.id)
+        for project_id, n in query.group_by(Document.project_id):
+            per_project[_scope(project_id)][(name, "")] += n
+
+    session.query(CorpusStat).delete(synchronize_session=False)
+    for project_id, counts in per_project.items():
+        _upsert(session, project_id, counts, add=False)
+    refresh_graph_stats(session)
+    logger.info(f"Rebuilt corpus stats for {len(per_project)} project(s)")
+
+
+def _ensure_fresh(session: Session) -> None:
+    """Build the table on first use; refresh a graph snapshot gone stale."""
+    try:
+        stamp = session.get(CorpusStat, (CORPUS_WIDE, "graph_version", ""))
+        if stamp is None:
+            rebuild_corpus_stats(session)
+            session.commit()
+            return
+        version = _graph_version(session)
+        interval = float(get_config("corpus_stats.graph_refresh_seconds", 30))
+        age = (datetime.utcnow() - (stamp.updated_at or datetime.min)).total_seconds()
+        if stamp.value != version and age >= interval:
+            refresh_graph_stats(session, version)
+            session.commit()
+    except Exception as e:
+        # Serve the counters as they are rather than failing the dashboard
+        session.rollback()
+        logger.warning(f"Corpus stats refresh failed: {e}")
+
+
+def _empty_block() -> Dict[str, Any]:
+    return {
+        "documents": 0,
+        "doc_types": {},
+        "recent_documents": 0,
+        **{name: 0 for name in ROW_METRICS},
+    }
+
+
+def read_corpus_stats(
+    session: Session, project_id: Optional[int] = None, now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Corpus statistics from the materialised counters.
+
+    Returns the document metrics (documents, doc_types, recent_documents over
+    the last RECENT_DAYS days, chunks, anomalies, tables, timeline_events)
+    for one project (project_id, 0 for documents without one) or the whole
+    corpus with a "by_project" breakdown, plus the corpus-wide entity graph
+    metrics: entities, entity_types, entity_mentions (total/min/max/avg) and
+    relationships.
+    """
+    _ensure_fresh(session)
+    cutoff = ((now or datetime.utcnow()) - timedelta(days=RECENT_DAYS)).date().isoformat()
+    query = session.query(
+        CorpusStat.project_id, CorpusStat.metric, CorpusStat.key, CorpusStat.value
+    ).filter(or_(CorpusStat.metric != "documents_by_day", CorpusStat.key >= cutoff))
+    if project_id is not None:
+        query = query.filter(CorpusStat.project_id.in_([project_id, CORPUS_WIDE]))
+
+    blocks: Dict[int, Dict[str, Any]] = defaultdict(_empty_block)
+    graph: Dict[StatKey, int] = {}
+    for scope, metric, key, value in query:
+        if scope == CORPUS_WIDE:
+            graph[(metric, key)] = value
+            continue
+        block = blocks[scope]
+        if metric == "doc_type":
+            if value:
+                block["doc_types"][key] = value
+        elif metric == "documents_by_day":
+            block["recent_documents"] += value
+        elif metric in block:
+            block[metric] += value
+
+    if project_id is None:
+        result = _empty_block()
+        for block in blocks.values():
+            for name, value in block.items():
+                if name == "doc_types":
+                    for doc_type, n in value.items():
+                        result["doc_types"][doc_type] = result["doc_types"].get(doc_type, 0) + n
+                else:
+                    result[name] += value
+        result["by_project"] = dict(blocks)
+    else:
+        result = blocks[project_id] if project_id in blocks else _empty_block()
+
+    entities = graph.get(("entities", ""), 0)
+    mentions = graph.get(("entity_mentions", ""), 0)
+    result.update({
+        "entities": entities,
+        "entity_types": {
+            key: value for (metric, key), value in graph.items() if metric == "entity_type"
+        },
+        "entity_mentions": {
+            "total": mentions,
+            "min": graph.get(("entity_mentions_min", ""), 0),
+            "max": graph.get(("entity_mentions_max", ""), 0),
+            "avg": round(mentions / entities, 1) if entities else 0,
+        },
+        "relationships": graph.get(("relationships", ""), 0),
+    })
+    return result
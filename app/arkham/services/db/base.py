@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Union
+from typing import Dict, Iterable, Iterator, List, Union
+
+EmbeddingResult = Dict[str, Union[List[float], Dict[int, float]]]
 
 
 class EmbeddingProvider(ABC):
@@ -12,7 +14,7 @@ class EmbeddingProvider(ABC):
         pass
 
     @abstractmethod
-    def encode(self, text: str) -> Dict[str, Union[List[float], Dict[int, float]]]:
+    def encode(self, text: str) -> EmbeddingResult:
         """
         Encode text into dense and sparse vectors.
 
@@ -23,3 +25,33 @@ class EmbeddingProvider(ABC):
             }
         """
         pass
+
+    def encode_batch(
+        self, texts: List[str], batch_size: int = 32
+    ) -> List[EmbeddingResult]:
+        """
+        Encode a list of texts, returning one result per text in input order.
+
+        Providers should override this with a batched forward pass; the default
+        falls back to encoding one text at a time.
+        """
+        return [self.encode(text) for text in texts]
+
+    def iter_encode(
+        self, texts: Iterable[str], batch_size: int = 32
+    ) -> Iterator[EmbeddingResult]:
+        """
+        Lazily encode an iterable of texts, yielding results in input order.
+
+        At most `batch_size` texts (and their vectors) are held in memory at a
+        time, so arbitrarily large corpora can be streamed through the model.
+        """
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                yield from self.encode_batch(batch, batch_size=batch_size)
+                batch = []
+
+        if batch:
+            yield from self.encode_batch(batch, batch_size=batch_size)
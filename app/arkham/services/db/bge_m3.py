@@ -53,3 +53,15 @@ class BGEM3Provider(EmbeddingProvider):
             "dense": output["dense_vecs"].tolist(),
             "sparse": output["lexical_weights"],
         }
+
+    def encode_batch(self, texts: list, batch_size: int = 32) -> list:
+        """Encode several texts in batched forward passes of `batch_size`."""
+        if not texts:
+            return []
+        output = self.model.encode(
+            texts, batch_size=batch_size, return_dense=True, return_sparse=True
+        )
+        return [
+            {"dense": dense.tolist(), "sparse": sparse}
+            for dense, sparse in zip(output["dense_vecs"], output["lexical_weights"])
+        ]
@@ -0,0 +1,205 @@
+"""
+Process-wide database engine, session factory and Qdrant client.
+
+Every service, worker and state module should get its connections from here
+instead of calling create_engine()/QdrantClient() itself. Each engine owns a
+connection pool, so building one per module (or per call) multiplies the
+number of open Postgres connections and pays connect latency on hot paths.
+
+Pool settings are read from the `database` section of config.yaml:
+
+    database:
+      pool_size: 5
+      max_overflow: 10
+      pool_pre_ping: true
+      pool_recycle: 1800
+      pool_timeout: 30
+
+Everything is created lazily on first use, so importing a module that uses
+these helpers never opens a connection.
+"""
+
+import logging
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services.config import get_config
+from config.settings import DATABASE_URL, QDRANT_URL
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_engine = None
+_session_factory = None
+_qdrant_client = None
+_qdrant_probe_client = None
+
+# Checkout counters for get_pool_stats(); guarded by _stats_lock
+_stats_lock = threading.Lock()
+_stats = {
+    "connects": 0,
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidated": 0,
+}
+
+
+def _pool_settings():
+    """Read pool settings from config.yaml (with the previous SQLAlchemy defaults)."""
+    return {
+        "pool_size": int(get_config("database.pool_size", 5)),
+        "max_overflow": int(get_config("database.max_overflow", 10)),
+        "pool_pre_ping": bool(get_config("database.pool_pre_ping", True)),
+        "pool_recycle": int(get_config("database.pool_recycle", 1800)),
+        "pool_timeout": int(get_config("database.pool_timeout", 30)),
+    }
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _install_pool_listeners(engine):
+    """Count connects, checkouts, checkins and invalidations on the engine."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _bump("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _bump("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _bump("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _bump("invalidated")
+
+
+def get_engine():
+    """
+    Get the shared SQLAlchemy engine, creating it on first use.
+
+    SQLite URLs (used by tests and local tooling) don't accept the queue pool
+    arguments, so those are only applied to server databases.
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                if DATABASE_URL.startswith("sqlite"):
+                    engine = create_engine(DATABASE_URL)
+                else:
+                    settings = _pool_settings()
+                    engine = create_engine(DATABASE_URL, **settings)
+                    logger.info(
+                        "Created shared database engine (pool_size=%s, max_overflow=%s)",
+                        settings["pool_size"],
+                        settings["max_overflow"],
+                    )
+                _install_pool_listeners(engine)
+                _engine = engine
+    return _engine
+
+
+def get_session_factory():
+    """
+    Get the shared sessionmaker bound to get_engine().
+
+    Usage mirrors a module-level sessionmaker:
+        Session = get_session_factory()
+        session = Session()
+    """
+    global _session_factory
+    if _session_factory is None:
+        engine = get_engine()
+        with _lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(bind=engine)
+    return _session_factory
+
+
+def get_session():
+    """Open a new session from the shared factory (caller must close it)."""
+    return get_session_factory()()
+
+
+def get_qdrant_client():
+    """Get the shared Qdrant client, creating it on first use."""
+    global _qdrant_client
+    if _qdrant_client is None:
+        with _lock:
+            if _qdrant_client is None:
+                from qdrant_client import QdrantClient
+
+                _qdrant_client = QdrantClient(
+                    url=QDRANT_URL, timeout=int(get_config("vector_store.timeout", 30))
+                )
+    return _qdrant_client
+
+
+def get_qdrant_probe_client():
+    """
+    Get a Qdrant client for health checks and the startup collection check.
+    It uses the short vector_store.health_timeout, so an unreachable Qdrant
+    is reported quickly instead of after the shared client's request timeout.
+    """
+    global _qdrant_probe_client
+    if _qdrant_probe_client is None:
+        with _lock:
+            if _qdrant_probe_client is None:
+                from qdrant_client import QdrantClient
+
+                _qdrant_probe_client = QdrantClient(
+                    url=QDRANT_URL, timeout=int(get_config("vector_store.health_timeout", 5))
+                )
+    return _qdrant_probe_client
+
+
+def get_pool_stats():
+    """
+    Snapshot of connection pool usage for monitoring.
+
+    Returns:
+        Dict with the configured pool size, current checked-in/checked-out/
+        overflow counts and lifetime connect/checkout/checkin/invalidation
+        counters.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    engine = _engine
+    pool = engine.pool if engine is not None else None
+    stats["initialized"] = engine is not None
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        stats[name] = method() if callable(method) else None
+    if stats["overflow"] is not None:
+        # QueuePool counts overflow from -pool_size; report only real overflow
+        stats["overflow"] = max(stats["overflow"], 0)
+    stats["status"] = pool.status() if pool is not None else "not initialized"
+    return stats
+
+
+def dispose_engine(close=True):
+    """
+    Drop pooled connections.
+
+    With close=False the connections are forgotten without being closed,
+    which is what a forked child must do so it never shares a socket with
+    its parent (RQ forks a work horse per job).
+    """
+    engine = _engine
+    if engine is not None:
+        engine.dispose(close=close)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: dispose_engine(close=False))
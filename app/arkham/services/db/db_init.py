@@ -4,15 +4,16 @@ from pathlib import Path
 
 import subprocess
 
-from config.settings import DATABASE_URL, QDRANT_URL
+from config.settings import QDRANT_URL
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
 logger = logging.getLogger(__name__)
 
 # Import base models to ensure they're registered with SQLAlchemy
 from app.arkham.services.db.models import Base
+from app.arkham.services.db.connection import get_engine, get_qdrant_probe_client
 
 
 def _table_exists(engine, table_name: str) -> bool:
@@ -134,6 +135,145 @@ def _run_phase5_migration(engine) -> bool:
         return False
 
 
+def _run_relationship_pair_migration(engine) -> bool:
+    """
+    Store each entity relationship once per unordered pair.
+
+    Older builds could write both (a, b) and (b, a), or several rows for the
+    same pair. Fold those into the (min_id, max_id) row with the lowest id
+    (summing co-occurrence counts), then add the unique index that the bulk
+    relationship upsert conflicts on.
+    """
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_indexes WHERE indexname = 'idx_relationship_pair'")
+            ).first()
+            if exists:
+                return True
+
+            logger.info("Deduplicating entity relationships by entity pair...")
+            conn.execute(
+                text("""
+                UPDATE entity_relationships r
+                SET co_occurrence_count = agg.total,
+                    strength = LEAST(1.0 + 0.1 * (agg.total - 1), 10.0)
+                FROM (
+                    SELECT MIN(id) AS keep_id,
+                           SUM(COALESCE(co_occurrence_count, 1)) AS total
+                    FROM entity_relationships
+                    GROUP BY LEAST(entity1_id, entity2_id),
+                             GREATEST(entity1_id, entity2_id)
+                    HAVING COUNT(*) > 1
+                ) agg
+                WHERE r.id = agg.keep_id;
+            """)
+            )
+            conn.execute(
+                text("""
+                DELETE FROM entity_relationships r
+                USING entity_relationships k
+                WHERE LEAST(r.entity1_id, r.entity2_id) = LEAST(k.entity1_id, k.entity2_id)
+                  AND GREATEST(r.entity1_id, r.entity2_id) = GREATEST(k.entity1_id, k.entity2_id)
+                  AND r.id > k.id;
+            """)
+            )
+            conn.execute(
+                text("""
+                UPDATE entity_relationships
+                SET entity1_id = entity2_id, entity2_id = entity1_id
+                WHERE entity1_id > entity2_id;
+            """)
+            )
+            conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_relationship_pair "
+                    "ON entity_relationships(entity1_id, entity2_id);"
+                )
+            )
+            conn.commit()
+            logger.info("✓ entity_relationships unique pair index created")
+
+        return True
+    except Exception as e:
+        logger.error(f"Failed to run relationship pair migration: {e}")
+        return False
+
+
+def _run_minidoc_progress_migration(engine) -> bool:
+    """
+    Add minidocs.pages_done (the OCR completion counter) to older databases,
+    backfilled from the page_ocr rows already saved.
+    """
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'minidocs' AND column_name = 'pages_done'
+            """)
+            ).first()
+            if exists:
+                return True
+
+            logger.info("Adding minidocs.pages_done...")
+            conn.execute(
+                text(
+                    "ALTER TABLE minidocs ADD COLUMN pages_done INTEGER NOT NULL DEFAULT 0;"
+                )
+            )
+            conn.execute(
+                text("""
+                UPDATE minidocs m
+                SET pages_done = (
+                    SELECT COUNT(*) FROM page_ocr p
+                    WHERE p.document_id = m.document_id
+                      AND p.page_num BETWEEN m.page_start AND m.page_end
+                );
+            """)
+            )
+            conn.commit()
+            logger.info("✓ minidocs.pages_done added")
+
+        return True
+    except Exception as e:
+        logger.error(f"Failed to run MiniDoc progress migration: {e}")
+        return False
+
+
+def _run_centroid_chunks_migration(engine) -> bool:
+    """
+    Add document_centroids.chunks_total (the chunk rows a centroid was
+    computed over) to older databases. Existing centroids get their vector
+    count, so partial ones are recomputed once by the next clustering run.
+    """
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'document_centroids' AND column_name = 'chunks_total'
+            """)
+            ).first()
+            if exists:
+                return True
+
+            logger.info("Adding document_centroids.chunks_total...")
+            conn.execute(
+                text(
+                    "ALTER TABLE document_centroids ADD COLUMN chunks_total INTEGER DEFAULT 0;"
+                )
+            )
+            conn.execute(text("UPDATE document_centroids SET chunks_total = chunk_count;"))
+            conn.commit()
+            logger.info("✓ document_centroids.chunks_total added")
+
+        return True
+    except Exception as e:
+        logger.error(f"Failed to run centroid chunks migration: {e}")
+        return False
+
+
 def _run_additional_indexes(engine) -> bool:
     """Create additional indexes for performance."""
     try:
@@ -163,6 +303,52 @@ def _run_additional_indexes(engine) -> bool:
         return True  # Non-critical
 
 
+def _ensure_chunk_trigram_index(engine) -> bool:
+    """
+    Trigram GIN index on chunks.text, so regex search can narrow candidate
+    chunks with LIKE '%literal%' (services/regex_service.py). Needs the
+    pg_trgm extension; without it, regex search scans every chunk.
+    """
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS idx_chunks_text_trgm "
+                    "ON chunks USING gin (text gin_trgm_ops);"
+                )
+            )
+            conn.commit()
+            logger.debug("✓ Chunk trigram index ensured")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to create chunk trigram index (pg_trgm): {e}")
+        return True  # Non-critical
+
+
+def _run_corpus_stats_backfill(engine) -> bool:
+    """
+    Build the materialised corpus counters (services/corpus_stats.py) for
+    databases that predate them, so the first dashboard load does not.
+    """
+    try:
+        from sqlalchemy.orm import Session
+
+        from app.arkham.services.corpus_stats import CORPUS_WIDE, rebuild_corpus_stats
+        from app.arkham.services.db.models import CorpusStat
+
+        with Session(engine) as session:
+            if session.get(CorpusStat, (CORPUS_WIDE, "graph_version", "")) is None:
+                logger.info("Building corpus statistics...")
+                rebuild_corpus_stats(session)
+                session.commit()
+                logger.info("✓ Corpus statistics built")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to build corpus statistics: {e}")
+        return True  # Non-critical: readers build them on first use
+
+
 def _get_embedding_dimension() -> int:
     """
     Get the vector dimension based on configured embedding provider.
@@ -204,14 +390,14 @@ def _ensure_qdrant_collection() -> bool:
     - minilm-bm25: 384 dimensions (lightweight, English-only, ~80MB)
     """
     try:
-        from qdrant_client import QdrantClient
         from qdrant_client.http import models
         from qdrant_client.http.exceptions import UnexpectedResponse
 
         collection_name = "arkham_mirror_hybrid"
 
         try:
-            client = QdrantClient(url=QDRANT_URL, timeout=5.0)
+            # Short timeout: startup must not hang on an unreachable Qdrant
+            client = get_qdrant_probe_client()
 
             # Check if collection exists
             collections = client.get_collections().collections
@@ -321,7 +507,7 @@ def ensure_database_ready() -> bool:
     try:
         logger.info("Checking database initialization...")
 
-        engine = create_engine(DATABASE_URL)
+        engine = get_engine()
 
         # Test database connection
         try:
@@ -346,8 +532,19 @@ def ensure_database_ready() -> bool:
         if not _run_phase5_migration(engine):
             return False
 
+        if not _run_relationship_pair_migration(engine):
+            return False
+
+        if not _run_minidoc_progress_migration(engine):
+            return False
+
+        if not _run_centroid_chunks_migration(engine):
+            return False
+
         # Create performance indexes
         _run_additional_indexes(engine)
+        _ensure_chunk_trigram_index(engine)
+        _run_corpus_stats_backfill(engine)
 
         if needs_init:
             logger.info("✓ Database initialization complete!")
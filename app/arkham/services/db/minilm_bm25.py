@@ -35,10 +35,7 @@ class MiniLMBM25Provider(EmbeddingProvider):
     def dense_dimension(self) -> int:
         return 384
 
-    def encode(self, text: str) -> dict:
-        # Dense embedding
-        dense = self.model.encode(text).tolist()
-
+    def _sparse_tf(self, text: str) -> dict:
         # Sparse embedding (TF)
         # We use the model's tokenizer to ensure consistent tokenization
         # Qdrant expects integer indices for sparse vectors
@@ -50,6 +47,19 @@ class MiniLMBM25Provider(EmbeddingProvider):
         counts = Counter(input_ids)
 
         # Convert to float for consistency with BGE-M3 interface
-        sparse = {k: float(v) for k, v in counts.items()}
+        return {k: float(v) for k, v in counts.items()}
+
+    def encode(self, text: str) -> dict:
+        # Dense embedding
+        dense = self.model.encode(text).tolist()
+        return {"dense": dense, "sparse": self._sparse_tf(text)}
 
-        return {"dense": dense, "sparse": sparse}
+    def encode_batch(self, texts: list, batch_size: int = 32) -> list:
+        """Encode several texts in batched dense forward passes of `batch_size`."""
+        if not texts:
+            return []
+        dense_vecs = self.model.encode(texts, batch_size=batch_size)
+        return [
+            {"dense": dense.tolist(), "sparse": self._sparse_tf(text)}
+            for dense, text in zip(dense_vecs, texts)
+        ]
@@ -1,12 +1,15 @@
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     DateTime,
     Float,
     Text,
+    LargeBinary,
     ForeignKey,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -78,6 +81,8 @@ class MiniDoc(Base):
     page_start = Column(Integer)
     page_end = Column(Integer)
     status = Column(String, default="pending_ocr")  # pending_ocr, ocr_done, parsed
+    # Pages with a PageOCR row; see services/minidoc_progress.py
+    pages_done = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -105,6 +110,53 @@ class Chunk(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class DocumentFingerprint(Base):
+    """
+    Near-duplicate fingerprint of a document's full text, computed once when
+    the document finishes processing (see services/fingerprint_utils.py).
+    """
+
+    __tablename__ = "document_fingerprints"
+    doc_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    minhash = Column(LargeBinary, nullable=True)  # uint32 signature; NULL if too short
+    simhash = Column(BigInteger, nullable=True)  # 64-bit SimHash, stored signed
+    shingle_count = Column(Integer, default=0)
+    word_count = Column(Integer, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DocumentSegment(Base):
+    """Normalised paragraph hash per document, for copy-paste detection."""
+
+    __tablename__ = "document_segments"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    doc_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=False)
+    segment_hash = Column(String(32), index=True, nullable=False)  # MD5 hex
+    length = Column(Integer, default=0)  # Paragraph length in characters
+    sample_text = Column(Text)  # First 200 characters
+
+    __table_args__ = (
+        UniqueConstraint("doc_id", "segment_hash", name="uq_document_segment"),
+    )
+
+
+class DocumentCentroid(Base):
+    """
+    Mean dense embedding of a document's chunks, stored when the document
+    finishes embedding so clustering and the cluster map read one row per
+    document instead of every chunk vector. A document whose chunks have no
+    vectors gets an empty vector (dimension 0) so it is not retried.
+    """
+
+    __tablename__ = "document_centroids"
+    doc_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    vector = Column(LargeBinary, nullable=False)  # float32 array
+    dimension = Column(Integer, nullable=False)
+    chunk_count = Column(Integer, default=0)  # Chunk vectors averaged
+    chunks_total = Column(Integer, default=0)  # Chunk rows when computed
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Entity(Base):
     """
     Represents an entity mention found in a document.
@@ -160,6 +212,11 @@ class EntityRelationship(Base):
     """
 
     __tablename__ = "entity_relationships"
+    # One row per unordered pair, stored as (min_id, max_id); bulk upserts
+    # (services/relationship_utils.py) conflict on this key
+    __table_args__ = (
+        Index("idx_relationship_pair", "entity1_id", "entity2_id", unique=True),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     entity1_id = Column(Integer, ForeignKey("canonical_entities.id"), nullable=False)
     entity2_id = Column(Integer, ForeignKey("canonical_entities.id"), nullable=False)
@@ -178,6 +235,73 @@ class EntityRelationship(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class RelationshipBuildProgress(Base):
+    """
+    Documents already counted by relationship_builder.build_all_relationships.
+
+    Written in the same transaction as the document's relationship upsert, so
+    an interrupted build can resume without counting any document twice.
+    """
+
+    __tablename__ = "relationship_build_progress"
+    doc_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    pairs = Column(Integer, default=0)  # Entity pairs upserted for the document
+    built_at = Column(DateTime, default=datetime.utcnow)
+
+
+class GraphVersion(Base):
+    """
+    Single-row counter bumped whenever canonical entities or relationships change.
+
+    The in-memory entity graph (services/graph_cache.py) compares this against
+    the version it was loaded at, so readers only reload after a write.
+    """
+
+    __tablename__ = "graph_version"
+    id = Column(Integer, primary_key=True)  # Always 1
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CorpusStat(Base):
+    """
+    One materialised corpus counter, read by the dashboards instead of
+    counting rows (see services/corpus_stats.py).
+
+    project_id 0 holds documents without a project; -1 holds the corpus-wide
+    entity graph snapshot.
+    """
+
+    __tablename__ = "corpus_stats"
+    project_id = Column(Integer, primary_key=True, autoincrement=False)
+    metric = Column(String, primary_key=True)  # e.g. documents, doc_type, entity_type
+    key = Column(String, primary_key=True, default="")  # e.g. ".pdf", "PERSON", a day
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EntityCentrality(Base):
+    """
+    Influence metrics per canonical entity, computed in the background by
+    workers/centrality_worker.py. Every row of a run carries the graph
+    version it was computed from, so readers can tell when it is stale.
+    """
+
+    __tablename__ = "entity_centrality"
+    canonical_entity_id = Column(Integer, primary_key=True)
+    degree = Column(Integer, default=0)
+    degree_centrality = Column(Float, default=0.0)
+    betweenness = Column(Float, default=0.0)
+    closeness = Column(Float, default=0.0)
+    pagerank = Column(Float, default=0.0)
+    eigenvector = Column(Float, default=0.0)
+    community = Column(Integer, default=0)
+    influence_score = Column(Float, default=0.0, index=True)
+    graph_version = Column(Integer, nullable=False)
+    method = Column(String)  # e.g. "networkx, exact" or "scipy, sampled k=500"
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Anomaly(Base):
     __tablename__ = "anomalies"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -364,7 +488,7 @@ class ContradictionBatch(Base):
 class EntityAnalysisCache(Base):
     """
     Caches analysis state for entities to avoid re-processing unchanged content.
-    Used by contradiction detection to skip entities that haven't changed.
+    Superseded by the LLM cache (LLMCacheEntry); kept for existing databases.
     """
 
     __tablename__ = "entity_analysis_cache"
@@ -426,8 +550,7 @@ class EntityFilterRule(Base):
 class FactComparisonCache(Base):
     """
     Caches fact comparison analysis results to avoid expensive re-analysis.
-    Uses a hash of document/entity IDs as the cache key.
-    Results expire after 24 hours.
+    Superseded by the LLM cache (LLMCacheEntry); kept for existing databases.
     """
 
     __tablename__ = "fact_comparison_cache"
@@ -442,6 +565,41 @@ class FactComparisonCache(Base):
     expires_at = Column(DateTime, nullable=False)  # Cache expiration time
 
 
+class LLMCacheEntry(Base):
+    """
+    One cached LLM answer or LLM-derived result (see services/llm_cache.py).
+
+    `key` is content-addressed: a SHA-256 of the model, schema and normalised
+    prompt (or of a feature's result parameters). `source_hash` ties the entry
+    to the text it was derived from; a different hash at lookup is a miss.
+    """
+
+    __tablename__ = "llm_cache"
+    key = Column(String(64), primary_key=True)
+    feature = Column(String(64), nullable=False, index=True)
+    model = Column(String, default="")
+    value = Column(Text, nullable=False)
+    source_hash = Column(String(64), nullable=True)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)  # LRU eviction
+    expires_at = Column(DateTime, nullable=True)  # NULL: kept until evicted
+
+
+class LLMCacheStat(Base):
+    """Lookup counters of the LLM cache per feature (hit rate)."""
+
+    __tablename__ = "llm_cache_stats"
+    feature = Column(String(64), primary_key=True)
+    hits = Column(BigInteger, nullable=False, default=0)
+    misses = Column(BigInteger, nullable=False, default=0)
+    stale = Column(BigInteger, nullable=False, default=0)  # Source text changed
+    stores = Column(BigInteger, nullable=False, default=0)
+    evictions = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class AnomalyKeyword(Base):
     """
     Configurable keywords for anomaly detection.
@@ -5,27 +5,35 @@ from pathlib import Path
 from typing import List, Dict
 import logging
 
-from config.settings import DATABASE_URL, QDRANT_URL, REDIS_URL, DOCUMENTS_DIR, PAGES_DIR
+from config.settings import REDIS_URL, DOCUMENTS_DIR, PAGES_DIR
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from rq import Queue
 from redis import Redis
-from qdrant_client import QdrantClient
 
 from app.arkham.services.db.models import (
     Document,
     MiniDoc,
     PageOCR,
     Chunk,
+    DocumentCentroid,
+    DocumentFingerprint,
+    DocumentSegment,
     Entity,
     EntityRelationship,
+    RelationshipBuildProgress,
     Anomaly,
     TimelineEvent,
     DateMention,
     SensitiveDataMatch,
     ExtractedTable,
 )
+from app.arkham.services.db.connection import (
+    get_engine,
+    get_session_factory,
+    get_qdrant_client,
+)
+from app.arkham.services.corpus_stats import forget_document, rebuild_corpus_stats
+from app.arkham.services.relationship_utils import bump_graph_version
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,9 +51,9 @@ class DocumentManagementService:
     """Service for managing document lifecycle with proper cleanup."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        self.qdrant_client = QdrantClient(url=QDRANT_URL)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
+        self.qdrant_client = get_qdrant_client()
         self.redis_conn = Redis.from_url(REDIS_URL)
         self.queue = Queue(connection=self.redis_conn)
 
@@ -279,9 +287,30 @@ class DocumentManagementService:
                     .filter(EntityRelationship.doc_id == doc_id)
                     .delete()
                 )
+                session.query(RelationshipBuildProgress).filter(
+                    RelationshipBuildProgress.doc_id == doc_id
+                ).delete()
+                session.query(DocumentFingerprint).filter(
+                    DocumentFingerprint.doc_id == doc_id
+                ).delete()
+                session.query(DocumentSegment).filter(
+                    DocumentSegment.doc_id == doc_id
+                ).delete()
+                session.query(DocumentCentroid).filter(
+                    DocumentCentroid.doc_id == doc_id
+                ).delete()
 
                 # Finally delete the document itself
+                forget_document(
+                    session,
+                    doc,
+                    chunks=chunks_deleted,
+                    anomalies=anomalies_deleted,
+                    tables=tables_deleted,
+                    timeline_events=timeline_deleted,
+                )
                 session.delete(doc)
+                bump_graph_version(session)
                 session.commit()
 
                 total_deleted = (
@@ -477,6 +506,7 @@ class DocumentManagementService:
             # 2. Delete all database entries
             doc_count = session.query(Document).count()
             session.query(Document).delete()
+            rebuild_corpus_stats(session)
             session.commit()
             results["documents_deleted"] = doc_count
             logger.info(f"Wiped {doc_count} documents from database")
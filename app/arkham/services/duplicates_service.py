@@ -2,91 +2,83 @@
 Fingerprint Duplicate Detector Service
 
 Fuzzy matching for near-duplicate documents:
-- MinHash/SimHash for fast similarity detection
+- MinHash/SimHash fingerprints stored per document at ingest time; missing
+  ones are backfilled by a background job, never inside a scan
+- LSH banding index so near-duplicate search covers the whole corpus
 - Identify plagiarism, template reuse, copy-paste patterns
 - Cluster similar documents by content fingerprint
 """
 
 import os
 import logging
-import hashlib
 import re
+import threading
 from typing import Dict, Any, List, Set
 from datetime import datetime
 from collections import defaultdict
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc, func
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
-from app.arkham.services.db.models import Document, Chunk
+from config.settings import REDIS_URL
+from app.arkham.services.config import get_config
+from app.arkham.services.db.models import (
+    Document,
+    Chunk,
+    DocumentFingerprint,
+    DocumentSegment,
+)
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.fingerprint_utils import (
+    NUM_PERM,
+    SEGMENT_MIN_LENGTH,
+    LSHIndex,
+    create_shingles,
+    hamming_distance,
+    hash_shingles,
+    load_signature,
+    simhash,
+    to_unsigned64,
+    tokenize,
+    unfingerprinted_documents,
+)
 from app.arkham.services.utils.security_utils import get_display_filename
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-
+FINGERPRINT_BACKFILL_JOB_ID = "fingerprint-backfill"
 
 
 class FingerprintService:
     """Service for detecting near-duplicate documents using fingerprinting."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        self.num_perm = 128  # Number of permutations for MinHash
+        self.engine = get_engine()
+        self.Session = get_session_factory()
+        self.num_perm = NUM_PERM  # Number of permutations for MinHash
         self.shingle_size = 5  # Words per shingle
 
+        # LSH index over the stored MinHash signatures, synced incrementally
+        self._lsh = LSHIndex(NUM_PERM, get_config("duplicates.lsh_bands", 42))
+        self._indexed_at: Dict[int, datetime] = {}  # doc_id -> computed_at
+        self._simhashes: Dict[int, int] = {}
+        self._index_lock = threading.Lock()
+
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize text into words."""
-        text = text.lower()
-        text = re.sub(r"[^\w\s]", " ", text)
-        words = text.split()
-        return [w for w in words if len(w) > 2]
+        return tokenize(text)
 
     def _create_shingles(self, text: str) -> Set[str]:
         """Create word-based shingles from text."""
-        words = self._tokenize(text)
-        if len(words) < self.shingle_size:
-            return {" ".join(words)} if words else set()
-
-        shingles = set()
-        for i in range(len(words) - self.shingle_size + 1):
-            shingle = " ".join(words[i : i + self.shingle_size])
-            shingles.add(shingle)
-        return shingles
+        return create_shingles(self._tokenize(text), self.shingle_size)
 
     def _simhash(self, text: str) -> int:
         """Compute SimHash fingerprint for text."""
-        shingles = self._create_shingles(text)
-        if not shingles:
-            return 0
-
-        v = [0] * 64
-        for shingle in shingles:
-            h = int(hashlib.md5(shingle.encode()).hexdigest(), 16)
-            for i in range(64):
-                bit = (h >> i) & 1
-                if bit:
-                    v[i] += 1
-                else:
-                    v[i] -= 1
-
-        fingerprint = 0
-        for i in range(64):
-            if v[i] > 0:
-                fingerprint |= 1 << i
-        return fingerprint
+        return simhash(hash_shingles(self._create_shingles(text)))
 
     def _hamming_distance(self, hash1: int, hash2: int) -> int:
         """Compute Hamming distance between two hashes."""
-        xor = hash1 ^ hash2
-        count = 0
-        while xor:
-            count += xor & 1
-            xor >>= 1
-        return count
+        return hamming_distance(hash1, hash2)
 
     def _jaccard_similarity(self, set1: Set[str], set2: Set[str]) -> float:
         """Compute Jaccard similarity between two sets."""
@@ -122,66 +114,131 @@ class FingerprintService:
         finally:
             session.close()
 
-    def find_similar_documents(self, threshold: float = 0.7) -> List[Dict[str, Any]]:
-        """Find all pairs of similar documents in the corpus."""
+    def get_fingerprint_status(self) -> Dict[str, Any]:
+        """
+        Count processed documents that have no fingerprint yet, and queue the
+        background backfill when there are any. Scans only cover documents
+        that are already fingerprinted.
+        """
         session = self.Session()
         try:
-            documents = (
-                session.query(Document)
-                .order_by(desc(Document.created_at))
-                .limit(100)
-                .all()
+            pending = unfingerprinted_documents(session).count()
+        finally:
+            session.close()
+        queued = self.queue_fingerprint_backfill() if pending else False
+        return {"pending": pending, "backfill_queued": queued}
+
+    def queue_fingerprint_backfill(self) -> bool:
+        """
+        Queue the background fingerprint backfill unless one is already
+        pending. Returns True if a job is queued or running.
+        """
+        try:
+            from redis import Redis
+            from rq import Queue
+            from rq.exceptions import NoSuchJobError
+            from rq.job import Job
+
+            redis_conn = Redis.from_url(REDIS_URL)
+            try:
+                job = Job.fetch(FINGERPRINT_BACKFILL_JOB_ID, connection=redis_conn)
+                if job.get_status() in ("queued", "started", "deferred", "scheduled"):
+                    return True
+            except NoSuchJobError:
+                pass
+
+            # By path, so the UI process never imports the worker modules
+            Queue("default", connection=redis_conn).enqueue(
+                "app.arkham.services.workers.fingerprint_worker.backfill_fingerprints_job",
+                job_id=FINGERPRINT_BACKFILL_JOB_ID,
+                job_timeout="4h",
             )
+            logger.info("Queued fingerprint backfill")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not queue fingerprint backfill: {e}")
+            return False
 
-            # Compute fingerprints for all documents
-            fingerprints = []
-            for doc in documents:
-                chunks = session.query(Chunk).filter_by(doc_id=doc.id).all()
-                full_text = " ".join([c.text for c in chunks])
+    def _sync_index(self, session):
+        """
+        Bring the LSH index up to date with the stored fingerprints: add new or
+        recomputed signatures and drop deleted documents. Call under _index_lock.
+        """
+        stored = dict(
+            session.query(DocumentFingerprint.doc_id, DocumentFingerprint.computed_at)
+            .filter(DocumentFingerprint.minhash.isnot(None))
+            .all()
+        )
+        for doc_id in set(self._indexed_at) - set(stored):
+            self._lsh.remove(doc_id)
+            self._simhashes.pop(doc_id, None)
+            del self._indexed_at[doc_id]
+
+        changed = [
+            doc_id
+            for doc_id, computed_at in stored.items()
+            if self._indexed_at.get(doc_id) != computed_at
+        ]
+        for i in range(0, len(changed), 500):
+            rows = (
+                session.query(
+                    DocumentFingerprint.doc_id,
+                    DocumentFingerprint.minhash,
+                    DocumentFingerprint.simhash,
+                    DocumentFingerprint.computed_at,
+                )
+                .filter(DocumentFingerprint.doc_id.in_(changed[i : i + 500]))
+                .all()
+            )
+            for doc_id, minhash, simhash_value, computed_at in rows:
+                self._lsh.add(doc_id, load_signature(minhash))
+                self._simhashes[doc_id] = to_unsigned64(simhash_value or 0)
+                self._indexed_at[doc_id] = computed_at
+
+        if changed:
+            logger.info(
+                f"LSH index: {len(changed)} signatures added, {len(self._lsh)} total"
+            )
 
-                if len(full_text) < 50:  # Skip very short documents
-                    continue
+    def find_similar_documents(self, threshold: float = 0.7) -> List[Dict[str, Any]]:
+        """
+        Find all pairs of similar documents in the corpus.
 
-                simhash = self._simhash(full_text)
-                shingles = self._create_shingles(full_text)
+        Candidate pairs come from the LSH index; their similarity is the MinHash
+        estimate of the Jaccard similarity of their word shingles.
+        """
+        session = self.Session()
+        try:
+            with self._index_lock:
+                self._sync_index(session)
+                matches = []
+                for doc1, doc2 in self._lsh.candidate_pairs():
+                    similarity = self._lsh.similarity(doc1, doc2)
+                    if similarity >= threshold:
+                        hamming = self._hamming_distance(
+                            self._simhashes[doc1], self._simhashes[doc2]
+                        )
+                        matches.append((doc1, doc2, similarity, hamming))
 
-                fingerprints.append(
-                    {
-                        "document_id": doc.id,
-                        "filename": get_display_filename(doc),
-                        "simhash": simhash,
-                        "shingles": shingles,
-                        "word_count": len(self._tokenize(full_text)),
-                    }
-                )
+            doc_ids = {doc_id for pair in matches for doc_id in pair[:2]}
+            filenames = {}
+            for i in range(0, len(doc_ids), 500):
+                batch = list(doc_ids)[i : i + 500]
+                for doc in session.query(Document).filter(Document.id.in_(batch)):
+                    filenames[doc.id] = get_display_filename(doc)
 
-            # Find similar pairs
-            similar_pairs = []
-            for i in range(len(fingerprints)):
-                for j in range(i + 1, len(fingerprints)):
-                    fp1 = fingerprints[i]
-                    fp2 = fingerprints[j]
-
-                    # Quick check with SimHash (Hamming distance)
-                    hamming = self._hamming_distance(fp1["simhash"], fp2["simhash"])
-                    if hamming > 20:  # Too different based on SimHash
-                        continue
-
-                    # Detailed check with Jaccard similarity
-                    jaccard = self._jaccard_similarity(fp1["shingles"], fp2["shingles"])
-
-                    if jaccard >= threshold:
-                        similar_pairs.append(
-                            {
-                                "doc1_id": fp1["document_id"],
-                                "doc1_filename": fp1["filename"],
-                                "doc2_id": fp2["document_id"],
-                                "doc2_filename": fp2["filename"],
-                                "similarity": round(jaccard * 100, 1),
-                                "hamming_distance": hamming,
-                                "match_type": self._classify_match(jaccard),
-                            }
-                        )
+            similar_pairs = [
+                {
+                    "doc1_id": doc1,
+                    "doc1_filename": filenames.get(doc1, "Unknown"),
+                    "doc2_id": doc2,
+                    "doc2_filename": filenames.get(doc2, "Unknown"),
+                    "similarity": round(similarity * 100, 1),
+                    "hamming_distance": hamming,
+                    "match_type": self._classify_match(similarity),
+                }
+                for doc1, doc2, similarity, hamming in matches
+            ]
 
             # Sort by similarity
             similar_pairs.sort(key=lambda x: x["similarity"], reverse=True)
@@ -204,71 +261,59 @@ class FingerprintService:
             return "low_similarity"
 
     def find_copy_paste_patterns(self, min_length: int = 50) -> List[Dict[str, Any]]:
-        """Find shared text segments across documents (copy-paste detection)."""
+        """
+        Find shared text segments across documents (copy-paste detection).
+
+        Uses the paragraph hashes stored per document, so every fingerprinted
+        document is covered. Paragraphs shorter than SEGMENT_MIN_LENGTH are not
+        stored.
+        """
         session = self.Session()
         try:
-            documents = session.query(Document).limit(50).all()
-
-            # Extract paragraphs/segments from each document
-            doc_segments = {}
-            segment_to_docs = defaultdict(list)
-
-            for doc in documents:
-                chunks = session.query(Chunk).filter_by(doc_id=doc.id).all()
-
-                for chunk in chunks:
-                    # Split into paragraphs
-                    paragraphs = [
-                        p.strip()
-                        for p in chunk.text.split("\n\n")
-                        if len(p.strip()) >= min_length
-                    ]
-
-                    for para in paragraphs:
-                        # Normalize for comparison
-                        normalized = " ".join(para.lower().split())
-                        segment_hash = hashlib.md5(normalized.encode()).hexdigest()
-
-                        if doc.id not in doc_segments:
-                            doc_segments[doc.id] = {
-                                "filename": get_display_filename(doc),
-                                "segments": set(),
-                            }
-                        doc_segments[doc.id]["segments"].add(segment_hash)
-
-                        segment_to_docs[segment_hash].append(
-                            {
-                                "doc_id": doc.id,
-                                "filename": get_display_filename(doc),
-                                "original_text": para[:200] + "..."
-                                if len(para) > 200
-                                else para,
-                            }
-                        )
+            min_length = max(min_length, SEGMENT_MIN_LENGTH)
+            doc_count = func.count(func.distinct(DocumentSegment.doc_id))
+            shared = (
+                session.query(DocumentSegment.segment_hash, doc_count)
+                .filter(DocumentSegment.length >= min_length)
+                .group_by(DocumentSegment.segment_hash)
+                .having(doc_count > 1)
+                .order_by(doc_count.desc(), DocumentSegment.segment_hash)
+                .limit(50)
+                .all()
+            )
+            if not shared:
+                return []
+
+            occurrences = defaultdict(list)
+            rows = (
+                session.query(DocumentSegment, Document)
+                .join(Document, Document.id == DocumentSegment.doc_id)
+                .filter(DocumentSegment.segment_hash.in_([h for h, _ in shared]))
+                .order_by(DocumentSegment.doc_id)
+            )
+            for segment, doc in rows:
+                occurrences[segment.segment_hash].append(
+                    {
+                        "doc_id": doc.id,
+                        "filename": get_display_filename(doc),
+                        "original_text": segment.sample_text,
+                    }
+                )
 
-            # Find segments that appear in multiple documents
             shared_patterns = []
-            for segment_hash, occurrences in segment_to_docs.items():
-                if len(occurrences) > 1:
-                    # Deduplicate by doc_id
-                    unique_docs = {}
-                    for occ in occurrences:
-                        if occ["doc_id"] not in unique_docs:
-                            unique_docs[occ["doc_id"]] = occ
-
-                    if len(unique_docs) > 1:
-                        shared_patterns.append(
-                            {
-                                "pattern_hash": segment_hash[:8],
-                                "occurrences": len(unique_docs),
-                                "documents": list(unique_docs.values()),
-                                "sample_text": occurrences[0]["original_text"],
-                            }
-                        )
-
-            # Sort by number of occurrences
-            shared_patterns.sort(key=lambda x: x["occurrences"], reverse=True)
-            return shared_patterns[:50]
+            for segment_hash, _ in shared:
+                documents = occurrences.get(segment_hash)
+                if not documents:
+                    continue
+                shared_patterns.append(
+                    {
+                        "pattern_hash": segment_hash[:8],
+                        "occurrences": len(documents),
+                        "documents": documents,
+                        "sample_text": documents[0]["original_text"],
+                    }
+                )
+            return shared_patterns
 
         finally:
             session.close()
@@ -333,6 +378,7 @@ class FingerprintService:
         similar_pairs = self.find_similar_documents(threshold=0.5)
         clusters = self.cluster_similar_documents(threshold=0.6)
         copy_patterns = self.find_copy_paste_patterns()
+        fingerprints = self.get_fingerprint_status()
 
         # Count by match type
         match_types = defaultdict(int)
@@ -347,6 +393,8 @@ class FingerprintService:
             "partial_overlap": match_types.get("partial_overlap", 0),
             "total_clusters": len(clusters),
             "shared_patterns": len(copy_patterns),
+            "fingerprints_pending": fingerprints["pending"],
+            "backfill_queued": fingerprints["backfill_queued"],
             "analyzed_at": datetime.now().isoformat(),
         }
 
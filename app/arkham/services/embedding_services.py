@@ -1,8 +1,7 @@
-from functools import lru_cache
-
 from app.arkham.services.config import get_config
 from app.arkham.services.db.bge_m3 import BGEM3Provider
 from app.arkham.services.db.minilm_bm25 import MiniLMBM25Provider
+from app.arkham.services.query_embedding_cache import get_query_embedding_cache
 
 _provider_instance = None
 
@@ -36,16 +35,55 @@ def get_provider():
     return _provider_instance
 
 
-@lru_cache(maxsize=1000)
 def embed_hybrid(text):
     """
     Generates hybrid embeddings (dense + sparse) using the configured provider.
 
+    Query embeddings are cached across processes (services/query_embedding_cache.py);
+    each call returns new lists the caller may modify.
+
     Returns:
         {
             "dense": List[float],
             "sparse": Dict[int, float]
         }
     """
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return get_provider().encode(text)
+    return cache.get_or_compute(text, lambda query: get_provider().encode(query))
+
+
+def embed_hybrid_batch(texts, batch_size=None):
+    """
+    Generates hybrid embeddings for a list of texts in batched encodes.
+
+    Bypasses the single-text cache: bulk callers (the embed worker) rarely
+    see the same chunk twice.
+
+    Returns:
+        List of {"dense": ..., "sparse": ...} dicts, in the order of `texts`.
+    """
+    if not texts:
+        return []
+    if batch_size is None:
+        batch_size = get_config("processing.embed_batch_size", 32)
+    provider = get_provider()
+    return provider.encode_batch(list(texts), batch_size=batch_size)
+
+
+def iter_embed_hybrid(texts, batch_size=None):
+    """
+    Streams hybrid embeddings for an iterable of texts.
+
+    Only one batch of texts and vectors is held in memory at a time, so this
+    is the entry point for corpus-wide jobs (clustering, re-indexing,
+    contradiction embeddings).
+
+    Yields:
+        {"dense": ..., "sparse": ...} dicts, in the order of `texts`.
+    """
+    if batch_size is None:
+        batch_size = get_config("processing.embed_batch_size", 32)
     provider = get_provider()
-    return provider.encode(text)
+    yield from provider.iter_encode(texts, batch_size=batch_size)
@@ -13,16 +13,15 @@ while project_root.name != 'ArkhamMirror' and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 import logging
 import os
 import re
 from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 from .db.models import EntityFilterRule, Entity, CanonicalEntity
+from .db.connection import get_engine, get_session_factory
+from .relationship_utils import bump_graph_version
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -34,16 +33,8 @@ class EntityCleanupService:
     """Service for cleaning up and filtering noisy entities."""
 
     def __init__(self):
-        # Robust connection pool settings to prevent hanging
-        self.engine = create_engine(
-            DATABASE_URL,
-            pool_size=3,
-            max_overflow=2,
-            pool_timeout=10,  # Wait max 10s for connection
-            pool_recycle=300,  # Recycle connections after 5 min
-            pool_pre_ping=True,  # Test connection before use
-        )
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
         self._compiled_rules: List[Tuple[re.Pattern, str]] = []
         self._rules_loaded = False
 
@@ -342,6 +333,7 @@ class EntityCleanupService:
                 session.query(CanonicalEntity).filter(
                     CanonicalEntity.id.in_(ids_to_remove)
                 ).delete(synchronize_session=False)
+                bump_graph_version(session)
                 session.commit()
                 result["removed"] = len(ids_to_remove)
 
@@ -16,23 +16,185 @@ while project_root.name != 'ArkhamMirror' and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
+import heapq
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy import create_engine, func, or_
-from sqlalchemy.orm import sessionmaker
+import math
+import threading
+import time
+from collections import defaultdict
+from itertools import chain
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+from sqlalchemy import func, or_
 from datetime import datetime
 
 from .db.models import Entity, CanonicalEntity, EntityRelationship, EntityMergeAudit
-from .entity_resolution import EntityResolver
+from .db.connection import get_engine, get_session_factory
+from .entity_resolution import EntityResolver, notify_canonical_entities_changed
+from .relationship_utils import bump_graph_version, reassign_relationships
 
 logger = logging.getLogger(__name__)
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
+
+# Candidate blocking parameters
+NGRAM_SIZE = 3
+# Minimum share of the shorter name's trigrams that must appear in the other
+MIN_NGRAM_OVERLAP = 0.5
+# Trigrams carried by more names than this are treated like stopwords
+MAX_BLOCK_SIZE = 500
+# Trigram-overlap partners kept per name (exact-key partners are always kept)
+MAX_CANDIDATES_PER_NAME = 50
+# Names blocked before their pairs are handed to scoring
+BLOCK_NAMES = 1000
+
+# get_duplicate_candidates keeps the most similar pairs per
+# (label_filter, min_similarity), so paging does not re-run the dedup pass
+CANDIDATE_CACHE_SIZE = 5000
+CANDIDATE_CACHE_TTL = 300  # Seconds; merges, unlinks and deletes clear it
+_candidate_cache: Dict[Tuple[Optional[str], float], Tuple[float, bool, List[Dict]]] = {}
+_candidate_cache_lock = threading.Lock()
+
+
+def clear_candidate_cache():
+    """Drop the cached candidate rankings (canonical entities changed)."""
+    with _candidate_cache_lock:
+        _candidate_cache.clear()
+
+
+def _name_ngrams(norm: str) -> frozenset:
+    padded = f" {norm} "
+    return frozenset(
+        padded[i : i + NGRAM_SIZE]
+        for i in range(max(len(padded) - NGRAM_SIZE + 1, 1))
+    )
+
+
+def iter_candidate_blocks(
+    entities: Iterable[Tuple[int, str, str]],
+    min_overlap: float = MIN_NGRAM_OVERLAP,
+    max_block_size: int = MAX_BLOCK_SIZE,
+    max_candidates: int = MAX_CANDIDATES_PER_NAME,
+    block_names: int = BLOCK_NAMES,
+) -> Iterator[List[Tuple[float, int, int]]]:
+    """
+    Blocking stage for duplicate detection: pick plausible pairs to score.
+
+    Pairs are only generated within a label, and only when one of:
+    - they share at least `min_overlap` of the shorter name's character
+      trigrams (found with prefix filtering on rare-first trigrams, so
+      common trigrams never produce quadratic blocks). Each name keeps at
+      most `max_candidates` of these partners, the most overlapping ones.
+    - they have the same sorted-token key ("Doe John" / "John Doe")
+    - PERSON only: same last name and first initial ("J. Doe" / "John Doe")
+
+    Pairs are yielded as soon as the names of a block (`block_names` names
+    of one label) have been blocked, so scoring can start before the whole
+    corpus is processed.
+
+    Args:
+        entities: (id, name, label) tuples
+
+    Yields:
+        Lists of (overlap, id1, id2) tuples with id1 < id2, highest overlap
+        first; every pair appears once
+    """
+    by_label = defaultdict(list)
+    for entity_id, name, label in entities:
+        by_label[label].append((entity_id, EntityResolver.normalize_text(name or "")))
+
+    for label, members in by_label.items():
+        ids = [m[0] for m in members]
+        grams = [_name_ngrams(m[1]) for m in members]
+
+        postings = defaultdict(list)
+        for idx, gram_set in enumerate(grams):
+            for gram in gram_set:
+                postings[gram].append(idx)
+
+        # Exact blocking keys
+        keyed = defaultdict(list)
+        for idx, (_, norm) in enumerate(members):
+            words = norm.split()
+            if not words:
+                continue
+            keyed[("tokens", " ".join(sorted(words)))].append(idx)
+            if label == "PERSON" and len(words) > 1:
+                keyed[("person", words[-1], words[0][0])].append(idx)
+
+        keyed_partners = defaultdict(set)
+        for block in keyed.values():
+            if 1 < len(block) <= max_block_size:
+                for x in block:
+                    keyed_partners[x].update(y for y in block if y != x)
+
+        def overlap(x, y):
+            return len(grams[x] & grams[y]) / max(min(len(grams[x]), len(grams[y])), 1)
+
+        emitted = set()
+        block = []
+        for x, gram_set in enumerate(grams):
+            # Trigram overlap via prefix filtering. If x is the shorter name
+            # and shares >= t*|x| trigrams with y, then y must contain at least
+            # one of x's (|x| - ceil(t*|x|) + 1) rarest trigrams.
+            size = len(gram_set)
+            prefix_len = size - math.ceil(min_overlap * size) + 1
+            ordered = sorted(gram_set, key=lambda g: (len(postings[g]), g))
+            found = set()
+            for gram in ordered[:prefix_len]:
+                posting = postings[gram]
+                if len(posting) > max_block_size:
+                    break  # Remaining trigrams are even more common
+                found.update(y for y in posting if y != x and len(grams[y]) >= size)
+
+            scored = [(overlap(x, y), y) for y in found - keyed_partners[x]]
+            scored = [item for item in scored if item[0] >= min_overlap]
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            scored = scored[:max_candidates]
+            scored += [(overlap(x, y), y) for y in keyed_partners[x]]
+
+            for value, y in scored:
+                key = (x, y) if x < y else (y, x)
+                if key in emitted:
+                    continue
+                emitted.add(key)
+                id1, id2 = sorted((ids[x], ids[y]))
+                block.append((value, id1, id2))
+
+            if (x + 1) % block_names == 0 and block:
+                block.sort(key=lambda r: (-r[0], r[1], r[2]))
+                yield block
+                block = []
+
+        if block:
+            block.sort(key=lambda r: (-r[0], r[1], r[2]))
+            yield block
+
+
+def generate_candidate_pairs(
+    entities: Iterable[Tuple[int, str, str]],
+    min_overlap: float = MIN_NGRAM_OVERLAP,
+    max_block_size: int = MAX_BLOCK_SIZE,
+    max_candidates: int = MAX_CANDIDATES_PER_NAME,
+) -> List[Tuple[float, int, int]]:
+    """
+    All pairs of iter_candidate_blocks at once.
+
+    Returns:
+        (overlap, id1, id2) tuples with id1 < id2, highest overlap first
+    """
+    results = [
+        pair
+        for block in iter_candidate_blocks(
+            entities, min_overlap, max_block_size, max_candidates
+        )
+        for pair in block
+    ]
+    results.sort(key=lambda r: (-r[0], r[1], r[2]))
+    return results
 
 
 class EntityDeduplicationService:
@@ -43,14 +205,104 @@ class EntityDeduplicationService:
     def __init__(self):
         self.resolver = EntityResolver()
 
+    def _load_canonical_rows(self, session, label_filter: Optional[str] = None):
+        """Load the columns needed for candidate scoring (no full ORM objects)."""
+        query = session.query(
+            CanonicalEntity.id,
+            CanonicalEntity.canonical_name,
+            CanonicalEntity.label,
+            CanonicalEntity.total_mentions,
+            CanonicalEntity.aliases,
+        )
+        if label_filter:
+            query = query.filter(CanonicalEntity.label == label_filter)
+        return {row.id: row for row in query.all()}
+
+    def _score_pair(self, c1, c2, min_similarity: float) -> Optional[Dict[str, Any]]:
+        """Score one candidate pair; returns the candidate dict or None."""
+        # Calculate similarity
+        similarity = self.resolver.similarity_score(
+            self.resolver.normalize_text(c1.canonical_name),
+            self.resolver.normalize_text(c2.canonical_name),
+        )
+
+        # Check if they match according to resolver rules
+        is_match = self.resolver.is_match(
+            c1.canonical_name,
+            c2.canonical_name,
+            c1.label,
+        )
+
+        # Include if similarity is above threshold or if resolver says they match
+        if similarity < min_similarity and not is_match:
+            return None
+
+        return {
+            "id1": c1.id,
+            "id2": c2.id,
+            "name1": c1.canonical_name,
+            "name2": c2.canonical_name,
+            "label": c1.label,
+            "similarity": round(similarity, 3),
+            "is_auto_match": is_match,
+            "mentions1": c1.total_mentions or 0,
+            "mentions2": c2.total_mentions or 0,
+            "aliases1": self._parse_aliases(c1.aliases),
+            "aliases2": self._parse_aliases(c2.aliases),
+        }
+
+    def iter_duplicate_candidates(
+        self,
+        label_filter: Optional[str] = None,
+        min_similarity: float = 0.75,
+        page_size: int = 100,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream duplicate candidates in pages as they are scored.
+
+        Only pairs that survive blocking (see iter_candidate_blocks) are
+        scored. Each block is scored as soon as blocking has produced it, so
+        the first page arrives after one block rather than the whole corpus;
+        callers that want a running top-N merge the pages.
+
+        Yields:
+            Lists of up to `page_size` candidate dicts (same keys as
+            get_duplicate_candidates), each page sorted by similarity.
+        """
+        session = Session()
+        try:
+            rows = self._load_canonical_rows(session, label_filter)
+        finally:
+            session.close()
+
+        blocks = iter_candidate_blocks(
+            (row.id, row.canonical_name, row.label) for row in rows.values()
+        )
+
+        for block in blocks:
+            scored = []
+            for _, id1, id2 in block:
+                candidate = self._score_pair(rows[id1], rows[id2], min_similarity)
+                if candidate is not None:
+                    scored.append(candidate)
+            scored.sort(key=lambda x: x["similarity"], reverse=True)
+            for start in range(0, len(scored), page_size):
+                yield scored[start : start + page_size]
+
     def get_duplicate_candidates(
         self,
         label_filter: Optional[str] = None,
         min_similarity: float = 0.75,
         limit: int = 100,
+        offset: int = 0,
     ) -> List[Dict[str, Any]]:
         """
-        Get candidate pairs of canonical entities that might be duplicates.
+        Get candidate pairs of canonical entities that might be duplicates,
+        most similar first.
+
+        The top CANDIDATE_CACHE_SIZE pairs (or offset + limit, if more) are
+        kept for CANDIDATE_CACHE_TTL seconds, so later pages are cut from
+        that ranking instead of scoring the corpus again.
 
         Returns:
             List of dicts with keys:
@@ -61,69 +313,26 @@ class EntityDeduplicationService:
                 - mentions1, mentions2: Total mention counts
                 - aliases1, aliases2: List of known aliases
         """
-        session = Session()
-        try:
-            # Get canonical entities
-            query = session.query(CanonicalEntity)
-            if label_filter:
-                query = query.filter(CanonicalEntity.label == label_filter)
-
-            canonicals = query.all()
-
-            candidates = []
-            checked_pairs = set()
-
-            # Compare all pairs
-            for i, c1 in enumerate(canonicals):
-                for c2 in canonicals[i + 1 :]:
-                    # Skip if already checked
-                    pair_key = tuple(sorted([c1.id, c2.id]))
-                    if pair_key in checked_pairs:
-                        continue
-                    checked_pairs.add(pair_key)
-
-                    # Skip if different labels
-                    if c1.label != c2.label:
-                        continue
-
-                    # Calculate similarity
-                    similarity = self.resolver.similarity_score(
-                        self.resolver.normalize_text(c1.canonical_name),
-                        self.resolver.normalize_text(c2.canonical_name),
-                    )
-
-                    # Check if they match according to resolver rules
-                    is_match = self.resolver.is_match(
-                        c1.canonical_name,
-                        c2.canonical_name,
-                        c1.label,
-                    )
+        key = (label_filter, min_similarity)
+        needed = offset + limit
+        with _candidate_cache_lock:
+            cached = _candidate_cache.get(key)
+        if (
+            cached is None
+            or time.monotonic() - cached[0] > CANDIDATE_CACHE_TTL
+            or (len(cached[2]) < needed and not cached[1])
+        ):
+            depth = max(CANDIDATE_CACHE_SIZE, needed)
+            pages = self.iter_duplicate_candidates(label_filter, min_similarity)
+            ranked = heapq.nlargest(
+                depth, chain.from_iterable(pages), key=lambda x: x["similarity"]
+            )
+            # Fewer than asked for: the ranking holds every candidate
+            cached = (time.monotonic(), len(ranked) < depth, ranked)
+            with _candidate_cache_lock:
+                _candidate_cache[key] = cached
 
-                    # Include if similarity is above threshold or if resolver says they match
-                    if similarity >= min_similarity or is_match:
-                        candidates.append(
-                            {
-                                "id1": c1.id,
-                                "id2": c2.id,
-                                "name1": c1.canonical_name,
-                                "name2": c2.canonical_name,
-                                "label": c1.label,
-                                "similarity": round(similarity, 3),
-                                "is_auto_match": is_match,
-                                "mentions1": c1.total_mentions or 0,
-                                "mentions2": c2.total_mentions or 0,
-                                "aliases1": self._parse_aliases(c1.aliases),
-                                "aliases2": self._parse_aliases(c2.aliases),
-                            }
-                        )
-
-            # Sort by similarity descending
-            candidates.sort(key=lambda x: x["similarity"], reverse=True)
-
-            return candidates[:limit]
-
-        finally:
-            session.close()
+        return [dict(c) for c in cached[2][offset : offset + limit]]
 
     def get_entity_details(self, canonical_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -222,18 +431,8 @@ class EntityDeduplicationService:
                 .update({"canonical_entity_id": keep_id}, synchronize_session=False)
             )
 
-            # Update entity relationships
-            rel_updated_1 = (
-                session.query(EntityRelationship)
-                .filter(EntityRelationship.entity1_id == merge_id)
-                .update({"entity1_id": keep_id})
-            )
-
-            rel_updated_2 = (
-                session.query(EntityRelationship)
-                .filter(EntityRelationship.entity2_id == merge_id)
-                .update({"entity2_id": keep_id})
-            )
+            # Update entity relationships (folding pairs that now coincide)
+            rels_updated = reassign_relationships(session, merge_id, keep_id)
 
             # Merge metadata
             keep.total_mentions = (keep.total_mentions or 0) + (
@@ -283,7 +482,7 @@ class EntityDeduplicationService:
                 merged_name=merge.canonical_name,
                 label=keep.label,
                 entities_affected=entities_updated,
-                relationships_affected=rel_updated_1 + rel_updated_2,
+                relationships_affected=rels_updated,
                 merge_type="manual",
                 user_note=user_note,
                 similarity_score=self.resolver.similarity_score(
@@ -298,7 +497,10 @@ class EntityDeduplicationService:
             session.delete(merge)
 
             # Commit changes
+            bump_graph_version(session)
             session.commit()
+            notify_canonical_entities_changed()
+            clear_candidate_cache()
 
             logger.info(
                 f"Merged canonical entities: {keep_id} <- {merge_id} "
@@ -311,7 +513,7 @@ class EntityDeduplicationService:
                 "merged_id": merge_id,
                 "final_name": keep.canonical_name,
                 "entities_updated": entities_updated,
-                "relationships_updated": rel_updated_1 + rel_updated_2,
+                "relationships_updated": rels_updated,
                 "aliases": list(keep_aliases),
             }
 
@@ -381,7 +583,10 @@ class EntityDeduplicationService:
 
             # 6. Delete audit record
             session.delete(audit)
+            bump_graph_version(session)
             session.commit()
+            notify_canonical_entities_changed()
+            clear_candidate_cache()
             
             logger.info(f"Unmerged entity {audit.merged_canonical_id} from {audit.kept_canonical_id}")
             
@@ -428,7 +633,9 @@ class EntityDeduplicationService:
                         0, (canonical.total_mentions or 0) - entity.count
                     )
 
+            bump_graph_version(session)
             session.commit()
+            clear_candidate_cache()
 
             logger.info(
                 f"Unlinked entity {entity_id} from canonical {old_canonical_id}"
@@ -470,6 +677,8 @@ class EntityDeduplicationService:
 
             canonical.aliases = json.dumps(list(aliases))
             session.commit()
+            notify_canonical_entities_changed()
+            clear_candidate_cache()
 
             logger.info(f"Added alias '{alias}' to canonical entity {canonical_id}")
 
@@ -563,10 +772,21 @@ def get_duplicate_candidates(
     label_filter: Optional[str] = None,
     min_similarity: float = 0.75,
     limit: int = 100,
+    offset: int = 0,
 ) -> List[Dict[str, Any]]:
     """Get duplicate entity candidates."""
     service = EntityDeduplicationService()
-    return service.get_duplicate_candidates(label_filter, min_similarity, limit)
+    return service.get_duplicate_candidates(label_filter, min_similarity, limit, offset)
+
+
+def iter_duplicate_candidates(
+    label_filter: Optional[str] = None,
+    min_similarity: float = 0.75,
+    page_size: int = 100,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Stream duplicate entity candidates in pages."""
+    service = EntityDeduplicationService()
+    return service.iter_duplicate_candidates(label_filter, min_similarity, page_size)
 
 
 def get_entity_details(canonical_id: int) -> Optional[Dict[str, Any]]:
@@ -703,6 +923,7 @@ def delete_entity(canonical_id: int) -> Dict[str, Any]:
         # Delete the canonical entity
         session.delete(canonical)
         session.commit()
+        clear_candidate_cache()
 
         logger.info(f"Deleted canonical entity {canonical_id}: '{name}' ({label})")
 
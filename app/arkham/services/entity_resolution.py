@@ -9,8 +9,10 @@ refer to the same real-world entity (e.g., "John Doe" = "J. Doe" = "John D.").
 import json
 import logging
 import re
+import time
+from collections import Counter
 from difflib import SequenceMatcher
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -229,3 +231,289 @@ class EntityResolver:
             aliases.append(sanitized_alias)
 
         return json.dumps(aliases)
+
+
+# Redis key bumped whenever canonical names/aliases change outside the embed
+# worker (manual merges, unmerges, alias edits). Workers holding a
+# CanonicalEntityIndex reload it when they see a new value.
+CANONICAL_INDEX_EPOCH_KEY = "arkham:canonical_index:epoch"
+
+
+def notify_canonical_entities_changed():
+    """Invalidate warm CanonicalEntityIndex instances in other processes."""
+    try:
+        from redis import Redis
+        from config.settings import REDIS_URL
+
+        Redis.from_url(REDIS_URL).incr(CANONICAL_INDEX_EPOCH_KEY)
+    except Exception as e:
+        logger.debug(f"Could not bump canonical index epoch: {e}")
+
+
+def get_canonical_index_epoch(redis_conn) -> Optional[int]:
+    """Read the current canonical index epoch, or None if Redis is unavailable."""
+    try:
+        value = redis_conn.get(CANONICAL_INDEX_EPOCH_KEY)
+        return int(value) if value is not None else 0
+    except Exception as e:
+        logger.debug(f"Could not read canonical index epoch: {e}")
+        return None
+
+
+class CanonicalEntityIndex:
+    """
+    In-memory lookup structure over canonical entities, keyed by label.
+
+    Replaces the per-mention "load every canonical of this label and fuzzy
+    match against all of them" scan with:
+    1. Exact hash lookup on normalized canonical names and aliases
+    2. (last name, first initial) buckets for PERSON
+    3. Character trigram blocking to pick a small set of fuzzy candidates
+
+    Candidates are still confirmed with EntityResolver.is_match, so matching
+    rules are unchanged; only the set of names compared against shrinks.
+
+    The index is meant to be kept warm in a worker process: call sync() once
+    per job to pull in canonicals created by other workers, and upsert()/
+    remove() as this process creates or invalidates canonicals. Wrap changes
+    made inside a database transaction in begin()/commit()/rollback(), so a
+    rolled-back canonical does not stay in the index.
+    """
+
+    NGRAM_SIZE = 3
+    MAX_FUZZY_CANDIDATES = 50
+    # Re-read this many ids below the high-water mark on each sync, to pick up
+    # rows from transactions that committed out of id order.
+    REFRESH_LOOKBACK = 256
+    # Full reload interval, as a backstop for alias edits made elsewhere
+    RELOAD_INTERVAL_SECONDS = 600
+
+    def __init__(self, resolver: Optional[EntityResolver] = None):
+        self.resolver = resolver or EntityResolver()
+        # (canonical_id, label, names) before each change since begin()
+        self._journal: Optional[List[Tuple[int, Optional[str], Optional[List[str]]]]] = None
+        self._clear()
+
+    def _clear(self):
+        self._names: Dict[int, List[str]] = {}  # canonical_id -> raw names
+        self._label_of: Dict[int, str] = {}
+        self._exact: Dict[str, Dict[str, int]] = {}  # label -> norm -> id
+        self._grams: Dict[str, Dict[str, set]] = {}  # label -> gram -> ids
+        self._person: Dict[Tuple[str, str], set] = {}  # (last, initial) -> ids
+        self.max_id = 0
+        self.epoch: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _ngrams(cls, norm: str) -> set:
+        padded = f" {norm} "
+        n = cls.NGRAM_SIZE
+        return {padded[i : i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+    @staticmethod
+    def _person_key(norm: str) -> Optional[Tuple[str, str]]:
+        words = norm.split()
+        if len(words) > 1:
+            return (words[-1], words[0][0])
+        return None
+
+    @staticmethod
+    def _parse_aliases(aliases_json: Optional[str]) -> List[str]:
+        if not aliases_json:
+            return []
+        try:
+            aliases = json.loads(aliases_json)
+            return [a for a in aliases if isinstance(a, str)]
+        except (json.JSONDecodeError, TypeError):
+            return []
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def begin(self):
+        """Start recording changes, so rollback() can undo them."""
+        self._journal = []
+
+    def commit(self):
+        """Keep the changes made since begin()."""
+        self._journal = None
+
+    def rollback(self):
+        """Undo the changes made since begin() (their transaction rolled back)."""
+        journal, self._journal = self._journal, None
+        for canonical_id, label, names in reversed(journal or []):
+            self.remove(canonical_id)
+            if names is not None:
+                self.upsert(canonical_id, label, names)
+
+    def _record(self, canonical_id: int):
+        if self._journal is not None:
+            names = self._names.get(canonical_id)
+            self._journal.append(
+                (canonical_id, self._label_of.get(canonical_id), names and list(names))
+            )
+
+    def upsert(self, canonical_id: int, label: str, names: Iterable[str]):
+        """Insert or replace all names known for a canonical entity."""
+        self._record(canonical_id)
+        self.remove(canonical_id)
+
+        names = [n for n in dict.fromkeys(names) if n]
+        self._names[canonical_id] = names
+        self._label_of[canonical_id] = label
+
+        exact = self._exact.setdefault(label, {})
+        grams = self._grams.setdefault(label, {})
+        for name in names:
+            norm = self.resolver.normalize_text(name)
+            exact.setdefault(norm, canonical_id)
+            for gram in self._ngrams(norm):
+                grams.setdefault(gram, set()).add(canonical_id)
+            if label == "PERSON":
+                key = self._person_key(norm)
+                if key:
+                    self._person.setdefault(key, set()).add(canonical_id)
+
+    def add_name(self, canonical_id: int, name: str):
+        """Register one more alias for an indexed canonical entity."""
+        label = self._label_of.get(canonical_id)
+        if label is None:
+            return
+        self.upsert(canonical_id, label, self._names[canonical_id] + [name])
+
+    def remove(self, canonical_id: int):
+        """Drop a canonical entity (merged away or deleted) from the index."""
+        self._record(canonical_id)
+        names = self._names.pop(canonical_id, None)
+        label = self._label_of.pop(canonical_id, None)
+        if names is None:
+            return
+
+        exact = self._exact.get(label, {})
+        grams = self._grams.get(label, {})
+        for name in names:
+            norm = self.resolver.normalize_text(name)
+            if exact.get(norm) == canonical_id:
+                del exact[norm]
+            for gram in self._ngrams(norm):
+                ids = grams.get(gram)
+                if ids:
+                    ids.discard(canonical_id)
+                    if not ids:
+                        del grams[gram]
+            if label == "PERSON":
+                key = self._person_key(norm)
+                ids = self._person.get(key) if key else None
+                if ids:
+                    ids.discard(canonical_id)
+                    if not ids:
+                        del self._person[key]
+
+    def load_rows(self, rows):
+        """Index (id, canonical_name, label, aliases_json) rows."""
+        for canonical_id, canonical_name, label, aliases in rows:
+            self.upsert(
+                canonical_id,
+                label,
+                [canonical_name] + self._parse_aliases(aliases),
+            )
+            self.max_id = max(self.max_id, canonical_id)
+
+    def sync(self, session, epoch: Optional[int] = None):
+        """
+        Bring the index up to date with the database.
+
+        Performs a full load the first time, when `epoch` changed (someone
+        merged or edited canonicals), or after RELOAD_INTERVAL_SECONDS.
+        Otherwise only fetches canonicals near or above the high-water id.
+        """
+        from app.arkham.services.db.models import CanonicalEntity
+
+        columns = (
+            CanonicalEntity.id,
+            CanonicalEntity.canonical_name,
+            CanonicalEntity.label,
+            CanonicalEntity.aliases,
+        )
+
+        stale = (
+            self.loaded_at is None
+            or (epoch is not None and epoch != self.epoch)
+            or time.monotonic() - self.loaded_at > self.RELOAD_INTERVAL_SECONDS
+        )
+
+        if stale:
+            self._clear()
+            self.load_rows(session.query(*columns).order_by(CanonicalEntity.id))
+            self.epoch = epoch
+            self.loaded_at = time.monotonic()
+            logger.info(f"Loaded canonical entity index ({len(self)} entities)")
+            return
+
+        floor = max(self.max_id - self.REFRESH_LOOKBACK, 0)
+        self.load_rows(
+            session.query(*columns)
+            .filter(CanonicalEntity.id > floor)
+            .order_by(CanonicalEntity.id)
+        )
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _matches(self, mention: str, label: str, canonical_id: int) -> bool:
+        return any(
+            self.resolver.is_match(mention, name, label)
+            for name in self._names.get(canonical_id, ())
+        )
+
+    def candidates(self, mention: str, label: str) -> List[int]:
+        """Canonical ids worth running the full matcher against, best first."""
+        norm = self.resolver.normalize_text(mention)
+        ordered: List[int] = []
+
+        if label == "PERSON":
+            key = self._person_key(norm)
+            if key:
+                ordered.extend(sorted(self._person.get(key, ())))
+
+        grams = self._grams.get(label, {})
+        shared = Counter()
+        for gram in self._ngrams(norm):
+            for canonical_id in grams.get(gram, ()):
+                shared[canonical_id] += 1
+
+        ranked = sorted(shared.items(), key=lambda kv: (-kv[1], kv[0]))
+        seen = set(ordered)
+        for canonical_id, _ in ranked[: self.MAX_FUZZY_CANDIDATES]:
+            if canonical_id not in seen:
+                ordered.append(canonical_id)
+                seen.add(canonical_id)
+
+        return ordered
+
+    def find(self, mention: str, label: str) -> Optional[int]:
+        """
+        Find a matching canonical entity id for a mention.
+
+        Same contract as EntityResolver.find_canonical_match, without
+        scanning every canonical of the label.
+        """
+        norm = self.resolver.normalize_text(mention)
+        exact_id = self._exact.get(label, {}).get(norm)
+        if exact_id is not None:
+            return exact_id
+
+        for canonical_id in self.candidates(mention, label):
+            if self._matches(mention, label, canonical_id):
+                return canonical_id
+
+        return None
@@ -15,12 +15,9 @@ import zipfile
 from io import BytesIO
 from typing import Dict, Any, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc, func
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Document,
@@ -29,6 +26,7 @@ from app.arkham.services.db.models import (
     EntityRelationship,
     SensitiveDataMatch,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -38,8 +36,8 @@ class ExportService:
     """Service for exporting investigation packages."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_entity_report(self, entity_id: int) -> Dict[str, Any]:
         """Generate a detailed report for a single entity."""
@@ -11,36 +11,38 @@ import json
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Chunk,
-    FactComparisonCache,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.llm_service import (
     chat_with_llm,
     FACTS_SCHEMA,
     FACT_COMPARISON_SCHEMA,
 )
+from app.arkham.services.llm_cache import get_llm_cache, result_key
+from app.arkham.services.llm_scheduler import get_llm_scheduler
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Cache settings
+# Cache settings (entries live in the shared LLM cache)
 CACHE_DURATION_HOURS = 24
+RESULTS_FEATURE = "fact_comparison_results"
+EXTRACTION_FEATURE = "fact_extraction"
+COMPARISON_FEATURE = "fact_comparison"
 
 
 class FactComparisonService:
     """Service for cross-document fact comparison and verification."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def _compute_cache_key(
         self,
@@ -49,21 +51,11 @@ class FactComparisonService:
         limit: int = 10,
     ) -> str:
         """Create deterministic cache key from entity and document IDs."""
-        import hashlib
-
-        # Build a unique string representation
-        parts = []
-        if entity_ids:
-            parts.append(f"e:{','.join(str(i) for i in sorted(entity_ids))}")
-        else:
-            parts.append(f"top:{limit}")
-        if doc_ids:
-            parts.append(f"d:{','.join(str(i) for i in sorted(doc_ids))}")
-        else:
-            parts.append("d:all")
-
-        key_string = "|".join(parts)
-        return hashlib.sha256(key_string.encode()).hexdigest()
+        return result_key(
+            RESULTS_FEATURE,
+            sorted(entity_ids) if entity_ids else f"top:{limit}",
+            sorted(doc_ids) if doc_ids else "all",
+        )
 
     def get_cached_results(
         self,
@@ -72,32 +64,21 @@ class FactComparisonService:
         limit: int = 10,
     ) -> dict | None:
         """Check for valid (non-expired) cached results."""
-        from datetime import datetime
-
         cache_key = self._compute_cache_key(entity_ids, doc_ids, limit)
-
-        with self.Session() as session:
-            cache_entry = (
-                session.query(FactComparisonCache)
-                .filter(
-                    FactComparisonCache.cache_key == cache_key,
-                    FactComparisonCache.expires_at > datetime.utcnow(),
+        cache_entry = get_llm_cache().lookup(cache_key, RESULTS_FEATURE)
+
+        if cache_entry:
+            try:
+                results = json.loads(cache_entry.value)
+                results["from_cache"] = True
+                results["cached_at"] = cache_entry.created_at.isoformat()
+                results["expires_at"] = cache_entry.expires_at.isoformat()
+                logger.info(
+                    f"Loaded fact analysis from database cache (key: {cache_key[:8]}...)"
                 )
-                .first()
-            )
-
-            if cache_entry:
-                try:
-                    results = json.loads(cache_entry.results_json)
-                    results["from_cache"] = True
-                    results["cached_at"] = cache_entry.created_at.isoformat()
-                    results["expires_at"] = cache_entry.expires_at.isoformat()
-                    logger.info(
-                        f"Loaded fact analysis from database cache (key: {cache_key[:8]}...)"
-                    )
-                    return results
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse cached JSON: {e}")
+                return results
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse cached JSON: {e}")
 
         return None
 
@@ -109,10 +90,7 @@ class FactComparisonService:
         limit: int = 10,
     ) -> None:
         """Save results to database cache with expiration."""
-        from datetime import datetime, timedelta
-
         cache_key = self._compute_cache_key(entity_ids, doc_ids, limit)
-        expires_at = datetime.utcnow() + timedelta(hours=CACHE_DURATION_HOURS)
 
         # Remove from_cache flag before saving
         results_to_save = {
@@ -121,44 +99,21 @@ class FactComparisonService:
             if k not in ("from_cache", "cached_at", "expires_at")
         }
 
-        with self.Session() as session:
-            # Upsert logic
-            existing = (
-                session.query(FactComparisonCache)
-                .filter(FactComparisonCache.cache_key == cache_key)
-                .first()
-            )
-
-            summary = results_to_save.get("summary", {})
-
-            if existing:
-                existing.results_json = json.dumps(results_to_save)
-                existing.entity_count = summary.get("entities_analyzed", 0)
-                existing.fact_count = summary.get("total_facts", 0)
-                existing.created_at = datetime.utcnow()
-                existing.expires_at = expires_at
-            else:
-                cache_entry = FactComparisonCache(
-                    cache_key=cache_key,
-                    results_json=json.dumps(results_to_save),
-                    entity_count=summary.get("entities_analyzed", 0),
-                    fact_count=summary.get("total_facts", 0),
-                    expires_at=expires_at,
-                )
-                session.add(cache_entry)
-
-            session.commit()
-            logger.info(
-                f"Saved fact analysis to database cache (key: {cache_key[:8]}...)"
-            )
+        get_llm_cache().put(
+            cache_key,
+            RESULTS_FEATURE,
+            json.dumps(results_to_save),
+            ttl_seconds=CACHE_DURATION_HOURS * 3600,
+        )
+        logger.info(f"Saved fact analysis to database cache (key: {cache_key[:8]}...)")
 
     def clear_cache(self) -> int:
         """Clear all cached results. Returns number of entries deleted."""
-        with self.Session() as session:
-            count = session.query(FactComparisonCache).delete()
-            session.commit()
-            logger.info(f"Cleared {count} cache entries")
-            return count
+        count = get_llm_cache().clear(
+            RESULTS_FEATURE, EXTRACTION_FEATURE, COMPARISON_FEATURE
+        )
+        logger.info(f"Cleared {count} cache entries")
+        return count
 
     def extract_facts_from_chunks(
         self, chunks: list, entity_name: str = None
@@ -238,7 +193,13 @@ Extract verifiable facts only. Ensure the JSON is complete and valid."""
             logger.info(f"Prompt length: {len(prompt)} chars")
 
             # Higher max_tokens to prevent truncation of JSON output
-            response = chat_with_llm(prompt, max_tokens=3500, json_schema=FACTS_SCHEMA)
+            response = chat_with_llm(
+                prompt,
+                max_tokens=3500,
+                json_schema=FACTS_SCHEMA,
+                feature=EXTRACTION_FEATURE,
+                sources=[c.text for c in chunks[:10]],
+            )
 
             logger.info(f"LLM response length: {len(response)} chars")
             logger.debug(f"LLM response preview: {response[:500]}...")
@@ -341,7 +302,10 @@ Return valid JSON only."""
         try:
             logger.info(f"Comparing {len(facts)} facts for corroboration/conflicts...")
             response = chat_with_llm(
-                prompt, max_tokens=2000, json_schema=FACT_COMPARISON_SCHEMA
+                prompt,
+                max_tokens=2000,
+                json_schema=FACT_COMPARISON_SCHEMA,
+                feature=COMPARISON_FEATURE,
             )
             logger.info(f"Comparison response length: {len(response)} chars")
 
@@ -512,8 +476,14 @@ Return valid JSON only."""
             total_conflicts = 0
             total_confirmations = 0
 
-            for entity in entities:
-                analysis = self.analyze_entity_facts(entity.id, doc_ids_filter)
+            # Entities are analysed concurrently; the scheduler bounds how
+            # many LLM requests are in flight.
+            analyses = get_llm_scheduler().map(
+                lambda entity_id: self.analyze_entity_facts(entity_id, doc_ids_filter),
+                [entity.id for entity in entities],
+            )
+
+            for entity, analysis in zip(entities, analyses):
                 if "error" not in analysis:
                     results.append(
                         {
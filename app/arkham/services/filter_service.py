@@ -13,13 +13,10 @@ Cross-page filtering capabilities:
 import os
 import logging
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine, func, and_, or_, desc
-from sqlalchemy.orm import sessionmaker
+from datetime import datetime
+from sqlalchemy import func, and_, or_, desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     Document,
     Chunk,
@@ -27,6 +24,8 @@ from app.arkham.services.db.models import (
     Entity,
     EntityRelationship,
 )
+from app.arkham.services.corpus_stats import read_corpus_stats
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -38,8 +37,8 @@ class FilterService:
     """Service for advanced filtering."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_filter_options(self) -> Dict[str, Any]:
         """Get all available filter options."""
@@ -221,30 +220,14 @@ class FilterService:
         """Get entity statistics for filter UI."""
         session = self.Session()
         try:
-            # By type
-            by_type = (
-                session.query(CanonicalEntity.label, func.count(CanonicalEntity.id))
-                .group_by(CanonicalEntity.label)
-                .all()
-            )
-
-            # Mention ranges
-            min_mentions = (
-                session.query(func.min(CanonicalEntity.total_mentions)).scalar() or 0
-            )
-            max_mentions = (
-                session.query(func.max(CanonicalEntity.total_mentions)).scalar() or 0
-            )
-            avg_mentions = (
-                session.query(func.avg(CanonicalEntity.total_mentions)).scalar() or 0
-            )
-
+            stats = read_corpus_stats(session)
+            mentions = stats["entity_mentions"]
             return {
-                "by_type": {t: c for t, c in by_type if t},
+                "by_type": stats["entity_types"],
                 "mention_range": {
-                    "min": min_mentions,
-                    "max": max_mentions,
-                    "avg": round(avg_mentions, 1),
+                    "min": mentions["min"],
+                    "max": mentions["max"],
+                    "avg": mentions["avg"],
                 },
             }
         finally:
@@ -254,27 +237,11 @@ class FilterService:
         """Get document statistics for filter UI."""
         session = self.Session()
         try:
-            total = session.query(func.count(Document.id)).scalar() or 0
-
-            # By file type
-            by_type = (
-                session.query(Document.doc_type, func.count(Document.id))
-                .group_by(Document.doc_type)
-                .all()
-            )
-
-            # By date (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            recent_count = (
-                session.query(func.count(Document.id))
-                .filter(Document.created_at >= thirty_days_ago)
-                .scalar()
-            ) or 0
-
+            stats = read_corpus_stats(session)
             return {
-                "total": total,
-                "by_type": {t or "unknown": c for t, c in by_type},
-                "recent_30_days": recent_count,
+                "total": stats["documents"],
+                "by_type": stats["doc_types"],
+                "recent_30_days": stats["recent_documents"],
             }
         finally:
             session.close()
@@ -0,0 +1,314 @@
+"""
+Document fingerprints for near-duplicate and copy-paste detection.
+
+Each document is fingerprinted once when it finishes processing
+(store_document_fingerprint, called from the embed worker), and the results
+are persisted:
+
+- DocumentFingerprint: a 128-value MinHash signature of the document's word
+  5-gram shingles, plus a 64-bit SimHash.
+- DocumentSegment: one MD5 per normalised paragraph, so shared paragraphs
+  across the corpus are a GROUP BY instead of a re-read of every chunk.
+
+Documents ingested before fingerprints were stored are fingerprinted by
+backfill_fingerprints in the background (workers/fingerprint_worker.py),
+never inside a page request.
+
+LSHIndex buckets MinHash signatures by band: two documents become a
+candidate pair when any band of their signatures is identical, so
+near-duplicate search only compares candidates instead of all pairs.
+"""
+
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .db.models import Chunk, Document, DocumentFingerprint, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128  # MinHash permutations
+SHINGLE_SIZE = 5  # Words per shingle
+MIN_TEXT_LENGTH = 50  # Shorter documents get no MinHash signature
+SEGMENT_MIN_LENGTH = 50  # Shortest paragraph stored for copy-paste detection
+SAMPLE_LENGTH = 200
+BACKFILL_COMMIT_BATCH = 50  # Documents fingerprinted per commit while backfilling
+
+# Documents in these states have all their chunks and can be fingerprinted
+FINGERPRINT_READY_STATUSES = ("complete", "embedded")
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes, as in datasketch
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+# Shingles hashed per block, bounding the (block x NUM_PERM) temporary array
+_MINHASH_BLOCK = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words longer than two characters, punctuation removed."""
+    text = text.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return [w for w in text.split() if len(w) > 2]
+
+
+def create_shingles(words: List[str], size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word-based shingles; a text shorter than one shingle is one shingle."""
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def hash_shingles(shingles: Iterable[str]) -> np.ndarray:
+    """64-bit hash of every shingle, as a uint64 array."""
+    digests = b"".join(
+        hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles
+    )
+    return np.frombuffer(digests, dtype="<u8")
+
+
+def minhash_signature(hashes: np.ndarray) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a set of shingle hashes."""
+    signature = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    values = (hashes & _MAX_HASH)[:, None]
+    for start in range(0, len(values), _MINHASH_BLOCK):
+        block = values[start : start + _MINHASH_BLOCK]
+        permuted = ((block * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def simhash(hashes: np.ndarray) -> int:
+    """64-bit SimHash: bit i is set when most shingle hashes have bit i set."""
+    if not len(hashes):
+        return 0
+    bits = np.unpackbits(
+        hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little"
+    )
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+    return int(np.packbits(majority, bitorder="little").view("<u8")[0])
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
+    return (hash1 ^ hash2).bit_count()
+
+
+def to_signed64(value: int) -> int:
+    """Unsigned 64-bit hash -> signed, for BIGINT columns."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def minhash_similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    """Estimated Jaccard similarity: fraction of equal signature values."""
+    return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+def paragraph_segments(
+    texts: Iterable[str], min_length: int = SEGMENT_MIN_LENGTH
+) -> Dict[str, Tuple[int, str]]:
+    """Map MD5 of each normalised paragraph -> (length, sample text)."""
+    segments = {}
+    for text in texts:
+        for para in text.split("\n\n"):
+            para = para.strip()
+            if len(para) < min_length:
+                continue
+            normalized = " ".join(para.lower().split())
+            segment_hash = hashlib.md5(normalized.encode()).hexdigest()
+            if segment_hash not in segments:
+                sample = (
+                    para[:SAMPLE_LENGTH] + "..." if len(para) > SAMPLE_LENGTH else para
+                )
+                segments[segment_hash] = (len(para), sample)
+    return segments
+
+
+def fingerprint_text(texts: List[str]) -> Dict[str, Any]:
+    """MinHash, SimHash and paragraph segments for a document's chunk texts."""
+    full_text = " ".join(texts)
+    words = tokenize(full_text)
+    shingles = create_shingles(words)
+    hashes = hash_shingles(shingles)
+
+    signature = None
+    if len(full_text) >= MIN_TEXT_LENGTH and shingles:
+        signature = minhash_signature(hashes)
+
+    return {
+        "minhash": signature,
+        "simhash": simhash(hashes),
+        "shingle_count": len(shingles),
+        "word_count": len(words),
+        "segments": paragraph_segments(texts),
+    }
+
+
+def store_document_fingerprint(session: Session, doc_id: int) -> Dict[str, Any]:
+    """
+    Compute and persist the fingerprint and paragraph segments of a document,
+    replacing any previous ones. The caller commits.
+    """
+    texts = [
+        text
+        for (text,) in session.query(Chunk.text)
+        .filter(Chunk.doc_id == doc_id)
+        .order_by(Chunk.chunk_index, Chunk.id)
+    ]
+    fingerprint = fingerprint_text(texts)
+
+    session.query(DocumentSegment).filter(DocumentSegment.doc_id == doc_id).delete(
+        synchronize_session=False
+    )
+    session.merge(
+        DocumentFingerprint(
+            doc_id=doc_id,
+            minhash=(
+                fingerprint["minhash"].astype("<u4").tobytes()
+                if fingerprint["minhash"] is not None
+                else None
+            ),
+            simhash=to_signed64(fingerprint["simhash"]),
+            shingle_count=fingerprint["shingle_count"],
+            word_count=fingerprint["word_count"],
+        )
+    )
+    if fingerprint["segments"]:
+        session.execute(
+            DocumentSegment.__table__.insert(),
+            [
+                {
+                    "doc_id": doc_id,
+                    "segment_hash": segment_hash,
+                    "length": length,
+                    "sample_text": sample,
+                }
+                for segment_hash, (length, sample) in fingerprint["segments"].items()
+            ],
+        )
+    return fingerprint
+
+
+def unfingerprinted_documents(session: Session):
+    """Query of the ids of processed documents that have no fingerprint yet."""
+    return (
+        session.query(Document.id)
+        .outerjoin(DocumentFingerprint, DocumentFingerprint.doc_id == Document.id)
+        .filter(
+            DocumentFingerprint.doc_id.is_(None),
+            Document.status.in_(FINGERPRINT_READY_STATUSES),
+        )
+    )
+
+
+def backfill_fingerprints(session: Session, limit: Optional[int] = None) -> int:
+    """
+    Fingerprint processed documents that have none yet (documents ingested
+    before fingerprints were stored at ingest time). Commits every
+    BACKFILL_COMMIT_BATCH documents. Returns the count.
+    """
+    query = unfingerprinted_documents(session).order_by(Document.id)
+    if limit:
+        query = query.limit(limit)
+    doc_ids = [doc_id for (doc_id,) in query]
+
+    for i, doc_id in enumerate(doc_ids, 1):
+        store_document_fingerprint(session, doc_id)
+        if i % BACKFILL_COMMIT_BATCH == 0:
+            session.commit()
+    session.commit()
+
+    if doc_ids:
+        logger.info(f"Fingerprinted {len(doc_ids)} documents")
+    return len(doc_ids)
+
+
+def load_signature(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Stored MinHash bytes -> uint32 signature (None if not stored)."""
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype="<u4")
+
+
+class LSHIndex:
+    """
+    In-memory MinHash LSH banding index.
+
+    The signature is split into `bands` bands of `rows` values; documents that
+    agree on every value of at least one band share a bucket. Two documents
+    with Jaccard similarity s collide with probability 1 - (1 - s^rows)^bands.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = 42):
+        if not 0 < bands <= num_perm:
+            raise ValueError(f"bands must be between 1 and {num_perm}")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [
+            defaultdict(set) for _ in range(bands)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self.signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, doc_id: int, signature: np.ndarray):
+        if doc_id in self.signatures:
+            self.remove(doc_id)
+        self.signatures[doc_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets[key].add(doc_id)
+
+    def remove(self, doc_id: int):
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(key)
+            if members is not None:
+                members.discard(doc_id)
+                if not members:
+                    del buckets[key]
+
+    def query(self, signature: np.ndarray) -> Set[int]:
+        """Documents sharing at least one band with the signature."""
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        return candidates
+
+    def candidate_pairs(self) -> Set[Tuple[int, int]]:
+        """All (lower id, higher id) pairs sharing at least one bucket."""
+        pairs = set()
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                ordered = sorted(members)
+                for i, a in enumerate(ordered):
+                    for b in ordered[i + 1 :]:
+                        pairs.add((a, b))
+        return pairs
+
+    def similarity(self, doc1: int, doc2: int) -> float:
+        return minhash_similarity(self.signatures[doc1], self.signatures[doc2])
@@ -0,0 +1,505 @@
+"""
+In-memory entity graph shared by the Graph, Path Finder and Influence pages.
+
+Each of those pages used to reload every CanonicalEntity and aggregate every
+EntityRelationship into a fresh NetworkX graph on every request. Instead, the
+graph is loaded once into compact CSR (compressed sparse row) arrays and kept
+until the `graph_version` counter changes. Writers bump the counter in the
+same transaction as their change (relationship_utils.bump_graph_version), so
+a reader only pays one single-row query per request until something is
+actually written.
+
+Usage:
+    graph = get_entity_graph_cache().get()
+    path = graph.shortest_path(source_id, target_id, min_weight=0.5)
+    G = graph.to_networkx(min_weight=0.1)  # Frozen, cached per filter set
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .db.connection import get_session_factory
+from .db.models import CanonicalEntity, EntityRelationship, GraphVersion
+
+logger = logging.getLogger(__name__)
+
+# Derived NetworkX views kept per snapshot (one per distinct filter set)
+MAX_CACHED_VIEWS = 8
+DEFAULT_EDGE_TYPE = "associated"
+
+# Node attribute sources understood by EntityGraph.to_networkx(node_attrs=...)
+NODE_COLUMNS = ("name", "label", "mentions")
+
+
+def get_graph_version(session: Session) -> int:
+    """Current entity graph version (0 before the first write)."""
+    version = session.query(GraphVersion.version).filter(GraphVersion.id == 1).scalar()
+    return version or 0
+
+
+class EntityGraph:
+    """
+    Immutable snapshot of the entity graph.
+
+    Nodes are canonical entities stored in ascending id order; node positions
+    index every per-node array. Each undirected edge is stored once in the
+    edge arrays (edge_u < edge_v, by position) and twice in the CSR arrays
+    (indptr/indices/weights), which are used for traversal.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        node_ids: np.ndarray,
+        names: List[str],
+        labels: List[str],
+        mentions: np.ndarray,
+        edge_u: np.ndarray,
+        edge_v: np.ndarray,
+        edge_weight: np.ndarray,
+        edge_type: np.ndarray,
+        edge_type_names: List[str],
+    ):
+        self.version = version
+        self.node_ids = node_ids
+        self.names = names
+        self.labels = labels
+        self.mentions = mentions
+        self.edge_u = edge_u
+        self.edge_v = edge_v
+        self.edge_weight = edge_weight
+        self.edge_type = edge_type
+        self.edge_type_names = edge_type_names
+        self.loaded_at = time.time()
+
+        n = len(node_ids)
+        rows = np.concatenate([edge_u, edge_v])
+        cols = np.concatenate([edge_v, edge_u])
+        edge_index = np.concatenate([np.arange(len(edge_u))] * 2)
+        order = np.lexsort((cols, rows))
+
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+        self.indices = cols[order].astype(np.int32)
+        self.weights = edge_weight[edge_index[order]]
+        # CSR slot -> edge array position (for edge attributes)
+        self.csr_edge = edge_index[order].astype(np.int32)
+
+        self._views: "OrderedDict[tuple, nx.Graph]" = OrderedDict()
+        self._views_lock = threading.Lock()
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edge_u)
+
+    def position(self, entity_id: int) -> Optional[int]:
+        """Node position of a canonical entity id, or None if not in the graph."""
+        pos = int(np.searchsorted(self.node_ids, entity_id))
+        if pos < len(self.node_ids) and self.node_ids[pos] == entity_id:
+            return pos
+        return None
+
+    def node(self, entity_id: int) -> Optional[Dict]:
+        """Attributes of a node ({id, name, label, mentions}) or None."""
+        pos = self.position(entity_id)
+        if pos is None:
+            return None
+        return {
+            "id": int(self.node_ids[pos]),
+            "name": self.names[pos],
+            "label": self.labels[pos],
+            "mentions": int(self.mentions[pos]),
+        }
+
+    def node_mask(
+        self, min_mentions: int = 0, exclude_labels: Iterable[str] = ()
+    ) -> np.ndarray:
+        """Boolean mask over node positions for the given node filters."""
+        mask = self.mentions >= min_mentions
+        excluded = set(exclude_labels)
+        if excluded:
+            mask &= np.fromiter(
+                (label not in excluded for label in self.labels),
+                dtype=bool,
+                count=self.num_nodes,
+            )
+        return mask
+
+    def edge_mask(self, min_weight: float, node_mask: np.ndarray) -> np.ndarray:
+        """Edges at or above min_weight whose endpoints are both kept."""
+        return (
+            (self.edge_weight >= min_weight)
+            & node_mask[self.edge_u]
+            & node_mask[self.edge_v]
+        )
+
+    def edge(self, source_id: int, target_id: int) -> Optional[Dict]:
+        """Weight and type of the edge between two entities, or None."""
+        u, v = self.position(source_id), self.position(target_id)
+        if u is None or v is None:
+            return None
+        start, end = self.indptr[u], self.indptr[u + 1]
+        slot = start + int(np.searchsorted(self.indices[start:end], v))
+        if slot >= end or self.indices[slot] != v:
+            return None
+        edge = self.csr_edge[slot]
+        return {
+            "weight": float(self.edge_weight[edge]),
+            "type": self.edge_type_names[self.edge_type[edge]],
+        }
+
+    def neighbors(
+        self, entity_id: int, min_weight: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """(neighbor_id, weight) pairs for an entity, strongest first."""
+        pos = self.position(entity_id)
+        if pos is None:
+            return []
+        start, end = self.indptr[pos], self.indptr[pos + 1]
+        keep = self.weights[start:end] >= min_weight
+        ids = self.node_ids[self.indices[start:end][keep]]
+        weights = self.weights[start:end][keep]
+        order = np.argsort(-weights, kind="stable")
+        return [(int(ids[i]), float(weights[i])) for i in order]
+
+    def shortest_path(
+        self,
+        source_id: int,
+        target_id: int,
+        min_weight: float = 0.0,
+        min_mentions: int = 0,
+    ) -> Optional[List[int]]:
+        """
+        Fewest-hops path between two entities (breadth-first search on CSR).
+
+        Only edges with weight >= min_weight and nodes with at least
+        min_mentions mentions are traversed. Returns the list of entity ids,
+        or None if either end is missing/filtered out or no path exists.
+        """
+        source, target = self.position(source_id), self.position(target_id)
+        if source is None or target is None:
+            return None
+        if self.mentions[source] < min_mentions or self.mentions[target] < min_mentions:
+            return None
+        if source == target:
+            return [source_id]
+
+        parent = np.full(self.num_nodes, -1, dtype=np.int64)
+        parent[source] = source
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            start, end = self.indptr[node], self.indptr[node + 1]
+            nbrs = self.indices[start:end]
+            nbrs = nbrs[
+                (self.weights[start:end] >= min_weight)
+                & (parent[nbrs] < 0)
+                & (self.mentions[nbrs] >= min_mentions)
+            ]
+            if not len(nbrs):
+                continue
+            parent[nbrs] = node
+            if parent[target] >= 0:
+                break
+            queue.extend(nbrs.tolist())
+
+        if parent[target] < 0:
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return [int(self.node_ids[p]) for p in reversed(path)]
+
+    def to_networkx(
+        self,
+        min_weight: float = 0.0,
+        min_mentions: int = 0,
+        exclude_labels: Iterable[str] = (),
+        min_degree: int = 0,
+        hide_singletons: bool = False,
+        node_attrs: Optional[Dict[str, str]] = None,
+        edge_types: bool = False,
+    ) -> nx.Graph:
+        """
+        Build (or reuse) a NetworkX view of the snapshot.
+
+        Args:
+            min_weight: Minimum aggregated edge strength
+            min_mentions: Minimum total_mentions for a node to be included
+            exclude_labels: Entity labels to leave out
+            min_degree: Drop nodes with fewer kept edges than this
+            hide_singletons: Then drop nodes left without any edges
+            node_attrs: {graph attribute name: column} where column is one of
+                NODE_COLUMNS; defaults to the column names themselves
+            edge_types: Also set a "type" attribute on edges
+
+        Returns:
+            A frozen nx.Graph. Views are cached per argument set, so callers
+            must not mutate them (nx.Graph(view) gives a mutable copy).
+        """
+        node_attrs = node_attrs or {c: c for c in NODE_COLUMNS}
+        key = (
+            float(min_weight),
+            int(min_mentions),
+            tuple(sorted(set(exclude_labels))),
+            int(min_degree),
+            bool(hide_singletons),
+            tuple(sorted(node_attrs.items())),
+            bool(edge_types),
+        )
+        with self._views_lock:
+            G = self._views.get(key)
+            if G is not None:
+                self._views.move_to_end(key)
+                return G
+
+        G = self._build_networkx(*key)
+
+        with self._views_lock:
+            self._views[key] = G
+            while len(self._views) > MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+        return G
+
+    def _build_networkx(
+        self,
+        min_weight,
+        min_mentions,
+        exclude_labels,
+        min_degree,
+        hide_singletons,
+        node_attrs,
+        edge_types,
+    ) -> nx.Graph:
+        unknown = {column for _, column in node_attrs} - set(NODE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown node attribute columns: {sorted(unknown)}")
+
+        node_mask = self.node_mask(min_mentions, exclude_labels)
+        edge_mask = self.edge_mask(min_weight, node_mask)
+        if min_degree > 0:
+            node_mask &= self._degrees(edge_mask) >= min_degree
+            edge_mask &= node_mask[self.edge_u] & node_mask[self.edge_v]
+        if hide_singletons:
+            node_mask &= self._degrees(edge_mask) > 0
+
+        columns = {
+            "name": self.names,
+            "label": self.labels,
+            "mentions": self.mentions.tolist(),
+        }
+        ids = self.node_ids.tolist()
+
+        G = nx.Graph()
+        G.add_nodes_from(
+            (ids[p], {attr: columns[column][p] for attr, column in node_attrs})
+            for p in np.flatnonzero(node_mask).tolist()
+        )
+
+        keep = np.flatnonzero(edge_mask)
+        us = self.edge_u[keep].tolist()
+        vs = self.edge_v[keep].tolist()
+        ws = self.edge_weight[keep].tolist()
+        if edge_types:
+            types = [self.edge_type_names[t] for t in self.edge_type[keep].tolist()]
+            G.add_edges_from(
+                (ids[u], ids[v], {"weight": w, "type": t})
+                for u, v, w, t in zip(us, vs, ws, types)
+            )
+        else:
+            G.add_edges_from(
+                (ids[u], ids[v], {"weight": w}) for u, v, w in zip(us, vs, ws)
+            )
+        return nx.freeze(G)
+
+    def _degrees(self, edge_mask: np.ndarray) -> np.ndarray:
+        n = self.num_nodes
+        return np.bincount(self.edge_u[edge_mask], minlength=n) + np.bincount(
+            self.edge_v[edge_mask], minlength=n
+        )
+
+
+def load_entity_graph(session: Session, version: Optional[int] = None) -> EntityGraph:
+    """
+    Load the whole entity graph from the database into an EntityGraph.
+
+    Relationship rows are aggregated per unordered entity pair (summing
+    strength), and edges whose endpoints are not canonical entities are
+    dropped, matching what the per-request builders used to do.
+    """
+    if version is None:
+        version = get_graph_version(session)
+
+    entity_rows = _fetch_rows(
+        session,
+        select(
+            CanonicalEntity.id,
+            CanonicalEntity.canonical_name,
+            CanonicalEntity.label,
+            CanonicalEntity.total_mentions,
+        ).order_by(CanonicalEntity.id),
+    )
+    n = len(entity_rows)
+    node_ids = np.fromiter((r[0] for r in entity_rows), dtype=np.int64, count=n)
+    names = [r[1] for r in entity_rows]
+    labels = [r[2] for r in entity_rows]
+    mentions = np.fromiter((r[3] or 0 for r in entity_rows), dtype=np.int64, count=n)
+    del entity_rows
+
+    rel_rows = _fetch_rows(
+        session,
+        select(
+            EntityRelationship.entity1_id,
+            EntityRelationship.entity2_id,
+            EntityRelationship.strength,
+            EntityRelationship.relationship_type,
+        ),
+    )
+    m = len(rel_rows)
+    e1 = np.fromiter((r[0] for r in rel_rows), dtype=np.int64, count=m)
+    e2 = np.fromiter((r[1] for r in rel_rows), dtype=np.int64, count=m)
+    strength = np.fromiter((r[2] or 0.0 for r in rel_rows), dtype=np.float64, count=m)
+    type_lookup: Dict[str, int] = {}
+    type_codes = np.fromiter(
+        (
+            type_lookup.setdefault(r[3] or DEFAULT_EDGE_TYPE, len(type_lookup))
+            for r in rel_rows
+        ),
+        dtype=np.int16,
+        count=m,
+    )
+    type_names = list(type_lookup) or [DEFAULT_EDGE_TYPE]
+    del rel_rows
+
+    edge_u, edge_v, edge_weight, edge_type = _aggregate_edges(
+        node_ids,
+        e1, e2, strength, type_codes
+    )
+
+    return EntityGraph(
+        version=version,
+        node_ids=node_ids,
+        names=names,
+        labels=labels,
+        mentions=mentions,
+        edge_u=edge_u,
+        edge_v=edge_v,
+        edge_weight=edge_weight,
+        edge_type=edge_type,
+        edge_type_names=type_names,
+    )
+
+
+def _fetch_rows(session: Session, stmt) -> List[tuple]:
+    """
+    Run a parameterless SELECT on the session's raw DBAPI cursor.
+
+    Plain driver tuples instead of SQLAlchemy Row objects; building those was
+    most of the load time for large graphs.
+    """
+    sql = str(stmt.compile(dialect=session.get_bind().dialect))
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.execute(sql)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _aggregate_edges(node_ids, e1, e2, strength, type_codes):
+    """Map relationship rows onto node positions and merge duplicate pairs."""
+    empty = np.zeros(0, dtype=np.int32)
+    if not len(e1) or not len(node_ids):
+        return empty, empty, np.zeros(0), np.zeros(0, dtype=np.int16)
+
+    p1 = np.minimum(np.searchsorted(node_ids, e1), len(node_ids) - 1)
+    p2 = np.minimum(np.searchsorted(node_ids, e2), len(node_ids) - 1)
+    valid = (node_ids[p1] == e1) & (node_ids[p2] == e2) & (p1 != p2)
+    u = np.minimum(p1, p2)[valid]
+    v = np.maximum(p1, p2)[valid]
+
+    keys = u * len(node_ids) + v
+    unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    weights = np.bincount(inverse, weights=strength[valid], minlength=len(unique_keys))
+
+    return (
+        (unique_keys // len(node_ids)).astype(np.int32),
+        (unique_keys % len(node_ids)).astype(np.int32),
+        weights,
+        type_codes[valid][first],
+    )
+
+
+class EntityGraphCache:
+    """
+    Process-wide holder of the current EntityGraph snapshot.
+
+    get() checks the graph version (one single-row query) and reloads only
+    when it has moved. Snapshots are immutable, so callers can keep using one
+    while a newer one is being loaded.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._graph: Optional[EntityGraph] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, session: Optional[Session] = None) -> EntityGraph:
+        """Return an up-to-date graph, using `session` if given."""
+        own_session = session is None
+        if own_session:
+            session = (self._session_factory or get_session_factory())()
+        try:
+            version = get_graph_version(session)
+            graph = self._graph
+            if graph is not None and graph.version == version:
+                return graph
+
+            with self._lock:
+                graph = self._graph
+                if graph is None or graph.version != version:
+                    start = time.perf_counter()
+                    graph = load_entity_graph(session, version)
+                    self._graph = graph
+                    self.loads += 1
+                    logger.info(
+                        f"Loaded entity graph v{version}: {graph.num_nodes} nodes, "
+                        f"{graph.num_edges} edges in {time.perf_counter() - start:.2f}s"
+                    )
+            return graph
+        finally:
+            if own_session:
+                session.close()
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next get() reloads."""
+        with self._lock:
+            self._graph = None
+
+
+# Singleton
+_cache_instance: Optional[EntityGraphCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_entity_graph_cache() -> EntityGraphCache:
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = EntityGraphCache()
+    return _cache_instance
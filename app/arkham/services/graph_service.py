@@ -6,24 +6,21 @@ while project_root.name != 'ArkhamMirror' and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 import networkx as nx
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import os
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 from .graph_utils import build_networkx_graph, detect_communities
 from .db.models import CanonicalEntity
+from .db.connection import get_engine, get_session_factory
 
 # Load environment variables
 load_dotenv()
 
-# Database setup
-# In a real app, use a shared database connection manager
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+# Database setup (shared engine, see db/connection.py)
+engine = get_engine()
+Session = get_session_factory()
 
 
 def get_entity_graph(
@@ -3,10 +3,13 @@ import logging
 import community.community_louvain as community_louvain
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .db.models import CanonicalEntity, EntityRelationship
+from .graph_cache import get_entity_graph_cache
 
 logger = logging.getLogger(__name__)
 
+# Node attributes of the Graph page ({attribute: graph_cache column})
+GRAPH_NODE_ATTRS = {"label": "name", "type": "label", "size": "mentions"}
+
 
 def build_networkx_graph(
     session: Session,
@@ -28,72 +31,33 @@ def build_networkx_graph(
         hide_singletons: Whether to remove nodes with no edges after filtering
 
     Returns:
-        Filtered NetworkX Graph
+        Filtered NetworkX Graph (frozen and shared between callers; use
+        nx.Graph(G) for a mutable copy)
     """
     if exclude_types is None:
         exclude_types = []
 
-    G = nx.Graph()
-
     # Get total document count for ratio calculation
     from .db.models import Document
 
     total_docs = session.query(func.count(Document.id)).scalar() or 1
 
-    # Fetch nodes
-    entities = session.query(CanonicalEntity).all()
-    for entity in entities:
-        # Skip excluded entity types
-        if entity.label in exclude_types:
-            continue
-
-        # Calculate document ratio for super-node filtering
-        doc_count = entity.document_count if hasattr(entity, "document_count") else 1
-        doc_ratio = doc_count / total_docs if total_docs > 0 else 0
-
-        # Skip super-nodes that appear in too many documents
-        if doc_ratio > max_doc_ratio:
-            continue
-
-        G.add_node(
-            entity.id,
-            label=entity.canonical_name,
-            type=entity.label,
-            size=entity.total_mentions,
-            doc_ratio=doc_ratio,
-        )
-
-    # Fetch edges and aggregate strength
-    relationships = (
-        session.query(
-            EntityRelationship.entity1_id,
-            EntityRelationship.entity2_id,
-            func.sum(EntityRelationship.strength).label("total_strength"),
-        )
-        .group_by(EntityRelationship.entity1_id, EntityRelationship.entity2_id)
-        .having(func.sum(EntityRelationship.strength) >= min_strength)
-        .all()
+    # Canonical entities carry no per-entity document count, so every node
+    # has the same ratio (1 / total_docs) and the super-node filter either
+    # keeps or drops all of them
+    if 1 / total_docs > max_doc_ratio:
+        return nx.Graph()
+
+    # Answer from the shared in-memory graph instead of reloading the tables
+    graph = get_entity_graph_cache().get(session)
+    return graph.to_networkx(
+        min_weight=min_strength,
+        exclude_labels=exclude_types,
+        min_degree=min_degree,
+        hide_singletons=hide_singletons,
+        node_attrs=GRAPH_NODE_ATTRS,
     )
 
-    for r in relationships:
-        # Ensure both nodes exist (weren't filtered out)
-        if G.has_node(r.entity1_id) and G.has_node(r.entity2_id):
-            G.add_edge(r.entity1_id, r.entity2_id, weight=r.total_strength)
-
-    # Apply degree filtering
-    if min_degree > 0:
-        nodes_to_remove = [
-            node for node, degree in dict(G.degree()).items() if degree < min_degree
-        ]
-        G.remove_nodes_from(nodes_to_remove)
-
-    # Remove singletons (nodes with no edges) if requested
-    if hide_singletons:
-        singletons = [node for node, degree in dict(G.degree()).items() if degree == 0]
-        G.remove_nodes_from(singletons)
-
-    return G
-
 
 def detect_communities(G: nx.Graph):
     """
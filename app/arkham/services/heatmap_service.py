@@ -2,16 +2,15 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from collections import defaultdict
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
 from app.arkham.services.db.models import Document, TimelineEvent
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 # Database setup from central config
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 
 def get_day_of_week_hour_heatmap(project_id: int = None) -> Dict[str, Any]:
@@ -14,13 +14,10 @@ import logging
 from collections import Counter
 import unicodedata
 
-from config.settings import DATABASE_URL
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 from app.arkham.services.db.models import Document, Chunk, PageOCR
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 
@@ -36,8 +33,8 @@ class HiddenContentDetector:
     """Service for detecting hidden or concealed content in documents."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def detect_all_hidden_content(self, doc_id: Optional[int] = None) -> List[Dict]:
         """
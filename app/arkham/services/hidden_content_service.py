@@ -13,13 +13,11 @@ import logging
 from typing import Dict, Any, List
 from datetime import datetime
 from pathlib import Path
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import Document
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.utils.security_utils import get_display_filename
 
 load_dotenv()
@@ -44,8 +42,8 @@ class HiddenContentService:
     """Service for detecting hidden content and metadata anomalies."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
         """Analyze a file for hidden content and anomalies."""
@@ -7,77 +7,60 @@ and hidden connections through network analysis metrics.
 
 import os
 import logging
-from typing import Dict, Any, Optional
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
+from typing import Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 import networkx as nx
 
-from config.settings import DATABASE_URL
-
+from config.settings import REDIS_URL
+from app.arkham.services.centrality_utils import METRICS, refresh_centrality
+from app.arkham.services.config import get_config
 from app.arkham.services.db.models import (
     CanonicalEntity,
+    EntityCentrality,
     EntityRelationship,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.graph_cache import get_entity_graph_cache
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-
+# Node attributes used by the Influence page ({attribute: graph_cache column})
+INFLUENCE_NODE_ATTRS = {"name": "name", "label": "label", "mentions": "mentions"}
+# Fixed RQ job id so concurrent page loads queue at most one refresh
+CENTRALITY_JOB_ID = "centrality-refresh"
 
 
 class InfluenceService:
     """Service for entity influence and power dynamics analysis."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
+        self.min_strength = float(get_config("influence.min_strength", 0.1))
 
     def build_graph(self, min_strength: float = 0.1) -> nx.Graph:
-        """Build NetworkX graph from entity relationships."""
-        session = self.Session()
-        try:
-            G = nx.Graph()
-
-            # Add nodes
-            entities = session.query(CanonicalEntity).all()
-            for entity in entities:
-                G.add_node(
-                    entity.id,
-                    name=entity.canonical_name,
-                    label=entity.label,
-                    mentions=entity.total_mentions or 0,
-                )
-
-            # Add edges with aggregated weights
-            relationships = (
-                session.query(
-                    EntityRelationship.entity1_id,
-                    EntityRelationship.entity2_id,
-                    func.sum(EntityRelationship.strength).label("total_strength"),
-                )
-                .group_by(EntityRelationship.entity1_id, EntityRelationship.entity2_id)
-                .having(func.sum(EntityRelationship.strength) >= min_strength)
-                .all()
-            )
-
-            for rel in relationships:
-                if G.has_node(rel.entity1_id) and G.has_node(rel.entity2_id):
-                    G.add_edge(
-                        rel.entity1_id, rel.entity2_id, weight=rel.total_strength
-                    )
+        """
+        Entity graph with edges of at least min_strength.
 
-            return G
-        finally:
-            session.close()
+        Served from the shared in-memory graph (graph_cache.py); the returned
+        graph is frozen and shared, so don't mutate it.
+        """
+        return get_entity_graph_cache().get().to_networkx(
+            min_weight=min_strength, node_attrs=INFLUENCE_NODE_ATTRS
+        )
 
     def get_influence_metrics(self) -> Dict[str, Any]:
         """
-        Calculate comprehensive influence metrics for all entities.
+        Influence metrics for all entities.
 
         Returns centrality scores, community detection, and power rankings.
+        Scores come from the background centrality job (EntityCentrality);
+        "status" says which graph version they were computed for and whether
+        a refresh is queued.
         """
-        G = self.build_graph()
+        graph = get_entity_graph_cache().get()
+        G = self.build_graph(self.min_strength)
 
         if len(G.nodes) == 0:
             return {
@@ -91,53 +74,13 @@ class InfluenceService:
                 },
             }
 
-        # Calculate centrality metrics
-        degree_centrality = nx.degree_centrality(G)
-
-        # Betweenness (who controls information flow)
-        try:
-            betweenness = nx.betweenness_centrality(G, weight="weight")
-        except Exception:
-            betweenness = {n: 0 for n in G.nodes}
-
-        # Closeness (who can reach others quickly)
-        try:
-            closeness = nx.closeness_centrality(G)
-        except Exception:
-            closeness = {n: 0 for n in G.nodes}
-
-        # PageRank (overall importance)
-        try:
-            pagerank = nx.pagerank(G, weight="weight")
-        except Exception:
-            pagerank = {n: 1 / len(G.nodes) for n in G.nodes}
-
-        # Eigenvector centrality (connected to important nodes)
-        try:
-            eigenvector = nx.eigenvector_centrality(G, max_iter=1000, weight="weight")
-        except Exception:
-            eigenvector = {n: 0 for n in G.nodes}
-
-        # Community detection
-        try:
-            import community.community_louvain as community_louvain
-
-            partition = community_louvain.best_partition(G, weight="weight")
-        except Exception:
-            partition = {n: 0 for n in G.nodes}
+        centrality, status = self._stored_centrality(graph)
 
         # Build entity list with all metrics
         entities = []
         for node_id in G.nodes:
             node_data = G.nodes[node_id]
-
-            # Calculate composite influence score (weighted average)
-            influence_score = (
-                degree_centrality.get(node_id, 0) * 0.2
-                + betweenness.get(node_id, 0) * 0.3
-                + pagerank.get(node_id, 0) * 0.3
-                + eigenvector.get(node_id, 0) * 0.2
-            ) * 100  # Scale to 0-100
+            stored = centrality.get(node_id, {})
 
             entities.append(
                 {
@@ -147,17 +90,11 @@ class InfluenceService:
                     "mentions": node_data.get("mentions", 0),
                     "degree": G.degree(node_id),
                     "connections": list(G.neighbors(node_id)),
-                    "community": partition.get(node_id, 0),
+                    "community": stored.get("community", 0),
                     "metrics": {
-                        "degree_centrality": round(
-                            degree_centrality.get(node_id, 0), 4
-                        ),
-                        "betweenness": round(betweenness.get(node_id, 0), 4),
-                        "closeness": round(closeness.get(node_id, 0), 4),
-                        "pagerank": round(pagerank.get(node_id, 0), 4),
-                        "eigenvector": round(eigenvector.get(node_id, 0), 4),
+                        name: round(stored.get(name, 0), 4) for name in METRICS
                     },
-                    "influence_score": round(influence_score, 2),
+                    "influence_score": round(stored.get("influence_score", 0), 2),
                 }
             )
 
@@ -197,11 +134,89 @@ class InfluenceService:
             "most_influential": entities[0]["name"] if entities else "N/A",
         }
 
-        return {"entities": entities, "communities": communities, "summary": summary}
+        return {
+            "entities": entities,
+            "communities": communities,
+            "summary": summary,
+            "status": status,
+        }
+
+    def _stored_centrality(self, graph) -> Tuple[Dict[int, Dict[str, Any]], Dict]:
+        """
+        Load stored centrality rows, keyed by entity id.
+
+        Queues a background refresh when the rows are missing or were
+        computed for an older graph version. Small graphs with no stored
+        rows at all are computed inline so the first page load has data.
+        """
+        session = self.Session()
+        try:
+            rows = session.query(EntityCentrality).all()
+            if not rows and graph.num_nodes <= int(
+                get_config("influence.sync_max_nodes", 2000)
+            ):
+                refresh_centrality(session)
+                rows = session.query(EntityCentrality).all()
+        finally:
+            session.close()
+
+        metrics_version = rows[0].graph_version if rows else None
+        stale = metrics_version != graph.version
+        status = {
+            "graph_version": graph.version,
+            "metrics_version": metrics_version,
+            "stale": stale,
+            "refresh_queued": self.request_centrality_refresh() if stale else False,
+            "method": rows[0].method if rows else None,
+            "computed_at": rows[0].computed_at.isoformat() if rows else None,
+        }
+
+        centrality = {
+            row.canonical_entity_id: {
+                **{name: getattr(row, name) or 0.0 for name in METRICS},
+                "community": row.community or 0,
+                "influence_score": row.influence_score or 0.0,
+            }
+            for row in rows
+        }
+        return centrality, status
+
+    def request_centrality_refresh(self, force: bool = False) -> bool:
+        """
+        Queue the background centrality job unless one is already pending.
+
+        Returns True if a job is queued or running.
+        """
+        try:
+            from redis import Redis
+            from rq import Queue
+            from rq.exceptions import NoSuchJobError
+            from rq.job import Job
+
+            redis_conn = Redis.from_url(REDIS_URL)
+            try:
+                job = Job.fetch(CENTRALITY_JOB_ID, connection=redis_conn)
+                if job.get_status() in ("queued", "started", "deferred", "scheduled"):
+                    return True
+            except NoSuchJobError:
+                pass
+
+            # By path, so the UI process never imports the worker modules
+            Queue("default", connection=redis_conn).enqueue(
+                "app.arkham.services.workers.centrality_worker.compute_centrality_job",
+                force,
+                job_id=CENTRALITY_JOB_ID,
+                job_timeout="2h",
+            )
+            logger.info("Queued centrality refresh")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not queue centrality refresh: {e}")
+            return False
 
     def get_entity_influence_detail(self, entity_id: int) -> Optional[Dict[str, Any]]:
         """Get detailed influence analysis for a specific entity."""
-        G = self.build_graph()
+        G = self.build_graph(self.min_strength)
 
         if entity_id not in G.nodes:
             return None
@@ -227,18 +242,21 @@ class InfluenceService:
         # Calculate ego network metrics
         ego = nx.ego_graph(G, entity_id)
 
-        # Find shortest paths to other influential nodes
+        # Find shortest paths to the most influential nodes (stored PageRank)
         try:
-            pagerank = nx.pagerank(G, weight="weight")
-            top_entities = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)[
-                :10
-            ]
+            graph = get_entity_graph_cache().get()
+            centrality, _ = self._stored_centrality(graph)
+            top_entities = sorted(
+                centrality.items(), key=lambda x: x[1]["pagerank"], reverse=True
+            )[:10]
 
             paths_to_top = []
-            for target_id, pr in top_entities:
-                if target_id != entity_id:
-                    try:
-                        path = nx.shortest_path(G, entity_id, target_id)
+            for target_id, _ in top_entities:
+                if target_id != entity_id and target_id in G.nodes:
+                    path = graph.shortest_path(
+                        entity_id, target_id, min_weight=self.min_strength
+                    )
+                    if path:
                         paths_to_top.append(
                             {
                                 "target_id": target_id,
@@ -249,8 +267,6 @@ class InfluenceService:
                                 "path": [G.nodes[n].get("name", str(n)) for n in path],
                             }
                         )
-                    except nx.NetworkXNoPath:
-                        pass
         except Exception:
             paths_to_top = []
 
@@ -270,19 +286,20 @@ class InfluenceService:
         """
         Identify power dynamics and hidden relationships.
         """
-        G = self.build_graph()
+        G = self.build_graph(self.min_strength)
 
         if len(G.nodes) < 2:
             return {"brokers": [], "bridges": [], "clusters": []}
 
         # Find brokers (high betweenness, connect different communities)
-        try:
-            betweenness = nx.betweenness_centrality(G, weight="weight")
-            import community.community_louvain as community_louvain
-
-            partition = community_louvain.best_partition(G, weight="weight")
-        except Exception:
+        graph = get_entity_graph_cache().get()
+        centrality, _ = self._stored_centrality(graph)
+        if not centrality:
             return {"brokers": [], "bridges": [], "clusters": []}
+        betweenness = {
+            n: centrality.get(n, {}).get("betweenness", 0.0) for n in G.nodes
+        }
+        partition = {n: centrality.get(n, {}).get("community", 0) for n in G.nodes}
 
         # Identify bridges (edges connecting different communities)
         bridges = []
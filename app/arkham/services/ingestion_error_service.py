@@ -13,16 +13,15 @@ while project_root.name != 'ArkhamMirror' and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 import logging
 import traceback
 import os
 from typing import Optional, List, Dict, Any
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func
 from dotenv import load_dotenv
 
 from .db.models import IngestionError
+from .db.connection import get_engine, get_session_factory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -45,16 +44,8 @@ class IngestionErrorService:
     ERROR_TYPES = ["timeout", "parse_error", "connection", "validation", "unknown"]
 
     def __init__(self):
-        # Robust connection pool settings to prevent hanging
-        self.engine = create_engine(
-            DATABASE_URL,
-            pool_size=3,
-            max_overflow=2,
-            pool_timeout=10,  # Wait max 10s for connection
-            pool_recycle=300,  # Recycle connections after 5 min
-            pool_pre_ping=True,  # Test connection before use
-        )
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def log_error(
         self,
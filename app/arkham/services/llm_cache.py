@@ -0,0 +1,352 @@
+"""
+Durable, content-addressed cache of LLM answers and LLM-derived results.
+
+LLM answers used to be cached in Redis under an MD5 of the whole request
+payload, so a different temperature, max_tokens or stray whitespace missed,
+and a Redis flush lost everything. Fact comparison, timeline merging and
+contradiction detection also kept their own caches (a Postgres table, a
+per-process dict and a content-hash table). All of them now use the
+llm_cache table:
+
+- Prompt keys are a SHA-256 of the model id, the structured-output schema
+  and the normalised prompt (prompt_key()). Whitespace runs, line endings
+  and blank lines are normalised, and generation settings are not part of
+  the key.
+- Result keys (result_key()) address a feature's own results, such as a
+  corpus fact comparison or an entity's contradiction scan.
+- An entry can carry the hash of the chunk texts it was derived from
+  (source_hash()). A lookup with a different hash is a miss, so an answer is
+  reused until its source text changes.
+- The table is bounded by llm_cache.max_mb. Once it is over the limit, the
+  least recently used entries are evicted down to 90% of it.
+- Hits, misses, stale entries, stores and evictions are counted per feature
+  in llm_cache_stats (stats()).
+
+Cache failures are logged and treated as misses; they never fail an LLM call.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from sqlalchemy import func
+
+from .config import get_config
+from .db.connection import get_session_factory
+from .db.models import LLMCacheEntry, LLMCacheStat
+from .relationship_utils import _insert_for
+
+logger = logging.getLogger(__name__)
+
+EVICT_CHECK_EVERY = 50  # Stores between size checks
+EVICT_LOW_WATER = 0.9  # Eviction frees space down to this share of the limit
+DELETE_BATCH = 500
+
+_SPACES = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+@dataclass
+class CachedValue:
+    value: str
+    created_at: Optional[datetime]
+    expires_at: Optional[datetime]
+
+
+def normalize_prompt(text: str) -> str:
+    """Prompt text as it is keyed: runs of spaces, line endings and blank lines collapsed."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = (_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _normalize_content(content: Any) -> Any:
+    if isinstance(content, str):
+        return normalize_prompt(content)
+    if isinstance(content, list):  # Multi-part (e.g. text + image) messages
+        return [
+            dict(part, text=normalize_prompt(part["text"]))
+            if isinstance(part, dict) and isinstance(part.get("text"), str)
+            else part
+            for part in content
+        ]
+    return content
+
+
+def _digest(body: Any) -> str:
+    encoded = json.dumps(body, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def prompt_key(
+    model: str,
+    messages: Union[str, List[Dict[str, Any]]],
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Cache key of a chat request: model + schema + normalised messages."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    return _digest(
+        {
+            "model": model,
+            "schema": json_schema,
+            "messages": [
+                {"role": m.get("role"), "content": _normalize_content(m.get("content"))}
+                for m in messages
+            ],
+        }
+    )
+
+
+def result_key(feature: str, *parts: Any) -> str:
+    """Cache key of a feature's own result, addressed by its parameters."""
+    return _digest({"feature": feature, "parts": parts})
+
+
+def source_hash(texts: Iterable[str]) -> str:
+    """Hash of the source chunk texts an entry was derived from (order matters)."""
+    hasher = hashlib.sha256()
+    for text in texts:
+        hasher.update(hashlib.sha256((text or "").encode("utf-8")).digest())
+    return hasher.hexdigest()
+
+
+def _bump(session, feature: str, **counts: int) -> None:
+    table = LLMCacheStat.__table__
+    row = {"feature": feature, "updated_at": datetime.utcnow()}
+    row.update({name: counts.get(name, 0) for name in
+                ("hits", "misses", "stale", "stores", "evictions")})
+    stmt = _insert_for(session)(table).values(row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.feature],
+        set_=dict(
+            {name: table.c[name] + stmt.excluded[name] for name in counts},
+            updated_at=stmt.excluded.updated_at,
+        ),
+    )
+    session.execute(stmt)
+
+
+def _delete(session, keys: List[str]) -> None:
+    for start in range(0, len(keys), DELETE_BATCH):
+        session.query(LLMCacheEntry).filter(
+            LLMCacheEntry.key.in_(keys[start : start + DELETE_BATCH])
+        ).delete(synchronize_session=False)
+
+
+class LLMCache:
+    """The llm_cache table; each call runs in its own short transaction."""
+
+    def __init__(self, session_factory=None, max_bytes: Optional[int] = None):
+        self.Session = session_factory or get_session_factory()
+        self._max_bytes = max_bytes
+        self._stores = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return int(float(get_config("llm_cache.max_mb", 256)) * 1024 * 1024)
+
+    def lookup(
+        self, key: str, feature: str, source_hash: Optional[str] = None
+    ) -> Optional[CachedValue]:
+        """
+        The entry under `key`, or None when it is missing, expired or (when
+        source_hash is given) derived from different source text.
+        """
+        now = datetime.utcnow()
+        session = self.Session()
+        try:
+            entry = session.get(LLMCacheEntry, key)
+            found = None
+            if entry is None or (entry.expires_at and entry.expires_at <= now):
+                outcome = "misses"
+            elif source_hash is not None and entry.source_hash != source_hash:
+                outcome = "stale"
+            else:
+                outcome = "hits"
+                entry.hits += 1
+                entry.last_used_at = now
+                found = CachedValue(entry.value, entry.created_at, entry.expires_at)
+            _bump(session, feature, **{outcome: 1})
+            session.commit()
+            return found
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        finally:
+            session.close()
+
+    def get(
+        self, key: str, feature: str, source_hash: Optional[str] = None
+    ) -> Optional[str]:
+        """lookup(), returning only the cached text."""
+        found = self.lookup(key, feature, source_hash)
+        return found.value if found else None
+
+    def put(
+        self,
+        key: str,
+        feature: str,
+        value: str,
+        source_hash: Optional[str] = None,
+        model: str = "",
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """Store (or replace) an entry. Empty values are not cached."""
+        if not value:
+            return
+        now = datetime.utcnow()
+        row = {
+            "key": key,
+            "feature": feature,
+            "model": model,
+            "value": value,
+            "source_hash": source_hash,
+            "size_bytes": len(value.encode("utf-8")),
+            "hits": 0,
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": now + timedelta(seconds=ttl_seconds) if ttl_seconds else None,
+        }
+        session = self.Session()
+        try:
+            table = LLMCacheEntry.__table__
+            stmt = _insert_for(session)(table).values(row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={name: stmt.excluded[name] for name in row if name != "key"},
+            )
+            session.execute(stmt)
+            _bump(session, feature, stores=1)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"LLM cache store failed: {e}")
+            return
+        finally:
+            session.close()
+
+        with self._lock:
+            self._stores += 1
+            check = self._stores % EVICT_CHECK_EVERY == 0
+        if check:
+            self.evict()
+
+    def forget(self, key: str) -> None:
+        session = self.Session()
+        try:
+            session.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).delete()
+            session.commit()
+        finally:
+            session.close()
+
+    def clear(self, *features: str) -> int:
+        """Delete the entries of the given features (all entries if none)."""
+        session = self.Session()
+        try:
+            query = session.query(LLMCacheEntry)
+            if features:
+                query = query.filter(LLMCacheEntry.feature.in_(features))
+            count = query.delete(synchronize_session=False)
+            session.commit()
+            return count
+        finally:
+            session.close()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones while over max_bytes."""
+        session = self.Session()
+        try:
+            evicted: Dict[str, int] = {}
+            victims = []
+
+            def drop(key, feature):
+                victims.append(key)
+                evicted[feature] = evicted.get(feature, 0) + 1
+
+            for key, feature in session.query(
+                LLMCacheEntry.key, LLMCacheEntry.feature
+            ).filter(LLMCacheEntry.expires_at <= datetime.utcnow()):
+                drop(key, feature)
+            _delete(session, victims)
+
+            total = session.query(
+                func.coalesce(func.sum(LLMCacheEntry.size_bytes), 0)
+            ).scalar()
+            limit = self.max_bytes
+            if total > limit:
+                excess = total - int(limit * EVICT_LOW_WATER)
+                expired = len(victims)
+                for key, feature, size in session.query(
+                    LLMCacheEntry.key, LLMCacheEntry.feature, LLMCacheEntry.size_bytes
+                ).order_by(LLMCacheEntry.last_used_at, LLMCacheEntry.key):
+                    if excess <= 0:
+                        break
+                    drop(key, feature)
+                    excess -= size
+                _delete(session, victims[expired:])
+
+            for feature, count in sorted(evicted.items()):
+                _bump(session, feature, evictions=count)
+            session.commit()
+            if victims:
+                logger.info(f"LLM cache evicted {len(victims)} entries")
+            return len(victims)
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"LLM cache eviction failed: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per feature: lookup counters, hit rate, and entries/bytes stored."""
+        session = self.Session()
+        try:
+            stored = {
+                feature: (entries, size or 0)
+                for feature, entries, size in session.query(
+                    LLMCacheEntry.feature,
+                    func.count(),
+                    func.sum(LLMCacheEntry.size_bytes),
+                ).group_by(LLMCacheEntry.feature)
+            }
+            result = {}
+            for row in session.query(LLMCacheStat).order_by(LLMCacheStat.feature):
+                lookups = row.hits + row.misses + row.stale
+                entries, size = stored.get(row.feature, (0, 0))
+                result[row.feature] = {
+                    "hits": row.hits,
+                    "misses": row.misses,
+                    "stale": row.stale,
+                    "stores": row.stores,
+                    "evictions": row.evictions,
+                    "hit_rate": row.hits / lookups if lookups else 0.0,
+                    "entries": entries,
+                    "bytes": size,
+                }
+            return result
+        finally:
+            session.close()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """The process-wide LLM cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
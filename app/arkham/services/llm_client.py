@@ -0,0 +1,258 @@
+"""
+One client for every chat completion sent to the LLM server.
+
+Services used to reach LM Studio four different ways (chat_with_llm, the
+enrichment pipeline's own requests.post, OpenAI SDK clients for RAG and a
+per-call OpenAI client for cluster naming), each with its own caching,
+timeout and retry behaviour. Every path now goes through this module and
+gets the same policy:
+
+- payloads are built once (build_payload), including LM Studio structured
+  output when a json_schema is given;
+- responses are kept in the durable LLM cache (llm_cache.py), keyed by
+  model + schema + normalised prompt, and optionally tied to the source
+  chunk texts. A streamed answer and a plain one share the same entry;
+- the timeout is llm.timeout. Saturated answers (429/503) are retried
+  llm.max_retries times;
+- every request holds a slot of the shared llm_scheduler window, so the
+  concurrency limit covers streaming too.
+
+complete() raises on failure (requests exceptions); callers decide what to
+show instead. chat_with_llm() in llm_service keeps its user-facing error
+strings on top of it.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+
+from config.settings import LM_STUDIO_URL
+
+from .config import get_config
+from .llm_cache import get_llm_cache, prompt_key, source_hash
+from .llm_scheduler import get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+# LM Studio Configuration from central config
+LM_STUDIO_BASE_URL = LM_STUDIO_URL
+if not LM_STUDIO_BASE_URL.endswith("/v1"):
+    LM_STUDIO_BASE_URL = f"{LM_STUDIO_BASE_URL}/v1"
+CHAT_ENDPOINT = f"{LM_STUDIO_BASE_URL}/chat/completions"
+MODEL_ID = "qwen/qwen3-vl-8b"
+
+# OpenAI-compatible clients (used for streaming), created once so their HTTP
+# connection pools are reused. httpx async pools belong to one event loop,
+# so there is one async client per loop.
+_llm_client = None
+_async_llm_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+Messages = Union[str, List[Dict[str, Any]]]
+
+
+def request_timeout() -> float:
+    """Seconds before an LLM request is abandoned (llm.timeout)."""
+    return float(get_config("llm.timeout", 120))
+
+
+def _sdk_options() -> Dict[str, Any]:
+    return {
+        "base_url": LM_STUDIO_BASE_URL,
+        "api_key": "lm-studio",
+        "timeout": request_timeout(),
+        "max_retries": int(get_config("llm.max_retries", 2)),
+    }
+
+
+def get_llm_client():
+    """Shared OpenAI client for LM Studio (streaming)."""
+    global _llm_client
+    with _client_lock:
+        if _llm_client is None:
+            from openai import OpenAI
+
+            _llm_client = OpenAI(**_sdk_options())
+        return _llm_client
+
+
+def get_async_llm_client():
+    """Shared AsyncOpenAI client for LM Studio, for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_llm_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(**_sdk_options())
+        _async_llm_clients[loop] = client
+    return client
+
+
+def build_payload(
+    messages: Messages,
+    temperature: float = 0.3,
+    max_tokens: Optional[int] = 1000,
+    json_schema: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Chat completion request body. `messages` is a prompt string or a list
+    of message dicts; max_tokens=None leaves the length to the server.
+    """
+    # Handle both string prompts and message arrays
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+
+    payload = {
+        "model": MODEL_ID,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": False,
+    }
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+
+    # LM Studio Structured Output:
+    # Use "json_schema" type with an actual schema for enforced structure
+    # See: https://lmstudio.ai/docs/advanced/structured-output
+    # (LM Studio doesn't support the "json_object" type; without a schema
+    # the prompts ask for JSON explicitly)
+    if json_schema:
+        payload["response_format"] = {"type": "json_schema", "json_schema": json_schema}
+    return payload
+
+
+def _cache_lookup(
+    payload: Dict[str, Any],
+    json_schema: Optional[Dict[str, Any]],
+    sources: Optional[Iterable[str]],
+    feature: str,
+):
+    """(key, source hash, cached answer) of a request."""
+    key = prompt_key(payload["model"], payload["messages"], json_schema)
+    sources_hash = source_hash(sources) if sources is not None else None
+    return key, sources_hash, get_llm_cache().get(key, feature, sources_hash)
+
+
+def _cache_store(key: str, feature: str, content: str, sources_hash: Optional[str]):
+    get_llm_cache().put(key, feature, content, source_hash=sources_hash, model=MODEL_ID)
+
+
+def complete(
+    messages: Messages,
+    temperature: float = 0.3,
+    max_tokens: Optional[int] = 1000,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    feature: str = "chat",
+    timeout: Optional[float] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    Send one chat completion and return the answer text.
+
+    Args:
+        messages: A prompt string or a list of message dicts
+        temperature: Creativity (0.0 - 1.0)
+        max_tokens: Max response length (None: server default)
+        json_schema: JSON schema to enforce structured output, e.g.
+                     {"name": "my_schema", "schema": {"type": "object", ...}}
+        use_cache: Whether to use the response cache
+        feature: Name the call's metrics are grouped under (llm_scheduler stats)
+        timeout: Seconds to wait (default llm.timeout)
+        sources: Texts of the chunks the prompt was built from; a cached
+                 answer is only reused while they are unchanged
+
+    Raises:
+        requests.exceptions.RequestException: server unreachable, timed out
+        or answered with an error status
+    """
+    payload = build_payload(messages, temperature, max_tokens, json_schema)
+    if use_cache:
+        key, sources_hash, cached = _cache_lookup(payload, json_schema, sources, feature)
+        if cached:
+            logger.info("Returning cached LLM response")
+            return cached
+
+    response = get_llm_scheduler().post(
+        CHAT_ENDPOINT, payload, timeout=timeout or request_timeout(), feature=feature
+    )
+    response.raise_for_status()
+    content = response.json()["choices"][0]["message"]["content"]
+
+    if use_cache:
+        _cache_store(key, feature, content, sources_hash)
+    return content
+
+
+def _stream_request(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(payload, stream=True)
+
+
+def stream_chat(
+    messages: Messages,
+    temperature: float = 0.3,
+    max_tokens: Optional[int] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    feature: str = "chat",
+    sources: Optional[Iterable[str]] = None,
+) -> Iterator[str]:
+    """
+    complete() that yields the answer as the server produces it. A cached
+    answer is yielded in one piece; a completed stream is cached. Errors
+    propagate to the caller, also after some text has been yielded.
+    """
+    payload = build_payload(messages, temperature, max_tokens, json_schema)
+    if use_cache:
+        key, sources_hash, cached = _cache_lookup(payload, json_schema, sources, feature)
+        if cached:
+            yield cached
+            return
+
+    parts = []
+    with get_llm_scheduler().slot(feature):
+        stream = get_llm_client().chat.completions.create(**_stream_request(payload))
+        with stream:
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    parts.append(token)
+                    yield token
+    if use_cache:
+        _cache_store(key, feature, "".join(parts), sources_hash)
+
+
+async def astream_chat(
+    messages: Messages,
+    temperature: float = 0.3,
+    max_tokens: Optional[int] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    feature: str = "chat",
+    sources: Optional[Iterable[str]] = None,
+) -> AsyncIterator[str]:
+    """stream_chat() for coroutines; the event loop is never blocked."""
+    payload = build_payload(messages, temperature, max_tokens, json_schema)
+    if use_cache:
+        key, sources_hash, cached = await asyncio.to_thread(
+            _cache_lookup, payload, json_schema, sources, feature
+        )
+        if cached:
+            yield cached
+            return
+
+    parts = []
+    async with get_llm_scheduler().aslot(feature):
+        stream = await get_async_llm_client().chat.completions.create(
+            **_stream_request(payload)
+        )
+        async with stream:
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    parts.append(token)
+                    yield token
+    if use_cache:
+        await asyncio.to_thread(_cache_store, key, feature, "".join(parts), sources_hash)
@@ -18,6 +18,7 @@ project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from config import LM_STUDIO_URL
+from app.arkham.services.llm_client import complete
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,8 @@ def call_llm(
     prompt: str, max_tokens: int = 500, temperature: float = 0.3
 ) -> Optional[str]:
     """
-    Call the local LLM with a prompt.
+    Call the local LLM with a prompt (through the shared LLM client, so
+    responses are cached).
 
     Args:
         prompt: The prompt to send
@@ -48,27 +50,12 @@ def call_llm(
         Response text or None if failed
     """
     try:
-        import requests
-
-        base_url = LM_STUDIO_URL
-
-        response = requests.post(
-            f"{base_url}/chat/completions",
-            json={
-                "model": "local-model",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-            },
-            timeout=60,
+        return complete(
+            prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            feature="enrichment",
         )
-
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            logger.warning(f"LLM returned status {response.status_code}")
-            return None
-
     except Exception as e:
         logger.error(f"LLM call failed: {e}")
         return None
@@ -0,0 +1,391 @@
+"""
+Concurrent dispatch of LLM requests.
+
+Every LLM call used to open its own HTTP connection (requests.post without
+a session), and bulk features (ACH rating suggestions, corpus fact
+comparison, cluster naming, contradiction detection) sent one prompt at a
+time, leaving the local server's parallel slots idle. LLMScheduler instead:
+
+- sends requests through one keep-alive connection pool;
+- keeps at most llm.max_concurrency requests in flight, to match the
+  server's parallel slots (LM Studio "Max Concurrent Predictions"). Callers
+  beyond the window wait for a slot;
+- applies back-pressure when the server is saturated. A 429/503 or a
+  timeout halves the window, then each success grows it back by about one
+  slot per window. 429/503 answers are retried after Retry-After (or an
+  exponential backoff);
+- records latency, queue wait and token usage per call, aggregated per
+  feature (stats());
+- runs batches with map() / iter_map() (threads) and amap() (asyncio).
+  map() and iter_map() take the next item only as a running one finishes,
+  so a long item list never queues thousands of requests at once.
+
+The window is enforced where requests are sent (post(), slot()), so nested
+maps and unrelated callers share the same limit.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+SATURATED_STATUS = {429, 503}
+LATENCY_SAMPLES = 500  # Recent calls kept per feature for percentiles
+
+
+@dataclass
+class LLMCallMetrics:
+    """One request: where its time went and what it cost."""
+
+    feature: str
+    queue_wait: float = 0.0  # Seconds waiting for a slot
+    latency: float = 0.0  # Seconds from sending to the full response
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    ok: bool = False
+
+
+@dataclass
+class _Ticket:
+    """One acquire() that its caller may abandon (see _Window.cancel)."""
+
+    cancelled: bool = False
+    granted: bool = False
+
+
+class _Window:
+    """Adaptive limit on requests in flight (additive increase, halving on saturation)."""
+
+    def __init__(self, limit: int, minimum: int = 1):
+        self.max_limit = max(1, limit)
+        self.minimum = max(1, min(minimum, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, ticket: Optional[_Ticket] = None) -> float:
+        """
+        Wait for a slot and take it; returns the seconds waited. No slot is
+        taken if the ticket is cancelled first.
+        """
+        start = time.monotonic()
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    if ticket and ticket.cancelled:
+                        break
+                    self._cond.wait()
+            finally:
+                self.waiting -= 1
+            if ticket:
+                if ticket.cancelled:
+                    return time.monotonic() - start
+                ticket.granted = True
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def cancel(self, ticket: _Ticket):
+        """Abandon an acquire(): stop its wait, or give back the slot it took."""
+        with self._cond:
+            ticket.cancelled = True
+            if ticket.granted:
+                self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, saturated: bool = False, ok: bool = True):
+        with self._cond:
+            self.in_flight -= 1
+            if saturated:
+                self.limit = max(float(self.minimum), self.limit / 2)
+            elif ok:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class _FeatureStats:
+    def __init__(self):
+        self.calls = self.errors = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.queue_wait = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, metrics: LLMCallMetrics):
+        self.calls += 1
+        self.errors += 0 if metrics.ok else 1
+        self.retries += metrics.retries
+        self.prompt_tokens += metrics.prompt_tokens
+        self.completion_tokens += metrics.completion_tokens
+        self.queue_wait += metrics.queue_wait
+        self.latencies.append(metrics.latency)
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        busy = sum(ordered)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_latency": busy / len(ordered) if ordered else 0.0,
+            "p95_latency": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+            "avg_queue_wait": self.queue_wait / self.calls if self.calls else 0.0,
+            "completion_tokens_per_s": (
+                self.completion_tokens / busy if busy else 0.0
+            ),
+        }
+
+
+def _usage(response) -> Tuple[int, int]:
+    try:
+        usage = response.json().get("usage") or {}
+        return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
+    except Exception:
+        return 0, 0
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """Bounded, pooled, measured dispatch of requests to the LLM server."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+        retry_backoff: float = 1.0,
+        http_session: Optional[requests.Session] = None,
+    ):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.window = _Window(self.max_concurrency)
+        if http_session is None:
+            http_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+            http_session.mount("http://", adapter)
+            http_session.mount("https://", adapter)
+        self.http = http_session
+        self._stats: Dict[str, _FeatureStats] = defaultdict(_FeatureStats)
+        self._stats_lock = threading.Lock()
+
+    def _record(self, metrics: LLMCallMetrics):
+        with self._stats_lock:
+            self._stats[metrics.feature].add(metrics)
+        logger.debug(
+            f"LLM {metrics.feature}: {metrics.latency:.2f}s "
+            f"(waited {metrics.queue_wait:.2f}s, {metrics.prompt_tokens}+"
+            f"{metrics.completion_tokens} tokens, {metrics.retries} retries)"
+        )
+
+    def post(
+        self, url: str, payload: Dict[str, Any], timeout: float = 120, feature: str = "chat"
+    ) -> requests.Response:
+        """
+        POST a JSON request within the window. Saturated answers (429/503)
+        are retried up to max_retries times; the last response is returned
+        either way, so callers keep using raise_for_status(). Connection
+        errors and timeouts propagate.
+        """
+        metrics = LLMCallMetrics(feature=feature)
+        try:
+            for attempt in range(self.max_retries + 1):
+                metrics.queue_wait += self.window.acquire()
+                response = None
+                saturated = False
+                start = time.monotonic()
+                try:
+                    response = self.http.post(url, json=payload, timeout=timeout)
+                    saturated = response.status_code in SATURATED_STATUS
+                except requests.exceptions.Timeout:
+                    saturated = True
+                    raise
+                finally:
+                    metrics.latency += time.monotonic() - start
+                    self.window.release(saturated=saturated, ok=response is not None)
+
+                if not saturated or attempt == self.max_retries:
+                    break
+                delay = _retry_after(response) or self.retry_backoff * 2**attempt
+                logger.info(
+                    f"LLM server saturated ({response.status_code}); "
+                    f"window {int(self.window.limit)}, retrying in {delay:.1f}s"
+                )
+                metrics.retries += 1
+                time.sleep(delay)
+
+            metrics.ok = response.ok
+            if response.ok:
+                metrics.prompt_tokens, metrics.completion_tokens = _usage(response)
+            return response
+        finally:
+            self._record(metrics)
+
+    @contextmanager
+    def slot(self, feature: str = "chat"):
+        """
+        Hold one window slot around a request sent another way (e.g. the
+        OpenAI SDK). Timeouts count as saturation; the latency is recorded.
+        """
+        metrics = LLMCallMetrics(feature=feature, queue_wait=self.window.acquire())
+        saturated = False
+        start = time.monotonic()
+        try:
+            yield metrics
+            metrics.ok = True
+        except Exception as e:
+            saturated = "timeout" in type(e).__name__.lower()
+            raise
+        finally:
+            metrics.latency = time.monotonic() - start
+            self.window.release(saturated=saturated, ok=metrics.ok)
+            self._record(metrics)
+
+    @asynccontextmanager
+    async def aslot(self, feature: str = "chat"):
+        """slot() for coroutines; waiting for the slot does not block the event loop."""
+        ticket = _Ticket()
+        try:
+            queue_wait = await asyncio.to_thread(self.window.acquire, ticket)
+        except asyncio.CancelledError:
+            # The waiting thread can't be interrupted; make sure it holds no slot
+            self.window.cancel(ticket)
+            raise
+        metrics = LLMCallMetrics(feature=feature, queue_wait=queue_wait)
+        saturated = False
+        start = time.monotonic()
+        try:
+            yield metrics
+            metrics.ok = True
+        except Exception as e:
+            saturated = "timeout" in type(e).__name__.lower()
+            raise
+        finally:
+            metrics.latency = time.monotonic() - start
+            self.window.release(saturated=saturated, ok=metrics.ok)
+            self._record(metrics)
+
+    def iter_map(
+        self, fn: Callable[[Any], Any], items: Iterable[Any]
+    ) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+        """
+        Run fn(item) on worker threads and yield (item, result, error) as
+        each finishes. At most max_concurrency items run at once and new
+        items are only taken from `items` as earlier ones finish. Closing
+        the generator cancels the items not yet started.
+        """
+        iterator = iter(items)
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        pending = {}
+        try:
+            for item in iterator:
+                pending[pool.submit(fn, item)] = item
+                if len(pending) >= self.max_concurrency:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield item, None if error else future.result(), error
+                    next_item = next(iterator, _END)
+                    if next_item is not _END:
+                        pending[pool.submit(fn, next_item)] = next_item
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def map(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        fn over items with bounded concurrency; results in input order. The
+        first error is raised unless return_exceptions, which puts the
+        exceptions in the results instead.
+        """
+        items = list(items)
+        results: List[Any] = [None] * len(items)
+        for (i, _), result, error in self.iter_map(
+            lambda pair: fn(pair[1]), enumerate(items)
+        ):
+            if error is not None and not return_exceptions:
+                raise error
+            results[i] = error if error is not None else result
+        return results
+
+    async def amap(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        map() for asyncio code. A coroutine function runs on the event loop
+        (send its requests within aslot()); a plain function runs in a
+        worker thread. At most max_concurrency items run at once.
+        """
+        limit = asyncio.Semaphore(self.max_concurrency)
+        is_async = asyncio.iscoroutinefunction(fn)
+
+        async def run(item):
+            async with limit:
+                if is_async:
+                    return await fn(item)
+                return await asyncio.to_thread(fn, item)
+
+        return await asyncio.gather(
+            *(run(item) for item in items), return_exceptions=return_exceptions
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Window state and per-feature call metrics."""
+        with self._stats_lock:
+            features = {name: s.summary() for name, s in self._stats.items()}
+        return {
+            "max_concurrency": self.max_concurrency,
+            "window": int(self.window.limit),
+            "in_flight": self.window.in_flight,
+            "waiting": self.window.waiting,
+            "features": features,
+        }
+
+
+_END = object()
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """The process-wide scheduler, configured from the `llm:` section."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                max_concurrency=int(get_config("llm.max_concurrency", 4)),
+                max_retries=int(get_config("llm.max_retries", 2)),
+                retry_backoff=float(get_config("llm.retry_backoff", 1.0)),
+            )
+        return _scheduler
@@ -2,36 +2,30 @@ import base64
 import logging
 import requests
 import json
-import hashlib
-from typing import List, Dict, Any, Optional
-from redis import Redis
-
-from config.settings import LM_STUDIO_URL, REDIS_URL
+from typing import List, Dict, Any
+
+# Requests go through the shared client (response cache, timeout/retry
+# policy, concurrency window); its names are re-exported for callers.
+from .llm_client import (  # noqa: F401
+    CHAT_ENDPOINT,
+    LM_STUDIO_BASE_URL,
+    MODEL_ID,
+    complete,
+    get_async_llm_client,
+    get_llm_client,
+)
 
 # Configure Logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Redis for caching
-redis_client = None
-if REDIS_URL:
-    try:
-        redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
-    except Exception as e:
-        logger.warning(f"Failed to connect to Redis for caching: {e}")
-
-# LM Studio Configuration from central config
-LM_STUDIO_BASE_URL = LM_STUDIO_URL
-if not LM_STUDIO_BASE_URL.endswith("/v1"):
-    LM_STUDIO_BASE_URL = f"{LM_STUDIO_BASE_URL}/v1"
-CHAT_ENDPOINT = f"{LM_STUDIO_BASE_URL}/chat/completions"
-MODEL_ID = "qwen/qwen3-vl-8b"
-
 logger.info(f"LM Studio configured: {LM_STUDIO_BASE_URL}")
 
 
 def encode_image(image_path):
-    """Encodes a local image to base64."""
+    """Encodes a local image (or image bytes already in memory) to base64."""
+    if isinstance(image_path, bytes):
+        return base64.b64encode(image_path).decode("utf-8")
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode("utf-8")
 
@@ -41,8 +35,8 @@ def transcribe_image(
     prompt="Transcribe the text in this image exactly as it appears. Maintain the layout structure. Do not summarize. Output in Markdown format.",
 ):
     """
-    Sends an image to the local LLM (Qwen-VL via LM Studio) for transcription using raw HTTP requests.
-    No OpenAI SDK involved.
+    Sends an image to the local LLM (Qwen-VL via LM Studio) for transcription through the shared
+    LLM client. Images are not cached.
 
     Returns:
         Transcribed text on success, None on failure (LM Studio not running, timeout, etc.)
@@ -50,40 +44,31 @@ def transcribe_image(
     try:
         base64_image = encode_image(image_path)
 
-        payload = {
-            "model": MODEL_ID,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a robotic OCR engine. Your ONLY job is to transcribe text from the image exactly as it appears. Do not correct typos. Do not summarize. Do not add commentary. If a word is illegible, write [illegible].",
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            },
-                        },
-                    ],
-                },
-            ],
-            "temperature": 0.0,
-            "max_tokens": 2048,
-            "stream": False,
-        }
-
-        headers = {"Content-Type": "application/json"}
-
-        response = requests.post(
-            CHAT_ENDPOINT, headers=headers, json=payload, timeout=180
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a robotic OCR engine. Your ONLY job is to transcribe text from the image exactly as it appears. Do not correct typos. Do not summarize. Do not add commentary. If a word is illegible, write [illegible].",
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/png;base64,{base64_image}"},
+                    },
+                ],
+            },
+        ]
+
+        return complete(
+            messages,
+            temperature=0.0,
+            max_tokens=2048,
+            use_cache=False,
+            feature="transcription",
+            timeout=180,
         )
-        response.raise_for_status()
-
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
 
     except requests.exceptions.ConnectionError:
         logger.warning(
@@ -115,6 +100,8 @@ def chat_with_llm(
     json_mode=False,
     json_schema=None,
     use_cache=True,
+    feature="chat",
+    sources=None,
 ):
     """
     Chat with the LLM.
@@ -124,74 +111,27 @@ def chat_with_llm(
         temperature: Creativity (0.0 - 1.0)
         max_tokens: Max response length
         json_mode: If True with no schema, relies on prompt engineering for JSON output
+                   (LM Studio has no "json_object" mode)
         json_schema: Dict containing JSON schema to enforce structured output.
                      Example: {"name": "my_schema", "schema": {"type": "object", "properties": {...}}}
-        use_cache: Whether to use Redis caching (default True)
+        use_cache: Whether to use the response cache (default True)
+        feature: Name the call's metrics and cache entries are grouped under
+        sources: Texts of the source chunks; the cached answer is reused only
+                 while they are unchanged
 
     Returns:
         String response content
     """
     try:
-        # Handle both string prompts and message arrays
-        if isinstance(messages, str):
-            # Convert string prompt to proper message format
-            messages = [{"role": "user", "content": messages}]
-
-        payload = {
-            "model": MODEL_ID,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": False,
-        }
-
-        # LM Studio Structured Output:
-        # Use "json_schema" type with an actual schema for enforced structure
-        # See: https://lmstudio.ai/docs/advanced/structured-output
-        if json_schema:
-            payload["response_format"] = {
-                "type": "json_schema",
-                "json_schema": json_schema,
-            }
-        # Note: LM Studio doesn't support "json_object" type.
-        # When json_mode=True but no schema, we rely on prompt engineering
-        # (the prompts already ask for JSON output explicitly)
-
-        # Check cache
-        cache_key = ""
-        if use_cache and redis_client:
-            try:
-                # Create deterministic hash of the payload
-                payload_str = json.dumps(payload, sort_keys=True)
-                cache_key = (
-                    f"llm_cache:{hashlib.md5(payload_str.encode('utf-8')).hexdigest()}"
-                )
-                cached_response = redis_client.get(cache_key)
-                if cached_response:
-                    logger.info("Returning cached LLM response")
-                    return cached_response
-            except Exception as e:
-                logger.warning(f"Cache check failed: {e}")
-
-        headers = {"Content-Type": "application/json"}
-
-        response = requests.post(
-            CHAT_ENDPOINT, headers=headers, json=payload, timeout=120
+        return complete(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_schema=json_schema,
+            use_cache=use_cache,
+            feature=feature,
+            sources=sources,
         )
-        response.raise_for_status()
-
-        result = response.json()
-        content = result["choices"][0]["message"]["content"]
-
-        # Save to cache
-        if use_cache and redis_client and cache_key and content:
-            try:
-                # Cache for 24 hours
-                redis_client.setex(cache_key, 86400, content)
-            except Exception as e:
-                logger.warning(f"Cache save failed: {e}")
-
-        return content
 
     except requests.exceptions.ConnectionError:
         # LM Studio not running or not reachable
@@ -2,21 +2,19 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL
 import os
 from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from app.arkham.services.db.models import CanonicalEntity
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.geocoding_service import get_geocoder
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 
 def get_map_entities(
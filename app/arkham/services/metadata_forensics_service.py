@@ -12,13 +12,11 @@ from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 import logging
 
-from config.settings import DATABASE_URL
-
-from sqlalchemy import create_engine, func, and_, or_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, and_, or_
 from dotenv import load_dotenv
 
 from app.arkham.services.db.models import Document
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 
@@ -34,8 +32,8 @@ class MetadataForensicsService:
     """Service for document metadata analysis and forensics."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_metadata_summary(self) -> Dict:
         """
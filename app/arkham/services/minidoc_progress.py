@@ -0,0 +1,85 @@
+"""
+MiniDoc OCR completion counter.
+
+Each MiniDoc keeps a pages_done counter. A page job bumps it with one
+UPDATE ... RETURNING in the same transaction that inserts the page's
+PageOCR row, so the row lock serialises concurrent finishers. The unique
+(document_id, page_num) constraint on page_ocr means a page counts only
+once, even if its job runs twice. Exactly one finishing page sees
+pages_done reach the page count, and only that job enqueues the parser.
+No COUNT(*) over page_ocr is needed.
+
+The splitter resets the counter when it (re)creates a MiniDoc and counts
+the pages it saves from the text layer.
+"""
+
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .db.models import MiniDoc
+
+PAGE_COUNT = MiniDoc.page_end - MiniDoc.page_start + 1
+
+
+def _containing(doc_id: int, page_num: int):
+    return (
+        MiniDoc.document_id == doc_id,
+        MiniDoc.page_start <= page_num,
+        MiniDoc.page_end >= page_num,
+    )
+
+
+def complete_page(
+    session: Session, doc_id: int, page_num: int, new_page: bool = True
+) -> Optional[int]:
+    """
+    Count a finished page towards its MiniDoc, in the caller's transaction.
+
+    new_page: the page's PageOCR row was inserted (not updated) in this
+        transaction. Re-OCR of an existing page (e.g. a retry of a failed
+        page) does not count again, but re-parses an already complete
+        MiniDoc.
+
+    Returns the MiniDoc id if it is now complete (the caller commits, then
+    enqueues the parser), else None.
+    """
+    if new_page:
+        row = session.execute(
+            update(MiniDoc)
+            .where(*_containing(doc_id, page_num))
+            .values(pages_done=MiniDoc.pages_done + 1)
+            .returning(MiniDoc.id, MiniDoc.pages_done, PAGE_COUNT)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None or row[1] != row[2]:
+            return None
+    else:
+        row = (
+            session.query(MiniDoc.id, MiniDoc.pages_done, PAGE_COUNT)
+            .filter(*_containing(doc_id, page_num))
+            .first()
+        )
+        if row is None or row[1] < row[2]:
+            return None
+
+    minidoc_id = row[0]
+    session.execute(
+        update(MiniDoc)
+        .where(MiniDoc.id == minidoc_id)
+        .values(status="ocr_done")
+        .execution_options(synchronize_session=False)
+    )
+    return minidoc_id
+
+
+def add_pages_done(session: Session, minidoc_db_id: int, count: int):
+    """Count pages saved outside page jobs (range jobs). The caller commits."""
+    if count:
+        session.execute(
+            update(MiniDoc)
+            .where(MiniDoc.id == minidoc_db_id)
+            .values(pages_done=MiniDoc.pages_done + count)
+            .execution_options(synchronize_session=False)
+        )
@@ -12,18 +12,16 @@ import json
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Chunk,
     EntityMention,
     EntityRelationship,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.llm_service import (
     chat_with_llm,
     NARRATIVE_SCHEMA,
@@ -41,8 +39,8 @@ class NarrativeService:
     """Service for narrative reconstruction and motive inference."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def _get_entity_context(
         self, session, entity_id: int, limit: int = 20
@@ -0,0 +1,139 @@
+"""
+Persistent pool of PaddleOCR engine processes.
+
+process_page_job OCRs one page per RQ job on the worker's single engine, and
+run_rq_worker.py uses SimpleWorker (no fork), so a worker only ever keeps one
+core busy. In range mode (ocr.execution_mode: range) the OCR worker instead
+takes a whole MiniDoc page range as one job and fans its pages out to this
+pool: processing.max_workers processes, each holding its own PaddleOCR
+engine for the life of the pool.
+
+This module is deliberately light: pool processes are started with "spawn"
+(also the only option on Windows) and re-import it, so it must not import
+the RQ workers.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Per-process engine (in pool processes only)
+_engine = None
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def parse_paddle_result(result) -> Tuple[str, List[Dict[str, Any]]]:
+    """Page text and per-line metadata (box, text, conf) from a PaddleOCR result."""
+    page_text = ""
+    ocr_meta = []
+    if not result or not result[0]:
+        return page_text, ocr_meta
+
+    # Handle PaddleX / New PaddleOCR structure
+    ocr_res = result[0]
+
+    # Check if it has the new keys
+    if hasattr(ocr_res, "keys") and "rec_texts" in ocr_res:
+        texts = ocr_res["rec_texts"]
+        scores = ocr_res["rec_scores"]
+        boxes = ocr_res["rec_polys"]  # These are numpy arrays
+
+        for box, text, score in zip(boxes, texts, scores):
+            # Convert box to list for JSON serialization
+            box_list = box.tolist() if hasattr(box, "tolist") else box
+            page_text += text + "\n"
+            ocr_meta.append({"box": box_list, "text": text, "conf": float(score)})
+
+    # Fallback for old list-of-lists structure
+    elif isinstance(ocr_res, list):
+        for line in ocr_res:
+            # line structure: [[x1,y1,x2,y2], (text, conf)]
+            if len(line) >= 2:
+                box = line[0]
+                text, conf = line[1]
+                page_text += text + "\n"
+                ocr_meta.append({"box": box, "text": text, "conf": conf})
+
+    return page_text, ocr_meta
+
+
+def _init_engine(use_gpu: bool, lang: str):
+    """Pool process initializer: one single-threaded PaddleOCR engine per process."""
+    global _engine
+    # Parallelism comes from the pool; keep each engine on one core
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
+    from paddleocr import PaddleOCR
+
+    if use_gpu:
+        _engine = PaddleOCR(use_angle_cls=True, lang=lang)
+    else:
+        _engine = PaddleOCR(use_angle_cls=True, lang=lang, device="cpu")
+
+
+def ocr_image(image: Union[str, bytes]) -> Tuple[str, List[Dict[str, Any]]]:
+    """OCR one page image (file path or encoded image bytes) in a pool process."""
+    import io
+
+    import numpy as np
+    from PIL import Image
+
+    if isinstance(image, bytes):
+        image = io.BytesIO(image)
+    with Image.open(image) as img:
+        img_np = np.array(img)
+    return parse_paddle_result(_engine.ocr(img_np))
+
+
+def pool_size() -> int:
+    return max(1, int(get_config("processing.max_workers", 2)))
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """The process-wide OCR pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = pool_size()
+            logger.info(f"Starting OCR pool with {size} PaddleOCR processes...")
+            _pool = ProcessPoolExecutor(
+                max_workers=size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_engine,
+                initargs=(
+                    bool(get_config("ocr.paddle.use_gpu", False)),
+                    get_config("ocr.paddle.lang", "en"),
+                ),
+            )
+        return _pool
+
+
+def shutdown_ocr_pool(wait: bool = True):
+    """Stop the pool; the next get_ocr_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_ocr_pool)
+
+
+def submit_pages(images: Iterable[Union[str, bytes]]) -> List[Future]:
+    """
+    Submit page images (paths or bytes) to the pool as they are produced;
+    futures are returned in page order.
+    """
+    pool = get_ocr_pool()
+    return [pool.submit(ocr_image, image) for image in images]
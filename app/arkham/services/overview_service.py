@@ -2,11 +2,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL
 import os
 from typing import Dict, Any, List
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,10 +16,12 @@ from app.arkham.services.db.models import (
     ExtractedTable,
     TimelineEvent,
 )
+from app.arkham.services.corpus_stats import read_corpus_stats
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 
 def get_overview_stats() -> Dict[str, Any]:
@@ -31,29 +30,11 @@ def get_overview_stats() -> Dict[str, Any]:
     """
     session = SessionLocal()
     try:
-        # Document counts
-        total_docs = session.query(Document).count()
-        docs_by_type = (
-            session.query(Document.doc_type, func.count(Document.id))
-            .group_by(Document.doc_type)
-            .all()
-        )
-
-        # Entity counts
-        total_entities = session.query(CanonicalEntity).count()
-        entities_by_type = (
-            session.query(CanonicalEntity.label, func.count(CanonicalEntity.id))
-            .group_by(CanonicalEntity.label)
-            .order_by(func.count(CanonicalEntity.id).desc())
-            .limit(5)
-            .all()
-        )
-
-        # Other metrics
-        total_chunks = session.query(Chunk).count()
-        total_anomalies = session.query(Anomaly).count()
-        total_tables = session.query(ExtractedTable).count()
-        total_events = session.query(TimelineEvent).count()
+        # Materialised counters (services/corpus_stats.py)
+        stats = read_corpus_stats(session)
+        entities_by_type = sorted(
+            stats["entity_types"].items(), key=lambda item: item[1], reverse=True
+        )[:5]
 
         # Recent activity (newest documents)
         recent_docs = (
@@ -61,14 +42,16 @@ def get_overview_stats() -> Dict[str, Any]:
         )
 
         return {
-            "total_docs": total_docs,
-            "docs_by_type": [{"type": t, "count": c} for t, c in docs_by_type],
-            "total_entities": total_entities,
+            "total_docs": stats["documents"],
+            "docs_by_type": [
+                {"type": t, "count": c} for t, c in stats["doc_types"].items()
+            ],
+            "total_entities": stats["entities"],
             "top_entity_types": [{"type": t, "count": c} for t, c in entities_by_type],
-            "total_chunks": total_chunks,
-            "total_anomalies": total_anomalies,
-            "total_tables": total_tables,
-            "total_events": total_events,
+            "total_chunks": stats["chunks"],
+            "total_anomalies": stats["anomalies"],
+            "total_tables": stats["tables"],
+            "total_events": stats["timeline_events"],
             "recent_docs": [
                 {
                     "id": d.id,
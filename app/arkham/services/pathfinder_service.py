@@ -10,119 +10,93 @@ import logging
 from typing import Dict, Any, List, Optional, Tuple
 from collections import defaultdict
 import networkx as nx
-from sqlalchemy import create_engine, or_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import or_
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
-from app.arkham.services.db.models import (
-    CanonicalEntity,
-    EntityRelationship,
-)
+from app.arkham.services.db.models import CanonicalEntity
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.graph_cache import get_entity_graph_cache
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-
+# Node attributes used by the Path Finder ({attribute: graph_cache column})
+PATH_NODE_ATTRS = {"name": "name", "type": "label", "mentions": "mentions"}
 
 
 class PathFinderService:
     """Service for finding paths between entities."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def build_graph(self, min_weight: float = 0.1) -> nx.Graph:
-        """Build NetworkX graph from entity relationships."""
-        session = self.Session()
-        try:
-            G = nx.Graph()
-
-            # Add entities as nodes
-            entities = (
-                session.query(CanonicalEntity)
-                .filter(CanonicalEntity.total_mentions > 0)
-                .all()
-            )
-
-            for entity in entities:
-                G.add_node(
-                    entity.id,
-                    name=entity.canonical_name,
-                    type=entity.label,
-                    mentions=entity.total_mentions,
-                )
-
-            # Add relationships as edges
-            logger.info(f"Querying relationships with strength >= {min_weight}")
-            relationships = (
-                session.query(EntityRelationship)
-                .filter(EntityRelationship.strength >= min_weight)
-                .all()
-            )
-            logger.info(f"Found {len(relationships)} relationships")
-
-            edge_count = 0
-            for rel in relationships:
-                if G.has_node(rel.entity1_id) and G.has_node(rel.entity2_id):
-                    G.add_edge(
-                        rel.entity1_id,
-                        rel.entity2_id,
-                        weight=rel.strength,
-                        type=rel.relationship_type or "associated",
-                    )
-                    edge_count += 1
-
-            logger.info(
-                f"Added {edge_count} edges to graph (some rels may not have valid nodes)"
-            )
-            return G
-        finally:
-            session.close()
+        """
+        Entity graph of mentioned entities with edges of at least min_weight.
+
+        Served from the shared in-memory graph (graph_cache.py); the returned
+        graph is frozen and shared, so don't mutate it.
+        """
+        graph = get_entity_graph_cache().get()
+        G = graph.to_networkx(
+            min_weight=min_weight,
+            min_mentions=1,
+            node_attrs=PATH_NODE_ATTRS,
+            edge_types=True,
+        )
+        logger.info(
+            f"Entity graph v{graph.version}: {G.number_of_nodes()} nodes, "
+            f"{G.number_of_edges()} edges (min_weight={min_weight})"
+        )
+        return G
 
     def find_shortest_path(
         self, source_id: int, target_id: int, min_weight: float = 0.1
     ) -> Dict[str, Any]:
         """Find shortest path between two entities."""
-        G = self.build_graph(min_weight)
-        logger.info(
-            f"Built graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges (min_weight={min_weight})"
-        )
+        # Breadth-first search straight on the cached CSR arrays, no NetworkX
+        # graph needed for a single query
+        graph = get_entity_graph_cache().get()
 
-        if source_id not in G.nodes:
-            return {"error": "Source entity not found in graph"}
-        if target_id not in G.nodes:
-            return {"error": "Target entity not found in graph"}
+        for entity_id, role in ((source_id, "Source"), (target_id, "Target")):
+            node = graph.node(entity_id)
+            if node is None or node["mentions"] < 1:
+                return {"error": f"{role} entity not found in graph"}
 
         try:
-            # Find shortest path
-            path = nx.shortest_path(G, source_id, target_id)
+            path = graph.shortest_path(
+                source_id, target_id, min_weight=min_weight, min_mentions=1
+            )
+            if path is None:
+                return {
+                    "found": False,
+                    "error": "No path exists between these entities",
+                }
 
             # Build path details
             path_nodes = []
             for node_id in path:
-                node_data = G.nodes[node_id]
+                node = graph.node(node_id)
                 path_nodes.append(
                     {
                         "id": node_id,
-                        "name": node_data.get("name", ""),
-                        "type": node_data.get("type", ""),
-                        "mentions": node_data.get("mentions", 0),
+                        "name": node["name"] or "",
+                        "type": node["label"] or "",
+                        "mentions": node["mentions"],
                     }
                 )
 
             # Build edge details
             path_edges = []
             for i in range(len(path) - 1):
-                edge_data = G.edges[path[i], path[i + 1]]
+                edge = graph.edge(path[i], path[i + 1])
                 path_edges.append(
                     {
                         "source": path[i],
                         "target": path[i + 1],
-                        "weight": edge_data.get("weight", 1),
-                        "type": edge_data.get("type", "associated"),
+                        "weight": edge["weight"],
+                        "type": edge["type"],
                     }
                 )
 
@@ -133,11 +107,6 @@ class PathFinderService:
                 "edges": path_edges,
             }
 
-        except nx.NetworkXNoPath:
-            return {
-                "found": False,
-                "error": "No path exists between these entities",
-            }
         except Exception as e:
             return {"error": str(e)}
 
@@ -193,19 +162,15 @@ class PathFinderService:
             return {"error": "Entity not found in graph"}
 
         try:
-            # Use ego_graph for N-hop neighborhood
-            ego = nx.ego_graph(G, entity_id, radius=degree)
+            # One BFS gives the N-hop neighborhood and every distance
+            distances = nx.single_source_shortest_path_length(
+                G, entity_id, cutoff=degree
+            )
 
             neighbors = []
-            for node_id in ego.nodes:
+            for node_id, distance in distances.items():
                 if node_id != entity_id:
                     node_data = G.nodes[node_id]
-                    # Calculate distance from source
-                    try:
-                        distance = nx.shortest_path_length(G, entity_id, node_id)
-                    except nx.NetworkXNoPath:
-                        distance = -1
-
                     neighbors.append(
                         {
                             "id": node_id,
@@ -0,0 +1,159 @@
+"""
+Per-page triage and rendering for PDF splitting.
+
+Born-digital PDFs carry a text layer PyMuPDF can read directly, so the
+splitter only rasterises and OCRs pages that need it: pages with too little
+extractable text (scans) or mostly covered by images. Text-layer pages are
+written straight to PageOCR with mode "text_layer".
+
+Pages that do need OCR are rendered here too, either to PNG files under
+the pages directory or, with ocr.stream_pages in range mode, to PNG bytes
+in the OCR job itself so nothing round-trips through disk.
+
+Thresholds come from the `ocr.text_layer` section of config.yaml.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+from sqlalchemy.orm import Session
+
+from .config import get_config
+from .db.models import PageOCR
+
+DPI = 200  # Render resolution for OCR
+TEXT_LAYER_MODE = "text_layer"
+MAX_UNMAPPED_RATIO = 0.1  # Share of U+FFFD above which a text layer is garbage
+
+
+def triage_enabled() -> bool:
+    return bool(get_config("ocr.text_layer.enabled", True))
+
+
+def image_coverage(page: "fitz.Page") -> float:
+    """Share of the page area covered by images (overlapping images add up, capped at 1)."""
+    page_rect = page.rect
+    page_area = abs(page_rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        covered += abs(fitz.Rect(info["bbox"]) & page_rect)
+    return min(1.0, covered / page_area)
+
+
+def page_text_layer(
+    page: "fitz.Page",
+    min_chars: Optional[int] = None,
+    max_image_coverage: Optional[float] = None,
+) -> Optional[str]:
+    """
+    The page's native text if it can stand in for OCR, else None.
+
+    A page needs OCR when its text layer has fewer than min_chars
+    non-whitespace characters, is mostly unmapped glyphs (fonts without a
+    Unicode mapping), or more than max_image_coverage of it is images.
+    """
+    if min_chars is None:
+        min_chars = get_config("ocr.text_layer.min_chars", 100)
+    if max_image_coverage is None:
+        max_image_coverage = get_config("ocr.text_layer.max_image_coverage", 0.5)
+
+    text = page.get_text("text", sort=True)
+    chars = len("".join(text.split()))
+    if chars < min_chars:
+        return None
+    if text.count("\ufffd") > chars * MAX_UNMAPPED_RATIO:
+        return None
+    if image_coverage(page) > max_image_coverage:
+        return None
+    return text
+
+
+def text_layer_meta(page: "fitz.Page", dpi: int = DPI) -> List[Dict[str, Any]]:
+    """Per-block boxes in rendered-image pixels, shaped like PaddleOCR line meta."""
+    scale = dpi / 72
+    meta = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks", sort=True):
+        if block_type != 0 or not text.strip():
+            continue  # Image block
+        x0, y0, x1, y1 = (round(v * scale, 1) for v in (x0, y0, x1, y1))
+        meta.append(
+            {
+                "box": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+                "text": text.strip(),
+                "conf": 1.0,
+            }
+        )
+    return meta
+
+
+def render_page(page: "fitz.Page", dpi: int = DPI) -> bytes:
+    """PNG bytes of one page."""
+    return page.get_pixmap(dpi=dpi).tobytes("png")
+
+
+def render_page_file(page: "fitz.Page", image_path: str, dpi: int = DPI) -> str:
+    """Render one page to a PNG file (what OCR jobs read in the default mode)."""
+    page.get_pixmap(dpi=dpi).save(image_path)
+    return image_path
+
+
+def render_pdf_pages(
+    pdf_path: str, page_nums: Sequence[int], dpi: int = DPI
+) -> Iterator[Tuple[int, bytes]]:
+    """Lazily render the given 1-based pages as (page_num, PNG bytes)."""
+    with fitz.open(pdf_path) as pdf:
+        for page_num in page_nums:
+            yield page_num, render_page(pdf.load_page(page_num - 1), dpi)
+
+
+def write_page_json(
+    output_dir: str, doc_id, page_num: int, page_text: str, ocr_meta, ocr_mode: str
+):
+    """Writes the OCR output of one page next to the other pages of the document."""
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, f"page_{page_num:04d}.json")
+
+    output_data = {
+        "doc_id": doc_id,
+        "page_num": page_num,
+        "text": page_text,
+        "meta": ocr_meta,
+        "mode": ocr_mode,
+    }
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+
+def store_text_layer_page(
+    session: Session,
+    doc_id: int,
+    page_num: int,
+    page_text: str,
+    ocr_meta: List[Dict[str, Any]],
+    output_dir: str,
+):
+    """Save a text-layer page like an OCR'd one (JSON + PageOCR). The caller commits."""
+    write_page_json(output_dir, doc_id, page_num, page_text, ocr_meta, TEXT_LAYER_MODE)
+
+    existing = (
+        session.query(PageOCR).filter_by(document_id=doc_id, page_num=page_num).first()
+    )
+    if existing:
+        existing.text = page_text
+        existing.ocr_meta = json.dumps(ocr_meta)
+    else:
+        session.add(
+            PageOCR(
+                document_id=doc_id,
+                page_num=page_num,
+                text=page_text,
+                ocr_meta=json.dumps(ocr_meta),
+                checksum=hashlib.sha256(page_text.encode("utf-8")).hexdigest(),
+            )
+        )
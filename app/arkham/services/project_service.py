@@ -4,7 +4,6 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from sqlalchemy import (
-    create_engine,
     Column,
     Integer,
     String,
@@ -12,11 +11,12 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     desc,
+    func,
 )
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -47,8 +47,8 @@ class ProjectService:
     """Service for managing projects/cases."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
         # Create tables if not exists (Project table)
         # Note: Document table is defined elsewhere, but we assume it exists
         Base.metadata.create_all(self.engine)
@@ -193,12 +193,14 @@ class ProjectService:
 
         session = self.Session()
         try:
+            from app.arkham.services.corpus_stats import merge_project_stats
             from app.arkham.services.db.models import Document as DocModel
 
             # Move documents to Default Project
             session.query(DocModel).filter(DocModel.project_id == project_id).update(
                 {"project_id": 1}
             )
+            merge_project_stats(session, project_id, 1)
 
             # Delete project
             project = session.query(Project).filter_by(id=project_id).first()
@@ -214,18 +216,13 @@ class ProjectService:
         """Get a single project with details."""
         session = self.Session()
         try:
-            from app.arkham.services.db.models import Document as DocModel
+            from app.arkham.services.corpus_stats import read_corpus_stats
 
             project = session.query(Project).filter_by(id=project_id).first()
             if not project:
                 return None
 
-            # Count documents using Document.project_id
-            doc_count = (
-                session.query(DocModel)
-                .filter(DocModel.project_id == project_id)
-                .count()
-            )
+            doc_count = read_corpus_stats(session, project_id)["documents"]
 
             return {
                 "id": project.id,
@@ -254,7 +251,7 @@ class ProjectService:
         """List all projects with optional filters."""
         session = self.Session()
         try:
-            from app.arkham.services.db.models import Document as DocModel
+            from app.arkham.services.corpus_stats import read_corpus_stats
 
             query = session.query(Project)
 
@@ -265,12 +262,11 @@ class ProjectService:
 
             projects = query.order_by(desc(Project.updated_at)).limit(limit).all()
 
+            by_project = read_corpus_stats(session)["by_project"] if projects else {}
+
             result = []
             for p in projects:
-                # Use Document.project_id directly
-                doc_count = (
-                    session.query(DocModel).filter(DocModel.project_id == p.id).count()
-                )
+                doc_count = by_project.get(p.id, {}).get("documents", 0)
                 result.append(
                     {
                         "id": p.id,
@@ -299,6 +295,8 @@ class ProjectService:
         try:
             from app.arkham.services.db.models import Document as DocModel
 
+            from app.arkham.services.corpus_stats import move_document
+
             doc = session.query(DocModel).filter_by(id=document_id).first()
             if not doc:
                 return {"error": "Document not found"}
@@ -307,6 +305,7 @@ class ProjectService:
                 return {"error": "Document already in project"}
 
             # Set project_id directly
+            move_document(session, doc, doc.project_id, project_id)
             doc.project_id = project_id
             session.commit()
 
@@ -322,6 +321,7 @@ class ProjectService:
         """Remove a document from a project (moves to Default Project)."""
         session = self.Session()
         try:
+            from app.arkham.services.corpus_stats import move_document
             from app.arkham.services.db.models import Document as DocModel
 
             doc = (
@@ -331,6 +331,7 @@ class ProjectService:
             )
             if doc:
                 # Move to Default Project (ID=1) instead of leaving orphaned
+                move_document(session, doc, doc.project_id, 1)
                 doc.project_id = 1
                 session.commit()
                 return True
@@ -372,22 +373,30 @@ class ProjectService:
         """Get project statistics."""
         session = self.Session()
         try:
-            total = session.query(Project).count()
-
-            by_status = {}
-            for status in ["active", "archived", "completed"]:
-                count = session.query(Project).filter_by(status=status).count()
-                by_status[status] = count
-
-            by_priority = {}
-            for priority in ["high", "medium", "low"]:
-                count = session.query(Project).filter_by(priority=priority).count()
-                by_priority[priority] = count
-
+            from app.arkham.services.corpus_stats import read_corpus_stats
+
+            # One grouped pass over the (small) projects table
+            by_status = {status: 0 for status in ["active", "archived", "completed"]}
+            by_priority = {priority: 0 for priority in ["high", "medium", "low"]}
+            total = 0
+            for status, priority, count in session.query(
+                Project.status, Project.priority, func.count(Project.id)
+            ).group_by(Project.status, Project.priority):
+                total += count
+                if status in by_status:
+                    by_status[status] += count
+                if priority in by_priority:
+                    by_priority[priority] += count
+
+            corpus = read_corpus_stats(session)
             return {
                 "total": total,
                 "by_status": by_status,
                 "by_priority": by_priority,
+                "documents_by_project": {
+                    project_id: block["documents"]
+                    for project_id, block in corpus["by_project"].items()
+                },
             }
         finally:
             session.close()
@@ -0,0 +1,276 @@
+"""
+Query embedding cache shared by every process.
+
+embed_hybrid() used to cache with functools.lru_cache, so each Reflex
+backend worker and RQ worker re-encoded the same queries (saved searches,
+history replays, ACH evidence imports), and callers shared, and could
+mutate, the cached lists. Query embeddings are now stored once, keyed by
+(provider, model, normalized text), in Redis (or, without Redis, in a
+per-process LRU):
+
+- dense vectors as float16 (or int8 with a per-vector scale), sparse
+  weights as uint32 index / float16 weight pairs, about a quarter of the
+  size of a float32 vector;
+- at most embedding.query_cache.max_entries entries; the least recently
+  used are evicted (a sorted set of last-use times in Redis);
+- hit/miss counters, shared across processes in Redis (stats()).
+
+Every lookup decodes a fresh dict. A miss returns the stored (quantized)
+embedding too, so a query embeds the same way whether or not it was cached.
+"""
+
+import hashlib
+import logging
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float16": 0, "int8": 1}
+
+# dtype code, dense length, sparse length, int8 scale
+_HEADER = struct.Struct("<BIIf")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Unicode NFKC, whitespace runs collapsed to one space, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def encode_embedding(embedding: Dict[str, Any], dtype: str = "float16") -> bytes:
+    """Pack {"dense": [...], "sparse": {index: weight}} into compact bytes."""
+    dense = np.asarray(embedding["dense"], dtype=np.float32)
+    scale = 0.0
+    if dtype == "int8":
+        peak = float(np.abs(dense).max()) if dense.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        packed = np.round(dense / scale).astype(np.int8)
+    else:
+        packed = dense.astype(np.float16)
+    sparse = embedding.get("sparse") or {}
+    indices = np.fromiter((int(i) for i in sparse.keys()), dtype=np.uint32, count=len(sparse))
+    weights = np.fromiter(
+        (float(w) for w in sparse.values()), dtype=np.float16, count=len(sparse)
+    )
+    header = _HEADER.pack(DTYPES[dtype], dense.size, len(sparse), scale)
+    return header + packed.tobytes() + indices.tobytes() + weights.tobytes()
+
+
+def decode_embedding(blob: bytes) -> Dict[str, Any]:
+    """Inverse of encode_embedding(); always builds new lists and dicts."""
+    code, dense_len, sparse_len, scale = _HEADER.unpack_from(blob)
+    offset = _HEADER.size
+    if code == DTYPES["int8"]:
+        dense = np.frombuffer(blob, np.int8, dense_len, offset).astype(np.float32) * scale
+        offset += dense_len
+    else:
+        dense = np.frombuffer(blob, np.float16, dense_len, offset).astype(np.float32)
+        offset += dense_len * 2
+    indices = np.frombuffer(blob, np.uint32, sparse_len, offset)
+    offset += sparse_len * 4
+    weights = np.frombuffer(blob, np.float16, sparse_len, offset).astype(np.float32)
+    return {
+        "dense": dense.tolist(),
+        "sparse": dict(zip(indices.tolist(), weights.tolist())),
+    }
+
+
+class MemoryStore:
+    """Per-process LRU of encoded embeddings."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._counts = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return blob
+
+    def put(self, key: str, blob: bytes):
+        with self._lock:
+            self._entries[key] = blob
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counts, "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counts = {"hits": 0, "misses": 0}
+
+
+class RedisStore:
+    """
+    Encoded embeddings in Redis, shared by all processes.
+
+    Keys: {prefix}v:{digest} holds an embedding, the {prefix}lru sorted set
+    scores each digest by its last use, {prefix}stats counts hits/misses.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, max_entries: int, prefix: str = "qemb:"):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._lru = f"{prefix}lru"
+        self._stats = f"{prefix}stats"
+
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}v:{digest}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        blob = self.client.get(self._key(key))
+        pipe = self.client.pipeline(transaction=False)
+        if blob is None:
+            pipe.hincrby(self._stats, "misses", 1)
+        else:
+            pipe.zadd(self._lru, {key: time.time()}, xx=True)
+            pipe.hincrby(self._stats, "hits", 1)
+        pipe.execute()
+        return blob
+
+    def put(self, key: str, blob: bytes):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._key(key), blob)
+        pipe.zadd(self._lru, {key: time.time()})
+        pipe.zcard(self._lru)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = self.client.zpopmin(self._lru, size - self.max_entries)
+            if evicted:
+                self.client.delete(*(self._key(_text(d)) for d, _ in evicted))
+
+    def counts(self) -> Dict[str, int]:
+        stats = self.client.hgetall(self._stats)
+        return {
+            "hits": int(stats.get(b"hits", stats.get("hits", 0))),
+            "misses": int(stats.get(b"misses", stats.get("misses", 0))),
+            "entries": int(self.client.zcard(self._lru)),
+        }
+
+    def clear(self):
+        digests = self.client.zrange(self._lru, 0, -1)
+        if digests:
+            self.client.delete(*(self._key(_text(d)) for d in digests))
+        self.client.delete(self._lru, self._stats)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class QueryEmbeddingCache:
+    """Embeddings of query texts for one provider/model (the namespace)."""
+
+    def __init__(self, store, namespace: str, dtype: str = "float16"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown query cache dtype: {dtype}")
+        self.store = store
+        self.namespace = namespace
+        self.dtype = dtype
+
+    def key(self, text: str) -> str:
+        payload = f"{self.namespace}\0{normalize_query(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_or_compute(
+        self, text: str, compute: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """The cached embedding of `text`, else compute(normalized text), stored."""
+        key = self.key(text)
+        try:
+            blob = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"Query embedding cache read failed: {e}")
+            blob = None
+        if blob is not None:
+            return decode_embedding(blob)
+
+        blob = encode_embedding(compute(normalize_query(text)), self.dtype)
+        try:
+            self.store.put(key, blob)
+        except Exception as e:
+            logger.warning(f"Query embedding cache write failed: {e}")
+        return decode_embedding(blob)
+
+    def stats(self) -> Dict[str, Any]:
+        counts = self.store.counts()
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **counts,
+            "hit_rate": counts["hits"] / lookups if lookups else 0.0,
+            "backend": self.store.backend,
+            "max_entries": self.store.max_entries,
+        }
+
+
+_cache: Optional[QueryEmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def _namespace() -> str:
+    provider = get_config("embedding.provider", "bge-m3")
+    if provider == "minilm-bm25":
+        model = get_config(
+            "embedding.providers.minilm-bm25.dense_model",
+            "sentence-transformers/all-MiniLM-L6-v2",
+        )
+    else:
+        model = get_config(f"embedding.providers.{provider}.model_name", "BAAI/bge-m3")
+    return f"{provider}:{model}"
+
+
+def _make_store(max_entries: int):
+    if get_config("embedding.query_cache.backend", "redis") == "redis":
+        try:
+            from redis import Redis
+
+            from config.settings import REDIS_URL
+
+            client = Redis.from_url(REDIS_URL)
+            client.ping()
+            return RedisStore(client, max_entries)
+        except Exception as e:
+            logger.warning(f"Query embedding cache: Redis unavailable ({e}), using memory")
+    return MemoryStore(max_entries)
+
+
+def get_query_embedding_cache() -> Optional[QueryEmbeddingCache]:
+    """The process-wide cache, or None when embedding.query_cache.enabled is false."""
+    global _cache
+    if not get_config("embedding.query_cache.enabled", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            max_entries = int(get_config("embedding.query_cache.max_entries", 20000))
+            _cache = QueryEmbeddingCache(
+                _make_store(max_entries),
+                _namespace(),
+                get_config("embedding.query_cache.dtype", "float16"),
+            )
+        return _cache
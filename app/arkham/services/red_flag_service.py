@@ -8,10 +8,7 @@ from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 import logging
 
-from config.settings import DATABASE_URL
-
-from sqlalchemy import create_engine, func, and_, or_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, and_, or_
 from dotenv import load_dotenv
 
 from app.arkham.services.db.models import (
@@ -24,6 +21,7 @@ from app.arkham.services.db.models import (
     DateMention,
     ExtractedTable,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 
@@ -39,8 +37,8 @@ class RedFlagService:
     """Service for detecting red flags in document corpus."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def detect_all_red_flags(self) -> List[Dict]:
         """
@@ -2,18 +2,26 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL
 import re
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import List, Dict, Any, Iterator, Optional
+
+from sqlalchemy import and_, or_
+
+from app.arkham.services.config import get_config
 from app.arkham.services.db.models import Document, Chunk, SensitiveDataMatch
-from app.arkham.services.utils.pattern_detector import get_detector, PatternMatch
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.utils.pattern_detector import (
+    PATTERN_ALIASES,
+    get_detector,
+    PatternMatch,
+    resolve_pattern_types,
+)
+from app.arkham.services.utils.pattern_scanner import required_features
 import os
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 
 def get_pattern_descriptions() -> Dict[str, str]:
@@ -22,82 +30,186 @@ def get_pattern_descriptions() -> Dict[str, str]:
     return detector.get_pattern_descriptions()
 
 
-def search_patterns_in_chunks(
+def _literal_filter(patterns: List[re.Pattern]):
+    """
+    SQL condition a chunk must meet to possibly match any of `patterns`:
+    for each pattern, contain all its required literals of 3+ characters
+    (what the pg_trgm index on chunks.text can serve). None when some
+    pattern has no such literal, i.e. every chunk is a candidate.
+    """
+    alternatives = []
+    for pattern in patterns:
+        literals = [lit for lit in required_features(pattern)[0] if len(lit) >= 3]
+        if not literals:
+            return None
+        alternatives.append(
+            and_(
+                *(
+                    Chunk.text.like(f"%{_escape_like(lit)}%", escape="\\")
+                    for lit in literals
+                )
+            )
+        )
+    return or_(*alternatives) if alternatives else None
+
+
+def _escape_like(literal: str) -> str:
+    return literal.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def iter_pattern_matches(
     pattern_types: List[str],
     custom_regex: Optional[str] = None,
     confidence_threshold: float = 0.5,
-) -> List[Dict[str, Any]]:
+    batch_size: Optional[int] = None,
+    max_results: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
     """
-    Search for patterns across all documents.
+    Search for patterns across all documents, one page of chunks at a time.
+
+    Chunks are read in id order, batch_size at a time (keyset pagination),
+    and only those that can match: built-in and custom patterns with
+    literals narrow the query (see _literal_filter). Yields the matches of
+    each page, possibly none, so a consumer can stop between pages: closing
+    the generator cancels the search. Stops after max_results matches (the
+    last page is cut to fit).
 
     Args:
         pattern_types: List of built-in pattern types to search for.
         custom_regex: Optional custom regex string.
         confidence_threshold: Minimum confidence score.
-
-    Returns:
-        List of match dictionaries.
+        batch_size: Chunks per page (default regex_search.batch_size).
+        max_results: Result cap (default regex_search.max_results).
     """
+    batch_size = batch_size or get_config("regex_search.batch_size", 500)
+    if max_results is None:
+        max_results = get_config("regex_search.max_results", 5000)
+
+    detector = get_detector()
+    pattern_types = [
+        ptype
+        for ptype in resolve_pattern_types(pattern_types or [])
+        if ptype in detector.patterns
+    ]
+
+    # Compile custom regex if provided
+    custom_pattern = None
+    if custom_regex:
+        try:
+            custom_pattern = re.compile(custom_regex)
+        except re.error:
+            logger.warning(f"Invalid custom regex: {custom_regex}")
+
+    patterns = [detector.patterns[ptype]["regex"] for ptype in pattern_types]
+    if custom_pattern:
+        patterns.append(custom_pattern)
+    if not patterns:
+        return
+    candidates = _literal_filter(patterns)
+
     session = SessionLocal()
     try:
-        chunks = session.query(Chunk).all()
-        if not chunks:
-            return []
+        doc_title_map: Dict[int, str] = {}
+        found = 0
+        last_id = 0
+        while True:
+            query = session.query(Chunk.id, Chunk.doc_id, Chunk.text).filter(
+                Chunk.id > last_id
+            )
+            if candidates is not None:
+                query = query.filter(candidates)
+            chunks = query.order_by(Chunk.id).limit(batch_size).all()
+            if not chunks:
+                return
+            last_id = chunks[-1].id
+
+            # Fetch the titles of documents not seen on earlier pages
+            new_doc_ids = {chunk.doc_id for chunk in chunks} - doc_title_map.keys()
+            if new_doc_ids:
+                docs = session.query(Document.id, Document.title).filter(
+                    Document.id.in_(new_doc_ids)
+                )
+                doc_title_map.update({doc.id: doc.title for doc in docs})
+
+            page = []
+            for chunk in chunks:
+                page.extend(
+                    _chunk_matches(
+                        chunk, detector, pattern_types, custom_pattern,
+                        confidence_threshold, doc_title_map,
+                    )
+                )
+            page = page[: max_results - found]
+            found += len(page)
+            yield page
+            if found >= max_results:
+                logger.info(f"Regex search stopped at {max_results} results")
+                return
+    finally:
+        session.close()
 
-        detector = get_detector()
-        results = []
 
-        # Compile custom regex if provided
-        custom_pattern = None
-        if custom_regex:
-            try:
-                custom_pattern = re.compile(custom_regex)
-            except re.error:
-                logger.warning(f"Invalid custom regex: {custom_regex}")
+def _chunk_matches(
+    chunk, detector, pattern_types, custom_pattern, confidence_threshold, doc_title_map
+) -> List[Dict[str, Any]]:
+    results = []
 
-        # Batch fetch all document titles upfront to avoid N+1 queries
-        doc_ids = list(set(chunk.doc_id for chunk in chunks))
-        docs = session.query(Document).filter(Document.id.in_(doc_ids)).all()
-        doc_title_map = {doc.id: doc.title for doc in docs}
+    # 1. Search built-in patterns
+    if pattern_types:
+        matches = detector.detect_patterns(chunk.text, pattern_types=pattern_types)
+        for match in matches:
+            if match.confidence >= confidence_threshold:
+                results.append(_format_match(match, chunk, doc_title_map))
+
+    # 2. Search custom regex
+    if custom_pattern:
+        for match in custom_pattern.finditer(chunk.text):
+            match_text = match.group()
+            start = match.start()
+            end = match.end()
+            context_before = chunk.text[max(0, start - 30) : start].strip()
+            context_after = chunk.text[end : min(len(chunk.text), end + 30)].strip()
 
-        for chunk in chunks:
-            # 1. Search built-in patterns
-            if pattern_types:
-                matches = detector.detect_patterns(
-                    chunk.text, pattern_types=pattern_types
-                )
-                for match in matches:
-                    if match.confidence >= confidence_threshold:
-                        results.append(_format_match(match, chunk, doc_title_map))
-
-            # 2. Search custom regex
-            if custom_pattern:
-                for match in custom_pattern.finditer(chunk.text):
-                    match_text = match.group()
-                    start = match.start()
-                    end = match.end()
-                    context_before = chunk.text[max(0, start - 30) : start].strip()
-                    context_after = chunk.text[
-                        end : min(len(chunk.text), end + 30)
-                    ].strip()
-
-                    results.append(
-                        {
-                            "doc_id": chunk.doc_id,
-                            "chunk_id": chunk.id,
-                            "pattern_type": "custom",
-                            "match_text": match_text,
-                            "confidence": 1.0,  # Custom regex is always 100% match to itself
-                            "context": f"...{context_before} **{match_text}** {context_after}...",
-                            "document_title": doc_title_map.get(
-                                chunk.doc_id, f"Document #{chunk.doc_id}"
-                            ),
-                        }
-                    )
+            results.append(
+                {
+                    "doc_id": chunk.doc_id,
+                    "chunk_id": chunk.id,
+                    "pattern_type": "custom",
+                    "match_text": match_text,
+                    "confidence": 1.0,  # Custom regex is always 100% match to itself
+                    "context": f"...{context_before} **{match_text}** {context_after}...",
+                    "document_title": doc_title_map.get(
+                        chunk.doc_id, f"Document #{chunk.doc_id}"
+                    ),
+                }
+            )
+    return results
 
-        return results
-    finally:
-        session.close()
+
+def search_patterns_in_chunks(
+    pattern_types: List[str],
+    custom_regex: Optional[str] = None,
+    confidence_threshold: float = 0.5,
+    max_results: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search for patterns across all documents.
+
+    Args:
+        pattern_types: List of built-in pattern types to search for.
+        custom_regex: Optional custom regex string.
+        confidence_threshold: Minimum confidence score.
+        max_results: Result cap (default regex_search.max_results).
+
+    Returns:
+        List of match dictionaries.
+    """
+    results = []
+    for page in iter_pattern_matches(
+        pattern_types, custom_regex, confidence_threshold, max_results=max_results
+    ):
+        results.extend(page)
+    return results
 
 
 def get_detected_sensitive_data() -> Dict[str, Any]:
@@ -109,7 +221,12 @@ def get_detected_sensitive_data() -> Dict[str, Any]:
     """
     session = SessionLocal()
     try:
-        matches_query = session.query(SensitiveDataMatch).all()
+        # Rows stored under an alias duplicate a row of the pattern it names
+        matches_query = (
+            session.query(SensitiveDataMatch)
+            .filter(SensitiveDataMatch.pattern_type.notin_(PATTERN_ALIASES))
+            .all()
+        )
 
         if not matches_query:
             return {"matches": [], "stats": {}}
@@ -159,10 +276,15 @@ def get_detected_matches(
     """
     session = SessionLocal()
     try:
-        query = session.query(SensitiveDataMatch)
+        # Rows stored under an alias duplicate a row of the pattern it names
+        query = session.query(SensitiveDataMatch).filter(
+            SensitiveDataMatch.pattern_type.notin_(PATTERN_ALIASES)
+        )
 
         if pattern_filter:
-            query = query.filter(SensitiveDataMatch.pattern_type.in_(pattern_filter))
+            query = query.filter(
+                SensitiveDataMatch.pattern_type.in_(resolve_pattern_types(pattern_filter))
+            )
 
         if min_confidence > 0:
             query = query.filter(SensitiveDataMatch.confidence >= min_confidence)
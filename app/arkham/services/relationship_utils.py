@@ -0,0 +1,180 @@
+"""
+Set-based co-occurrence relationship updates.
+
+Relationships are stored once per unordered pair of canonical entities, as
+(entity1_id, entity2_id) = (min_id, max_id). Callers count pair increments in
+Python and apply them with one INSERT ... ON CONFLICT DO UPDATE per batch
+instead of one SELECT + UPDATE/INSERT per pair.
+"""
+
+import logging
+from datetime import datetime
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from .db.models import EntityRelationship, GraphVersion
+
+logger = logging.getLogger(__name__)
+
+# Each co-occurrence adds this much strength to a pair, up to MAX_STRENGTH
+STRENGTH_STEP = 0.1
+MAX_STRENGTH = 10.0
+# Rows per INSERT statement (keeps bind parameters well under driver limits)
+UPSERT_BATCH_SIZE = 500
+
+PairKey = Tuple[int, int]
+
+
+def pair_increments(
+    groups: Iterable[Tuple[Optional[int], Iterable[int]]],
+) -> Dict[PairKey, List]:
+    """
+    Count co-occurrences for groups of canonical entity IDs.
+
+    Args:
+        groups: (doc_id, canonical_ids) tuples; every pair of distinct IDs in
+            a group co-occurs once (e.g. one group per chunk or per document)
+
+    Returns:
+        {(min_id, max_id): [count, doc_id]} where doc_id is the first document
+        the pair was seen in (stored only when the relationship is created)
+    """
+    increments: Dict[PairKey, List] = {}
+    for doc_id, ids in groups:
+        for pair in combinations(sorted(set(ids)), 2):
+            entry = increments.get(pair)
+            if entry:
+                entry[0] += 1
+            else:
+                increments[pair] = [1, doc_id]
+    return increments
+
+
+def _insert_for(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Relationship upsert not supported on {dialect}")
+    return insert
+
+
+def upsert_cooccurrences(
+    session: Session,
+    increments: Dict[PairKey, List],
+    batch_size: int = UPSERT_BATCH_SIZE,
+) -> int:
+    """
+    Apply pair increments with INSERT ... ON CONFLICT DO UPDATE.
+
+    New pairs start at strength 1.0 and every further co-occurrence adds
+    STRENGTH_STEP (capped at MAX_STRENGTH), matching the old row-by-row
+    update. Rows are written in key order so concurrent builders lock pairs
+    in the same order and cannot deadlock. The caller commits.
+
+    Returns:
+        Number of pairs upserted.
+    """
+    if not increments:
+        return 0
+
+    insert = _insert_for(session)
+    table = EntityRelationship.__table__
+    keys = sorted(increments)
+
+    for start in range(0, len(keys), batch_size):
+        rows = []
+        for entity1_id, entity2_id in keys[start : start + batch_size]:
+            count, doc_id = increments[(entity1_id, entity2_id)]
+            rows.append(
+                {
+                    "entity1_id": entity1_id,
+                    "entity2_id": entity2_id,
+                    "relationship_type": "co-occurrence",
+                    "strength": min(1.0 + STRENGTH_STEP * (count - 1), MAX_STRENGTH),
+                    "co_occurrence_count": count,
+                    "doc_id": doc_id,
+                }
+            )
+
+        stmt = insert(table).values(rows)
+        strength = (
+            func.coalesce(table.c.strength, 1.0)
+            + STRENGTH_STEP * stmt.excluded.co_occurrence_count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.entity1_id, table.c.entity2_id],
+            set_={
+                "co_occurrence_count": func.coalesce(table.c.co_occurrence_count, 0)
+                + stmt.excluded.co_occurrence_count,
+                "strength": case(
+                    (strength > MAX_STRENGTH, MAX_STRENGTH), else_=strength
+                ),
+            },
+        )
+        session.execute(stmt)
+
+    return len(keys)
+
+
+def bump_graph_version(session: Session) -> None:
+    """
+    Increment the entity graph version in the caller's transaction.
+
+    Call this from every write that changes canonical entities or their
+    relationships so cached graphs (see graph_cache.py) reload. The caller
+    commits; bump last so the counter row is locked only briefly.
+    """
+    insert = _insert_for(session)
+    table = GraphVersion.__table__
+    now = datetime.utcnow()
+    stmt = insert(table).values(id=1, version=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={"version": table.c.version + 1, "updated_at": now},
+    )
+    session.execute(stmt)
+
+
+def reassign_relationships(session: Session, old_id: int, new_id: int) -> int:
+    """
+    Move every relationship of canonical entity `old_id` onto `new_id`.
+
+    Used when merging entities: pairs that already exist for `new_id` absorb
+    the moved counts, and the (old_id, new_id) pair itself is dropped instead
+    of becoming a self-loop. The caller commits.
+
+    Returns:
+        Number of relationship rows moved or folded.
+    """
+    rows = (
+        session.query(EntityRelationship)
+        .filter(
+            (EntityRelationship.entity1_id == old_id)
+            | (EntityRelationship.entity2_id == old_id)
+        )
+        .all()
+    )
+    if not rows:
+        return 0
+
+    increments: Dict[PairKey, List] = {}
+    for rel in rows:
+        other = rel.entity2_id if rel.entity1_id == old_id else rel.entity1_id
+        if other in (old_id, new_id):
+            continue
+        pair = (min(other, new_id), max(other, new_id))
+        entry = increments.setdefault(pair, [0, rel.doc_id])
+        entry[0] += rel.co_occurrence_count or 1
+
+    session.query(EntityRelationship).filter(
+        EntityRelationship.id.in_([rel.id for rel in rows])
+    ).delete(synchronize_session=False)
+    session.flush()
+    upsert_cooccurrences(session, increments)
+    return len(rows)
@@ -2,20 +2,19 @@ import os
 import sys
 import logging
 from pathlib import Path
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from redis import Redis
 from rq import Queue
 
-from config.settings import DATABASE_URL, REDIS_URL, PAGES_DIR
+from config.settings import REDIS_URL, PAGES_DIR
 
 from app.arkham.services.db.models import Document, PageOCR
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 q = Queue(connection=redis_conn)
 
@@ -23,6 +22,24 @@ q = Queue(connection=redis_conn)
 RAW_PAGES_DIR = str(PAGES_DIR)  # Convert Path to string for os.path.join compatibility
 
 
+def _render_missing_page(doc, page_num, image_path):
+    """Render a page image that was streamed to OCR from the source PDF."""
+    try:
+        import fitz  # PyMuPDF
+
+        from app.arkham.services.pdf_pages import render_page_file
+
+        pdf_path = doc.path
+        if os.path.splitext(pdf_path)[1].lower() != ".pdf":
+            pdf_path = pdf_path.rsplit(".", 1)[0] + ".converted.pdf"
+        with fitz.open(pdf_path) as pdf:
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            return render_page_file(pdf.load_page(page_num - 1), image_path)
+    except Exception as e:
+        logger.warning(f"Could not render Doc {doc.id} Page {page_num}: {e}")
+        return None
+
+
 def retry_missing_pages(doc_id, ocr_mode="paddle"):
     """
     Identifies missing or failed pages for a document and re-enqueues them.
@@ -70,8 +87,11 @@ def retry_missing_pages(doc_id, ocr_mode="paddle"):
                 image_path = os.path.join(
                     RAW_PAGES_DIR, doc.file_hash, f"page_{page_num:04d}.png"
                 )
+                if not os.path.exists(image_path):
+                    # Streamed pages (ocr.stream_pages) were never written to disk
+                    image_path = _render_missing_page(doc, page_num, image_path)
 
-                if os.path.exists(image_path):
+                if image_path and os.path.exists(image_path):
                     logger.info(f"Retrying Doc {doc_id} Page {page_num}...")
                     q.enqueue(
                         "app.arkham.services.workers.ocr_worker.process_page_job",
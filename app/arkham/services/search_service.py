@@ -2,87 +2,65 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL, QDRANT_URL
 import os
 import sys
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue
 from .embedding_services import embed_hybrid
+from .query_embedding_cache import normalize_query
 
 from app.arkham.services.db.models import Document, TimelineEvent
+from app.arkham.services.db.connection import get_qdrant_client, get_session
 from app.arkham.services.config import get_config
 
-# Initialize Qdrant client
-# Note: In a real production app, we might want to dependency inject this or use a singleton pattern
-qdrant_client = QdrantClient(url=QDRANT_URL)
+# Shared Qdrant client (see db/connection.py)
+qdrant_client = get_qdrant_client()
 COLLECTION_NAME = "arkham_mirror_hybrid"
 
 
-def hybrid_search(
-    query: str,
-    project_id: Optional[int] = None,
-    limit: int = 20,
-    offset: int = 0,
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None,
-    entity_type: Optional[str] = None,
-    doc_type: Optional[str] = None,
-    allowed_doc_ids: Optional[List[int]] = None,
-) -> List[Dict[str, Any]]:
+class SearchSession:
     """
-    Perform hybrid search (dense + sparse) using Qdrant with optimized filtering.
+    The fused ranking of one query + filter combination.
 
-    Args:
-        query: Search query string
-        project_id: Optional project ID to filter by (int)
-        limit: Number of results to return
-        offset: Offset for pagination (not fully supported by Qdrant search, used for slicing)
-        date_from: Start date filter (ISO string)
-        date_to: End date filter (ISO string)
-        allowed_doc_ids: List of document IDs to restrict search to
-
-    Returns:
-        List of search results
+    Holds the (point id, RRF score) list of the best `depth` hits, without
+    payloads. Pages are cut from it and only their payloads are fetched;
+    a page past the end of a full ranking re-runs the search deeper.
     """
-    try:
-        # Generate embeddings (cached via LRU)
-        q_vecs = embed_hybrid(query)
-
-        # Build Filter with all conditions
-        must_conditions = []
 
-        # Project Filter - filter by project if specified and not ID 0 (all projects)
-        if project_id and project_id > 0:
-            must_conditions.append(
-                FieldCondition(key="project_id", match=MatchValue(value=project_id))
-            )
-
-        # Document Filter
-        if allowed_doc_ids:
-            must_conditions.append(
-                FieldCondition(
-                    key="doc_id",
-                    match=models.MatchAny(any=allowed_doc_ids),
-                )
-            )
-
-        # Date range filter (if date fields exist in payload)
-        if date_from:
-            must_conditions.append(
-                FieldCondition(
-                    key="created_at", range=models.DatetimeRange(gte=date_from)
-                )
-            )
-        if date_to:
-            must_conditions.append(
-                FieldCondition(
-                    key="created_at", range=models.DatetimeRange(lte=date_to)
-                )
-            )
-
-        search_filter = Filter(must=must_conditions) if must_conditions else None
+    def __init__(self, key: tuple, query: str, search_filter: Optional[Filter]):
+        self.key = key
+        self.query = query
+        self.search_filter = search_filter
+        self.ranked: List[Tuple[Any, float]] = []
+        self.depth = 0
+        self.created_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the ranking holds every hit (the last search came back short)."""
+        return self.depth > 0 and len(self.ranked) < self.depth
+
+    def expired(self, ttl: float) -> bool:
+        return time.monotonic() - self.created_at > ttl
+
+    def ranking(self, needed: int) -> List[Tuple[Any, float]]:
+        """At least the first `needed` ranked hits (fewer if there are no more)."""
+        with self._lock:
+            max_depth = get_config("search.max_depth", 5000)
+            if len(self.ranked) < needed and not self.exhausted and self.depth < max_depth:
+                depth = max(get_config("search.session_depth", 200), needed, self.depth * 2)
+                self.ranked = self._fuse(min(depth, max_depth))
+                self.depth = min(depth, max_depth)
+            return self.ranked
+
+    def _fuse(self, depth: int) -> List[Tuple[Any, float]]:
+        q_vecs = embed_hybrid(self.query)
 
         # Prepare sparse vector
         sparse_indices = list(map(int, q_vecs["sparse"].keys()))
@@ -91,74 +69,215 @@ def hybrid_search(
             indices=sparse_indices, values=sparse_values
         )
 
-        # Optimize prefetch limit - fetch 2x more for dense/sparse individually for better fusion results
-        # But overall limit stays constrained
-        prefetch_limit = min(
-            (limit + offset) * 2, 100
-        )  # Cap at 100 to prevent over-fetching
-
-        # Execute Hybrid Search with optimized parameters
         hits = qdrant_client.query_points(
             collection_name=COLLECTION_NAME,
             prefetch=[
                 models.Prefetch(
                     query=q_vecs["dense"],
                     using="dense",
-                    filter=search_filter,
-                    limit=prefetch_limit,
+                    filter=self.search_filter,
+                    limit=depth,
                 ),
                 models.Prefetch(
                     query=sparse_vector,
                     using="sparse",
-                    filter=search_filter,
-                    limit=prefetch_limit,
+                    filter=self.search_filter,
+                    limit=depth,
                 ),
             ],
             query=models.FusionQuery(fusion=models.Fusion.RRF),
-            limit=limit + offset,
-            with_payload=True,  # Explicit payload fetching
+            limit=depth,
+            with_payload=False,  # Payloads are fetched per page
         ).points
+        return [(hit.id, hit.score) for hit in hits]
 
-        # Apply offset manually since we fetched extra
-        hits = hits[offset:]
 
-        # Get unique doc_ids to fetch titles
-        doc_ids = list(
-            set(hit.payload.get("doc_id") for hit in hits if hit.payload.get("doc_id"))
+_sessions: "OrderedDict[tuple, SearchSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+MAX_SEARCH_SESSIONS = 64
+
+
+def _build_filter(project_id, date_from, date_to, allowed_doc_ids) -> Optional[Filter]:
+    """Qdrant filter for the search options (None when unfiltered)."""
+    must_conditions = []
+
+    # Project Filter - filter by project if specified and not ID 0 (all projects)
+    if project_id and project_id > 0:
+        must_conditions.append(
+            FieldCondition(key="project_id", match=MatchValue(value=project_id))
+        )
+
+    # Document Filter
+    if allowed_doc_ids:
+        must_conditions.append(
+            FieldCondition(
+                key="doc_id",
+                match=models.MatchAny(any=allowed_doc_ids),
+            )
         )
 
-        # Fetch document titles from database
-        doc_titles = {}
-        if doc_ids:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            import os
+    # Date range filter (if date fields exist in payload)
+    if date_from:
+        must_conditions.append(
+            FieldCondition(key="created_at", range=models.DatetimeRange(gte=date_from))
+        )
+    if date_to:
+        must_conditions.append(
+            FieldCondition(key="created_at", range=models.DatetimeRange(lte=date_to))
+        )
+
+    return Filter(must=must_conditions) if must_conditions else None
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
-            session = Session()
+
+def get_search_session(
+    query: str,
+    project_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    allowed_doc_ids: Optional[List[int]] = None,
+) -> SearchSession:
+    """
+    The live SearchSession for this query and filters, or a new one. Sessions
+    expire after search.session_ttl seconds, so new documents show up.
+    """
+    key = (
+        normalize_query(query),
+        project_id if project_id and project_id > 0 else None,
+        date_from or None,
+        date_to or None,
+        tuple(sorted(allowed_doc_ids)) if allowed_doc_ids else None,
+    )
+    ttl = get_config("search.session_ttl", 300)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None or session.expired(ttl):
+            session = SearchSession(
+                key, query, _build_filter(project_id, date_from, date_to, allowed_doc_ids)
+            )
+            _sessions[key] = session
+        _sessions.move_to_end(key)
+        while len(_sessions) > MAX_SEARCH_SESSIONS:
+            _sessions.popitem(last=False)
+        return session
+
+
+def clear_search_sessions():
+    with _sessions_lock:
+        _sessions.clear()
+
+
+class DocTitleCache:
+    """Document id -> title (or path), each entry kept for `ttl` seconds."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._titles: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, doc_ids) -> Dict[int, str]:
+        now = time.monotonic()
+        with self._lock:
+            titles = {
+                doc_id: entry[0]
+                for doc_id in doc_ids
+                if (entry := self._titles.get(doc_id)) and now - entry[1] <= self.ttl
+            }
+        missing = [doc_id for doc_id in doc_ids if doc_id not in titles]
+        if missing:
+            session = get_session()
             try:
-                docs = session.query(Document).filter(Document.id.in_(doc_ids)).all()
-                doc_titles = {d.id: d.title or d.path for d in docs}
+                rows = (
+                    session.query(Document.id, Document.title, Document.path)
+                    .filter(Document.id.in_(missing))
+                    .all()
+                )
             finally:
                 session.close()
+            fetched = {row.id: row.title or row.path for row in rows}
+            with self._lock:
+                for doc_id, title in fetched.items():
+                    self._titles[doc_id] = (title, now)
+            titles.update(fetched)
+        return titles
+
+    def clear(self):
+        with self._lock:
+            self._titles.clear()
+
+
+doc_title_cache = DocTitleCache(ttl=get_config("search.title_cache_ttl", 300))
+
+
+def hybrid_search(
+    query: str,
+    project_id: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    allowed_doc_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Perform hybrid search (dense + sparse) using Qdrant with optimized filtering.
+
+    The fused ranking is kept in a SearchSession, so the next page of the
+    same search only fetches that page's payloads.
+
+    Args:
+        query: Search query string
+        project_id: Optional project ID to filter by (int)
+        limit: Number of results to return
+        offset: Number of ranked results to skip (pagination)
+        date_from: Start date filter (ISO string)
+        date_to: End date filter (ISO string)
+        allowed_doc_ids: List of document IDs to restrict search to
+
+    Returns:
+        List of search results
+    """
+    try:
+        search = get_search_session(
+            query, project_id, date_from, date_to, allowed_doc_ids
+        )
+        page = search.ranking(offset + limit)[offset : offset + limit]
+        if not page:
+            return []
+
+        points = qdrant_client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=[point_id for point_id, _ in page],
+            with_payload=True,
+            with_vectors=False,
+        )
+        payloads = {point.id: point.payload or {} for point in points}
+
+        # Titles of the page's documents
+        doc_ids = list(
+            {payload.get("doc_id") for payload in payloads.values() if payload.get("doc_id")}
+        )
+        doc_titles = doc_title_cache.get_many(doc_ids)
 
         # Format results with optimized snippet generation
         results = []
-        for hit in hits:
-            text = hit.payload.get("text", "")
-            doc_id = hit.payload.get("doc_id")
+        for point_id, score in page:
+            payload = payloads.get(point_id)
+            if payload is None:
+                continue  # Deleted since the search ran
+            text = payload.get("text", "")
+            doc_id = payload.get("doc_id")
             # Only generate snippet if text exists and is long enough
             snippet = text[:200] + "..." if len(text) > 200 else text
 
             # Enrich metadata with title
-            metadata = dict(hit.payload)
+            metadata = dict(payload)
             metadata["title"] = doc_titles.get(doc_id, f"Document #{doc_id}")
 
             results.append(
                 {
-                    "id": hit.id,
-                    "score": hit.score,
+                    "id": point_id,
+                    "score": score,
                     "doc_id": doc_id,
                     "text": text,
                     "snippet": snippet,
@@ -183,16 +302,10 @@ def get_document_content(doc_id: int) -> str:
     Returns:
         Full document text with all chunks concatenated
     """
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
-    import os
-
     # Import Chunk model
     from app.arkham.services.db.models import Chunk
 
-    engine = create_engine(DATABASE_URL)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    session = get_session()
 
     try:
         # Fetch all chunks for this document, ordered by chunk_index
@@ -224,13 +337,7 @@ def get_document_content(doc_id: int) -> str:
 
 def get_document_title(doc_id: int) -> str:
     """Get document title from database."""
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
-    import os
-
-    engine = create_engine(DATABASE_URL)
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    session = get_session()
 
     try:
         doc = session.query(Document).filter(Document.id == doc_id).first()
@@ -12,12 +12,9 @@ import json
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc, func
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Document,
@@ -25,6 +22,7 @@ from app.arkham.services.db.models import (
     EntityMention,
     EntityRelationship,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.llm_service import (
     chat_with_llm,
     SPECULATION_SCENARIOS_SCHEMA,
@@ -42,8 +40,8 @@ class SpeculationService:
     """Service for generating investigative hypotheses and leads."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_filter_options(self) -> Dict[str, Any]:
         """Get available documents and entities for filtering."""
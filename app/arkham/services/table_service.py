@@ -2,22 +2,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL
 import os
 import csv
 import json
 from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from app.arkham.services.db.models import ExtractedTable, Document
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 
 def get_extracted_tables(limit: int = 20, offset: int = 0) -> Dict[str, Any]:
@@ -12,32 +12,35 @@ import logging
 import re
 from typing import Dict, Any, List
 from datetime import datetime
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc
 from dotenv import load_dotenv
 
-from config.settings import DATABASE_URL
-
 from app.arkham.services.db.models import (
     CanonicalEntity,
     Document,
     Chunk,
     EntityMention,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.llm_service import chat_with_llm, TIMELINE_EVENTS_SCHEMA
+from app.arkham.services.llm_cache import get_llm_cache, result_key, source_hash
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+TIMELINE_FEATURE = "timeline_merge"
+
+
+def _timeline_cache_key(entity_id: int = None) -> str:
+    return result_key(TIMELINE_FEATURE, entity_id or 0)  # 0 = corpus-wide
+
 
 class TimelineMergeService:
     """Service for multi-document timeline analysis and merging."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        # Cache: entity_id -> analysis result (0 = corpus-wide)
-        self._cache: Dict[int, Dict[str, Any]] = {}
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def extract_temporal_events(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Extract events with temporal references from the corpus."""
@@ -101,7 +104,10 @@ Return ONLY valid JSON:
 {{"events": [{{"date": "YYYY-MM-DD", "event": "...", "source": "...", "confidence": "..."}}]}}"""
 
         response = chat_with_llm(
-            prompt, max_tokens=1500, json_schema=TIMELINE_EVENTS_SCHEMA
+            prompt,
+            max_tokens=1500,
+            json_schema=TIMELINE_EVENTS_SCHEMA,
+            feature="timeline_events",
         )
 
         try:
@@ -220,13 +226,11 @@ Return ONLY valid JSON:
     def analyze_timeline(
         self, entity_id: int = None, force_refresh: bool = False
     ) -> Dict[str, Any]:
-        """Full timeline analysis, optionally focused on an entity."""
-        cache_key = entity_id or 0  # 0 = corpus-wide
-
-        # Return cached result if available
-        if not force_refresh and cache_key in self._cache:
-            logger.info(f"Returning cached timeline for entity_id={cache_key}")
-            return self._cache[cache_key]
+        """
+        Full timeline analysis, optionally focused on an entity. The result
+        is cached until the text of the chunks it was built from changes.
+        """
+        cache_key = _timeline_cache_key(entity_id)
 
         session = self.Session()
         try:
@@ -278,6 +282,14 @@ Return ONLY valid JSON:
                     "gaps": [],
                 }
 
+            # Return cached result if the source chunks are unchanged
+            sources = source_hash(c["text"] for c in temporal_chunks)
+            if not force_refresh:
+                cached = get_llm_cache().get(cache_key, TIMELINE_FEATURE, sources)
+                if cached:
+                    logger.info(f"Returning cached timeline for entity_id={entity_id or 0}")
+                    return json.loads(cached)
+
             # Extract events with LLM
             events = self.extract_events_with_llm(temporal_chunks)
 
@@ -287,8 +299,10 @@ Return ONLY valid JSON:
             merged["analyzed_at"] = datetime.now().isoformat()
 
             # Cache the result
-            self._cache[cache_key] = merged
-            logger.info(f"Cached timeline for entity_id={cache_key}")
+            get_llm_cache().put(
+                cache_key, TIMELINE_FEATURE, json.dumps(merged, default=str), source_hash=sources
+            )
+            logger.info(f"Cached timeline for entity_id={entity_id or 0}")
 
             return merged
 
@@ -298,10 +312,9 @@ Return ONLY valid JSON:
     def clear_cache(self, entity_id: int = None):
         """Clear cached analysis results."""
         if entity_id is not None:
-            cache_key = entity_id or 0
-            self._cache.pop(cache_key, None)
+            get_llm_cache().forget(_timeline_cache_key(entity_id))
         else:
-            self._cache.clear()
+            get_llm_cache().clear(TIMELINE_FEATURE)
         logger.info(f"Cache cleared for entity_id={entity_id}")
 
     def generate_timeline_narrative(
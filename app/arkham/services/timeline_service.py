@@ -20,22 +20,22 @@ while project_root.name != "ArkhamMirror" and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 import re
 import json
 import os
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from dateutil import parser as date_parser
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from .llm_service import chat_with_llm, LLM_EVENTS_ARRAY_SCHEMA
 from .db.models import Document, TimelineEvent
+from .db.connection import get_engine, get_session_factory
+from .utils.pattern_scanner import MultiPatternScanner
 
 # Database setup
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 
 
 def get_timeline_events(
@@ -83,7 +83,67 @@ def get_timeline_events(
         ]
 
 
-def extract_date_mentions(text: str, context_chars: int = 50) -> List[Dict]:
+# Date mention patterns, matched case-insensitively. Names are prefixed so
+# they can share a MultiPatternScanner with PatternDetector's patterns.
+DATE_PATTERNS = [
+    # Full dates with month names (March 15, 2023 | 15 March 2023)
+    (
+        "date_month_day_year",
+        r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b",
+        "explicit",
+    ),
+    (
+        "date_day_month_year",
+        r"\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{4}\b",
+        "explicit",
+    ),
+    # Numeric dates (03/15/2023, 15-03-2023, 2023-03-15)
+    ("date_numeric", r"\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b", "explicit"),
+    ("date_iso", r"\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b", "explicit"),
+    # Month and year (March 2023, 03/2023)
+    (
+        "date_month_year",
+        r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{4}\b",
+        "explicit",
+    ),
+    ("date_numeric_month_year", r"\b\d{1,2}[-/]\d{4}\b", "explicit"),
+    # Year only (1990-2099)
+    ("date_year", r"\b(19\d{2}|20\d{2})\b", "explicit"),
+    # Relative dates
+    (
+        "date_relative",
+        r"\b(today|yesterday|tomorrow|last\s+\w+|next\s+\w+|\d+\s+(?:days?|weeks?|months?|years?)\s+ago)\b",
+        "relative",
+    ),
+]
+
+DATE_REGEXES = {
+    name: re.compile(pattern, re.IGNORECASE) for name, pattern, _ in DATE_PATTERNS
+}
+
+_date_scanner = MultiPatternScanner(DATE_REGEXES)
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_text(date_text: str, today: date) -> Optional[datetime]:
+    # `today` is part of the key: dateutil fills missing fields from it
+    try:
+        return date_parser.parse(date_text, fuzzy=True)
+    except (ValueError, TypeError, OverflowError):
+        # If parsing fails, store as None
+        return None
+
+
+def parse_date_text(date_text: str) -> Optional[datetime]:
+    """dateutil's fuzzy parse of a date mention, cached per distinct text."""
+    return _parse_date_text(date_text, date.today())
+
+
+def extract_date_mentions(
+    text: str,
+    context_chars: int = 50,
+    scan: Optional[Dict[str, List[re.Match]]] = None,
+) -> List[Dict]:
     """
     Extract all date mentions from text using regex patterns.
 
@@ -96,48 +156,27 @@ def extract_date_mentions(text: str, context_chars: int = 50) -> List[Dict]:
     Args:
         text: Input text to search for dates
         context_chars: Number of characters before/after to capture for context
+        scan: Result of a MultiPatternScanner over this text that covers
+            DATE_REGEXES (skips scanning the text again)
 
     Returns:
         List of dicts with keys: date_text, parsed_date, date_type, context_before, context_after
     """
-    mentions = []
-
-    # Pattern 1: Full dates with month names (March 15, 2023 | 15 March 2023)
-    pattern1 = r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b"
-    pattern2 = r"\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{4}\b"
-
-    # Pattern 3: Numeric dates (03/15/2023, 15-03-2023, 2023-03-15)
-    pattern3 = r"\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b"
-    pattern4 = r"\b\d{4}[-/]\d{1,2}[-/]\d{1,2}\b"
-
-    # Pattern 5: Month and year (March 2023, 03/2023)
-    pattern5 = (
-        r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{4}\b"
-    )
-    pattern6 = r"\b\d{1,2}[-/]\d{4}\b"
-
-    # Pattern 7: Year only (1990-2099)
-    pattern7 = r"\b(19\d{2}|20\d{2})\b"
-
-    # Pattern 8: Relative dates
-    pattern8 = r"\b(today|yesterday|tomorrow|last\s+\w+|next\s+\w+|\d+\s+(?:days?|weeks?|months?|years?)\s+ago)\b"
-
-    all_patterns = [
-        (pattern1, "explicit"),
-        (pattern2, "explicit"),
-        (pattern3, "explicit"),
-        (pattern4, "explicit"),
-        (pattern5, "explicit"),
-        (pattern6, "explicit"),
-        (pattern7, "explicit"),
-        (pattern8, "relative"),
-    ]
-
-    for pattern, date_type in all_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
+    if scan is None:
+        scan = _date_scanner.scan(text)
+
+    # Same date_text at the same position: the first pattern wins
+    unique_mentions = []
+    seen = set()
+    for name, _, date_type in DATE_PATTERNS:
+        for match in scan[name]:
             date_text = match.group()
             start_pos = match.start()
             end_pos = match.end()
+            key = (date_text, start_pos)
+            if key in seen:
+                continue
+            seen.add(key)
 
             # Extract context
             context_before = text[max(0, start_pos - context_chars) : start_pos].strip()
@@ -145,19 +184,12 @@ def extract_date_mentions(text: str, context_chars: int = 50) -> List[Dict]:
                 end_pos : min(len(text), end_pos + context_chars)
             ].strip()
 
-            # Try to parse the date
-            parsed_date = None
-            try:
-                if date_type == "explicit":
-                    parsed_date = date_parser.parse(date_text, fuzzy=True)
-            except (ValueError, TypeError):
-                # If parsing fails, store as None
-                pass
-
-            mentions.append(
+            unique_mentions.append(
                 {
                     "date_text": date_text,
-                    "parsed_date": parsed_date,
+                    "parsed_date": (
+                        parse_date_text(date_text) if date_type == "explicit" else None
+                    ),
                     "date_type": date_type,
                     "context_before": context_before,
                     "context_after": context_after,
@@ -165,15 +197,6 @@ def extract_date_mentions(text: str, context_chars: int = 50) -> List[Dict]:
                 }
             )
 
-    # Remove duplicates (same date_text at same position)
-    unique_mentions = []
-    seen = set()
-    for mention in mentions:
-        key = (mention["date_text"], mention["position"])
-        if key not in seen:
-            seen.add(key)
-            unique_mentions.append(mention)
-
     # Sort by position in text
     unique_mentions.sort(key=lambda x: x["position"])
 
@@ -299,7 +322,10 @@ def determine_date_precision(date_text: str) -> str:
 
 
 def extract_timeline_from_chunk(
-    chunk_text: str, chunk_id: int, doc_id: int
+    chunk_text: str,
+    chunk_id: int,
+    doc_id: int,
+    scan: Optional[Dict[str, List[re.Match]]] = None,
 ) -> Tuple[List[Dict], List[Dict]]:
     """
     Extract both date mentions and events from a text chunk.
@@ -308,13 +334,15 @@ def extract_timeline_from_chunk(
         chunk_text: Text to analyze
         chunk_id: Database ID of the chunk
         doc_id: Database ID of the document
+        scan: Optional MultiPatternScanner result for the chunk (see
+            extract_date_mentions)
 
     Returns:
         Tuple of (date_mentions, timeline_events)
         Both are lists of dicts ready to be inserted into the database
     """
     # Extract date mentions
-    date_mentions = extract_date_mentions(chunk_text)
+    date_mentions = extract_date_mentions(chunk_text, scan=scan)
 
     # Prepare for database insertion
     db_date_mentions = []
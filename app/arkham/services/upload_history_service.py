@@ -12,13 +12,11 @@ while project_root.name != 'ArkhamMirror' and project_root.parent != project_roo
     project_root = project_root.parent
 sys.path.insert(0, str(project_root))
 
-from config import DATABASE_URL
 import os
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
 from sqlalchemy import (
-    create_engine,
     Column,
     Integer,
     String,
@@ -27,8 +25,9 @@ from sqlalchemy import (
     desc,
     func,
 )
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -60,8 +59,8 @@ class UploadHistoryService:
     """Service for managing upload history."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
         # Create table if not exists
         Base.metadata.create_all(self.engine)
 
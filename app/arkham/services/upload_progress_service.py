@@ -10,20 +10,18 @@ from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
-from config.settings import DATABASE_URL
-
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func
 
 from app.arkham.services.db.models import Document, MiniDoc, PageOCR, Chunk
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 
 class UploadProgressService:
     """Service for tracking document processing progress."""
 
     def __init__(self):
-        self.engine = create_engine(DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def get_document_progress(self, doc_id: int) -> Dict:
         """
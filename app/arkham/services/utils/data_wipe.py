@@ -1,10 +1,11 @@
 import logging
+import os
 import shutil
 import time
 import sys
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
-from config.settings import DATA_SILO_PATH, DATABASE_URL
+from config.settings import DATA_SILO_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,34 @@ class WipeResult:
         }
 
 
+def _directory_usage(root) -> Tuple[int, int]:
+    """
+    (file count, total bytes) under a directory.
+
+    Walks with os.scandir, whose entries already know their type, so each
+    file costs one stat() instead of the two (plus a Path object) that
+    Path.rglob() + is_file() + stat() take.
+    """
+    file_count = 0
+    size_bytes = 0
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            file_count += 1
+                            size_bytes += entry.stat().st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return file_count, size_bytes
+
+
 def get_data_silo_stats() -> Dict:
     """
     Get statistics about what will be deleted.
@@ -50,16 +79,7 @@ def get_data_silo_stats() -> Dict:
     for subdir in ["documents", "pages", "temp", "logs"]:
         subdir_path = DATA_SILO_PATH / subdir
         if subdir_path.exists():
-            file_count = 0
-            size_bytes = 0
-
-            for item in subdir_path.rglob("*"):
-                if item.is_file():
-                    file_count += 1
-                    try:
-                        size_bytes += item.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
+            file_count, size_bytes = _directory_usage(subdir_path)
 
             stats["directories"][subdir] = {
                 "files": file_count,
@@ -79,9 +99,10 @@ def clear_database_tables() -> bool:
     This is faster than destroying Docker volumes and preserves the schema.
     """
     try:
-        from sqlalchemy import create_engine, text, inspect
+        from sqlalchemy import text, inspect
+        from app.arkham.services.db.connection import get_engine
 
-        engine = create_engine(DATABASE_URL)
+        engine = get_engine()
         inspector = inspect(engine)
         existing_tables = set(inspector.get_table_names())
 
@@ -97,6 +118,11 @@ def clear_database_tables() -> bool:
             "sensitive_data_matches",
             "extracted_tables",
             "entity_relationships",
+            "relationship_build_progress",
+            "entity_centrality",
+            "document_fingerprints",
+            "document_segments",
+            "document_centroids",
             "entities",
             "page_ocr",
             "minidocs",
@@ -105,8 +131,11 @@ def clear_database_tables() -> bool:
             "clusters",
             "canonical_entities",
             "entity_analysis_cache",
+            "llm_cache",
+            "llm_cache_stats",
             "entity_filter_rules",
             "entity_merge_audit",
+            "corpus_stats",
             "projects",
         ]
 
@@ -126,6 +155,9 @@ def clear_database_tables() -> bool:
             stmt = text(f"TRUNCATE TABLE {tables_str} RESTART IDENTITY CASCADE;")
 
             conn.execute(stmt)
+            if "graph_version" in existing_tables:
+                # Keep the counter (not truncated) so cached graphs notice the wipe
+                conn.execute(text("UPDATE graph_version SET version = version + 1"))
             conn.commit()
 
         logger.info("✓ Database tables cleared")
@@ -141,13 +173,12 @@ def clear_qdrant_collection() -> bool:
     Delete and recreate the Qdrant collection with correct Hybrid Search schema.
     """
     try:
-        from qdrant_client import QdrantClient
         from qdrant_client.models import VectorParams, Distance, SparseVectorParams
-        from config.settings import QDRANT_URL
+        from app.arkham.services.db.connection import get_qdrant_client
         from app.arkham.services.db.db_init import _get_embedding_dimension
 
         collection_name = "arkham_mirror_hybrid"
-        client = QdrantClient(url=QDRANT_URL, timeout=10.0)
+        client = get_qdrant_client()
 
         # Delete collection if it exists
         try:
@@ -156,6 +187,12 @@ def clear_qdrant_collection() -> bool:
         except Exception:
             pass  # Collection might not exist
 
+        # The contradiction search index is rebuilt from the (now empty)
+        # contradictions table on next use
+        from app.arkham.services.contradiction_index import get_contradiction_index
+
+        get_contradiction_index().drop()
+
         # Get correct dimension (384 or 1024)
         vector_dimension = _get_embedding_dimension()
 
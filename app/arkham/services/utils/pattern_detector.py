@@ -16,6 +16,17 @@ import re
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from .pattern_scanner import MultiPatternScanner
+
+# Old pattern names, still accepted in pattern_types. Matches stored under
+# them duplicate a match stored under the pattern they name.
+PATTERN_ALIASES = {"phone": "phone_us"}
+
+
+def resolve_pattern_types(pattern_types: List[str]) -> List[str]:
+    """Map aliases to their pattern names, dropping duplicates, keeping order."""
+    return list(dict.fromkeys(PATTERN_ALIASES.get(p, p) for p in pattern_types))
+
 
 @dataclass
 class PatternMatch:
@@ -63,13 +74,6 @@ class PatternDetector:
                 "description": "Phone Number (US)"
             },
 
-            # Phone Numbers (backward compatibility - maps to phone_us)
-            "phone": {
-                "regex": re.compile(r'(?:\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
-                "validator": None,
-                "description": "Phone Number (US)"
-            },
-
             # Phone Numbers (Ukrainian)
             "phone_ua": {
                 "regex": re.compile(r'\+380\s?(\d{2})\s?(\d{3})\s?(\d{2})\s?(\d{2})\b'),
@@ -140,9 +144,25 @@ class PatternDetector:
                 "description": "Potential Driver's License"
             }
         }
+        self._scanners: Dict[tuple, MultiPatternScanner] = {}
+
+    def regexes(self) -> Dict[str, re.Pattern]:
+        """Compiled regex of every pattern type, for a shared MultiPatternScanner."""
+        return {ptype: config["regex"] for ptype, config in self.patterns.items()}
+
+    def _scanner(self, pattern_types: List[str]) -> MultiPatternScanner:
+        key = tuple(pattern_types)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            scanner = MultiPatternScanner(
+                {ptype: self.patterns[ptype]["regex"] for ptype in pattern_types}
+            )
+            self._scanners[key] = scanner
+        return scanner
 
     def detect_patterns(self, text: str, pattern_types: Optional[List[str]] = None,
-                       context_chars: int = 30) -> List[PatternMatch]:
+                       context_chars: int = 30,
+                       scan: Optional[Dict[str, List[re.Match]]] = None) -> List[PatternMatch]:
         """
         Detect sensitive patterns in text.
 
@@ -150,24 +170,27 @@ class PatternDetector:
             text: Text to search for patterns
             pattern_types: List of pattern types to search for (None = all)
             context_chars: Number of characters before/after to include in context
+            scan: Result of a MultiPatternScanner over this text that covers
+                the pattern types (skips scanning the text again)
 
         Returns:
             List of PatternMatch objects
         """
         if pattern_types is None:
             pattern_types = list(self.patterns.keys())
+        pattern_types = [
+            ptype for ptype in resolve_pattern_types(pattern_types)
+            if ptype in self.patterns
+        ]
+        if scan is None:
+            scan = self._scanner(pattern_types).scan(text)
 
         matches = []
 
         for pattern_type in pattern_types:
-            if pattern_type not in self.patterns:
-                continue
-
-            pattern_config = self.patterns[pattern_type]
-            regex = pattern_config["regex"]
-            validator = pattern_config["validator"]
+            validator = self.patterns[pattern_type]["validator"]
 
-            for match in regex.finditer(text):
+            for match in scan[pattern_type]:
                 match_text = match.group()
                 start_pos = match.start()
                 end_pos = match.end()
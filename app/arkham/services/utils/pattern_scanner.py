@@ -0,0 +1,178 @@
+"""
+Scan a text once for many named regex patterns.
+
+PatternDetector and the timeline date extractor used to run every pattern
+over every chunk with its own finditer() call, and ingestion ran both
+detectors one after the other. A MultiPatternScanner holds all of those
+compiled patterns and returns, in one scan() call, exactly what a separate
+finditer() per pattern would have found.
+
+Two strategies:
+
+- "alternation": one regex with a named group per pattern. A match of the
+  combined regex only names the first pattern that matches at a position,
+  so the other patterns are checked at that position and each pattern
+  keeps its own non-overlap cursor, as finditer() would.
+- "gated" (default): each pattern keeps its own compiled regex, but is only
+  run when the text contains the literals it requires (e.g. "@" for email,
+  "AKIA" for AWS keys) and, for patterns that need a digit, when the text
+  has one. Most chunks rule out most patterns this way.
+
+CPython's re is a backtracking matcher with no DFA, so the alternation
+tries every branch at every position and measures slower than the gated
+separate scans (see scripts/benchmarks/bench_pattern_scan.py); it is kept
+for comparison and for pattern sets without useful literals.
+"""
+
+import re
+from typing import Dict, List, Mapping, Optional, Pattern, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_constants
+    import sre_parse
+
+STRATEGIES = ("gated", "alternation")
+
+_DIGIT = re.compile(r"\d")
+
+
+def _is_digit_class(op, av) -> bool:
+    """Whether a parsed IN/CATEGORY item only matches digits."""
+    if op is sre_constants.CATEGORY:
+        return av is sre_constants.CATEGORY_DIGIT
+    if op is sre_constants.IN:
+        return bool(av) and all(_is_digit_class(*item) for item in av)
+    if op is sre_constants.RANGE:
+        return ord("0") <= av[0] and av[1] <= ord("9")
+    if op is sre_constants.LITERAL:
+        return chr(av).isdigit()
+    return False
+
+
+def required_features(pattern: Pattern) -> Tuple[List[str], bool]:
+    """
+    Literal substrings every match of `pattern` contains, and whether every
+    match contains a digit. Only mandatory parts of the pattern count
+    (optional items and alternations are skipped), and letters of
+    case-insensitive patterns are ignored, so the answer is conservative.
+    """
+    literals: List[str] = []
+    needs_digit = False
+    current: List[str] = []
+
+    def flush():
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    def walk(items, ignorecase):
+        nonlocal needs_digit
+        for op, av in items:
+            if op is sre_constants.LITERAL:
+                char = chr(av)
+                if char.isdigit():
+                    needs_digit = True
+                if ignorecase and char.lower() != char.upper():
+                    flush()
+                else:
+                    current.append(char)
+            elif op is sre_constants.AT:
+                continue  # Zero-width: \b does not break a literal run
+            elif op is sre_constants.SUBPATTERN:
+                add_flags, del_flags = av[1], av[2]
+                scoped = (ignorecase or bool(add_flags & re.IGNORECASE)) and not (
+                    del_flags & re.IGNORECASE
+                )
+                walk(av[-1], scoped)
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+                flush()
+                walk(av[2], ignorecase)
+                flush()
+            else:
+                if op is sre_constants.IN or op is sre_constants.CATEGORY:
+                    needs_digit = needs_digit or _is_digit_class(op, av)
+                flush()
+
+    walk(sre_parse.parse(pattern.pattern, pattern.flags), bool(pattern.flags & re.IGNORECASE))
+    flush()
+    return literals, needs_digit
+
+
+class MultiPatternScanner:
+    """
+    Finds all matches of several named patterns in one call.
+
+    scan(text)[name] lists the same matches, in the same order, as
+    list(patterns[name].finditer(text)).
+    """
+
+    def __init__(self, patterns: Mapping[str, Pattern], strategy: str = "gated"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown scan strategy: {strategy}")
+        self.patterns: Dict[str, Pattern] = dict(patterns)
+        self.strategy = strategy
+        self._gates = {name: required_features(p) for name, p in self.patterns.items()}
+        self._combined: Optional[Pattern] = None
+        if strategy == "alternation":
+            self._combined = self._compile_alternation()
+
+    def _compile_alternation(self) -> Pattern:
+        self._group_names = [f"p{i}" for i in range(len(self.patterns))]
+        branches = []
+        for group, pattern in zip(self._group_names, self.patterns.values()):
+            source = pattern.pattern
+            if pattern.flags & re.IGNORECASE:
+                source = f"(?i:{source})"
+            # Lookahead: zero width, so the branch never consumes text and
+            # every position where any pattern matches is reported
+            branches.append(f"(?=(?P<{group}>{source}))")
+        return re.compile("|".join(branches))
+
+    def scan(self, text: str) -> Dict[str, List[re.Match]]:
+        if self._combined is not None:
+            return self._scan_alternation(text)
+        return self._scan_gated(text)
+
+    def _scan_gated(self, text: str) -> Dict[str, List[re.Match]]:
+        has_digit = None
+        results = {}
+        for name, pattern in self.patterns.items():
+            literals, needs_digit = self._gates[name]
+            if needs_digit:
+                if has_digit is None:
+                    has_digit = _DIGIT.search(text) is not None
+                if not has_digit:
+                    results[name] = []
+                    continue
+            if not all(literal in text for literal in literals):
+                results[name] = []
+                continue
+            results[name] = list(pattern.finditer(text))
+        return results
+
+    def _scan_alternation(self, text: str) -> Dict[str, List[re.Match]]:
+        names = list(self.patterns)
+        compiled = list(self.patterns.values())
+        results: Dict[str, List[re.Match]] = {name: [] for name in names}
+        # Per-pattern position where its next finditer() match may start
+        next_start = [0] * len(names)
+        pos = 0
+        while pos <= len(text):
+            found = self._combined.search(text, pos)
+            if found is None:
+                break
+            pos = found.start()
+            first = self._group_names.index(found.lastgroup) if found.lastgroup else 0
+            for i in range(first, len(names)):
+                if next_start[i] > pos:
+                    continue
+                match = compiled[i].match(text, pos)
+                if match is None:
+                    continue
+                results[names[i]].append(match)
+                # finditer() moves past an empty match by one character
+                next_start[i] = match.end() if match.end() > pos else pos + 1
+            pos += 1
+        return results
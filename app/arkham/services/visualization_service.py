@@ -2,20 +2,16 @@ import base64
 import io
 import logging
 from typing import List, Dict, Any, Optional
-from collections import defaultdict
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import numpy as np
 
 # Third-party imports
-from qdrant_client import QdrantClient
 import umap.umap_ as umap
 from wordcloud import WordCloud
 from spacy.lang.en.stop_words import STOP_WORDS
 import string
 
 # Local imports
-from config.settings import DATABASE_URL, QDRANT_URL
+from app.arkham.services.clustering_utils import load_document_centroids
 from app.arkham.services.db.models import (
     Document,
     Chunk,
@@ -23,16 +19,15 @@ from app.arkham.services.db.models import (
     CanonicalEntity,
     EntityRelationship,
 )
+from app.arkham.services.db.connection import get_engine, get_session_factory
 
 logger = logging.getLogger(__name__)
 
-# Initialize Qdrant client from central config
-qdrant_client = QdrantClient(url=QDRANT_URL)
 COLLECTION_NAME = "arkham_mirror_hybrid"
 
 # Database setup from central config
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+engine = get_engine()
+SessionLocal = get_session_factory()
 
 # Default blocklist for wordcloud - common chunking/OCR artifacts
 WORDCLOUD_BLOCKLIST = {
@@ -68,72 +63,31 @@ def get_cluster_map_data() -> List[Dict[str, Any]]:
     """
     session = SessionLocal()
     try:
-        docs = session.query(Document).all()
-        if len(docs) < 3:
-            return []
-
-        doc_data = []
-        vectors = []
-
+        # Centroids are stored per document when embedding completes; missing
+        # ones are backfilled by the clustering run, not here (clustering_utils).
         # Limit to avoid performance issues on large datasets
-        # In a real prod env, these centroids should be pre-calculated
-        docs = docs[:1000]
-
-        # Optimize: Fetch all chunks for these docs in one go
-        doc_ids = [d.id for d in docs]
-        all_chunks = session.query(Chunk).filter(Chunk.doc_id.in_(doc_ids)).all()
-
-        chunks_by_doc = defaultdict(list)
-        for chunk in all_chunks:
-            chunks_by_doc[chunk.doc_id].append(chunk)
+        doc_ids, vectors = load_document_centroids(session, limit=1000)
+        if len(doc_ids) < 3:
+            return []
 
-        for doc in docs:
-            # Get chunks from pre-fetched map
-            chunks = chunks_by_doc.get(doc.id, [])
-            if not chunks:
-                continue
+        cluster_names = dict(session.query(Cluster.id, Cluster.name).all())
+        docs = {
+            doc.id: doc
+            for doc in session.query(Document).filter(Document.id.in_(doc_ids))
+        }
 
-            chunk_ids = [c.id for c in chunks]
-            try:
-                points = qdrant_client.retrieve(
-                    collection_name=COLLECTION_NAME, ids=chunk_ids, with_vectors=True
-                )
-                chunk_vecs = [
-                    p.vector["dense"]
-                    for p in points
-                    if p.vector and "dense" in p.vector
-                ]
-
-                # Handle case where vector might be just a list if not named vectors
-                if not chunk_vecs:
-                    chunk_vecs = [
-                        p.vector
-                        for p in points
-                        if p.vector and isinstance(p.vector, list)
-                    ]
-
-                if chunk_vecs:
-                    centroid = np.mean(chunk_vecs, axis=0)
-
-                    cluster_name = "Unclustered"
-                    if doc.cluster_id:
-                        cluster = session.query(Cluster).get(doc.cluster_id)
-                        if cluster:
-                            cluster_name = cluster.name
-
-                    doc_data.append(
-                        {
-                            "id": doc.id,
-                            "title": doc.title,
-                            "cluster": cluster_name,
-                            "type": doc.doc_type,
-                            "date": str(doc.created_at),
-                        }
-                    )
-                    vectors.append(centroid)
-            except Exception as e:
-                logger.error(f"Error fetching vectors for doc {doc.id}: {e}")
-                continue
+        doc_data = []
+        for doc_id in doc_ids:
+            doc = docs[doc_id]
+            doc_data.append(
+                {
+                    "id": doc.id,
+                    "title": doc.title,
+                    "cluster": cluster_names.get(doc.cluster_id) or "Unclustered",
+                    "type": doc.doc_type,
+                    "date": str(doc.created_at),
+                }
+            )
 
         if len(vectors) < 3:
             return []
@@ -148,7 +102,7 @@ def get_cluster_map_data() -> List[Dict[str, Any]]:
         reducer = umap.UMAP(
             n_components=2, n_neighbors=n_neighbors, random_state=42, n_jobs=1
         )
-        embedding = reducer.fit_transform(np.array(vectors))
+        embedding = reducer.fit_transform(vectors)
 
         # Combine metadata with coordinates
         result = []
@@ -3,11 +3,13 @@ Contradiction Detection Worker
 
 RQ worker for background contradiction detection with:
 - Per-entity processing with progress tracking
+- Entities analyzed concurrently within the shared LLM window
 - GPU thermal protection (cooldowns)
 - Pause/stop control via Redis
 - Priority queue by entity connection count
 """
 
+import json
 import os
 import sys
 import time
@@ -41,6 +43,8 @@ DEFAULT_MAX_RUNTIME_MINUTES = 60  # Force break after this
 
 
 # ==================== Phase 2: Caching Helpers ====================
+# Scans are cached in the shared LLM cache (app/arkham/services/llm_cache.py),
+# tied to the hash of the chunk texts they were made from.
 
 
 def compute_entity_content_hash(
@@ -51,115 +55,88 @@ def compute_entity_content_hash(
 
     Returns (hash, chunk_count) tuple.
     """
-    import hashlib
-    from arkham.services.db.models import Entity, Chunk
-
-    # Get chunks for entity via its mentions
-    entity_records = (
-        session.query(Entity)
-        .filter(Entity.canonical_entity_id == entity_id)
-        .limit(20)
-        .all()
-    )
-    doc_ids_for_entity = list(set(e.doc_id for e in entity_records if e.doc_id))
-
-    if not doc_ids_for_entity:
-        return "", 0
+    from app.arkham.services.contradiction_engine import load_entity_chunks
+    from app.arkham.services.db.models import CanonicalEntity
+    from app.arkham.services.llm_cache import source_hash
 
-    # Filter by doc_ids if provided
-    if doc_ids:
-        doc_ids_for_entity = [d for d in doc_ids_for_entity if d in doc_ids]
-
-    if not doc_ids_for_entity:
-        return "", 0
-
-    # Get chunks from these docs
-    chunks = (
-        session.query(Chunk)
-        .filter(Chunk.doc_id.in_(doc_ids_for_entity))
-        .order_by(Chunk.id)
-        .limit(10)  # Same limit as analysis
-        .all()
-    )
+    # The chunks detection picks its candidate pairs from
+    entity = session.get(CanonicalEntity, entity_id)
+    chunks = load_entity_chunks(session, entity, doc_ids) if entity else []
 
     if not chunks:
         return "", 0
 
     # Create hash from chunk texts
-    hasher = hashlib.md5()
-    for chunk in chunks:
-        hasher.update(chunk.text.encode("utf-8"))
+    return source_hash(chunk.text for chunk in chunks), len(chunks)
+
+
+def _entity_cache_key(entity_id: int, doc_ids: Optional[List[int]]) -> str:
+    from app.arkham.services.contradiction_service import ENTITY_CACHE_FEATURE
+    from app.arkham.services.llm_cache import result_key
 
-    return hasher.hexdigest(), len(chunks)
+    return result_key(
+        ENTITY_CACHE_FEATURE, entity_id, sorted(doc_ids) if doc_ids else None
+    )
 
 
-def get_entity_cache(session, entity_id: int):
-    """Get cached analysis data for an entity."""
-    from arkham.services.db.models import EntityAnalysisCache
+def get_entity_cache(
+    entity_id: int, doc_ids: Optional[List[int]], content_hash: str
+) -> Optional[Dict]:
+    """
+    Cached scan of an entity ({"chunk_count", "contradiction_count"}), if it
+    was made from the same chunk content.
+    """
+    from app.arkham.services.contradiction_service import ENTITY_CACHE_FEATURE
+    from app.arkham.services.llm_cache import get_llm_cache
 
-    return (
-        session.query(EntityAnalysisCache)
-        .filter(EntityAnalysisCache.entity_id == entity_id)
-        .first()
+    cached = get_llm_cache().get(
+        _entity_cache_key(entity_id, doc_ids), ENTITY_CACHE_FEATURE, content_hash
     )
+    return json.loads(cached) if cached else None
 
 
 def update_entity_cache(
-    session,
     entity_id: int,
+    doc_ids: Optional[List[int]],
     content_hash: str,
     chunk_count: int,
     contradiction_count: int,
 ):
     """Update or insert cache entry for an entity."""
-    from arkham.services.db.models import EntityAnalysisCache
-    from datetime import datetime
-
-    cache = get_entity_cache(session, entity_id)
-
-    if cache:
-        cache.content_hash = content_hash
-        cache.last_analyzed_at = datetime.utcnow()
-        cache.chunk_count = chunk_count
-        cache.contradiction_count = contradiction_count
-    else:
-        cache = EntityAnalysisCache(
-            entity_id=entity_id,
-            content_hash=content_hash,
-            chunk_count=chunk_count,
-            contradiction_count=contradiction_count,
-        )
-        session.add(cache)
-
-    session.commit()
+    from app.arkham.services.contradiction_service import ENTITY_CACHE_FEATURE
+    from app.arkham.services.llm_cache import get_llm_cache
+
+    get_llm_cache().put(
+        _entity_cache_key(entity_id, doc_ids),
+        ENTITY_CACHE_FEATURE,
+        json.dumps(
+            {"chunk_count": chunk_count, "contradiction_count": contradiction_count}
+        ),
+        source_hash=content_hash,
+    )
 
 
 def should_skip_entity(
     session, entity_id: int, doc_ids: Optional[List[int]], force_refresh: bool = False
-) -> tuple[bool, str]:
+) -> tuple[bool, str, int]:
     """
     Check if an entity can be skipped (already analyzed with same content).
 
-    Returns (should_skip, reason) tuple.
+    Returns (should_skip, reason, cached_contradiction_count) tuple.
     """
     if force_refresh:
-        return False, "force refresh"
-
-    cache = get_entity_cache(session, entity_id)
-    if not cache:
-        return False, "no cache"
-
-    current_hash, current_count = compute_entity_content_hash(
-        session, entity_id, doc_ids
-    )
+        return False, "force refresh", 0
 
+    current_hash, _ = compute_entity_content_hash(session, entity_id, doc_ids)
     if not current_hash:
-        return False, "no content"
+        return False, "no content", 0
 
-    if cache.content_hash == current_hash and cache.chunk_count == current_count:
-        return True, f"cache hit (hash match, {cache.contradiction_count} existing)"
+    cache = get_entity_cache(entity_id, doc_ids, current_hash)
+    if not cache:
+        return False, "no cache or content changed", 0
 
-    return False, "content changed"
+    count = cache["contradiction_count"]
+    return True, f"cache hit (hash match, {count} existing)", count
 
 
 def get_setting(key: str, default: int) -> int:
@@ -210,6 +187,66 @@ def wait_if_paused(job_id: str) -> bool:
             return True
 
 
+def _process_entity(
+    service,
+    entity_id: int,
+    doc_ids: Optional[List[int]],
+    force_refresh: bool,
+    job_id: str,
+    name_index=None,
+) -> tuple[str, int]:
+    """
+    Check the cache, analyze and re-cache one entity in its own session
+    (entities run on scheduler threads). Returns (entity_name, found_count).
+    """
+    from app.arkham.services.db.models import CanonicalEntity
+
+    session = service.Session()
+    try:
+        entity = session.get(CanonicalEntity, entity_id)
+        entity_name = entity.canonical_name if entity else f"Entity {entity_id}"
+
+        # Phase 2: Check cache - skip if already analyzed with same content
+        skip, skip_reason, cached_count = should_skip_entity(
+            session, entity_id, doc_ids, force_refresh
+        )
+        if skip:
+            logger.info(f"[Job {job_id}] Skipped {entity_name}: {skip_reason}")
+            # Count existing contradictions from cache
+            return entity_name, cached_count
+
+        if not entity:
+            return entity_name, 0
+
+        # Run detection for this entity
+        try:
+            contradictions = service._analyze_entity_contradictions(
+                session, entity, doc_ids, name_index
+            )
+            found_count = len(contradictions)
+            logger.info(
+                f"[Job {job_id}] Found {found_count} contradictions for {entity_name}"
+            )
+
+            # Phase 2: Update cache
+            content_hash, chunk_count = compute_entity_content_hash(
+                session, entity_id, doc_ids
+            )
+            if content_hash:
+                update_entity_cache(
+                    entity_id, doc_ids, content_hash, chunk_count, found_count
+                )
+                logger.info(f"[Job {job_id}] Updated cache for {entity_name}")
+            return entity_name, found_count
+
+        except Exception as e:
+            logger.error(f"[Job {job_id}] Error processing {entity_name}: {e}")
+            session.rollback()
+            return entity_name, 0
+    finally:
+        session.close()
+
+
 def detect_batch(
     entity_ids: List[int],
     doc_ids: Optional[List[int]] = None,
@@ -235,7 +272,11 @@ def detect_batch(
         Dict with results summary
     """
     # Lazy import to avoid loading at worker startup
-    from arkham.services.contradiction_service import get_contradiction_service
+    from app.arkham.services.contradiction_service import get_contradiction_service
+
+    # Same module as llm_service uses, so requests share one window
+    from app.arkham.services.llm_scheduler import get_llm_scheduler
+    from app.arkham.services.contradiction_engine import EntityNameIndex
 
     if not job_id:
         job_id = str(uuid.uuid4())[:8]
@@ -263,114 +304,79 @@ def detect_batch(
 
     service = get_contradiction_service()
     session = service.Session()
+    # Entities are analysed concurrently, bounded by the shared LLM window
+    scheduler = get_llm_scheduler()
 
     start_time = time.time()
     total_found = 0
     processed = 0
 
     try:
-        # Get entity objects for names
-        from arkham.services.db.models import CanonicalEntity
-
-        entities = (
-            session.query(CanonicalEntity)
-            .filter(CanonicalEntity.id.in_(entity_ids))
-            .all()
+        # Involved-entity names are resolved in memory, one index per batch
+        name_index = EntityNameIndex.load(session)
+        results = scheduler.iter_map(
+            lambda entity_id: _process_entity(
+                service, entity_id, doc_ids, force_refresh, job_id, name_index
+            ),
+            entity_ids,
         )
+        try:
+            for entity_id, outcome, error in results:
+                processed += 1
+                if error is not None:
+                    logger.error(f"[Job {job_id}] Error processing entity {entity_id}: {error}")
+                    entity_name = f"Entity {entity_id}"
+                else:
+                    entity_name, found_count = outcome
+                    total_found += found_count
 
-        entity_map = {e.id: e for e in entities}
-
-        for i, entity_id in enumerate(entity_ids):
-            # Check for pause/stop
-            if not wait_if_paused(job_id):
-                logger.info(f"[Job {job_id}] Stopped by user")
-                update_job_status(job_id, status="stopped")
-                return {
-                    "status": "stopped",
-                    "processed": processed,
-                    "found": total_found,
-                }
-
-            # Check max runtime
-            elapsed_minutes = (time.time() - start_time) / 60
-            if elapsed_minutes > max_runtime:
-                logger.warning(
-                    f"[Job {job_id}] Max runtime {max_runtime}min exceeded, stopping"
-                )
                 update_job_status(
                     job_id,
-                    status="timeout",
-                    error=f"Exceeded max runtime of {max_runtime} minutes",
+                    status="running",
+                    current_entity=entity_name,
+                    processed=processed,
+                    found=total_found,
+                )
+                logger.info(
+                    f"[Job {job_id}] Finished entity {processed}/{len(entity_ids)}: {entity_name}"
                 )
-                return {
-                    "status": "timeout",
-                    "processed": processed,
-                    "found": total_found,
-                }
-
-            entity = entity_map.get(entity_id)
-            entity_name = entity.canonical_name if entity else f"Entity {entity_id}"
-
-            update_job_status(
-                job_id,
-                status="running",
-                current_entity=entity_name,
-                processed=processed,
-            )
-
-            logger.info(
-                f"[Job {job_id}] Processing entity {i + 1}/{len(entity_ids)}: {entity_name}"
-            )
 
-            # Phase 2: Check cache - skip if already analyzed with same content
-            skip, skip_reason = should_skip_entity(
-                session, entity_id, doc_ids, force_refresh
-            )
-            if skip:
-                logger.info(f"[Job {job_id}] Skipped {entity_name}: {skip_reason}")
-                processed += 1
-                # Add existing contradiction count from cache
-                cache = get_entity_cache(session, entity_id)
-                if cache:
-                    total_found += cache.contradiction_count
-                update_job_status(job_id, processed=processed, found=total_found)
-                continue
-
-            # Run detection for this entity
-            try:
-                if entity:
-                    contradictions = service._analyze_entity_contradictions(
-                        session, entity, doc_ids
+                # GPU cooldown (no new entities start while cooling down)
+                if processed % cooldown_entities == 0 and processed < len(entity_ids):
+                    logger.info(f"[Job {job_id}] Cooling down for {cooldown_seconds}s...")
+                    update_job_status(job_id, status="cooldown")
+                    time.sleep(cooldown_seconds)
+                    update_job_status(job_id, status="running")
+
+                # Check for pause/stop
+                if not wait_if_paused(job_id):
+                    logger.info(f"[Job {job_id}] Stopped by user")
+                    update_job_status(job_id, status="stopped")
+                    return {
+                        "status": "stopped",
+                        "processed": processed,
+                        "found": total_found,
+                    }
+
+                # Check max runtime
+                elapsed_minutes = (time.time() - start_time) / 60
+                if elapsed_minutes > max_runtime:
+                    logger.warning(
+                        f"[Job {job_id}] Max runtime {max_runtime}min exceeded, stopping"
                     )
-                    found_count = len(contradictions)
-                    total_found += found_count
-                    logger.info(
-                        f"[Job {job_id}] Found {found_count} contradictions for {entity_name}"
-                    )
-
-                    # Phase 2: Update cache
-                    content_hash, chunk_count = compute_entity_content_hash(
-                        session, entity_id, doc_ids
+                    update_job_status(
+                        job_id,
+                        status="timeout",
+                        error=f"Exceeded max runtime of {max_runtime} minutes",
                     )
-                    if content_hash:
-                        update_entity_cache(
-                            session, entity_id, content_hash, chunk_count, found_count
-                        )
-                        logger.info(f"[Job {job_id}] Updated cache for {entity_name}")
-
-            except Exception as e:
-                logger.error(f"[Job {job_id}] Error processing {entity_name}: {e}")
-                # Continue with next entity
-
-            processed += 1
-            update_job_status(job_id, processed=processed, found=total_found)
-
-            # GPU cooldown
-            if processed > 0 and processed % cooldown_entities == 0:
-                logger.info(f"[Job {job_id}] Cooling down for {cooldown_seconds}s...")
-                update_job_status(job_id, status="cooldown")
-                time.sleep(cooldown_seconds)
-                update_job_status(job_id, status="running")
+                    return {
+                        "status": "timeout",
+                        "processed": processed,
+                        "found": total_found,
+                    }
+        finally:
+            # Entities not yet started are dropped; running ones finish
+            results.close()
 
         # Complete
         update_job_status(
@@ -395,7 +401,7 @@ def detect_batch(
 
         # Update batch record in database
         try:
-            from arkham.services.db.models import ContradictionBatch
+            from app.arkham.services.db.models import ContradictionBatch
             from datetime import datetime
 
             batch_record = (
@@ -441,7 +447,7 @@ def detect_batch(
 
         # Mark batch as incomplete
         try:
-            from arkham.services.db.models import ContradictionBatch
+            from app.arkham.services.db.models import ContradictionBatch
 
             batch_record = (
                 session.query(ContradictionBatch)
@@ -473,8 +479,8 @@ def detect_all(job_id: Optional[str] = None) -> Dict:
         Dict with results summary
     """
     # Lazy import
-    from arkham.services.contradiction_service import get_contradiction_service
-    from arkham.services.db.models import CanonicalEntity
+    from app.arkham.services.contradiction_service import get_contradiction_service
+    from app.arkham.services.db.models import CanonicalEntity
     from sqlalchemy import desc
 
     if not job_id:
@@ -1,40 +1,56 @@
-from config.settings import DATABASE_URL, REDIS_URL, QDRANT_URL
+from config.settings import REDIS_URL
 import os
 import json
 import logging
 import spacy
 from datetime import datetime
-from itertools import combinations
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from redis import Redis
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
 from qdrant_client.http.models import PointStruct
 
 from app.arkham.services.db.models import (
     Chunk,
     Anomaly,
     Document,
+    MiniDoc,
     Entity,
     CanonicalEntity,
-    EntityRelationship,
     AnomalyKeyword,
 )
-from app.arkham.services.embedding_services import embed_hybrid
-from app.arkham.services.entity_resolution import EntityResolver
+from app.arkham.services.db.connection import (
+    get_engine,
+    get_session_factory,
+    get_qdrant_client,
+)
+from app.arkham.services.embedding_services import embed_hybrid_batch
+from app.arkham.services.clustering_utils import (
+    stale_centroid_doc_ids,
+    store_document_centroids,
+)
+from app.arkham.services.corpus_stats import record_rows
+from app.arkham.services.fingerprint_utils import store_document_fingerprint
+from app.arkham.services.relationship_utils import (
+    bump_graph_version,
+    pair_increments,
+    upsert_cooccurrences,
+)
+from app.arkham.services.entity_resolution import (
+    CanonicalEntityIndex,
+    EntityResolver,
+    get_canonical_index_epoch,
+)
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Setup DB & Redis
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 
 # Qdrant
-qdrant_client = QdrantClient(url=QDRANT_URL)
+qdrant_client = get_qdrant_client()
 COLLECTION_NAME = "arkham_mirror_hybrid"
 
 # Spacy Model (Lazy Load)
@@ -56,7 +72,27 @@ def get_nlp():
     return _nlp
 
 
+# Canonical Entity Index (kept warm across jobs in this worker process)
+_canonical_index = None
+
+
+def get_canonical_index(session):
+    """Returns the process-wide canonical index, synced with the database."""
+    global _canonical_index
+    if _canonical_index is None:
+        _canonical_index = CanonicalEntityIndex()
+    _canonical_index.sync(session, epoch=get_canonical_index_epoch(redis_conn))
+    return _canonical_index
+
+
+_collection_ready = False
+
+
 def ensure_collection():
+    """Create the hybrid collection if needed (checked once per process)."""
+    global _collection_ready
+    if _collection_ready:
+        return
     try:
         qdrant_client.get_collection(COLLECTION_NAME)
     except Exception:
@@ -83,317 +119,379 @@ def ensure_collection():
                 )
             else:
                 raise e
+    _collection_ready = True
+
+
+def _build_point(chunk, doc, emb_result):
+    """Builds the Qdrant point for an embedded chunk."""
+    return PointStruct(
+        id=chunk.id,
+        vector={
+            "dense": emb_result["dense"],
+            "sparse": {
+                "indices": list(map(int, emb_result["sparse"].keys())),
+                "values": list(map(float, emb_result["sparse"].values())),
+            },
+        },
+        payload={
+            "doc_id": doc.id,
+            "text": chunk.text,
+            "doc_type": doc.doc_type,
+            "project_id": doc.project_id,
+            "chunk_index": chunk.chunk_index,
+        },
+    )
+
+
+def _load_suspicious_keywords(session):
+    """Fetches active anomaly keywords from the DB, falling back to defaults."""
+    db_keywords = session.query(AnomalyKeyword).filter_by(is_active=1).all()
+    if db_keywords:
+        return {k.keyword: k.weight for k in db_keywords}
+
+    # Fallback defaults
+    return {
+        "confidential": 0.2,
+        "secret": 0.2,
+        "delete": 0.2,
+        "shred": 0.2,
+        "hidden": 0.2,
+    }
+
+
+def _flag_anomalies(session, chunk, suspicious_keywords):
+    """Red Flag / Anomaly Analysis (Streaming) for a single chunk."""
+    score = 0
+    reasons = []
+
+    for kw, weight in suspicious_keywords.items():
+        if kw in chunk.text.lower():
+            score += weight
+            reasons.append(kw)
+
+    if score > 0:
+        anomaly = Anomaly(
+            chunk_id=chunk.id,
+            score=score,
+            reason=f"Keywords found: {', '.join(reasons)}",
+        )
+        session.add(anomaly)
+        record_rows(session, chunk.doc_id, anomalies=1)
+        session.commit()
+        logger.info(f"Flagged chunk {chunk.id} (Score: {score})")
 
 
-ensure_collection()
-
-
-def embed_chunk_job(chunk_id):
+def _extract_entities(session, chunk, doc, canonical_index):
     """
-    Embeds a chunk, upserts to Qdrant, runs Red Flag analysis, and extracts Entities.
+    Entity Extraction (NER) and canonical linking for a chunk.
+
+    Returns the set of canonical entity IDs mentioned in the chunk (empty on
+    failure) so the caller can record co-occurrences for the whole batch.
     """
-    session = Session()
+    chunk_canonical_ids = set()
+    # Index changes are undone if this chunk's transaction rolls back
+    canonical_index.begin()
     try:
-        chunk = session.query(Chunk).get(chunk_id)
-        if not chunk:
-            logger.error(f"Chunk {chunk_id} not found.")
-            return
-
-        # 1. Generate Embedding
-        emb_result = embed_hybrid(chunk.text)
-
-        # 2. Upsert to Qdrant
-        # Need to fetch Document to get metadata
-        doc = session.query(Document).get(chunk.doc_id)
-
-        point = PointStruct(
-            id=chunk.id,
-            vector={
-                "dense": emb_result["dense"],
-                "sparse": {
-                    "indices": list(map(int, emb_result["sparse"].keys())),
-                    "values": list(map(float, emb_result["sparse"].values())),
-                },
-            },
-            payload={
-                "doc_id": doc.id,
-                "text": chunk.text,
-                "doc_type": doc.doc_type,
-                "project_id": doc.project_id,
-                "chunk_index": chunk.chunk_index,
-            },
-        )
-
-        qdrant_client.upsert(collection_name=COLLECTION_NAME, points=[point])
-
-        # 3. Red Flag / Anomaly Analysis (Streaming)
-        # Fetch keywords from DB
-        db_keywords = session.query(AnomalyKeyword).filter_by(is_active=1).all()
-        if db_keywords:
-            suspicious_keywords = {k.keyword: k.weight for k in db_keywords}
-        else:
-            # Fallback defaults
-            suspicious_keywords = {
-                "confidential": 0.2,
-                "secret": 0.2,
-                "delete": 0.2,
-                "shred": 0.2,
-                "hidden": 0.2,
-            }
-
-        score = 0
-        reasons = []
-
-        for kw, weight in suspicious_keywords.items():
-            if kw in chunk.text.lower():
-                score += weight
-                reasons.append(kw)
-
-        if score > 0:
-            anomaly = Anomaly(
-                chunk_id=chunk.id,
-                score=score,
-                reason=f"Keywords found: {', '.join(reasons)}",
+        nlp = get_nlp()
+        spacy_doc = nlp(chunk.text)
+
+        # Aggregate locally to reduce DB hits
+        local_counts = {}
+
+        # Noise Blocklist (Common OCR artifacts or irrelevant terms)
+        BLOCKLIST = {
+            "page",
+            "total",
+            "date",
+            "invoice",
+            "subtotal",
+            "amount",
+            "description",
+            "item",
+            "qty",
+            "price",
+            "tel",
+            "fax",
+            "email",
+            "www",
+            "http",
+            "https",
+            "january",
+            "february",
+            "march",
+            "april",
+            "may",
+            "june",
+            "july",
+            "august",
+            "september",
+            "october",
+            "november",
+            "december",
+        }
+
+        for ent in spacy_doc.ents:
+            # 1. Filter by Label
+            if ent.label_ in [
+                "CARDINAL",
+                "ORDINAL",
+                "PERCENT",
+                "QUANTITY",
+                "MONEY",
+                "TIME",
+            ]:
+                continue
+
+            # 2. Filter by Length (Noise reduction)
+            clean_text = ent.text.strip()
+            if len(clean_text) < 3:
+                continue
+
+            # 3. Filter by Blocklist
+            if clean_text.lower() in BLOCKLIST:
+                continue
+
+            # 4. Filter specific patterns (e.g. just numbers)
+            if clean_text.isdigit():
+                continue
+
+            key = (clean_text, ent.label_)
+            local_counts[key] = local_counts.get(key, 0) + 1
+
+        # Entity Resolution: Link to canonical entities
+        for (text, label), count in local_counts.items():
+            # 1. Check if entity mention already exists for this document
+            entity = (
+                session.query(Entity)
+                .filter_by(doc_id=doc.id, text=text, label=label)
+                .first()
             )
-            session.add(anomaly)
-            session.commit()
-            logger.info(f"Flagged chunk {chunk.id} (Score: {score})")
 
-        # 4. Entity Extraction (NER)
-        try:
-            nlp = get_nlp()
-            spacy_doc = nlp(chunk.text)
-
-            # Aggregate locally to reduce DB hits
-            local_counts = {}
-
-            # Noise Blocklist (Common OCR artifacts or irrelevant terms)
-            BLOCKLIST = {
-                "page",
-                "total",
-                "date",
-                "invoice",
-                "subtotal",
-                "amount",
-                "description",
-                "item",
-                "qty",
-                "price",
-                "tel",
-                "fax",
-                "email",
-                "www",
-                "http",
-                "https",
-                "january",
-                "february",
-                "march",
-                "april",
-                "may",
-                "june",
-                "july",
-                "august",
-                "september",
-                "october",
-                "november",
-                "december",
-            }
-
-            for ent in spacy_doc.ents:
-                # 1. Filter by Label
-                if ent.label_ in [
-                    "CARDINAL",
-                    "ORDINAL",
-                    "PERCENT",
-                    "QUANTITY",
-                    "MONEY",
-                    "TIME",
-                ]:
-                    continue
-
-                # 2. Filter by Length (Noise reduction)
-                clean_text = ent.text.strip()
-                if len(clean_text) < 3:
-                    continue
-
-                # 3. Filter by Blocklist
-                if clean_text.lower() in BLOCKLIST:
-                    continue
-
-                # 4. Filter specific patterns (e.g. just numbers)
-                if clean_text.isdigit():
-                    continue
-
-                key = (clean_text, ent.label_)
-                local_counts[key] = local_counts.get(key, 0) + 1
-
-            # Entity Resolution: Link to canonical entities
-            resolver = EntityResolver()
-
-            for (text, label), count in local_counts.items():
-                # 1. Check if entity mention already exists for this document
-                entity = (
-                    session.query(Entity)
-                    .filter_by(doc_id=doc.id, text=text, label=label)
-                    .first()
+            if entity:
+                entity.count += count
+            else:
+                entity = Entity(doc_id=doc.id, text=text, label=label, count=count)
+                session.add(entity)
+                session.flush()  # Get entity ID
+
+            # 2. Find or create canonical entity
+            if not entity.canonical_entity_id:
+                resolver = canonical_index.resolver
+
+                # Try to match with existing canonical (indexed lookup)
+                canonical_id = canonical_index.find(text, label)
+                canonical = (
+                    session.query(CanonicalEntity).get(canonical_id)
+                    if canonical_id
+                    else None
                 )
 
-                if entity:
-                    entity.count += count
-                else:
-                    entity = Entity(doc_id=doc.id, text=text, label=label, count=count)
-                    session.add(entity)
-                    session.flush()  # Get entity ID
-
-                # 2. Find or create canonical entity
-                if not entity.canonical_entity_id:
-                    # Fetch existing canonical entities of same label
-                    existing_canonicals = (
-                        session.query(CanonicalEntity).filter_by(label=label).all()
-                    )
+                if canonical_id and canonical is None:
+                    # Merged away or deleted since the index was synced
+                    canonical_index.remove(canonical_id)
 
-                    canonical_dicts = [
-                        {
-                            "id": c.id,
-                            "canonical_name": c.canonical_name,
-                            "aliases": c.aliases,
-                        }
-                        for c in existing_canonicals
-                    ]
-
-                    # Try to match with existing canonical
-                    canonical_id = resolver.find_canonical_match(
-                        text, label, canonical_dicts
-                    )
+                if canonical:
+                    # Link to existing canonical
+                    entity.canonical_entity_id = canonical_id
 
-                    if canonical_id:
-                        # Link to existing canonical
-                        canonical = session.query(CanonicalEntity).get(canonical_id)
-                        entity.canonical_entity_id = canonical_id
+                    # Update canonical stats
+                    canonical.total_mentions += count
+                    canonical.last_seen = datetime.utcnow()
 
-                        # Update canonical stats
-                        canonical.total_mentions += count
-                        canonical.last_seen = datetime.utcnow()
+                    # Update aliases
+                    canonical.aliases = resolver.merge_aliases(
+                        canonical.aliases or "", text
+                    )
 
-                        # Update aliases
-                        canonical.aliases = resolver.merge_aliases(
-                            canonical.aliases or "", text
-                        )
+                    # Check if this new mention is a better canonical name
+                    try:
+                        current_aliases = json.loads(canonical.aliases)
+                        all_names = [canonical.canonical_name] + current_aliases
+                        best_name = resolver.select_best_name(all_names)
 
-                        # Check if this new mention is a better canonical name
-                        try:
-                            current_aliases = json.loads(canonical.aliases)
-                            all_names = [canonical.canonical_name] + current_aliases
-                            best_name = resolver.select_best_name(all_names)
-
-                            if best_name != canonical.canonical_name:
-                                logger.info(
-                                    f"Updating canonical name: {canonical.canonical_name} -> {best_name}"
-                                )
-                                canonical.canonical_name = best_name
-                        except Exception as e:
-                            logger.warning(f"Failed to update canonical name: {e}")
-
-                    else:
-                        # Create new canonical entity
-                        canonical = CanonicalEntity(
-                            canonical_name=text,
-                            label=label,
-                            total_mentions=count,
-                            aliases=json.dumps(
-                                [EntityResolver.sanitize_for_json(text)]
-                            ),
-                        )
-                        session.add(canonical)
-                        session.flush()
-                        entity.canonical_entity_id = canonical.id
-
-            # Collect all canonical entity IDs from this chunk for relationship creation
-            chunk_canonical_ids = set()
-            for (text, label), count in local_counts.items():
-                entity = (
-                    session.query(Entity)
-                    .filter_by(doc_id=doc.id, text=text, label=label)
-                    .first()
-                )
-                if entity and entity.canonical_entity_id:
-                    chunk_canonical_ids.add(entity.canonical_entity_id)
-
-            # Create co-occurrence relationships for entities in the same chunk
-            if len(chunk_canonical_ids) >= 2:
-                for entity1_id, entity2_id in combinations(
-                    sorted(chunk_canonical_ids), 2
-                ):
-                    # Check if relationship already exists (in either direction)
-                    existing = (
-                        session.query(EntityRelationship)
-                        .filter(
-                            (
-                                (EntityRelationship.entity1_id == entity1_id)
-                                & (EntityRelationship.entity2_id == entity2_id)
-                            )
-                            | (
-                                (EntityRelationship.entity1_id == entity2_id)
-                                & (EntityRelationship.entity2_id == entity1_id)
+                        if best_name != canonical.canonical_name:
+                            logger.info(
+                                f"Updating canonical name: {canonical.canonical_name} -> {best_name}"
                             )
+                            canonical.canonical_name = best_name
+
+                        canonical_index.upsert(
+                            canonical.id,
+                            label,
+                            [canonical.canonical_name] + current_aliases,
                         )
-                        .first()
+                    except Exception as e:
+                        logger.warning(f"Failed to update canonical name: {e}")
+
+                else:
+                    # Create new canonical entity
+                    canonical = CanonicalEntity(
+                        canonical_name=text,
+                        label=label,
+                        total_mentions=count,
+                        aliases=json.dumps(
+                            [EntityResolver.sanitize_for_json(text)]
+                        ),
                     )
+                    session.add(canonical)
+                    session.flush()
+                    entity.canonical_entity_id = canonical.id
+                    canonical_index.upsert(canonical.id, label, [text])
+
+            if entity.canonical_entity_id:
+                chunk_canonical_ids.add(entity.canonical_entity_id)
+
+        session.commit()
+        canonical_index.commit()
+        logger.info(
+            f"Extracted and linked {len(local_counts)} entities from chunk {chunk.id}"
+        )
+        return chunk_canonical_ids
 
-                    if existing:
-                        # Update existing relationship
-                        existing.co_occurrence_count += 1
-                        existing.strength = min(
-                            existing.strength + 0.1, 10.0
-                        )  # Capped at 10
-                    else:
-                        # Create new relationship
-                        new_rel = EntityRelationship(
-                            entity1_id=entity1_id,
-                            entity2_id=entity2_id,
-                            relationship_type="co-occurrence",
-                            strength=1.0,
-                            co_occurrence_count=1,
-                            doc_id=doc.id,
-                        )
-                        session.add(new_rel)
+    except Exception as ner_e:
+        logger.error(f"NER failed for chunk {chunk.id}: {ner_e}")
+        # Discard the half-linked mentions so the rest of the batch can commit
+        session.rollback()
+        canonical_index.rollback()
+        return set()
 
-                logger.info(
-                    f"Created/updated {len(list(combinations(chunk_canonical_ids, 2)))} relationships from chunk {chunk.id}"
-                )
 
+def _record_cooccurrences(session, groups):
+    """Upserts chunk-level co-occurrence counts for a batch of chunks."""
+    if not any(ids for _, ids in groups):
+        return
+    try:
+        pairs = upsert_cooccurrences(session, pair_increments(groups))
+        # New entities and mention counts change the graph even without pairs
+        bump_graph_version(session)
+        session.commit()
+        logger.info(f"Created/updated {pairs} relationships from {len(groups)} chunks")
+    except Exception as e:
+        logger.error(f"Relationship upsert failed: {e}")
+        session.rollback()
+
+
+def _mark_document_complete(session, doc):
+    """Marks the document complete once all of its MiniDocs are parsed."""
+    pending_minidocs = (
+        session.query(MiniDoc)
+        .filter(MiniDoc.document_id == doc.id, MiniDoc.status != "parsed")
+        .count()
+    )
+
+    if pending_minidocs == 0:
+        if doc.status != "complete":
+            doc.status = "complete"
+            session.add(doc)
             session.commit()
-            logger.info(
-                f"Extracted and linked {len(local_counts)} entities from chunk {chunk.id}"
-            )
+            logger.info(f"Document {doc.id} marked as COMPLETE.")
+            _fingerprint_document(session, doc)
 
-        except Exception as ner_e:
-            logger.error(f"NER failed for chunk {chunk.id}: {ner_e}")
 
-        logger.info(f"Embedded chunk {chunk.id}")
+def _fingerprint_document(session, doc):
+    """Stores the near-duplicate fingerprint of a completed document."""
+    try:
+        store_document_fingerprint(session, doc.id)
+        session.commit()
+    except Exception as e:
+        # Another batch of the same document may have raced us; either way the
+        # background fingerprint backfill picks it up
+        logger.warning(f"Fingerprinting document {doc.id} failed: {e}")
+        session.rollback()
 
-        # Check if all chunks for this document are processed
-        # This is a bit expensive, but ensures status correctness
-        total_chunks = session.query(Chunk).filter(Chunk.doc_id == doc.id).count()
 
-        # Check if all MiniDocs for this doc are 'parsed'
-        from arkham.services.db.models import MiniDoc
+def _store_centroids(session, doc_ids):
+    """
+    Stores the mean chunk embedding of completed documents for clustering.
 
-        pending_minidocs = (
-            session.query(MiniDoc)
-            .filter(MiniDoc.document_id == doc.id, MiniDoc.status != "parsed")
-            .count()
+    Runs after every batch: the batch that completes a document may finish
+    before the document's other batches have upserted their vectors, so a
+    centroid is recomputed while it averages fewer vectors than the document
+    has chunks. Only the documents of this batch are checked.
+    """
+    if not doc_ids:
+        return
+    try:
+        stale = stale_centroid_doc_ids(session, doc_ids, missing_vectors=True)
+        if stale:
+            store_document_centroids(session, qdrant_client, stale)
+            session.commit()
+    except Exception as e:
+        # The next clustering run backfills missing centroids
+        logger.warning(f"Storing centroids for documents {doc_ids} failed: {e}")
+        session.rollback()
+
+
+def embed_chunks_job(chunk_ids):
+    """
+    Embeds a batch of chunks with one batched encode and a single Qdrant upsert,
+    then runs Red Flag analysis and extracts Entities for each chunk.
+    """
+    session = Session()
+    try:
+        chunks = (
+            session.query(Chunk)
+            .filter(Chunk.id.in_(chunk_ids))
+            .order_by(Chunk.id)
+            .all()
         )
+        missing = set(chunk_ids) - {c.id for c in chunks}
+        for chunk_id in sorted(missing):
+            logger.error(f"Chunk {chunk_id} not found.")
+        if not chunks:
+            return
 
-        if pending_minidocs == 0:
-            if doc.status != "complete":
-                doc.status = "complete"
-                session.add(doc)
-                session.commit()
-                logger.info(f"Document {doc.id} marked as COMPLETE.")
+        # Need Documents to get metadata
+        doc_ids = {c.doc_id for c in chunks}
+        docs = {
+            d.id: d
+            for d in session.query(Document).filter(Document.id.in_(doc_ids)).all()
+        }
+
+        # 1. Generate Embeddings (one batched forward pass)
+        emb_results = embed_hybrid_batch([c.text for c in chunks])
+
+        # 2. Upsert to Qdrant (one round-trip for the whole batch)
+        points = [
+            _build_point(chunk, docs[chunk.doc_id], emb_result)
+            for chunk, emb_result in zip(chunks, emb_results)
+        ]
+        ensure_collection()
+        qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points)
+
+        # 3. Red Flag / Anomaly Analysis and 4. NER, per chunk
+        suspicious_keywords = _load_suspicious_keywords(session)
+        canonical_index = get_canonical_index(session)
+
+        cooccurrence_groups = []
+        for chunk in chunks:
+            _flag_anomalies(session, chunk, suspicious_keywords)
+            canonical_ids = _extract_entities(
+                session, chunk, docs[chunk.doc_id], canonical_index
+            )
+            cooccurrence_groups.append((chunk.doc_id, canonical_ids))
+            logger.info(f"Embedded chunk {chunk.id}")
+
+        # 5. Co-occurrence relationships for the whole batch (one bulk upsert)
+        _record_cooccurrences(session, cooccurrence_groups)
+
+        # Check if all MiniDocs for these documents are processed
+        for doc in docs.values():
+            _mark_document_complete(session, doc)
+        _store_centroids(
+            session, sorted(d.id for d in docs.values() if d.status == "complete")
+        )
 
     except Exception as e:
         logger.error(f"Embed job failed: {e}")
         session.rollback()
     finally:
         session.close()
+
+
+def embed_chunk_job(chunk_id):
+    """
+    Embeds a single chunk. Kept for jobs enqueued before batching was added;
+    new producers enqueue embed_chunks_job instead.
+    """
+    embed_chunks_job([chunk_id])
@@ -0,0 +1,49 @@
+"""
+Background fingerprinting of documents ingested before fingerprints were
+stored at ingest time.
+
+The duplicates page only reads stored fingerprints; when some are missing it
+queues this job and shows a "backfill pending" notice instead of hashing the
+corpus inside the request (see services/fingerprint_utils.py).
+
+Usage:
+    python -m app.arkham.services.workers.fingerprint_worker [--limit 1000]
+"""
+
+import argparse
+import logging
+from typing import Optional
+
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.fingerprint_utils import backfill_fingerprints
+
+logger = logging.getLogger(__name__)
+
+engine = get_engine()
+Session = get_session_factory()
+
+
+def backfill_fingerprints_job(limit: Optional[int] = None) -> int:
+    """
+    RQ job: fingerprint processed documents that have no fingerprint yet.
+    Returns the number of documents fingerprinted.
+    """
+    session = Session()
+    try:
+        return backfill_fingerprints(session, limit)
+    except Exception as e:
+        logger.error(f"Fingerprint backfill failed: {e}", exc_info=True)
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Fingerprint unfingerprinted documents")
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Fingerprint at most this many documents"
+    )
+    args = parser.parse_args()
+    print(f"Fingerprinted {backfill_fingerprints_job(args.limit)} documents")
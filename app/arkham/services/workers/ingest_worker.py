@@ -19,25 +19,25 @@ from pathlib import Path
 
 from rq import Queue
 from redis import Redis
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
-from config.settings import DATABASE_URL, REDIS_URL, DOCUMENTS_DIR
+from config.settings import REDIS_URL, DOCUMENTS_DIR
 
-from app.arkham.services.db.models import Document, Chunk, MiniDoc, DateMention, TimelineEvent, SensitiveDataMatch, ExtractedTable
+from app.arkham.services.config import get_config
+from app.arkham.services.chunk_utils import persist_chunks
+from app.arkham.services.corpus_stats import record_document, record_rows
+from app.arkham.services.db.models import Document, MiniDoc, ExtractedTable
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.utils.hash_utils import get_file_hash
 from app.arkham.services.utils.security_utils import sanitize_filename
 from app.arkham.services.converters import is_text_based_file, extract_text_direct, extract_tables_from_text
-from app.arkham.services.timeline_service import extract_timeline_from_chunk
-from app.arkham.services.utils.pattern_detector import detect_sensitive_data
 from app.arkham.services.utils.smart_chunker import smart_chunk, agentic_chunk, ChunkConfig
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Setup DB & Redis from central config
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 q = Queue(connection=redis_conn)
 
@@ -92,6 +92,7 @@ def _process_text_directly(session, doc, extracted_data):
                 text_content=table_data["text_content"],
             )
             session.add(ext_table)
+        record_rows(session, doc.id, tables=len(tables))
 
         if tables:
             logger.info(f"Extracted {len(tables)} tables from text-based file (doc_id={doc.id})")
@@ -132,56 +133,8 @@ def _process_text_directly(session, doc, extracted_data):
 
     logger.info(f"Created {len(chunks_list)} chunks from {len(text)} characters")
 
-    chunk_ids = []  # Collect chunk IDs for embedding after commit
-
-    for chunk_index, chunk_text in enumerate(chunks_list):
-
-        chunk = Chunk(
-            doc_id=doc.id,
-            text=chunk_text,
-            chunk_index=chunk_index,
-        )
-        session.add(chunk)
-        session.flush()  # Get ID
-        chunk_ids.append(chunk.id)
-
-        # Extract timeline information
-        try:
-            date_mentions, timeline_events = extract_timeline_from_chunk(
-                chunk_text, chunk.id, doc.id
-            )
-
-            for mention_data in date_mentions:
-                mention = DateMention(**mention_data)
-                session.add(mention)
-
-            for event_data in timeline_events:
-                event = TimelineEvent(**event_data)
-                session.add(event)
-
-        except Exception as e:
-            logger.warning(f"Timeline extraction failed for chunk {chunk.id}: {str(e)}")
-
-        # Detect sensitive data patterns
-        try:
-            sensitive_matches = detect_sensitive_data(chunk_text)
-
-            for match in sensitive_matches:
-                sensitive_data = SensitiveDataMatch(
-                    chunk_id=chunk.id,
-                    doc_id=doc.id,
-                    pattern_type=match.pattern_type,
-                    match_text=match.match_text,
-                    confidence=match.confidence,
-                    start_pos=match.start_pos,
-                    end_pos=match.end_pos,
-                    context_before=match.context_before,
-                    context_after=match.context_after
-                )
-                session.add(sensitive_data)
-
-        except Exception as e:
-            logger.warning(f"Sensitive data detection failed for chunk {chunk.id}: {str(e)}")
+    # Chunks and their derived rows are stored in bulk
+    chunk_ids = persist_chunks(session, doc.id, chunks_list)
 
     doc.num_pages = 1  # Text files are treated as single-page
     doc.status = "embedded"  # Mark as ready (embedding jobs will be queued)
@@ -192,10 +145,15 @@ def _process_text_directly(session, doc, extracted_data):
     logger.info(f"Text passthrough: {len(chunk_ids)} chunks committed to database")
 
     # Now enqueue embed jobs - chunks are guaranteed to exist in DB
-    for chunk_id in chunk_ids:
-        q.enqueue("app.arkham.services.workers.embed_worker.embed_chunk_job", chunk_id=chunk_id)
+    # Chunks are embedded in batches: one model forward pass and one Qdrant upsert per job
+    batch_size = get_config("processing.embed_batch_size", 32)
+    for i in range(0, len(chunk_ids), batch_size):
+        q.enqueue(
+            "app.arkham.services.workers.embed_worker.embed_chunks_job",
+            chunk_ids=chunk_ids[i : i + batch_size],
+        )
 
-    logger.info(f"Text passthrough complete for doc {doc.id}: {len(chunk_ids)} embed jobs enqueued")
+    logger.info(f"Text passthrough complete for doc {doc.id}: {len(chunk_ids)} chunks enqueued for embedding")
     return len(chunk_ids)
 
 
@@ -270,6 +228,7 @@ def process_file(file_path, project_id=None, ocr_mode="paddle"):
                     num_pages=1,
                 )
                 session.add(doc)
+                record_document(session, doc)
                 session.commit()
 
                 # Process text directly (chunks + embed jobs)
@@ -308,6 +267,7 @@ def process_file(file_path, project_id=None, ocr_mode="paddle"):
             num_pages=0,
         )
         session.add(doc)
+        record_document(session, doc)
         session.commit()
 
         # 4. Enqueue Splitter Job (for PDF/OCR pipeline)
@@ -3,29 +3,38 @@
 import os
 os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
 
-from config.settings import DATABASE_URL, REDIS_URL, PAGES_DIR
+from config.settings import REDIS_URL, PAGES_DIR
 import hashlib
 import json
 import logging
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 from PIL import Image
 from paddleocr import PaddleOCR
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from rq import Queue
+from sqlalchemy.exc import IntegrityError
 from redis import Redis
 from dotenv import load_dotenv
 
 from app.arkham.services.db.models import PageOCR, MiniDoc, ExtractedTable
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.corpus_stats import record_rows
 from app.arkham.services.llm_service import transcribe_image, extract_tables_from_image
+from app.arkham.services.minidoc_progress import add_pages_done, complete_page
+from app.arkham.services.ocr_pool import (
+    parse_paddle_result,
+    shutdown_ocr_pool,
+    submit_pages,
+)
+from app.arkham.services.pdf_pages import render_pdf_pages, write_page_json
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Setup DB & Redis
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 q = Queue(connection=redis_conn)
 
@@ -65,6 +74,29 @@ def get_paddle_engine(force_cpu=False):
     return _paddle_engine
 
 
+def save_page_json(doc_id, doc_hash, page_num, page_text, ocr_meta, ocr_mode):
+    """Writes the OCR output of one page next to the other pages of the document."""
+    write_page_json(
+        os.path.join(OCR_PAGES_DIR, doc_hash),
+        doc_id,
+        page_num,
+        page_text,
+        ocr_meta,
+        ocr_mode,
+    )
+
+
+def _enqueue_parser(minidoc_db_id, with_errors=False):
+    logger.info(
+        f"MiniDoc {minidoc_db_id} complete{' (with errors)' if with_errors else ''}! "
+        "Enqueuing parser."
+    )
+    q.enqueue(
+        "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+        minidoc_db_id=minidoc_db_id,
+    )
+
+
 def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
     """
     Runs OCR on a single page image and saves the result.
@@ -76,6 +108,7 @@ def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
 
         page_text = ""
         ocr_meta = []
+        tables_saved = 0
 
         if ocr_mode == "qwen":
             # --- Qwen-VL / LLM Strategy ---
@@ -133,6 +166,7 @@ def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
                                 text_content=json.dumps(table),
                             )
                             session.add(ext_table)
+                            tables_saved += 1
 
                         logger.info(
                             f"Saved {len(tables_data)} tables for page {page_num}"
@@ -195,49 +229,11 @@ def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
             if paddle_failed and page_text:
                 # Already processed via Qwen fallback
                 pass
-            elif result and result[0]:
-                # Handle PaddleX / New PaddleOCR structure
-                ocr_res = result[0]
-
-                # Check if it has the new keys
-                if hasattr(ocr_res, "keys") and "rec_texts" in ocr_res:
-                    texts = ocr_res["rec_texts"]
-                    scores = ocr_res["rec_scores"]
-                    boxes = ocr_res["rec_polys"]  # These are numpy arrays
-
-                    for box, text, score in zip(boxes, texts, scores):
-                        # Convert box to list for JSON serialization
-                        box_list = box.tolist() if hasattr(box, "tolist") else box
-                        page_text += text + "\n"
-                        ocr_meta.append(
-                            {"box": box_list, "text": text, "conf": float(score)}
-                        )
-
-                # Fallback for old list-of-lists structure
-                elif isinstance(ocr_res, list):
-                    for line in ocr_res:
-                        # line structure: [[x1,y1,x2,y2], (text, conf)]
-                        if len(line) >= 2:
-                            box = line[0]
-                            text, conf = line[1]
-                            page_text += text + "\n"
-                            ocr_meta.append({"box": box, "text": text, "conf": conf})
+            else:
+                page_text, ocr_meta = parse_paddle_result(result)
 
         # 2. Save JSON Output
-        output_dir = os.path.join(OCR_PAGES_DIR, doc_hash)
-        os.makedirs(output_dir, exist_ok=True)
-        json_path = os.path.join(output_dir, f"page_{page_num:04d}.json")
-
-        output_data = {
-            "doc_id": doc_id,
-            "page_num": page_num,
-            "text": page_text,
-            "meta": ocr_meta,
-            "mode": ocr_mode,
-        }
-
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        save_page_json(doc_id, doc_hash, page_num, page_text, ocr_meta, ocr_mode)
 
         # 3. Upsert PageOCR Record
         existing = (
@@ -260,43 +256,22 @@ def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
                 checksum=page_checksum,
             )
             session.add(page_record)
+            session.flush()  # A duplicate page fails here, before it is counted
 
-        session.commit()
-
-        # 4. Check MiniDoc Completion
-        minidoc = (
-            session.query(MiniDoc)
-            .filter(
-                MiniDoc.document_id == doc_id,
-                MiniDoc.page_start <= page_num,
-                MiniDoc.page_end >= page_num,
-            )
-            .first()
+        # 4. Count the page towards its MiniDoc (same transaction)
+        completed_minidoc_id = complete_page(
+            session, doc_id, page_num, new_page=existing is None
         )
+        record_rows(session, doc_id, tables=tables_saved)
+        session.commit()
 
-        if minidoc:
-            # Check if all pages in this minidoc are done
-            total_pages_in_minidoc = minidoc.page_end - minidoc.page_start + 1
-            completed_pages = (
-                session.query(PageOCR)
-                .filter(
-                    PageOCR.document_id == doc_id,
-                    PageOCR.page_num >= minidoc.page_start,
-                    PageOCR.page_num <= minidoc.page_end,
-                )
-                .count()
-            )
-
-            if completed_pages >= total_pages_in_minidoc:
-                logger.info(f"MiniDoc {minidoc.minidoc_id} complete! Enqueuing parser.")
-                minidoc.status = "ocr_done"
-                session.commit()
+        if completed_minidoc_id:
+            _enqueue_parser(completed_minidoc_id)
 
-                # Enqueue Parser Job
-                q.enqueue(
-                    "app.arkham.services.workers.parser_worker.parse_minidoc_job",
-                    minidoc_db_id=minidoc.id,
-                )
+    except IntegrityError:
+        # A duplicate job for this page saved (and counted) it first
+        session.rollback()
+        logger.warning(f"Doc {doc_id} Page {page_num} was already saved; skipping.")
 
     except Exception as e:
         logger.error(f"OCR Job failed: {e}")
@@ -327,49 +302,145 @@ def process_page_job(doc_id, doc_hash, page_num, image_path, ocr_mode="paddle"):
                     checksum="ERROR",
                 )
                 session.add(page_record)
+                session.flush()
 
+            completed_minidoc_id = complete_page(
+                session, doc_id, page_num, new_page=existing is None
+            )
             session.commit()
 
-            # Trigger completion check again (copy-paste logic, or refactor)
-            # For simplicity, let's just do the check here too
-            minidoc = (
-                session.query(MiniDoc)
-                .filter(
-                    MiniDoc.document_id == doc_id,
-                    MiniDoc.page_start <= page_num,
-                    MiniDoc.page_end >= page_num,
-                )
-                .first()
+            if completed_minidoc_id:
+                _enqueue_parser(completed_minidoc_id, with_errors=True)
+
+        except Exception as inner_e:
+            logger.critical(
+                f"CRITICAL: Failed to save error state for page {page_num}: {inner_e}"
             )
 
-            if minidoc:
-                total_pages_in_minidoc = minidoc.page_end - minidoc.page_start + 1
-                completed_pages = (
-                    session.query(PageOCR)
-                    .filter(
-                        PageOCR.document_id == doc_id,
-                        PageOCR.page_num >= minidoc.page_start,
-                        PageOCR.page_num <= minidoc.page_end,
-                    )
-                    .count()
-                )
+    finally:
+        session.close()
 
-                if completed_pages >= total_pages_in_minidoc:
-                    logger.info(
-                        f"MiniDoc {minidoc.minidoc_id} complete (with errors)! Enqueuing parser."
-                    )
-                    minidoc.status = "ocr_done"
-                    session.commit()
 
-                    q.enqueue(
-                        "app.arkham.services.workers.parser_worker.parse_minidoc_job",
-                        minidoc_db_id=minidoc.id,
-                    )
+def _image_checksum(image):
+    """SHA-256 of a page image given as a file path or PNG bytes."""
+    if isinstance(image, bytes):
+        return hashlib.sha256(image).hexdigest()
+    return compute_file_checksum(image)
 
-        except Exception as inner_e:
-            logger.critical(
-                f"CRITICAL: Failed to save error state for page {page_num}: {inner_e}"
+
+def _fallback_page(image, page_num, error):
+    """
+    Qwen-VL transcription for a page the OCR pool failed on, or an error
+    placeholder so the MiniDoc still completes. Returns (text, meta, checksum).
+
+    image: the page image as a file path or PNG bytes.
+    """
+    logger.warning(f"PaddleOCR failed for page {page_num}, trying Qwen-VL: {error}")
+    try:
+        text = transcribe_image(image)
+        if text:
+            meta = [{"fallback": "qwen", "reason": "paddle_failed"}]
+            return text, meta, _image_checksum(image)
+        fallback_error = "Qwen-VL returned empty text"
+    except Exception as e:
+        fallback_error = str(e)
+    logger.error(f"Qwen-VL fallback also failed for page {page_num}: {fallback_error}")
+    message = f"PaddleOCR error: {error}, Qwen fallback error: {fallback_error}"
+    error_text = f"[OCR FAILED] Error processing page {page_num}: {message}"
+    return error_text, {"error": message}, "ERROR"
+
+
+def process_minidoc_job(minidoc_db_id, doc_hash, pages, pdf_path=None):
+    """
+    Range mode (ocr.execution_mode: range): OCRs the pages of a MiniDoc that
+    need OCR on the OCR process pool, saves them in page order in one
+    transaction and enqueues the parser. Pages the splitter read from the
+    text layer are already saved.
+
+    pages: list of (page_num, image_path), in page order.
+    pdf_path: with ocr.stream_pages, the pages are rendered from this PDF in
+        memory (image_path is None) and streamed to the pool as PNG bytes.
+    """
+    session = Session()
+    try:
+        minidoc = session.query(MiniDoc).get(minidoc_db_id)
+        if not minidoc:
+            logger.error(f"MiniDoc {minidoc_db_id} not found.")
+            return
+        doc_id = minidoc.document_id
+        logger.info(f"OCR Job: MiniDoc {minidoc.minidoc_id} ({len(pages)} pages)")
+
+        # Fan out, then collect in page order
+        if pdf_path:
+            images = []
+
+            def rendered():
+                # Each page goes to the pool as soon as it is rendered, so
+                # rendering overlaps with OCR of the pages before it
+                for _, image in render_pdf_pages(pdf_path, [n for n, _ in pages]):
+                    images.append(image)
+                    yield image
+
+            futures = submit_pages(rendered())
+        else:
+            images = [image_path for _, image_path in pages]
+            futures = submit_pages(images)
+        results = []
+        for (page_num, _), image, future in zip(pages, images, futures):
+            try:
+                page_text, ocr_meta = future.result()
+                checksum = _image_checksum(image)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # A pool process died (e.g. out of memory); start a fresh pool next job
+                    shutdown_ocr_pool(wait=False)
+                page_text, ocr_meta, checksum = _fallback_page(image, page_num, e)
+
+            save_page_json(doc_id, doc_hash, page_num, page_text, ocr_meta, "paddle")
+            results.append((page_num, page_text, ocr_meta, checksum))
+
+        # One transaction for the whole range
+        existing = {
+            page.page_num: page
+            for page in session.query(PageOCR).filter(
+                PageOCR.document_id == doc_id,
+                PageOCR.page_num >= minidoc.page_start,
+                PageOCR.page_num <= minidoc.page_end,
             )
+        }
+        new_pages = 0
+        for page_num, page_text, ocr_meta, checksum in results:
+            page_record = existing.get(page_num)
+            if page_record:
+                page_record.text = page_text
+                page_record.ocr_meta = json.dumps(ocr_meta)
+            else:
+                new_pages += 1
+                session.add(
+                    PageOCR(
+                        document_id=doc_id,
+                        page_num=page_num,
+                        text=page_text,
+                        ocr_meta=json.dumps(ocr_meta),
+                        checksum=checksum,
+                    )
+                )
+        add_pages_done(session, minidoc.id, new_pages)
+        minidoc.status = "ocr_done"
+        session.commit()
 
+        logger.info(f"MiniDoc {minidoc.minidoc_id} complete! Enqueuing parser.")
+        q.enqueue(
+            "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+            minidoc_db_id=minidoc.id,
+        )
+
+    except Exception as e:
+        logger.error(f"OCR range job failed for MiniDoc {minidoc_db_id}: {e}")
+        session.rollback()
+        # Pages that failed OCR already fell back to placeholders; anything
+        # else (database, pool submission) fails the job so RQ records it
+        # instead of leaving the MiniDoc pending
+        raise
     finally:
         session.close()
@@ -1,15 +1,14 @@
-from config.settings import DATABASE_URL, REDIS_URL
+from config.settings import REDIS_URL
 import os
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from rq import Queue
 from redis import Redis
 from dotenv import load_dotenv
 
-from app.arkham.services.db.models import MiniDoc, PageOCR, Chunk, Document, TimelineEvent, DateMention, SensitiveDataMatch, ExtractedTable
-from app.arkham.services.timeline_service import extract_timeline_from_chunk
-from app.arkham.services.utils.pattern_detector import detect_sensitive_data
+from app.arkham.services.config import get_config
+from app.arkham.services.chunk_utils import persist_chunks
+from app.arkham.services.db.models import MiniDoc, PageOCR, ExtractedTable
+from app.arkham.services.db.connection import get_engine, get_session_factory
 from app.arkham.services.utils.smart_chunker import smart_chunk, agentic_chunk, ChunkConfig
 
 load_dotenv()
@@ -17,8 +16,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Setup DB & Redis
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 q = Queue(connection=redis_conn)
 
@@ -112,77 +111,14 @@ def parse_minidoc_job(minidoc_db_id):
         # MiniDocs are processed in parallel, so we use page_start as a namespace.
         # Formula: (page_start * 1_000_000) + local_chunk_index
         # This supports up to 1M chunks per minidoc (with 512-char chunks = 512MB text, far exceeding any real document).
-        local_chunk_index = 0
-        chunk_ids_to_embed = []  # Collect chunk IDs for embedding after commit
-
-        for chunk_text in chunks_list:
-
-            # Calculate global chunk index using page_start namespace
-            global_chunk_index = (minidoc.page_start * 1_000_000) + local_chunk_index
-
-            chunk = Chunk(
-                doc_id=minidoc.document_id,
-                text=chunk_text,
-                chunk_index=global_chunk_index,
-            )
-            session.add(chunk)
-            session.flush()  # Get ID
-            chunk_ids_to_embed.append(chunk.id)
-
-            # Extract timeline information from chunk
-            try:
-                date_mentions, timeline_events = extract_timeline_from_chunk(
-                    chunk_text, chunk.id, minidoc.document_id
-                )
-
-                # Insert date mentions
-                for mention_data in date_mentions:
-                    mention = DateMention(**mention_data)
-                    session.add(mention)
-
-                # Insert timeline events
-                for event_data in timeline_events:
-                    event = TimelineEvent(**event_data)
-                    session.add(event)
-
-                if date_mentions or timeline_events:
-                    logger.info(
-                        f"Extracted {len(date_mentions)} date mentions and {len(timeline_events)} events from chunk {chunk.id}"
-                    )
-
-            except Exception as e:
-                logger.warning(f"Timeline extraction failed for chunk {chunk.id}: {str(e)}")
-                # Don't fail the entire parsing job if timeline extraction fails
-
-            # Detect sensitive data patterns
-            try:
-                sensitive_matches = detect_sensitive_data(chunk_text)
-
-                for match in sensitive_matches:
-                    sensitive_data = SensitiveDataMatch(
-                        chunk_id=chunk.id,
-                        doc_id=minidoc.document_id,
-                        pattern_type=match.pattern_type,
-                        match_text=match.match_text,
-                        confidence=match.confidence,
-                        start_pos=match.start_pos,
-                        end_pos=match.end_pos,
-                        context_before=match.context_before,
-                        context_after=match.context_after
-                    )
-                    session.add(sensitive_data)
-
-                if sensitive_matches:
-                    logger.info(
-                        f"Detected {len(sensitive_matches)} sensitive pattern(s) in chunk {chunk.id}"
-                    )
-
-            except Exception as e:
-                logger.warning(f"Sensitive data detection failed for chunk {chunk.id}: {str(e)}")
-                # Don't fail the entire parsing job if pattern detection fails
-
-            # Increment local chunk counter for next iteration
-            local_chunk_index += 1
+        # Chunks, date mentions, timeline events and sensitive-data matches are
+        # stored in bulk (one INSERT ... RETURNING for the chunks)
+        chunk_ids_to_embed = persist_chunks(
+            session,
+            minidoc.document_id,
+            chunks_list,
+            [minidoc.page_start * 1_000_000 + i for i in range(len(chunks_list))],
+        )
 
         minidoc.status = "parsed"
 
@@ -190,14 +126,19 @@ def parse_minidoc_job(minidoc_db_id):
         # This prevents race condition where embed worker can't find chunks
         session.commit()
         logger.info(
-            f"MiniDoc {minidoc.minidoc_id} parsed. {local_chunk_index} chunks committed to database."
+            f"MiniDoc {minidoc.minidoc_id} parsed. {len(chunk_ids_to_embed)} chunks committed to database."
         )
 
         # Now enqueue embed jobs - chunks are guaranteed to exist in DB
-        for chunk_id in chunk_ids_to_embed:
-            q.enqueue("app.arkham.services.workers.embed_worker.embed_chunk_job", chunk_id=chunk_id)
+        # Chunks are embedded in batches: one model forward pass and one Qdrant upsert per job
+        batch_size = get_config("processing.embed_batch_size", 32)
+        for i in range(0, len(chunk_ids_to_embed), batch_size):
+            q.enqueue(
+                "app.arkham.services.workers.embed_worker.embed_chunks_job",
+                chunk_ids=chunk_ids_to_embed[i : i + batch_size],
+            )
 
-        logger.info(f"Enqueued {len(chunk_ids_to_embed)} embed jobs for MiniDoc {minidoc.minidoc_id}")
+        logger.info(f"Enqueued {len(chunk_ids_to_embed)} chunks for embedding for MiniDoc {minidoc.minidoc_id}")
 
     except Exception as e:
         logger.error(f"Parser failed: {e}")
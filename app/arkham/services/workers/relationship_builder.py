@@ -14,100 +14,91 @@ This script retroactively creates EntityRelationship records for existing
 documents that were ingested before the co-occurrence relationship feature
 was implemented.
 
-Run with: python -m arkham.services.workers.relationship_builder
+Each document's entity pairs are counted in Python and written with one
+bulk upsert (see services/relationship_utils.py). build_all_relationships
+processes documents on a thread pool and records finished documents in
+relationship_build_progress, so an interrupted run can be resumed without
+counting any document twice.
+
+Run with: python -m app.arkham.services.workers.relationship_builder
 """
 
-from config import DATABASE_URL
 import logging
-from itertools import combinations
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from arkham.services.db.models import (
+from app.arkham.services.db.models import (
     Document,
     Entity,
     CanonicalEntity,
-    Chunk,
     EntityRelationship,
+    RelationshipBuildProgress,
+)
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.relationship_utils import (
+    bump_graph_version,
+    pair_increments,
+    upsert_cooccurrences,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
+
+# Documents fetched per round when listing work for build_all_relationships
+DOC_ID_PAGE_SIZE = 1000
+# Log progress every N documents
+PROGRESS_INTERVAL = 100
 
 
-def build_relationships_for_document(doc_id: int) -> int:
+def build_relationships_for_document(doc_id: int, record_progress: bool = False) -> int:
     """
     Build co-occurrence relationships for all entities in a document.
 
     This uses document-level co-occurrence (entities appearing in the same document).
     For more granular relationships, we'd need chunk-level tracking.
 
-    Returns the number of relationships created.
+    Args:
+        doc_id: Document to process
+        record_progress: Also mark the document as built in
+            relationship_build_progress (same transaction as the upsert)
+
+    Returns the number of entity pairs created or updated.
     """
     session = Session()
-    relationships_created = 0
 
     try:
         # Get all canonical entity IDs mentioned in this document
-        entities = (
-            session.query(Entity)
+        canonical_ids = {
+            row[0]
+            for row in session.query(Entity.canonical_entity_id)
             .filter(Entity.doc_id == doc_id)
             .filter(Entity.canonical_entity_id.isnot(None))
-            .all()
-        )
-
-        # Collect unique canonical entity IDs
-        canonical_ids = set(e.canonical_entity_id for e in entities)
+            .distinct()
+        }
 
+        pairs = 0
         if len(canonical_ids) < 2:
             logger.debug(
                 f"Document {doc_id}: Only {len(canonical_ids)} canonical entities, skipping"
             )
-            return 0
-
-        # Create pairwise relationships
-        for entity1_id, entity2_id in combinations(sorted(canonical_ids), 2):
-            # Check if relationship already exists
-            existing = (
-                session.query(EntityRelationship)
-                .filter(
-                    (
-                        (EntityRelationship.entity1_id == entity1_id)
-                        & (EntityRelationship.entity2_id == entity2_id)
-                    )
-                    | (
-                        (EntityRelationship.entity1_id == entity2_id)
-                        & (EntityRelationship.entity2_id == entity1_id)
-                    )
-                )
-                .first()
+        else:
+            pairs = upsert_cooccurrences(
+                session, pair_increments([(doc_id, canonical_ids)])
             )
+            bump_graph_version(session)
 
-            if existing:
-                # Update existing relationship
-                existing.co_occurrence_count += 1
-                existing.strength = min(existing.strength + 0.1, 10.0)
-            else:
-                # Create new relationship
-                new_rel = EntityRelationship(
-                    entity1_id=entity1_id,
-                    entity2_id=entity2_id,
-                    relationship_type="co-occurrence",
-                    strength=1.0,
-                    co_occurrence_count=1,
-                    doc_id=doc_id,
-                )
-                session.add(new_rel)
-                relationships_created += 1
+        if record_progress:
+            session.merge(RelationshipBuildProgress(doc_id=doc_id, pairs=pairs))
 
         session.commit()
-        logger.info(
-            f"Document {doc_id}: Created {relationships_created} new relationships from {len(canonical_ids)} entities"
-        )
-        return relationships_created
+        if pairs:
+            logger.debug(
+                f"Document {doc_id}: Upserted {pairs} relationships from {len(canonical_ids)} entities"
+            )
+        return pairs
 
     except Exception as e:
         logger.error(f"Failed to build relationships for document {doc_id}: {e}")
@@ -117,37 +108,86 @@ def build_relationships_for_document(doc_id: int) -> int:
         session.close()
 
 
-def build_all_relationships() -> dict:
+def _pending_document_ids(resume: bool) -> list:
+    """IDs of completed documents, minus those already built when resuming."""
+    session = Session()
+    try:
+        doc_ids = []
+        last_id = 0
+        while True:
+            query = (
+                session.query(Document.id)
+                .filter(Document.status == "complete")
+                .filter(Document.id > last_id)
+            )
+            if resume:
+                query = query.filter(
+                    ~session.query(RelationshipBuildProgress.doc_id)
+                    .filter(RelationshipBuildProgress.doc_id == Document.id)
+                    .exists()
+                )
+            page = [
+                row[0]
+                for row in query.order_by(Document.id).limit(DOC_ID_PAGE_SIZE)
+            ]
+            if not page:
+                return doc_ids
+            doc_ids.extend(page)
+            last_id = page[-1]
+    finally:
+        session.close()
+
+
+def build_all_relationships(workers: int = 4, resume: bool = True) -> dict:
     """
     Build co-occurrence relationships for all completed documents.
 
-    Returns a summary of the operation.
+    Args:
+        workers: Documents processed concurrently (each on its own pooled
+            connection; keep <= database.pool_size + max_overflow)
+        resume: Skip documents a previous run already recorded as built.
+            With resume=False every document is counted again.
+
+    Returns a summary of the operation, including throughput.
     """
-    session = Session()
+    started = time.perf_counter()
 
     try:
-        # Get all completed documents
-        documents = session.query(Document).filter(Document.status == "complete").all()
-
-        total_docs = len(documents)
+        doc_ids = _pending_document_ids(resume)
+        total_docs = len(doc_ids)
         total_relationships = 0
         docs_with_relationships = 0
 
-        logger.info(f"Processing {total_docs} completed documents...")
-
-        for i, doc in enumerate(documents, 1):
-            relationships = build_relationships_for_document(doc.id)
-            if relationships > 0:
-                total_relationships += relationships
-                docs_with_relationships += 1
+        logger.info(
+            f"Processing {total_docs} completed documents with {workers} workers"
+            + (" (resuming)" if resume else "")
+        )
 
-            if i % 10 == 0:
-                logger.info(f"Progress: {i}/{total_docs} documents processed")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(build_relationships_for_document, doc_id, True)
+                for doc_id in doc_ids
+            ]
+            for i, future in enumerate(as_completed(futures), 1):
+                relationships = future.result()
+                if relationships > 0:
+                    total_relationships += relationships
+                    docs_with_relationships += 1
+
+                if i % PROGRESS_INTERVAL == 0:
+                    elapsed = time.perf_counter() - started
+                    logger.info(
+                        f"Progress: {i}/{total_docs} documents processed "
+                        f"({i / elapsed:.1f} docs/sec)"
+                    )
 
+        elapsed = time.perf_counter() - started
         summary = {
             "total_documents": total_docs,
-            "documents_with_new_relationships": docs_with_relationships,
-            "total_relationships_created": total_relationships,
+            "documents_with_relationships": docs_with_relationships,
+            "total_relationships_upserted": total_relationships,
+            "elapsed_seconds": round(elapsed, 2),
+            "docs_per_second": round(total_docs / elapsed, 2) if elapsed else 0.0,
         }
 
         logger.info(f"Completed! Summary: {summary}")
@@ -156,8 +196,6 @@ def build_all_relationships() -> dict:
     except Exception as e:
         logger.error(f"Failed to build relationships: {e}")
         return {"error": str(e)}
-    finally:
-        session.close()
 
 
 def get_relationship_stats() -> dict:
@@ -199,6 +237,14 @@ if __name__ == "__main__":
     parser.add_argument(
         "--doc-id", type=int, help="Build relationships for a specific document"
     )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Documents processed concurrently"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Recount every document, including ones a previous run finished",
+    )
     args = parser.parse_args()
 
     if args.stats:
@@ -209,7 +255,7 @@ if __name__ == "__main__":
         print()
     elif args.doc_id:
         count = build_relationships_for_document(args.doc_id)
-        print(f"\nCreated {count} relationships for document {args.doc_id}")
+        print(f"\nUpserted {count} relationships for document {args.doc_id}")
     else:
         print("\n=== Building relationships for all documents ===")
         print("Before:")
@@ -217,7 +263,9 @@ if __name__ == "__main__":
             print(f"  {key}: {value}")
         print()
 
-        summary = build_all_relationships()
+        summary = build_all_relationships(
+            workers=args.workers, resume=not args.no_resume
+        )
 
         print("\nAfter:")
         for key, value in get_relationship_stats().items():
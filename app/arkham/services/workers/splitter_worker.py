@@ -2,16 +2,25 @@ import os
 import sys
 import logging
 import fitz  # PyMuPDF
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from rq import Queue
 from redis import Redis
 from pathlib import Path
 
-from config.settings import DATABASE_URL, REDIS_URL, PAGES_DIR
+from config.settings import REDIS_URL, PAGES_DIR
 
-from app.arkham.services.db.models import Document, MiniDoc, ExtractedTable
+from app.arkham.services.config import get_config
+from app.arkham.services.db.models import Document, MiniDoc, ExtractedTable, PageOCR
+from app.arkham.services.db.connection import get_engine, get_session_factory
+from app.arkham.services.corpus_stats import record_rows
 from app.arkham.services.metadata_service import extract_pdf_metadata
+from app.arkham.services.pdf_pages import (
+    DPI,
+    page_text_layer,
+    render_page_file,
+    store_text_layer_page,
+    text_layer_meta,
+    triage_enabled,
+)
 from app.arkham.services.table_extraction import TableExtractor
 import json
 
@@ -19,20 +28,22 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Setup DB & Redis from central config
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+engine = get_engine()
+Session = get_session_factory()
 redis_conn = Redis.from_url(REDIS_URL)
 q = Queue(connection=redis_conn)
 
 # Config - now using DataSilo paths from central config
 RAW_PAGES_DIR = str(PAGES_DIR)  # Convert Path to string for os.path.join compatibility
 MINIDOC_SIZE = 20
-DPI = 200
 
 
 def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
     """
-    Splits a PDF into page images and creates MiniDoc records.
+    Splits a PDF into MiniDoc records and sends its pages to OCR.
+
+    Pages with a usable native text layer are saved straight to PageOCR;
+    only scanned or image-heavy pages are rendered and OCR'd.
     """
     session = Session()
     try:
@@ -94,6 +105,7 @@ def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
                 logger.info(f"Extracting tables from PDF: {file_path}")
                 extractor = TableExtractor(min_rows=2, min_cols=2)
                 tables = extractor.extract_tables_from_pdf(file_path)
+                tables_saved = 0
 
                 for table_info in tables:
                     try:
@@ -111,11 +123,13 @@ def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
                             text_content=text_content,
                         )
                         session.add(ext_table)
+                        tables_saved += 1
                     except Exception as table_err:
                         logger.warning(f"Failed to save table {table_info.get('table_index', '?')} on page {table_info.get('page_num', '?')}: {table_err}")
                         continue
 
                 if tables:
+                    record_rows(session, doc_id, tables=tables_saved)
                     session.commit()
                     logger.info(f"Extracted and saved {len(tables)} tables from PDF")
 
@@ -129,26 +143,13 @@ def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
         pages_dir = os.path.join(RAW_PAGES_DIR, doc_hash)
         os.makedirs(pages_dir, exist_ok=True)
 
-        # 1. Extract Images & Enqueue OCR Jobs
-        for page_num in range(num_pages):
-            page = pdf.load_page(page_num)
-            pix = page.get_pixmap(dpi=DPI)
-            image_path = os.path.join(pages_dir, f"page_{page_num + 1:04d}.png")
-            pix.save(image_path)
-
-            # Enqueue OCR job for this page
-            # We pass doc_id (int), doc_hash (str), page_num (1-based), and image_path
-            q.enqueue(
-                "app.arkham.services.workers.ocr_worker.process_page_job",
-                doc_id=doc_id,
-                doc_hash=doc_hash,
-                page_num=page_num + 1,
-                image_path=image_path,
-                ocr_mode=ocr_mode,
-            )
-
-        # 2. Create MiniDoc Records
+        # Re-split: drop pages from the previous run so every page is counted
+        # again by the MiniDoc completion counter
+        session.query(PageOCR).filter(PageOCR.document_id == doc_id).delete()
+
+        # 1. Create MiniDoc Records (before any OCR job can look for them)
         # Fixed size splitting
+        minidocs = {}  # part start page -> MiniDoc
         for i in range(0, num_pages, MINIDOC_SIZE):
             start_page = i + 1
             end_page = min(i + MINIDOC_SIZE, num_pages)
@@ -156,8 +157,8 @@ def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
             minidoc_id = f"{doc_hash}__part_{part_num:03d}"
 
             # Check if exists
-            existing = session.query(MiniDoc).filter_by(minidoc_id=minidoc_id).first()
-            if not existing:
+            minidoc = session.query(MiniDoc).filter_by(minidoc_id=minidoc_id).first()
+            if not minidoc:
                 minidoc = MiniDoc(
                     document_id=doc_id,
                     minidoc_id=minidoc_id,
@@ -166,10 +167,89 @@ def split_pdf_job(doc_id, file_path, ocr_mode="paddle"):
                     status="pending_ocr",
                 )
                 session.add(minidoc)
+                session.flush()
+            else:
+                minidoc.status = "pending_ocr"
+            minidoc.pages_done = 0
+            minidocs[start_page] = minidoc
 
         session.commit()
+
+        # Range mode: one OCR job per MiniDoc, fanned out to the OCR process
+        # pool (paddle only; Qwen pages are LLM calls and stay one job each)
+        range_mode = (
+            ocr_mode == "paddle"
+            and get_config("ocr.execution_mode", "page") == "range"
+        )
+        # Range jobs can render their pages in memory instead of reading PNGs
+        stream_pages = range_mode and get_config("ocr.stream_pages", False)
+        # Pages with a usable text layer skip OCR (paddle only: Qwen mode also
+        # extracts tables from the page images)
+        triage = ocr_mode == "paddle" and triage_enabled()
+
+        # 2. Triage pages, render the rest & enqueue OCR jobs, one MiniDoc at a time
+        text_pages = rendered_pages = 0
+        for start_page, minidoc in minidocs.items():
+            minidoc_db_id = minidoc.id
+            end_page = min(start_page + MINIDOC_SIZE - 1, num_pages)
+            ocr_pages = []  # (page_num, image_path or None when streamed)
+            for page_num in range(start_page, end_page + 1):
+                page = pdf.load_page(page_num - 1)
+                page_text = page_text_layer(page) if triage else None
+                if page_text is not None:
+                    store_text_layer_page(
+                        session,
+                        doc_id,
+                        page_num,
+                        page_text,
+                        text_layer_meta(page, DPI),
+                        pages_dir,
+                    )
+                    text_pages += 1
+                elif stream_pages:
+                    ocr_pages.append((page_num, None))
+                else:
+                    image_path = os.path.join(pages_dir, f"page_{page_num:04d}.png")
+                    render_page_file(page, image_path, DPI)
+                    ocr_pages.append((page_num, image_path))
+                    rendered_pages += 1
+
+            # Text pages are counted and committed before any OCR job can finish
+            minidoc.pages_done = end_page - start_page + 1 - len(ocr_pages)
+            if not ocr_pages:
+                minidoc.status = "ocr_done"
+            session.commit()
+
+            if not ocr_pages:
+                q.enqueue(
+                    "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+                    minidoc_db_id=minidoc_db_id,
+                )
+            elif range_mode:
+                q.enqueue(
+                    "app.arkham.services.workers.ocr_worker.process_minidoc_job",
+                    minidoc_db_id=minidoc_db_id,
+                    doc_hash=doc_hash,
+                    pages=ocr_pages,
+                    pdf_path=file_path if stream_pages else None,
+                    job_timeout="1h",
+                )
+            else:
+                # Enqueue OCR job for each page
+                # We pass doc_id (int), doc_hash (str), page_num (1-based), and image_path
+                for page_num, image_path in ocr_pages:
+                    q.enqueue(
+                        "app.arkham.services.workers.ocr_worker.process_page_job",
+                        doc_id=doc_id,
+                        doc_hash=doc_hash,
+                        page_num=page_num,
+                        image_path=image_path,
+                        ocr_mode=ocr_mode,
+                    )
+
         logger.info(
-            f"Split job complete for {doc_id}. Created {num_pages} page images."
+            f"Split job complete for {doc_id}. {text_pages} of {num_pages} pages "
+            f"read from the text layer, {rendered_pages} page images rendered."
         )
 
     except Exception as e:
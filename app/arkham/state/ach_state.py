@@ -2160,18 +2160,14 @@ class ACHState(rx.State):
         try:
             from app.arkham.services.contradiction_service import ContradictionService
             from app.arkham.services.db.models import Document
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from config.settings import DATABASE_URL
+            from app.arkham.services.db.connection import get_session
 
             service = ContradictionService()
             all_contradictions = service.get_contradictions(limit=100)
 
             # Filter to only contradictions from documents in the same project
             if self.analysis_project_id:
-                engine = create_engine(DATABASE_URL)
-                Session = sessionmaker(bind=engine)
-                session = Session()
+                session = get_session()
                 try:
                     # Get all doc_ids in this project
                     project_docs = (
@@ -1,6 +1,10 @@
+import time
+
 import reflex as rx
 from typing import List, Dict, Any, Optional, TypedDict
 
+STREAM_UPDATE_INTERVAL = 0.05  # Seconds between UI updates while an answer streams
+
 
 class AnomalyItem(TypedDict):
     """Structure for an anomaly item."""
@@ -50,6 +54,7 @@ class AnomalyState(rx.State):
     ]
     current_question: str = ""
     is_generating: bool = False
+    last_answer_metrics: str = ""  # Latency of the last answer
 
     @rx.var
     def total_pages(self) -> int:
@@ -291,7 +296,7 @@ class AnomalyState(rx.State):
         self.current_question = question
 
     async def ask_question(self):
-        """Process a user question with RAG context."""
+        """Process a user question with RAG context, streaming the answer."""
         if not self.current_question.strip():
             return
 
@@ -299,15 +304,28 @@ class AnomalyState(rx.State):
         self.chat_messages.append({"role": "user", "content": self.current_question})
 
         self.is_generating = True
+        yield
         try:
-            from ..services.anomaly_service import get_rag_response
+            from ..services.anomaly_service import RagMetrics, stream_rag_response
 
             # Pass document IDs to RAG (None means all)
             doc_ids = None if self.use_all_documents else self.selected_doc_ids
-            response = get_rag_response(query=self.current_question, doc_ids=doc_ids)
 
-            # Add assistant response
-            self.chat_messages.append({"role": "assistant", "content": response})
+            # Add assistant response, filled in as tokens arrive
+            answer = ""
+            self.chat_messages.append({"role": "assistant", "content": answer})
+            metrics = RagMetrics()
+            last_update = time.monotonic()
+            async for token in stream_rag_response(
+                self.current_question, doc_ids, metrics
+            ):
+                answer += token
+                if time.monotonic() - last_update >= STREAM_UPDATE_INTERVAL:
+                    self.chat_messages[-1] = {"role": "assistant", "content": answer}
+                    last_update = time.monotonic()
+                    yield
+            self.chat_messages[-1] = {"role": "assistant", "content": answer}
+            self.last_answer_metrics = metrics.summary()
         except Exception as e:
             from ..utils.error_handler import handle_processing_error
 
@@ -317,7 +335,7 @@ class AnomalyState(rx.State):
                 context={
                     "action": "rag_query",
                     "question": self.current_question,
-                    "doc_id": self.selected_doc_id,
+                    "doc_ids": self.selected_doc_ids,
                 },
             )
 
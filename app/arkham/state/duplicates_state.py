@@ -101,6 +101,7 @@ class DuplicatesState(rx.State):
     partial_overlap: int = 0
     total_clusters: int = 0
     shared_patterns_count: int = 0
+    fingerprint_status: str = ""
 
     # Results lists
     similar_pairs: List[DocumentPair] = []
@@ -165,6 +166,7 @@ class DuplicatesState(rx.State):
             self.partial_overlap = summary["partial_overlap"]
             self.total_clusters = summary["total_clusters"]
             self.shared_patterns_count = summary["shared_patterns"]
+            self.fingerprint_status = self._describe_fingerprint_status(summary)
 
             # Get similar pairs
             pairs = service.find_similar_documents(threshold=self.similarity_threshold)
@@ -213,6 +215,22 @@ class DuplicatesState(rx.State):
         finally:
             self.is_scanning = False
 
+    @staticmethod
+    def _describe_fingerprint_status(summary) -> str:
+        """One-line note shown while some documents are not fingerprinted yet."""
+        pending = summary.get("fingerprints_pending", 0)
+        if not pending:
+            return ""
+        if summary.get("backfill_queued"):
+            return (
+                f"Fingerprint backfill pending: {pending} documents are being "
+                "fingerprinted in the background and are not in these results yet."
+            )
+        return (
+            f"{pending} documents have no fingerprint yet and are not in these results. "
+            "Run: python -m app.arkham.services.workers.fingerprint_worker"
+        )
+
     def run_authorship_scan(self):
         """Analyze documents for authorship/writing style patterns."""
         self.is_analyzing_style = True
@@ -224,23 +224,36 @@ class EntityDedupState(rx.State):
 
         try:
             # Import here to avoid circular imports
-            from ..services.entity_deduplication_service import get_duplicate_candidates
+            from ..services.entity_deduplication_service import iter_duplicate_candidates
 
-            # Get candidates
+            # Stream candidates page by page so the strongest pairs show up
+            # before the whole corpus has been scored
             label = None if self.label_filter == "all" else self.label_filter
-            self.candidates = await asyncio.to_thread(
-                get_duplicate_candidates,
+            pages = iter_duplicate_candidates(
                 label_filter=label,
                 min_similarity=self.min_similarity,
-                limit=500,
+                page_size=100,
             )
 
-            # Apply filters
-            self._apply_filters()
-
-            # Reset page
+            self.candidates = []
             self.page = 0
 
+            while True:
+                batch = await asyncio.to_thread(next, pages, None)
+                if batch is None:
+                    break
+
+                # Keep the 500 most similar pairs seen so far
+                self.candidates = sorted(
+                    self.candidates + batch,
+                    key=lambda c: c["similarity"],
+                    reverse=True,
+                )[:500]
+
+                # Apply filters
+                self._apply_filters()
+                yield
+
         except Exception as e:
             self.error_message = f"Failed to load candidates: {str(e)}"
         finally:
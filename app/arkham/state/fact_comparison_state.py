@@ -7,8 +7,6 @@ from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
 
-from config.settings import DATABASE_URL
-
 
 class Fact(BaseModel):
     claim: str
@@ -259,11 +257,10 @@ class FactComparisonState(rx.State):
         """Load available entities for selection."""
         try:
             from app.arkham.services.db.models import CanonicalEntity
-            from sqlalchemy import create_engine, desc
-            from sqlalchemy.orm import sessionmaker
+            from sqlalchemy import desc
+            from app.arkham.services.db.connection import get_session_factory
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 entities = (
                     session.query(CanonicalEntity)
@@ -53,6 +53,8 @@ class InfluenceState(rx.State):
     summary_avg_degree: float = 0.0
     summary_num_communities: int = 0
     summary_most_influential: str = "N/A"
+    # Freshness of the stored centrality scores (empty when current)
+    metrics_status: str = ""
 
     selected_entity: Optional[InfluenceEntity] = None
     selected_entity_neighbors: List[Dict[str, Any]] = []
@@ -114,6 +116,7 @@ class InfluenceState(rx.State):
             self.summary_avg_degree = summary.get("avg_degree", 0)
             self.summary_num_communities = summary.get("num_communities", 0)
             self.summary_most_influential = summary.get("most_influential", "N/A")
+            self.metrics_status = self._describe_metrics_status(data.get("status", {}))
 
             # Power dynamics
             dynamics = service.get_power_dynamics()
@@ -148,6 +151,17 @@ class InfluenceState(rx.State):
             self.is_loading = False
             self._has_loaded = True  # Mark as loaded for session cache
 
+    @staticmethod
+    def _describe_metrics_status(status: Dict[str, Any]) -> str:
+        """One-line note shown when centrality scores are missing or stale."""
+        if not status or not status.get("stale"):
+            return ""
+        if status.get("metrics_version") is None:
+            return "Influence scores are being computed in the background. Refresh in a moment."
+        if status.get("refresh_queued"):
+            return "The entity graph has changed; updated scores are being computed in the background."
+        return "The entity graph has changed since these scores were computed."
+
     def refresh_influence_data(self):
         """Force reload influence data, clearing cache."""
         self._has_loaded = False
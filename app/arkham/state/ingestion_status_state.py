@@ -7,7 +7,7 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL, REDIS_URL
+from config.settings import REDIS_URL
 
 
 class IngestionStatusState(rx.State):
@@ -79,16 +79,15 @@ class IngestionStatusState(rx.State):
             # Import here to avoid circular dependencies
             from rq import Queue
             from redis import Redis
-            from sqlalchemy import create_engine, func
-            from sqlalchemy.orm import sessionmaker
+            from sqlalchemy import func
             from app.arkham.services.db.models import Document
+            from app.arkham.services.db.connection import get_session_factory
             from dotenv import load_dotenv
 
             load_dotenv()
 
             # Connect to PostgreSQL for document status counts
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 # Query document counts by status (Phase 1.4 - Hybrid Counters)
                 db_uploaded_count = (
@@ -586,14 +585,12 @@ class IngestionStatusState(rx.State):
             if isinstance(doc_id, str):
                 doc_id = int(doc_id)
 
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
             from app.arkham.services.db.models import Document, Chunk
+            from app.arkham.services.db.connection import get_session_factory
             from dotenv import load_dotenv
 
             load_dotenv()
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 # Get document details
                 doc = session.query(Document).filter(Document.id == doc_id).first()
@@ -30,7 +30,7 @@ class RegexState(rx.State):
     # Pattern selection
     available_patterns: Dict[str, str] = {}
     pattern_options: List[str] = []  # List of pattern keys for select component
-    selected_patterns: List[str] = ["email", "phone", "ssn"]
+    selected_patterns: List[str] = ["email", "phone_us", "ssn"]
     custom_regex: str = ""
     custom_pattern_name: str = ""
 
@@ -42,6 +42,8 @@ class RegexState(rx.State):
     # Search results
     search_results: List[Dict[str, Any]] = []
     is_searching: bool = False
+    search_truncated: bool = False  # Stopped at regex_search.max_results
+    _search_id: int = 0  # Bumped to cancel the running search
 
     # Detected tab data
     detected_results: List[Dict[str, Any]] = []
@@ -64,28 +66,46 @@ class RegexState(rx.State):
         except Exception as e:
             logger.error(f"Error loading patterns: {e}")
 
+    @rx.event(background=True)
     async def run_search(self):
-        """Execute pattern search across all documents."""
-        if not self.selected_patterns:
-            return
-
-        self.is_searching = True
-        yield
-
+        """
+        Execute pattern search across all documents, showing matches as each
+        page of chunks is scanned. cancel_search stops it between pages.
+        """
+        async with self:
+            if not self.selected_patterns or self.is_searching:
+                return
+            self._search_id += 1
+            search_id = self._search_id
+            self.is_searching = True
+            self.search_truncated = False
+            self.search_results = []
+            pattern_types = list(self.selected_patterns)
+            confidence_threshold = self.confidence_threshold
+
+        pages = None
         try:
-            from ..services.regex_service import search_patterns_in_chunks
+            from ..services.config import get_config
+            from ..services.regex_service import iter_pattern_matches
             import asyncio
-            from functools import partial
 
-            loop = asyncio.get_event_loop()
-            self.search_results = await loop.run_in_executor(
-                None,
-                partial(
-                    search_patterns_in_chunks,
-                    pattern_types=self.selected_patterns,
-                    confidence_threshold=self.confidence_threshold,
-                ),
+            max_results = get_config("regex_search.max_results", 5000)
+            pages = iter_pattern_matches(
+                pattern_types,
+                confidence_threshold=confidence_threshold,
+                max_results=max_results,
             )
+            loop = asyncio.get_event_loop()
+            while True:
+                page = await loop.run_in_executor(None, next, pages, None)
+                if page is None:
+                    break
+                async with self:
+                    if self._search_id != search_id:
+                        break  # Cancelled, or superseded by a new search
+                    if page:
+                        self.search_results = self.search_results + page
+                        self.search_truncated = len(self.search_results) >= max_results
         except Exception as e:
             from ..utils.error_handler import (
                 handle_processing_error,
@@ -98,14 +118,25 @@ class RegexState(rx.State):
                 error_type="default",
                 context={
                     "action": "regex_search",
-                    "pattern_types": self.selected_patterns,
-                    "confidence_threshold": self.confidence_threshold,
+                    "pattern_types": pattern_types,
+                    "confidence_threshold": confidence_threshold,
                 },
             )
 
-            toast_state = await self.get_state(ToastState)
-            toast_state.show_error(format_error_for_ui(error_info))
+            async with self:
+                toast_state = await self.get_state(ToastState)
+                toast_state.show_error(format_error_for_ui(error_info))
         finally:
+            if pages is not None:
+                pages.close()  # Ends the scan and releases its DB session
+            async with self:
+                if self._search_id == search_id:
+                    self.is_searching = False
+
+    def cancel_search(self):
+        """Stop the running pattern search, keeping the matches found so far."""
+        if self.is_searching:
+            self._search_id += 1
             self.is_searching = False
 
     async def load_detected_data(self):
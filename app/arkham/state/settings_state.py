@@ -247,13 +247,18 @@ class SettingsState(rx.State):
 
         # Check PostgreSQL
         try:
-            from sqlalchemy import create_engine, text
-            from config.settings import DATABASE_URL
+            from sqlalchemy import text
+            from app.arkham.services.db.connection import get_engine, get_pool_stats
 
-            engine = create_engine(DATABASE_URL)
+            engine = get_engine()
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
-            status["postgresql"] = {"status": "ok", "message": "Connected"}
+            pool = get_pool_stats()
+            status["postgresql"] = {
+                "status": "ok",
+                "message": f"Connected (pool: {pool['checkedout']} in use, "
+                f"{pool['checkedin']} idle, {pool['overflow']} overflow)",
+            }
         except Exception as e:
             status["postgresql"] = {"status": "error", "message": str(e)[:50]}
 
@@ -261,10 +266,9 @@ class SettingsState(rx.State):
 
         # Check Qdrant
         try:
-            from qdrant_client import QdrantClient
-            from config.settings import QDRANT_URL
+            from app.arkham.services.db.connection import get_qdrant_probe_client
 
-            client = QdrantClient(url=QDRANT_URL, timeout=5.0)
+            client = get_qdrant_probe_client()
             collections = client.get_collections()
             count = len(collections.collections)
             status["qdrant"] = {"status": "ok", "message": f"{count} collection(s)"}
@@ -345,13 +349,10 @@ class SettingsState(rx.State):
         self.is_keywords_loading = True
         yield
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from config.settings import DATABASE_URL
+            from app.arkham.services.db.connection import get_session_factory
             from app.arkham.services.db.models import AnomalyKeyword
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 items = (
                     session.query(AnomalyKeyword).order_by(AnomalyKeyword.keyword).all()
@@ -378,13 +379,10 @@ class SettingsState(rx.State):
         self.is_keywords_loading = True
         yield
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from config.settings import DATABASE_URL
+            from app.arkham.services.db.connection import get_session_factory
             from app.arkham.services.db.models import AnomalyKeyword
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 # Check duplicate
                 existing = (
@@ -416,13 +414,10 @@ class SettingsState(rx.State):
         self.is_keywords_loading = True
         yield
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from config.settings import DATABASE_URL
+            from app.arkham.services.db.connection import get_session_factory
             from app.arkham.services.db.models import AnomalyKeyword
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 session.query(AnomalyKeyword).filter(AnomalyKeyword.id == kid).delete()
                 session.commit()
@@ -438,13 +433,10 @@ class SettingsState(rx.State):
         self.is_keywords_loading = True
         yield
         try:
-            from sqlalchemy import create_engine
-            from sqlalchemy.orm import sessionmaker
-            from config.settings import DATABASE_URL
+            from app.arkham.services.db.connection import get_session_factory
             from app.arkham.services.db.models import AnomalyKeyword
 
-            engine = create_engine(DATABASE_URL)
-            Session = sessionmaker(bind=engine)
+            Session = get_session_factory()
             with Session() as session:
                 kw = session.query(AnomalyKeyword).get(kid)
                 if kw:
@@ -16,7 +16,6 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
-from config.settings import DATABASE_URL, QDRANT_URL
 from app.arkham.services.db.models import (
     Document,
     Chunk,
@@ -24,6 +23,7 @@ from app.arkham.services.db.models import (
     CanonicalEntity,
     EntityRelationship,
 )
+from app.arkham.services.db.connection import get_qdrant_client, get_session_factory
 
 
 class VisualizationState(rx.State):
@@ -347,174 +347,15 @@ class VisualizationState(rx.State):
 
             # Run clustering in thread to avoid blocking
             async with self:
-                self.error_message = "Fetching document vectors from Qdrant..."
+                self.error_message = "Loading document centroids..."
 
             def do_clustering():
                 """Execute clustering synchronously."""
-                import numpy as np
-                import hdbscan
-                from sqlalchemy import create_engine
-                from sqlalchemy.orm import sessionmaker
-                from qdrant_client import QdrantClient
-                from dotenv import load_dotenv
-                from openai import OpenAI
-                from collections import defaultdict
+                from app.arkham.services.clustering_utils import run_clustering
 
-                load_dotenv()
-
-                # Database Setup
-                engine = create_engine(DATABASE_URL)
-                Session = sessionmaker(bind=engine)
-
-                # Import models after engine setup
-                from app.arkham.services.db.models import Document, Cluster, Chunk
-
-                # Import LM Studio URL from central config
-                from config.settings import LM_STUDIO_URL as LM_URL
-
-                session = Session()
-
-                # Qdrant Setup
-                qdrant_client = QdrantClient(url=QDRANT_URL)
-                COLLECTION_NAME = "arkham_mirror_hybrid"
-
-                # LLM Setup - use central config URL
-                llm_client = OpenAI(base_url=LM_URL, api_key="lm-studio")
-
-                def generate_cluster_name(texts):
-                    if not texts:
-                        return "Unknown Cluster"
-                    context = "\n---\n".join([t[:500] for t in texts[:5]])
+                with get_session_factory()() as session:
                     try:
-                        response = llm_client.chat.completions.create(
-                            model="local-model",
-                            messages=[
-                                {
-                                    "role": "system",
-                                    "content": "You are a helpful librarian. Read the following document snippets and generate a short, specific topic name (max 5 words) that describes them all. Do not use quotes.",
-                                },
-                                {
-                                    "role": "user",
-                                    "content": f"Snippets:\n{context}\n\nTopic Name:",
-                                },
-                            ],
-                            temperature=0.3,
-                        )
-                        return response.choices[0].message.content.strip()
-                    except Exception:
-                        return "Unnamed Cluster"
-
-                with Session() as session:
-                    try:
-                        # Fetch Documents
-                        docs = session.query(Document).all()
-                        if not docs:
-                            return {
-                                "success": False,
-                                "message": "No documents found to cluster.",
-                            }
-
-                        # Fetch Vectors & Compute Centroids
-                        doc_vectors = []
-                        valid_doc_ids = []
-
-                        # Optimize: Fetch all chunks for these docs in one go
-                        doc_ids = [d.id for d in docs]
-                        all_chunks = session.query(Chunk).filter(Chunk.doc_id.in_(doc_ids)).all()
-                        
-                        chunks_by_doc = defaultdict(list)
-                        for chunk in all_chunks:
-                            chunks_by_doc[chunk.doc_id].append(chunk)
-
-                        for doc in docs:
-                            # Get chunks from pre-fetched map
-                            chunks = chunks_by_doc.get(doc.id, [])
-                            if not chunks:
-                                continue
-
-                            chunk_ids = [c.id for c in chunks]
-                            points = qdrant_client.retrieve(
-                                collection_name=COLLECTION_NAME,
-                                ids=chunk_ids,
-                                with_vectors=True,
-                            )
-
-                            vectors = [p.vector["dense"] for p in points if p.vector]
-                            if vectors:
-                                centroid = np.mean(vectors, axis=0)
-                                doc_vectors.append(centroid)
-                                valid_doc_ids.append(doc.id)
-
-                        if not doc_vectors:
-                            return {
-                                "success": False,
-                                "message": "No vectors found in Qdrant.",
-                            }
-
-                        X = np.array(doc_vectors)
-
-                        # Run HDBSCAN
-                        clusterer = hdbscan.HDBSCAN(
-                            min_cluster_size=3, min_samples=2, metric="euclidean"
-                        )
-                        labels = clusterer.fit_predict(X)
-
-                        # Save Clusters
-                        unique_labels = set(labels)
-                        num_clusters = len(unique_labels) - (
-                            1 if -1 in unique_labels else 0
-                        )
-
-                        cluster_map = {}
-
-                        for label in unique_labels:
-                            if label == -1:
-                                continue
-
-                            cluster = Cluster(
-                                project_id=None,
-                                label=int(label),
-                                name=f"Cluster {label}",
-                                size=int(np.sum(labels == label)),
-                            )
-                            session.add(cluster)
-                            session.flush()
-                            cluster_map[label] = cluster
-
-                        # Update Documents & Name Clusters
-                        cluster_docs_text = {
-                            label: [] for label in unique_labels if label != -1
-                        }
-
-                        for doc_id, label in zip(valid_doc_ids, labels):
-                            doc = session.query(Document).get(doc_id)
-                            if label != -1:
-                                doc.cluster_id = cluster_map[label].id
-                                first_chunk = (
-                                    session.query(Chunk)
-                                    .filter(Chunk.doc_id == doc.id)
-                                    .first()
-                                )
-                                if first_chunk:
-                                    cluster_docs_text[label].append(first_chunk.text)
-                            else:
-                                doc.cluster_id = None
-
-                        session.commit()
-
-                        # Generate Names with LLM
-                        for label, texts in cluster_docs_text.items():
-                            name = generate_cluster_name(texts)
-                            cluster = cluster_map[label]
-                            cluster.name = name
-
-                        session.commit()
-
-                        return {
-                            "success": True,
-                            "message": f"Clustering complete! Found {num_clusters} clusters from {len(valid_doc_ids)} documents.",
-                        }
-
+                        return run_clustering(session, get_qdrant_client())
                     except Exception as e:
                         session.rollback()
                         return {"success": False, "message": str(e)}
@@ -0,0 +1,125 @@
+"""
+Unit tests for the streaming RAG answer.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from qdrant_client.http.models import MatchAny
+
+from app.arkham.services import anomaly_service, llm_client
+
+
+class FakeStream:
+    """Stands in for openai's AsyncStream of chat completion chunks."""
+
+    def __init__(self, tokens, fail_after=None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def __aiter__(self):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise ConnectionError("dropped")
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def _client(stream):
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return stream
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _answer(stream=None, error=None):
+    async def collect():
+        metrics = anomaly_service.RagMetrics()
+        tokens = [
+            token
+            async for token in anomaly_service.stream_rag_response("Who paid?", [3], metrics)
+        ]
+        return tokens, metrics
+
+    client = MagicMock(side_effect=error) if error else MagicMock(return_value=_client(stream))
+    with patch.object(
+        anomaly_service, "_get_relevant_context", return_value="CTX"
+    ), patch.object(llm_client, "get_async_llm_client", client), patch.object(
+        llm_client, "get_llm_cache", return_value=MagicMock(get=MagicMock(return_value=None))
+    ):
+        return asyncio.run(collect())
+
+
+def test_stream_yields_tokens_and_reports_latency():
+    stream = FakeStream(["The ", None, "vendor", " paid."])
+    tokens, metrics = _answer(stream)
+
+    assert tokens == ["The ", "vendor", " paid."]
+    assert stream.closed
+    assert metrics.chunks == 3
+    assert 0 <= metrics.retrieval <= metrics.time_to_first_token <= metrics.total
+    assert metrics.summary().startswith("first token ")
+
+
+def test_stream_falls_back_to_context_without_llm():
+    tokens, metrics = _answer(error=ConnectionError("refused"))
+    assert tokens == ["LLM not available. Here's the relevant context:\n\nCTX"]
+    assert metrics.time_to_first_token is None
+
+    tokens, _ = _answer(FakeStream(["Partial", " answer"], fail_after=1))
+    assert tokens == ["Partial", "\n\n[Response interrupted]"]
+
+
+def test_context_search_filters_doc_ids_with_match_any():
+    query_points = MagicMock(return_value=SimpleNamespace(points=[]))
+    with patch.object(
+        anomaly_service,
+        "embed_hybrid",
+        return_value={"dense": [0.1, 0.2], "sparse": {1: 0.5}},
+    ), patch.object(anomaly_service.qdrant_client, "query_points", query_points):
+        anomaly_service._get_relevant_context("Who paid?", [3, 7])
+
+    prefetch = query_points.call_args.kwargs["prefetch"]
+    for search in prefetch:
+        (condition,) = search.filter.must
+        assert condition.key == "doc_id"
+        assert condition.match == MatchAny(any=[3, 7])
+
+
+def test_callers_can_bring_their_own_context_and_prompt():
+    sent = {}
+
+    async def astream_chat(messages, **kwargs):
+        sent.update(messages=messages, **kwargs)
+        yield "ok"
+
+    async def collect():
+        return [
+            token
+            async for token in anomaly_service.stream_rag_response(
+                "Who paid?",
+                [3],
+                get_context=lambda query, doc_ids: f"hits for {query} in {doc_ids}",
+                build_messages=lambda query, context: [{"role": "user", "content": context}],
+                max_tokens=1000,
+                feature="chat",
+            )
+        ]
+
+    with patch.object(anomaly_service, "astream_chat", astream_chat), patch.object(
+        anomaly_service, "_get_relevant_context"
+    ) as anomaly_context:
+        assert asyncio.run(collect()) == ["ok"]
+
+    anomaly_context.assert_not_called()
+    assert sent["messages"] == [{"role": "user", "content": "hits for Who paid? in [3]"}]
+    assert (sent["max_tokens"], sent["feature"]) == (1000, "chat")
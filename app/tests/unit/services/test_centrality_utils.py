@@ -0,0 +1,127 @@
+"""
+Unit tests for centrality computation and the background centrality job.
+"""
+
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.arkham.services import centrality_utils
+from app.arkham.services.centrality_utils import compute_centrality
+from app.arkham.services.db.models import CanonicalEntity, EntityCentrality
+from app.arkham.services.graph_cache import EntityGraphCache
+from app.arkham.services.relationship_utils import (
+    bump_graph_version,
+    upsert_cooccurrences,
+)
+
+
+def _populate(session, n=40, edges=90, seed=3):
+    """Random graph with two components and an isolated node."""
+    rng = random.Random(seed)
+    for cid in range(1, n + 1):
+        session.add(
+            CanonicalEntity(id=cid, canonical_name=f"E{cid}", label="ORG", total_mentions=1)
+        )
+    session.commit()
+
+    increments = {}
+    while len(increments) < edges:
+        # Nodes 1-30 and 31-39 never connect; node 40 stays isolated
+        a, b = rng.sample(range(1, 31), 2) if rng.random() < 0.85 else rng.sample(range(31, 40), 2)
+        increments[(min(a, b), max(a, b))] = [rng.randint(1, 30), None]
+    upsert_cooccurrences(session, increments)
+    bump_graph_version(session)
+    session.commit()
+
+
+@pytest.fixture
+def graph(in_memory_db):
+    _populate(in_memory_db)
+    return EntityGraphCache().get(in_memory_db)
+
+
+def _assert_close(actual, expected, tol=1e-4):
+    assert set(actual) == set(expected)
+    for node, value in expected.items():
+        assert actual[node] == pytest.approx(value, abs=tol), node
+
+
+def test_exact_networkx_matches_reference(graph):
+    G = graph.to_networkx(min_weight=0.1)
+    result = compute_centrality(graph, backend="networkx")
+
+    assert result["method"] == "networkx, exact"
+    assert result["node_ids"] == list(G.nodes)
+    _assert_close(result["metrics"]["closeness"], nx.closeness_centrality(G))
+    _assert_close(
+        result["metrics"]["betweenness"],
+        nx.betweenness_centrality(G, weight="weight"),
+    )
+    _assert_close(result["metrics"]["pagerank"], nx.pagerank(G, weight="weight"))
+    assert set(result["community"]) == set(G.nodes)
+
+
+def test_scipy_backend_matches_networkx(graph):
+    reference = compute_centrality(graph, backend="networkx")
+    result = compute_centrality(graph, backend="scipy")
+
+    assert result["method"] == "scipy, exact"
+    for name in ("degree_centrality", "closeness", "pagerank", "eigenvector"):
+        _assert_close(result["metrics"][name], reference["metrics"][name], tol=1e-3)
+
+
+def test_sampled_closeness_with_every_pivot_is_exact(graph):
+    G = graph.to_networkx(min_weight=0.1)
+    nodes = list(G.nodes)
+    distances = np.full((len(nodes), len(nodes)), np.inf)
+    for row, source in enumerate(nodes):
+        for target, dist in nx.single_source_shortest_path_length(G, source).items():
+            distances[row, nodes.index(target)] = dist
+
+    estimate = centrality_utils._sampled_closeness(distances, np.arange(len(nodes)))
+
+    _assert_close(dict(zip(nodes, estimate.tolist())), nx.closeness_centrality(G))
+
+
+@pytest.mark.parametrize("backend", ["networkx", "scipy"])
+def test_sampled_mode_tracks_exact_ranking(graph, backend):
+    exact = compute_centrality(graph, backend=backend)
+    sampled = compute_centrality(graph, backend=backend, sample_size=20)
+
+    assert sampled["method"] == f"{backend}, sampled k=20"
+    nodes = exact["node_ids"]
+    for name in ("closeness", "betweenness"):
+        a = [exact["metrics"][name][n] for n in nodes]
+        b = [sampled["metrics"][name][n] for n in nodes]
+        assert np.corrcoef(a, b)[0, 1] > 0.8, name
+
+
+def test_refresh_stores_metrics_once_per_graph_version(in_memory_db, monkeypatch):
+    _populate(in_memory_db)
+    cache = EntityGraphCache()
+    monkeypatch.setattr(centrality_utils, "get_entity_graph_cache", lambda: cache)
+
+    first = centrality_utils.refresh_centrality(in_memory_db)
+    again = centrality_utils.refresh_centrality(in_memory_db)
+
+    rows = in_memory_db.query(EntityCentrality).all()
+    assert first["entities"] == 40
+    assert again == {"graph_version": 1, "skipped": True}
+    assert {row.graph_version for row in rows} == {1}
+    top = max(rows, key=lambda row: row.influence_score)
+    assert top.influence_score == pytest.approx(
+        centrality_utils.influence_score(
+            {name: getattr(top, name) for name in centrality_utils.METRICS}
+        )
+    )
+
+    bump_graph_version(in_memory_db)
+    in_memory_db.commit()
+    refreshed = centrality_utils.refresh_centrality(in_memory_db, backend="scipy")
+
+    assert refreshed["graph_version"] == 2
+    assert refreshed["method"] == "scipy, exact"
+    assert in_memory_db.query(EntityCentrality).count() == 40
@@ -0,0 +1,54 @@
+"""
+Unit tests for bulk chunk persistence.
+"""
+
+from app.arkham.services import chunk_utils
+from app.arkham.services.db.models import (
+    Chunk,
+    DateMention,
+    Document,
+    SensitiveDataMatch,
+    TimelineEvent,
+)
+
+# Short texts (<= 100 chars) so timeline extraction makes no LLM call
+TEXTS = [
+    "Signed on March 15, 2023 by the treasurer.",
+    "Contact jane.doe@example.com before 2023-04-01.",
+    "Nothing of note here.",
+    "Wire sent 01/02/2024, reply to ops@example.org.",
+]
+
+
+def test_persist_chunks_stores_chunks_and_derived_rows(in_memory_db):
+    in_memory_db.add(Document(id=1, path="/docs/a.pdf", title="a.pdf"))
+    in_memory_db.commit()
+
+    chunk_ids = chunk_utils.persist_chunks(
+        in_memory_db, 1, TEXTS, [5_000_000 + i for i in range(len(TEXTS))], workers=1
+    )
+    in_memory_db.commit()
+
+    chunks = in_memory_db.query(Chunk).order_by(Chunk.id).all()
+    assert chunk_ids == [c.id for c in chunks]
+    assert [c.text for c in chunks] == TEXTS
+    assert [c.chunk_index for c in chunks] == [5_000_000, 5_000_001, 5_000_002, 5_000_003]
+
+    emails = in_memory_db.query(SensitiveDataMatch).filter_by(pattern_type="email").all()
+    assert {(m.chunk_id, m.match_text) for m in emails} == {
+        (chunk_ids[1], "jane.doe@example.com"),
+        (chunk_ids[3], "ops@example.org"),
+    }
+    mentions = in_memory_db.query(DateMention).all()
+    assert {m.chunk_id for m in mentions} >= {chunk_ids[0], chunk_ids[1]}
+    assert all(m.doc_id == 1 for m in mentions)
+    assert in_memory_db.query(TimelineEvent).count() == 0
+
+
+def test_extraction_on_process_pool_matches_in_process():
+    try:
+        pooled = chunk_utils.analyze_chunks(TEXTS * 3, workers=2)
+    finally:
+        chunk_utils.shutdown_extraction_pool()
+
+    assert pooled == [chunk_utils.analyze_chunk(text) for text in TEXTS * 3]
@@ -0,0 +1,134 @@
+"""
+Unit tests for stored document centroids and the clustering run.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.arkham.services import clustering_utils
+from app.arkham.services.db.models import Chunk, Cluster, Document, DocumentCentroid
+
+DIM = 8
+
+
+@pytest.fixture
+def qdrant():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        clustering_utils.COLLECTION_NAME,
+        vectors_config={
+            "dense": models.VectorParams(size=DIM, distance=models.Distance.DOT)
+        },
+    )
+    return client
+
+
+def _populate(session, qdrant, groups=3, docs_per_group=6, chunks_per_doc=3, seed=0):
+    """Documents in well-separated groups, each with a few noisy chunk vectors."""
+    rng = np.random.default_rng(seed)
+    centers = np.eye(DIM)[:groups] * 10
+    points, doc_id, chunk_id = [], 0, 0
+    for group in range(groups):
+        for _ in range(docs_per_group):
+            doc_id += 1
+            session.add(Document(id=doc_id, path=f"/docs/{doc_id}.pdf", title=f"g{group}"))
+            for _ in range(chunks_per_doc):
+                chunk_id += 1
+                session.add(
+                    Chunk(
+                        id=chunk_id,
+                        doc_id=doc_id,
+                        text=f"group {group} text",
+                        chunk_index=chunk_id,
+                    )
+                )
+                vector = centers[group] + rng.normal(0, 0.1, DIM)
+                points.append(
+                    models.PointStruct(id=chunk_id, vector={"dense": vector.tolist()})
+                )
+    session.commit()
+    qdrant.upsert(clustering_utils.COLLECTION_NAME, points=points)
+
+
+def test_centroids_match_mean_of_chunk_vectors(in_memory_db, qdrant):
+    _populate(in_memory_db, qdrant, groups=1, docs_per_group=2)
+
+    assert clustering_utils.store_document_centroids(in_memory_db, qdrant, [1, 2]) == 2
+    in_memory_db.commit()
+
+    records = qdrant.retrieve(
+        clustering_utils.COLLECTION_NAME, ids=[1, 2, 3], with_vectors=True
+    )
+    expected = np.mean([r.vector["dense"] for r in records], axis=0)
+    doc_ids, X = clustering_utils.load_document_centroids(in_memory_db)
+    assert doc_ids == [1, 2]
+    np.testing.assert_allclose(X[0], expected, rtol=1e-5)
+    assert in_memory_db.get(DocumentCentroid, 1).chunk_count == 3
+
+
+def test_run_clustering_backfills_assigns_and_names(in_memory_db, qdrant):
+    _populate(in_memory_db, qdrant)
+    llm = MagicMock(return_value=" Topic ")
+
+    with patch.object(clustering_utils, "complete", llm):
+        result = clustering_utils.run_clustering(in_memory_db, qdrant)
+
+    assert result["success"] and result["documents"] == 18
+    assert result["clusters"] == 3
+    assert in_memory_db.query(DocumentCentroid).count() == 18
+    # One naming request per cluster
+    assert llm.call_count == 3
+    clusters = in_memory_db.query(Cluster).all()
+    assert {c.name for c in clusters} == {"Topic"}
+    # Every document of a group landed in the same cluster
+    for group in range(3):
+        cluster_ids = {
+            d.cluster_id for d in in_memory_db.query(Document).filter_by(title=f"g{group}")
+        }
+        assert len(cluster_ids) == 1 and None not in cluster_ids
+
+
+def test_dimensionality_reduction_keeps_clusters(in_memory_db, qdrant):
+    _populate(in_memory_db, qdrant)
+    clustering_utils.backfill_document_centroids(in_memory_db, qdrant)
+    _, X = clustering_utils.load_document_centroids(in_memory_db)
+
+    full = clustering_utils.cluster_vectors(X, reduce_to=0, n_jobs=1)
+    reduced = clustering_utils.cluster_vectors(
+        X, reduce_to=3, reduction_method="pca", n_jobs=2
+    )
+
+    assert len(set(full.tolist()) - {-1}) == 3
+    # Same partition, possibly with different label numbers
+    assert len(set(zip(full.tolist(), reduced.tolist()))) == 3
+
+
+def test_partial_centroids_are_recomputed_but_gaps_are_not_retried(in_memory_db, qdrant):
+    _populate(in_memory_db, qdrant, groups=1, docs_per_group=3)
+    # Document 1: a chunk never got a vector; document 3: none of them did
+    qdrant.delete(clustering_utils.COLLECTION_NAME, points_selector=[3, 7, 8, 9])
+    clustering_utils.store_document_centroids(in_memory_db, qdrant, [1, 2, 3])
+    in_memory_db.commit()
+    assert in_memory_db.get(DocumentCentroid, 1).chunk_count == 2
+    assert in_memory_db.get(DocumentCentroid, 3).dimension == 0
+    assert clustering_utils.load_document_centroids(in_memory_db)[0] == [1, 2]
+    assert clustering_utils.stale_centroid_doc_ids(in_memory_db) == []
+
+    # The embed batch that upserts the missing vector recomputes its documents
+    vector = {"dense": [1.0] * DIM}
+    qdrant.upsert(
+        clustering_utils.COLLECTION_NAME, points=[models.PointStruct(id=3, vector=vector)]
+    )
+    stale = clustering_utils.stale_centroid_doc_ids(in_memory_db, [1, 2], missing_vectors=True)
+    assert stale == [1]
+
+    # Document 2 got another chunk after its centroid was computed
+    in_memory_db.add(Chunk(id=100, doc_id=2, text="late chunk", chunk_index=100))
+    in_memory_db.commit()
+    assert clustering_utils.stale_centroid_doc_ids(in_memory_db) == [2]
+    assert clustering_utils.backfill_document_centroids(in_memory_db, qdrant) == 1
+    assert in_memory_db.get(DocumentCentroid, 2).chunks_total == 4
+    assert clustering_utils.stale_centroid_doc_ids(in_memory_db) == []
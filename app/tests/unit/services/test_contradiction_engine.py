@@ -0,0 +1,202 @@
+"""
+Unit tests for contradiction candidate selection and entity name resolution.
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.arkham.services import contradiction_service
+from app.arkham.services.contradiction_engine import (
+    EntityNameIndex,
+    extract_claim_values,
+    load_entity_chunks,
+    select_candidate_pairs,
+)
+from app.arkham.services.contradiction_service import ContradictionService
+from app.arkham.services.db.models import (
+    CanonicalEntity,
+    Chunk,
+    Contradiction,
+    ContradictionEvidence,
+    Document,
+    Entity,
+)
+
+DIM = 4
+COLLECTION = "arkham_mirror_hybrid"
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_chunks_stating_different_values_rank_first():
+    chunks = [
+        Chunk(id=1, text="Smith signed the lease on March 3, 2021 for $4,000."),
+        Chunk(id=2, text="Smith signed the lease on June 9, 2021 for $4,000."),
+        Chunk(id=3, text="Smith signed the lease in the spring."),
+        Chunk(id=4, text="Quarterly weather report for the harbour district."),
+        Chunk(id=5, text="Smith signed the lease and paid the deposit for the lease."),
+    ]
+    vectors = {
+        1: _unit(1, 0.1, 0, 0),
+        2: _unit(1, 0.2, 0, 0),
+        3: _unit(1, 0, 0.1, 0),
+        4: _unit(0, 0, 0, 1),
+    }
+
+    pairs = select_candidate_pairs(chunks, vectors, max_pairs=3, min_similarity=0.8, min_overlap=0.3)
+
+    assert (pairs[0].chunk_a.id, pairs[0].chunk_b.id) == (1, 2)
+    assert pairs[0].conflicts == ["dates"]
+    assert pairs[0].describe() == "Chunk 1 vs Chunk 2 (different dates)"
+    # The weather chunk is never similar enough; chunk 5 (no vector) only
+    # qualifies through token overlap
+    assert all(4 not in (p.chunk_a.id, p.chunk_b.id) for p in pairs)
+    assert len(pairs) == 3
+    assert extract_claim_values(chunks[0].text) == {
+        "dates": frozenset({"2021-03-03"}),
+        "numbers": frozenset({"4000"}),
+    }
+
+
+def test_name_index_prefers_exact_then_whole_word_matches():
+    index = EntityNameIndex(
+        [
+            (1, "John Smith", 4),
+            (2, "Acme Holdings", 10),
+            (3, "John Smithson", 40),
+            (4, "acme", 1),
+        ]
+    )
+
+    assert index.resolve("ACME") == 4  # Exact name beats a more mentioned partial
+    assert index.resolve("john  smith") == 1
+    assert index.resolve("Smith") == 1  # Whole word beats a more mentioned "Smithson"
+    assert index.resolve("John") == 3  # Most mentioned of the whole-word matches
+    assert index.resolve("Hold") == 2  # Partial word
+    assert index.resolve("Nobody") is None
+    assert index.resolve_all(["Smith", "Acme", None, "John Smith"]) == [1, 4]
+
+
+def test_chunks_come_from_mentions_anywhere_in_the_documents(in_memory_db):
+    in_memory_db.add(Document(id=1, path="/docs/1.pdf", title="big"))
+    entity = CanonicalEntity(
+        id=1, canonical_name="Smith", label="PERSON", aliases='["J. Smith"]'
+    )
+    in_memory_db.add(entity)
+    for chunk_id in range(1, 501):
+        text = "J. Smith was paid." if chunk_id == 480 else "Filler text."
+        in_memory_db.add(Chunk(id=chunk_id, doc_id=1, text=text, chunk_index=chunk_id))
+    # Mention rows tie the entity to late chunks; one older mention has no chunk
+    in_memory_db.add_all(
+        [
+            Entity(doc_id=1, chunk_id=300, canonical_entity_id=1, text="Smith", label="PERSON"),
+            Entity(doc_id=1, chunk_id=450, canonical_entity_id=1, text="Smith", label="PERSON"),
+            Entity(doc_id=1, canonical_entity_id=1, text="J. Smith", label="PERSON"),
+        ]
+    )
+    in_memory_db.commit()
+
+    chunks = load_entity_chunks(in_memory_db, entity, max_chunks=3)
+    assert [c.id for c in chunks] == [300, 450, 480]
+    assert [c.id for c in load_entity_chunks(in_memory_db, entity, max_chunks=2)] == [300, 450]
+    assert load_entity_chunks(in_memory_db, entity, doc_ids_filter=[2]) == []
+
+
+def test_name_fallback_matches_like_wildcards_literally(in_memory_db):
+    in_memory_db.add(Document(id=1, path="/docs/1.pdf", title="sale"))
+    entity = CanonicalEntity(id=1, canonical_name="50%_off", label="ORG", aliases='["a_b"]')
+    in_memory_db.add(entity)
+    texts = ["The 50%_off store.", "50 cents off", "50% off", "ab testing", "a_b tested"]
+    for chunk_id, text in enumerate(texts, 1):
+        in_memory_db.add(Chunk(id=chunk_id, doc_id=1, text=text, chunk_index=chunk_id))
+    in_memory_db.add(Entity(doc_id=1, canonical_entity_id=1, text="50%_off", label="ORG"))
+    in_memory_db.commit()
+
+    assert [c.id for c in load_entity_chunks(in_memory_db, entity)] == [1, 5]
+
+
+@pytest.fixture
+def service(in_memory_db):
+    qdrant = QdrantClient(":memory:")
+    qdrant.create_collection(
+        COLLECTION,
+        vectors_config={"dense": models.VectorParams(size=DIM, distance=models.Distance.DOT)},
+    )
+    in_memory_db.add(Document(id=1, path="/docs/1.pdf", title="lease"))
+    in_memory_db.add_all(
+        [
+            CanonicalEntity(id=1, canonical_name="Smith", label="PERSON", total_mentions=5),
+            CanonicalEntity(id=2, canonical_name="Acme Holdings", label="ORG", total_mentions=3),
+            Entity(doc_id=1, canonical_entity_id=1, text="Smith", label="PERSON"),
+        ]
+    )
+    texts = {
+        1: "Smith paid Acme $4,000 on March 3, 2021.",
+        2: "Smith paid Acme $9,000 on March 3, 2021.",
+        3: "Minutes of an unrelated board meeting.",
+    }
+    vectors = {1: (1, 0.1, 0, 0), 2: (1, 0.2, 0, 0), 3: (0, 0, 0, 1)}
+    for chunk_id, text in texts.items():
+        in_memory_db.add(Chunk(id=chunk_id, doc_id=1, text=text, chunk_index=chunk_id))
+    in_memory_db.commit()
+    qdrant.upsert(
+        COLLECTION,
+        points=[
+            models.PointStruct(id=i, vector={"dense": list(_unit(*v))}) for i, v in vectors.items()
+        ],
+    )
+
+    svc = ContradictionService.__new__(ContradictionService)
+    svc.Session = MagicMock(return_value=in_memory_db)
+    with patch.object(
+        contradiction_service, "get_qdrant_client", return_value=qdrant
+    ), patch.object(contradiction_service, "get_contradiction_index"):
+        yield svc
+
+
+def test_only_candidate_pairs_reach_the_llm(service, in_memory_db):
+    answer = {
+        "contradictions": [
+            {
+                "claim_a": "Smith paid Acme $4,000",
+                "source_a": "Chunk 1",
+                "claim_b": "Smith paid Acme $9,000",
+                "source_b": "Chunk 2",
+                "severity": "High",
+                "explanation": "Different amounts for the same payment",
+                "category": "financial",
+                "confidence": 0.9,
+                "involved_entities": ["Smith", "acme holdings"],
+            }
+        ]
+    }
+    entity = in_memory_db.get(CanonicalEntity, 1)
+
+    with patch.object(
+        contradiction_service, "chat_with_llm", return_value=json.dumps(answer)
+    ) as llm:
+        found = service._analyze_entity_contradictions(in_memory_db, entity)
+
+    prompt = llm.call_args.args[0][0]["content"]
+    assert "[Chunk 1]" in prompt and "[Chunk 2]" in prompt
+    assert "[Chunk 3]" not in prompt
+    assert "Chunk 1 vs Chunk 2 (different numbers)" in prompt
+    assert len(found) == 1
+    saved = in_memory_db.get(Contradiction, found[0]["id"])
+    assert json.loads(saved.involved_entity_ids) == [1, 2]
+    evidence = in_memory_db.query(ContradictionEvidence).filter_by(contradiction_id=saved.id)
+    assert sorted(e.chunk_id for e in evidence) == [1, 2]
+
+    # Nothing similar to compare: no LLM call
+    in_memory_db.query(Chunk).filter(Chunk.id == 2).delete()
+    in_memory_db.commit()
+    with patch.object(contradiction_service, "chat_with_llm") as llm:
+        assert service._analyze_entity_contradictions(in_memory_db, entity) == []
+    llm.assert_not_called()
@@ -0,0 +1,83 @@
+"""
+Unit tests for the contradiction semantic search index.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from qdrant_client import QdrantClient, models
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services import contradiction_index
+from app.arkham.services.contradiction_index import COLLECTION_NAME, ContradictionIndex
+from app.arkham.services.db.models import Contradiction
+
+TOPICS = ["payment", "meeting", "travel"]
+
+
+def _embed(text):
+    """One dimension per topic word the text mentions."""
+    vector = [1.0 if topic in text.lower() else 0.0 for topic in TOPICS]
+    return {"dense": vector if any(vector) else [0.1] * len(TOPICS), "sparse": {}}
+
+
+@pytest.fixture
+def index(in_memory_db):
+    in_memory_db.add_all(
+        [
+            Contradiction(id=1, entity_id=1, description="Payment amount differs", severity="High", status="Open"),
+            Contradiction(id=2, entity_id=1, description="Meeting date differs", severity="Low", status="Open"),
+        ]
+    )
+    in_memory_db.commit()
+    encoder = MagicMock(side_effect=lambda texts: [_embed(t) for t in texts])
+    provider = SimpleNamespace(dense_dimension=len(TOPICS))
+    with patch.object(contradiction_index, "iter_embed_hybrid", encoder), patch.object(
+        contradiction_index, "embed_hybrid", side_effect=_embed
+    ), patch.object(contradiction_index, "get_provider", return_value=provider):
+        yield SimpleNamespace(
+            index=ContradictionIndex(
+                sessionmaker(bind=in_memory_db.get_bind()), QdrantClient(":memory:")
+            ),
+            session=in_memory_db,
+            encoder=encoder,
+            provider=provider,
+        )
+
+
+def test_search_backfills_once_then_stays_in_sync(index):
+    assert index.index.search("Who made the payment?", limit=1)[0][0] == 1
+    assert index.encoder.call_count == 1  # Both contradictions, one batch
+
+    index.session.add(
+        Contradiction(id=3, entity_id=2, description="Travel dates conflict", severity="Medium", status="Open")
+    )
+    index.session.commit()
+    assert index.index.add([3]) == 1
+    assert index.index.search("travel", limit=1)[0][0] == 3
+
+    index.index.set_status(3, "Resolved")
+    point = index.index.client.retrieve(COLLECTION_NAME, ids=[3])[0]
+    assert point.payload["status"] == "Resolved"
+    assert index.encoder.call_count == 2  # The search and status update embedded nothing
+
+
+def test_sync_removes_deleted_and_rebuilds_for_a_new_provider(index):
+    index.index.sync()
+    index.session.query(Contradiction).filter(Contradiction.id == 2).delete()
+    index.session.commit()
+    index.index.sync()
+    assert index.index.client.count(COLLECTION_NAME).count == 1
+
+    # Vectors of another size can't be queried: the collection is rebuilt
+    index.provider.dense_dimension = 2
+    index.encoder.side_effect = lambda texts: [{"dense": [1.0, 0.0]} for _ in texts]
+    assert index.index.sync() == 1
+    params = index.index.client.get_collection(COLLECTION_NAME).config.params
+    assert params.vectors.size == 2
+
+    # Dropped by another process: the next write rebuilds from the table
+    index.index.client.delete_collection(COLLECTION_NAME)
+    assert index.index.add([1]) == 1
+    assert index.index.client.count(COLLECTION_NAME).count == 1
@@ -0,0 +1,142 @@
+"""
+Unit tests for the materialised corpus statistics.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.arkham.services import chunk_utils, corpus_stats
+from app.arkham.services.db.models import (
+    Anomaly,
+    CanonicalEntity,
+    Chunk,
+    Document,
+    EntityRelationship,
+    ExtractedTable,
+)
+from app.arkham.services.relationship_utils import bump_graph_version
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+@pytest.fixture
+def config():
+    values = {"corpus_stats.graph_refresh_seconds": 0}
+    with patch.object(
+        corpus_stats, "get_config", lambda key, default=None: values.get(key, default)
+    ):
+        yield values
+
+
+@pytest.fixture
+def db(in_memory_db, config):
+    # Built on the empty database at startup, then kept up by the pipeline
+    corpus_stats.rebuild_corpus_stats(in_memory_db)
+    in_memory_db.commit()
+    return in_memory_db
+
+
+def _add_document(session, doc_id, project_id, doc_type=".pdf", age_days=0):
+    doc = Document(
+        id=doc_id,
+        path=f"/docs/{doc_id}{doc_type}",
+        doc_type=doc_type,
+        project_id=project_id,
+        created_at=NOW - timedelta(days=age_days),
+    )
+    session.add(doc)
+    corpus_stats.record_document(session, doc)
+    session.flush()
+    return doc
+
+
+def _analyze_chunk(text):
+    events = [{"description": text, "event_date_text": "2021-03-04"}] if "2021" in text else []
+    return {"date_mentions": [], "timeline_events": events, "sensitive_matches": []}
+
+
+def _ingest(session):
+    """Two projects and one unassigned document, counted the way the pipeline does."""
+    _add_document(session, 1, 2)
+    _add_document(session, 2, 2, ".docx", age_days=45)
+    _add_document(session, 3, None, ".pdf")
+    with patch.object(chunk_utils, "analyze_chunk", _analyze_chunk):
+        chunk_utils.persist_chunks(session, 1, ["Met on 2021-03-04.", "Routine note."], workers=1)
+        chunk_utils.persist_chunks(session, 2, ["Nothing to see."], workers=1)
+        chunk_utils.persist_chunks(session, 3, ["Routine note."], workers=1)
+    session.add(Anomaly(chunk_id=2, score=0.3, reason="shred"))
+    corpus_stats.record_rows(session, 1, anomalies=1)
+    session.add(ExtractedTable(doc_id=2, page_num=1, row_count=3, col_count=2))
+    corpus_stats.record_rows(session, 2, tables=1)
+    session.add_all([
+        CanonicalEntity(id=1, canonical_name="Acme", label="ORG", total_mentions=4),
+        CanonicalEntity(id=2, canonical_name="Jane", label="PERSON", total_mentions=1),
+        CanonicalEntity(id=3, canonical_name="Bob", label="PERSON", total_mentions=7),
+        EntityRelationship(entity1_id=1, entity2_id=2, doc_id=1),
+    ])
+    bump_graph_version(session)
+    session.commit()
+
+
+def test_counters_match_a_rebuild_and_break_down_by_project(db):
+    _ingest(db)
+    incremental = corpus_stats.read_corpus_stats(db, now=NOW)
+
+    assert incremental["documents"] == 3
+    assert incremental["doc_types"] == {".pdf": 2, ".docx": 1}
+    assert incremental["recent_documents"] == 2
+    assert (incremental["chunks"], incremental["anomalies"], incremental["tables"]) == (4, 1, 1)
+    assert incremental["timeline_events"] == 1
+    assert incremental["entity_types"] == {"ORG": 1, "PERSON": 2}
+    assert incremental["entity_mentions"] == {"total": 12, "min": 1, "max": 7, "avg": 4.0}
+    assert incremental["relationships"] == 1
+    assert incremental["by_project"][2]["chunks"] == 3
+    assert incremental["by_project"][corpus_stats.NO_PROJECT]["documents"] == 1
+
+    project = corpus_stats.read_corpus_stats(db, project_id=2, now=NOW)
+    assert (project["documents"], project["recent_documents"], project["tables"]) == (2, 1, 1)
+    assert project["entities"] == 3  # Entities are corpus-wide
+
+    corpus_stats.rebuild_corpus_stats(db)
+    db.commit()
+    assert corpus_stats.read_corpus_stats(db, now=NOW) == incremental
+
+
+def test_deleting_and_moving_documents_take_their_share_back(db):
+    _ingest(db)
+    doc = db.get(Document, 1)
+    corpus_stats.move_document(db, doc, 2, 5)
+    doc.project_id = 5
+    db.commit()
+
+    stats = corpus_stats.read_corpus_stats(db, now=NOW)["by_project"]
+    assert (stats[5]["documents"], stats[5]["chunks"], stats[5]["anomalies"]) == (1, 2, 1)
+    assert (stats[2]["documents"], stats[2]["chunks"], stats[2]["anomalies"]) == (1, 1, 0)
+
+    corpus_stats.merge_project_stats(db, 5, 2)
+    doc.project_id = 2
+    db.query(Chunk).filter(Chunk.doc_id == 2).delete()
+    corpus_stats.forget_document(db, db.get(Document, 2), chunks=1, tables=1)
+    db.commit()
+
+    stats = corpus_stats.read_corpus_stats(db, project_id=2, now=NOW)
+    assert (stats["documents"], stats["doc_types"], stats["chunks"]) == (1, {".pdf": 1}, 2)
+    assert 5 not in corpus_stats.read_corpus_stats(db)["by_project"]
+
+
+def test_graph_snapshot_refreshes_after_version_change_and_interval(db, config):
+    _ingest(db)
+    corpus_stats.read_corpus_stats(db)
+    db.add(CanonicalEntity(id=4, canonical_name="Oslo", label="GPE", total_mentions=2))
+    bump_graph_version(db)
+    db.commit()
+
+    config["corpus_stats.graph_refresh_seconds"] = 3600
+    assert corpus_stats.read_corpus_stats(db)["entities"] == 3  # Refreshed too recently
+    config["corpus_stats.graph_refresh_seconds"] = 0
+    stats = corpus_stats.read_corpus_stats(db)
+
+    assert stats["entities"] == 4
+    assert stats["entity_types"]["GPE"] == 1
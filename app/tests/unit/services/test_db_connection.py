@@ -0,0 +1,106 @@
+"""
+Unit tests for the process-wide engine/session/Qdrant registry.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.arkham.services.db import connection
+
+
+@pytest.fixture
+def sqlite_registry(monkeypatch, tmp_path):
+    """Point the registry at a throwaway SQLite file and reset its singletons."""
+    monkeypatch.setattr(connection, "DATABASE_URL", f"sqlite:///{tmp_path}/pool.db")
+    monkeypatch.setattr(connection, "_engine", None)
+    monkeypatch.setattr(connection, "_session_factory", None)
+    monkeypatch.setattr(connection, "_qdrant_client", None)
+    monkeypatch.setattr(connection, "_qdrant_probe_client", None)
+    monkeypatch.setattr(
+        connection,
+        "_stats",
+        {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0},
+    )
+    yield connection
+    connection.dispose_engine()
+
+
+def test_engine_and_factory_are_shared(sqlite_registry):
+    engine = sqlite_registry.get_engine()
+    assert sqlite_registry.get_engine() is engine
+
+    factory = sqlite_registry.get_session_factory()
+    assert sqlite_registry.get_session_factory() is factory
+    assert factory.kw["bind"] is engine
+
+
+def test_nothing_is_created_before_first_use(sqlite_registry):
+    stats = sqlite_registry.get_pool_stats()
+
+    assert stats["initialized"] is False
+    assert stats["checkouts"] == 0
+    assert stats["status"] == "not initialized"
+
+
+def test_pool_stats_count_checkouts(sqlite_registry):
+    engine = sqlite_registry.get_engine()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        during = sqlite_registry.get_pool_stats()
+
+    after = sqlite_registry.get_pool_stats()
+
+    assert during["initialized"] is True
+    assert during["checkedout"] == 1
+    assert after["checkedout"] == 0
+    assert after["checkouts"] == 1
+    assert after["checkins"] == 1
+    assert after["connects"] == 1
+
+
+def test_sessions_reuse_pooled_connections(sqlite_registry):
+    Session = sqlite_registry.get_session_factory()
+
+    for _ in range(3):
+        session = Session()
+        session.execute(text("SELECT 1"))
+        session.close()
+
+    stats = sqlite_registry.get_pool_stats()
+    assert stats["checkouts"] == 3
+    assert stats["connects"] == 1
+
+
+def test_pool_settings_come_from_config(monkeypatch):
+    values = {
+        "database.pool_size": 7,
+        "database.max_overflow": 3,
+        "database.pool_pre_ping": False,
+        "database.pool_recycle": 60,
+        "database.pool_timeout": 5,
+    }
+    monkeypatch.setattr(
+        connection, "get_config", lambda key, default=None: values.get(key, default)
+    )
+
+    assert connection._pool_settings() == {
+        "pool_size": 7,
+        "max_overflow": 3,
+        "pool_pre_ping": False,
+        "pool_recycle": 60,
+        "pool_timeout": 5,
+    }
+
+
+def test_qdrant_client_is_shared(sqlite_registry):
+    client = sqlite_registry.get_qdrant_client()
+    assert sqlite_registry.get_qdrant_client() is client
+
+
+def test_health_probe_uses_a_short_timeout(sqlite_registry):
+    probe = sqlite_registry.get_qdrant_probe_client()
+    assert sqlite_registry.get_qdrant_probe_client() is probe
+    assert probe is not sqlite_registry.get_qdrant_client()
+    assert probe._client._timeout == 5
+    assert sqlite_registry.get_qdrant_client()._client._timeout == 30
@@ -0,0 +1,76 @@
+"""
+Unit tests for the EmbeddingProvider batch and streaming API.
+
+Uses a tiny in-process provider so no model weights are downloaded.
+"""
+
+import pytest
+
+from app.arkham.services.db.base import EmbeddingProvider
+
+
+class RecordingProvider(EmbeddingProvider):
+    """Fake provider that records the size of every batch it encodes."""
+
+    def __init__(self):
+        self.batches = []
+
+    @property
+    def dense_dimension(self) -> int:
+        return 2
+
+    def encode(self, text):
+        return {"dense": [float(len(text)), 0.0], "sparse": {len(text): 1.0}}
+
+    def encode_batch(self, texts, batch_size=32):
+        self.batches.append(len(texts))
+        return [self.encode(t) for t in texts]
+
+
+def test_default_encode_batch_preserves_order():
+    class SingleOnly(RecordingProvider):
+        encode_batch = EmbeddingProvider.encode_batch
+
+    provider = SingleOnly()
+    results = provider.encode_batch(["a", "bbb", "cc"])
+
+    assert [r["dense"][0] for r in results] == [1.0, 3.0, 2.0]
+
+
+def test_iter_encode_is_lazy_and_bounded():
+    provider = RecordingProvider()
+    consumed = []
+
+    def texts():
+        for i in range(10):
+            consumed.append(i)
+            yield "x" * (i + 1)
+
+    stream = provider.iter_encode(texts(), batch_size=4)
+    first = next(stream)
+
+    # Only the first batch has been pulled from the source
+    assert first["dense"][0] == 1.0
+    assert consumed == [0, 1, 2, 3]
+
+    rest = list(stream)
+    assert len(rest) == 9
+    assert provider.batches == [4, 4, 2]
+    assert max(provider.batches) <= 4
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+def test_iter_encode_matches_encode_batch(batch_size):
+    provider = RecordingProvider()
+    texts = [f"text {i}" * (i + 1) for i in range(7)]
+
+    streamed = list(provider.iter_encode(texts, batch_size=batch_size))
+
+    assert streamed == [provider.encode(t) for t in texts]
+
+
+def test_iter_encode_empty_input():
+    provider = RecordingProvider()
+
+    assert list(provider.iter_encode([], batch_size=8)) == []
+    assert provider.batches == []
@@ -0,0 +1,129 @@
+"""
+Unit tests for blocking-based duplicate candidate generation and paging.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services import entity_deduplication_service as dedup
+from app.arkham.services.db.models import CanonicalEntity
+from app.arkham.services.entity_deduplication_service import (
+    EntityDeduplicationService,
+    generate_candidate_pairs,
+    iter_candidate_blocks,
+)
+
+
+def _pairs(entities, **kwargs):
+    return {(id1, id2) for _, id1, id2 in generate_candidate_pairs(entities, **kwargs)}
+
+
+def test_similar_names_are_paired():
+    entities = [
+        (1, "Microsoft", "ORG"),
+        (2, "Microsoft Corporation", "ORG"),
+        (3, "Acme Holdings", "ORG"),
+        (4, "Acme Holding", "ORG"),
+    ]
+    pairs = _pairs(entities)
+
+    assert (1, 2) in pairs  # containment
+    assert (3, 4) in pairs  # near-identical
+    assert (1, 3) not in pairs
+
+
+def test_pairs_never_cross_labels():
+    entities = [(1, "Jordan", "PERSON"), (2, "Jordan", "GPE")]
+
+    assert _pairs(entities) == set()
+
+
+def test_person_initial_and_token_blocking():
+    entities = [
+        (1, "John Doe", "PERSON"),
+        (2, "J. Doe", "PERSON"),
+        (3, "Doe John", "PERSON"),
+        (4, "Jane Smith", "PERSON"),
+    ]
+    pairs = _pairs(entities, min_overlap=0.99)
+
+    assert (1, 2) in pairs  # same last name + first initial
+    assert (1, 3) in pairs  # same sorted tokens
+    assert not any(4 in pair for pair in pairs)
+
+
+def test_results_are_ordered_by_overlap():
+    entities = [
+        (1, "Globex International", "ORG"),
+        (2, "Globex Internationa", "ORG"),
+        (3, "Globex Intl", "ORG"),
+    ]
+    results = generate_candidate_pairs(entities, min_overlap=0.3)
+    overlaps = [r[0] for r in results]
+
+    assert overlaps == sorted(overlaps, reverse=True)
+    assert (results[0][1], results[0][2]) == (1, 2)
+
+
+def test_matches_brute_force_for_high_overlap():
+    names = ["alpha beta", "alpha betta", "gamma delta", "gamma deltas", "omega"]
+    entities = [(i + 1, n, "ORG") for i, n in enumerate(names)]
+
+    assert _pairs(entities, min_overlap=0.6) == {(1, 2), (3, 4)}
+
+
+def test_blocks_stream_and_partners_are_capped():
+    names = ["Globex", "Globexx", "Globex Co", "Globexa", "Initech", "Initechs"]
+    entities = [(i + 1, n, "ORG") for i, n in enumerate(names)]
+
+    blocks = list(iter_candidate_blocks(entities, min_overlap=0.6, block_names=2))
+    assert len(blocks) > 1  # Yielded before every name was blocked
+    for block in blocks:
+        assert [r[0] for r in block] == sorted((r[0] for r in block), reverse=True)
+    pairs = [(id1, id2) for block in blocks for _, id1, id2 in block]
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == _pairs(entities, min_overlap=0.6)
+
+    capped = generate_candidate_pairs(entities, min_overlap=0.6, max_candidates=1)
+    assert len(capped) < len(pairs)
+    assert (5, 6) in {(r[1], r[2]) for r in capped}
+
+
+@pytest.fixture
+def dedup_db(in_memory_db):
+    names = ["Globex", "Globexx", "Globex Co", "Initech", "Initechs", "Umbrella"]
+    in_memory_db.add_all(
+        CanonicalEntity(id=i + 1, canonical_name=n, label="ORG") for i, n in enumerate(names)
+    )
+    in_memory_db.commit()
+    dedup.clear_candidate_cache()
+    with patch.object(dedup, "Session", sessionmaker(bind=in_memory_db.get_bind())):
+        yield in_memory_db
+    dedup.clear_candidate_cache()
+
+
+def test_candidate_pages_are_cut_from_one_cached_ranking(dedup_db):
+    service = EntityDeduplicationService()
+    with patch.object(
+        EntityDeduplicationService,
+        "iter_duplicate_candidates",
+        autospec=True,
+        side_effect=EntityDeduplicationService.iter_duplicate_candidates,
+    ) as scored:
+        ranking = service.get_duplicate_candidates(min_similarity=0.5, limit=100)
+        pages = [
+            service.get_duplicate_candidates(min_similarity=0.5, limit=2, offset=offset)
+            for offset in range(0, len(ranking), 2)
+        ]
+        assert scored.call_count == 1 and len(pages) > 1
+        assert [c for page in pages for c in page] == ranking
+        similarities = [c["similarity"] for c in ranking]
+        assert similarities == sorted(similarities, reverse=True)
+
+        # Deleting a canonical entity drops the cached ranking
+        assert dedup.delete_entity(2)["success"]
+        remaining = service.get_duplicate_candidates(min_similarity=0.5, limit=100)
+        assert scored.call_count == 2
+        assert all(2 not in (c["id1"], c["id2"]) for c in remaining)
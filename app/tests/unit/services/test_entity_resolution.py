@@ -0,0 +1,148 @@
+"""
+Unit tests for the in-memory CanonicalEntityIndex.
+
+The index must agree with EntityResolver.find_canonical_match (the brute
+force scan it replaces) while only comparing against a few candidates.
+"""
+
+import json
+import pytest
+
+from app.arkham.services.db.models import CanonicalEntity
+from app.arkham.services.entity_resolution import (
+    CanonicalEntityIndex,
+    EntityResolver,
+)
+
+
+CANONICALS = [
+    (1, "John Doe", "PERSON", ["J. Doe"]),
+    (2, "Jane Smith", "PERSON", []),
+    (3, "Microsoft Corporation", "ORG", ["Microsoft Corp."]),
+    (4, "Acme Holdings", "ORG", []),
+    (5, "Paris", "GPE", ["Paris, France"]),
+    (6, "Robert Johnson", "PERSON", ["Bob Johnson"]),
+]
+
+
+@pytest.fixture
+def index():
+    idx = CanonicalEntityIndex()
+    idx.load_rows(
+        (cid, name, label, json.dumps(aliases))
+        for cid, name, label, aliases in CANONICALS
+    )
+    return idx
+
+
+def _brute_force(mention, label):
+    canonicals = [
+        {"id": cid, "canonical_name": name, "aliases": json.dumps(aliases)}
+        for cid, name, lbl, aliases in CANONICALS
+        if lbl == label
+    ]
+    return EntityResolver().find_canonical_match(mention, label, canonicals)
+
+
+@pytest.mark.parametrize(
+    "mention,label",
+    [
+        ("john doe", "PERSON"),
+        ("J. Doe", "PERSON"),
+        ("Jon Doe", "PERSON"),
+        ("John Smith", "PERSON"),
+        ("Jane Doe", "PERSON"),
+        ("R. Johnson", "PERSON"),
+        ("Microsoft", "ORG"),
+        ("MICROSOFT CORP", "ORG"),
+        ("Acme Holdings Ltd", "ORG"),
+        ("IBM", "ORG"),
+        ("paris", "GPE"),
+        ("Parris", "GPE"),
+        ("Doe", "PERSON"),
+    ],
+)
+def test_find_agrees_with_brute_force(index, mention, label):
+    assert index.find(mention, label) == _brute_force(mention, label)
+
+
+def test_labels_are_isolated(index):
+    assert index.find("Paris", "PERSON") is None
+    assert index.find("John Doe", "ORG") is None
+
+
+def test_upsert_and_remove(index):
+    index.upsert(7, "ORG", ["Globex"])
+    assert index.find("globex", "ORG") == 7
+
+    index.add_name(7, "Globex Corporation International")
+    assert index.find("Globex Corporation International", "ORG") == 7
+
+    index.remove(7)
+    assert index.find("globex", "ORG") is None
+    assert len(index) == len(CANONICALS)
+
+
+def test_upsert_replaces_names(index):
+    index.upsert(2, "PERSON", ["Janet Smithers"])
+    assert index.find("Jane Smith", "PERSON") is None
+    assert index.find("Janet Smithers", "PERSON") == 2
+
+
+def test_rollback_undoes_changes_since_begin(index):
+    index.begin()
+    index.upsert(7, "ORG", ["Globex"])
+    index.add_name(3, "MSFT")
+    index.remove(4)
+    index.rollback()
+
+    assert index.find("globex", "ORG") is None
+    assert index.find("MSFT", "ORG") is None
+    assert index.find("Microsoft Corp.", "ORG") == 3
+    assert index.find("Acme Holdings", "ORG") == 4
+    assert len(index) == len(CANONICALS)
+
+    # Committed changes stay, and nothing is recorded outside begin()
+    index.begin()
+    index.upsert(7, "ORG", ["Globex"])
+    index.commit()
+    index.rollback()
+    assert index.find("globex", "ORG") == 7
+
+
+def test_candidates_are_blocked(index):
+    # An unrelated mention shares no trigrams with any ORG name
+    assert index.candidates("Zyx", "ORG") == []
+
+
+def test_sync_loads_then_refreshes(in_memory_db):
+    session = in_memory_db
+    session.add_all(
+        [
+            CanonicalEntity(
+                canonical_name="John Doe",
+                label="PERSON",
+                aliases=json.dumps(["John Doe"]),
+            ),
+            CanonicalEntity(canonical_name="Acme Holdings", label="ORG"),
+        ]
+    )
+    session.commit()
+
+    index = CanonicalEntityIndex()
+    index.sync(session, epoch=0)
+    assert len(index) == 2
+    assert index.find("J. Doe", "PERSON") is not None
+
+    # New canonical created by another worker is picked up incrementally
+    session.add(CanonicalEntity(canonical_name="Globex", label="ORG"))
+    session.commit()
+    index.sync(session, epoch=0)
+    assert index.find("globex", "ORG") is not None
+
+    # An epoch bump (e.g. manual merge) forces a full reload
+    session.query(CanonicalEntity).filter_by(canonical_name="Globex").delete()
+    session.commit()
+    index.sync(session, epoch=1)
+    assert index.find("globex", "ORG") is None
+    assert index.epoch == 1
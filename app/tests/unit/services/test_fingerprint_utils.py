@@ -0,0 +1,148 @@
+"""
+Unit tests for document fingerprints, the LSH index and the duplicate scan.
+"""
+
+import random
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services import duplicates_service
+from app.arkham.services.db.models import Chunk, Document, DocumentFingerprint
+from app.arkham.services.fingerprint_utils import (
+    LSHIndex,
+    backfill_fingerprints,
+    create_shingles,
+    hash_shingles,
+    minhash_signature,
+    minhash_similarity,
+    simhash,
+    store_document_fingerprint,
+    to_signed64,
+    to_unsigned64,
+    tokenize,
+)
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def _text(rng, n=400):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _mutate(rng, text, fraction):
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * fraction)):
+        words[i] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def _signature(text):
+    return minhash_signature(hash_shingles(create_shingles(tokenize(text))))
+
+
+def test_minhash_estimates_jaccard():
+    rng = random.Random(1)
+    base = _text(rng)
+    for fraction in (0.0, 0.02, 0.1, 0.3):
+        other = _mutate(rng, base, fraction)
+        a, b = create_shingles(tokenize(base)), create_shingles(tokenize(other))
+        jaccard = len(a & b) / len(a | b)
+        estimate = minhash_similarity(_signature(base), _signature(other))
+        assert estimate == pytest.approx(jaccard, abs=0.15), fraction
+
+
+def test_simhash_matches_bitwise_definition():
+    hashes = hash_shingles(create_shingles(tokenize(_text(random.Random(2)))))
+    expected = 0
+    for bit in range(64):
+        ones = sum(1 for h in hashes.tolist() if (h >> bit) & 1)
+        if ones * 2 > len(hashes):
+            expected |= 1 << bit
+
+    assert simhash(hashes) == expected
+    assert to_unsigned64(to_signed64(expected)) == expected
+
+
+def test_lsh_index_finds_near_duplicates_and_supports_removal():
+    rng = random.Random(3)
+    base = _text(rng)
+    index = LSHIndex(bands=42)
+    index.add(1, _signature(base))
+    index.add(2, _signature(_mutate(rng, base, 0.02)))
+    for doc_id in range(3, 30):
+        index.add(doc_id, _signature(_text(rng)))
+
+    assert (1, 2) in index.candidate_pairs()
+    assert index.query(index.signatures[1]) >= {1, 2}
+    assert index.similarity(1, 2) > 0.7
+
+    index.remove(2)
+    assert 2 not in index
+    assert all(2 not in pair for pair in index.candidate_pairs())
+
+
+def _add_document(session, doc_id, paragraphs):
+    session.add(
+        Document(
+            id=doc_id, path=f"/docs/{doc_id}.txt", title=f"doc{doc_id}.txt", status="complete"
+        )
+    )
+    session.add(Chunk(doc_id=doc_id, text="\n\n".join(paragraphs), chunk_index=0))
+    session.commit()
+
+
+@pytest.fixture
+def service(in_memory_db, monkeypatch):
+    engine = in_memory_db.get_bind()
+    monkeypatch.setattr(duplicates_service, "get_engine", lambda: engine)
+    monkeypatch.setattr(
+        duplicates_service, "get_session_factory", lambda: sessionmaker(bind=engine)
+    )
+    return duplicates_service.FingerprintService()
+
+
+def test_duplicate_scan_covers_corpus_and_updates_incrementally(in_memory_db, service):
+    rng = random.Random(4)
+    shared = "This paragraph was copied verbatim between two of the documents."
+    base = _text(rng)
+    _add_document(in_memory_db, 1, [base, shared])
+    _add_document(in_memory_db, 2, [_mutate(rng, base, 0.02), shared])
+    for doc_id in range(3, 120):
+        _add_document(in_memory_db, doc_id, [_text(rng)])
+
+    # Fingerprint written at ingest for one document, the rest are backfilled
+    # in the background, never by the scan itself
+    store_document_fingerprint(in_memory_db, 1)
+    in_memory_db.commit()
+
+    assert service.find_similar_documents(threshold=0.7) == []
+    assert service.find_copy_paste_patterns() == []
+    with patch.object(service, "queue_fingerprint_backfill", return_value=True) as queue:
+        assert service.get_fingerprint_status() == {"pending": 118, "backfill_queued": True}
+    queue.assert_called_once()
+    assert in_memory_db.query(DocumentFingerprint).count() == 1
+
+    assert backfill_fingerprints(in_memory_db) == 118
+    with patch.object(service, "queue_fingerprint_backfill") as queue:
+        assert service.get_fingerprint_status() == {"pending": 0, "backfill_queued": False}
+    queue.assert_not_called()
+
+    pairs = service.find_similar_documents(threshold=0.7)
+    assert [(p["doc1_id"], p["doc2_id"]) for p in pairs] == [(1, 2)]
+    assert pairs[0]["match_type"] in ("near_duplicate", "similar_content")
+    assert in_memory_db.query(DocumentFingerprint).count() == 119
+
+    patterns = service.find_copy_paste_patterns()
+    assert len(patterns) == 1
+    assert {d["doc_id"] for d in patterns[0]["documents"]} == {1, 2}
+    assert patterns[0]["sample_text"] == shared
+
+    # A new document arriving later is picked up without re-reading the others
+    _add_document(in_memory_db, 500, [base])
+    store_document_fingerprint(in_memory_db, 500)
+    in_memory_db.commit()
+
+    pairs = service.find_similar_documents(threshold=0.7)
+    assert {(p["doc1_id"], p["doc2_id"]) for p in pairs} == {(1, 2), (1, 500), (2, 500)}
@@ -0,0 +1,136 @@
+"""
+Unit tests for the shared in-memory entity graph.
+"""
+
+import networkx as nx
+import pytest
+
+from app.arkham.services.db.models import CanonicalEntity, EntityRelationship
+from app.arkham.services.graph_cache import EntityGraphCache, get_graph_version
+from app.arkham.services.relationship_utils import (
+    bump_graph_version,
+    upsert_cooccurrences,
+)
+
+
+@pytest.fixture
+def graph_db(in_memory_db):
+    """
+    1 - 2 - 3 - 4 chain plus a weak 1 - 4 shortcut, an isolated DATE (5) and
+    an unmentioned entity (6) linked to 4.
+    """
+    entities = [
+        (1, "Alice", "PERSON", 10),
+        (2, "Bob", "PERSON", 5),
+        (3, "Acme", "ORG", 20),
+        (4, "Paris", "GPE", 3),
+        (5, "Monday", "DATE", 7),
+        (6, "Ghost", "PERSON", 0),
+    ]
+    for cid, name, label, mentions in entities:
+        in_memory_db.add(
+            CanonicalEntity(id=cid, canonical_name=name, label=label, total_mentions=mentions)
+        )
+    in_memory_db.commit()
+
+    upsert_cooccurrences(
+        in_memory_db,
+        {(1, 2): [21, None], (2, 3): [11, None], (3, 4): [31, None], (4, 6): [1, None]},
+    )
+    in_memory_db.add(
+        EntityRelationship(entity1_id=1, entity2_id=4, strength=0.05, relationship_type="mentions")
+    )
+    # Dangling edge to a missing entity is ignored
+    in_memory_db.add(EntityRelationship(entity1_id=3, entity2_id=99, strength=1.0))
+    bump_graph_version(in_memory_db)
+    in_memory_db.commit()
+    return in_memory_db
+
+
+def test_load_builds_csr_from_relationships(graph_db):
+    graph = EntityGraphCache().get(graph_db)
+
+    assert graph.num_nodes == 6
+    assert graph.num_edges == 5
+    assert graph.version == 1
+    assert graph.edge(2, 1) == {"weight": pytest.approx(3.0), "type": "co-occurrence"}
+    assert graph.edge(1, 4) == {"weight": pytest.approx(0.05), "type": "mentions"}
+    assert graph.edge(1, 3) is None
+    assert [n for n, _ in graph.neighbors(4)] == [3, 6, 1]
+
+
+def test_cache_reloads_only_after_version_bump(graph_db):
+    cache = EntityGraphCache()
+
+    first = cache.get(graph_db)
+    assert cache.get(graph_db) is first
+    assert cache.loads == 1
+
+    upsert_cooccurrences(graph_db, {(1, 3): [1, None]})
+    bump_graph_version(graph_db)
+    graph_db.commit()
+
+    second = cache.get(graph_db)
+    assert cache.loads == 2
+    assert second.version == get_graph_version(graph_db) == 2
+    assert second.edge(1, 3) is not None
+    assert first.edge(1, 3) is None
+
+
+def test_shortest_path_respects_filters(graph_db):
+    graph = EntityGraphCache().get(graph_db)
+
+    assert graph.shortest_path(1, 4) == [1, 4]
+    assert graph.shortest_path(1, 4, min_weight=0.1) == [1, 2, 3, 4]
+    assert graph.shortest_path(1, 6, min_weight=0.1) == [1, 2, 3, 4, 6]
+    assert graph.shortest_path(1, 6, min_mentions=1) is None
+    assert graph.shortest_path(1, 5) is None
+    assert graph.shortest_path(1, 99) is None
+
+
+def test_shortest_path_matches_networkx(graph_db):
+    graph = EntityGraphCache().get(graph_db)
+    G = graph.to_networkx(min_weight=0.1)
+
+    for source in G.nodes:
+        for target in G.nodes:
+            path = graph.shortest_path(source, target, min_weight=0.1)
+            if nx.has_path(G, source, target):
+                assert len(path) == nx.shortest_path_length(G, source, target) + 1
+            else:
+                assert path is None
+
+
+def test_to_networkx_filters_and_reuses_views(graph_db):
+    graph = EntityGraphCache().get(graph_db)
+
+    G = graph.to_networkx(
+        min_weight=0.1,
+        exclude_labels=["GPE"],
+        hide_singletons=True,
+        node_attrs={"label": "name", "type": "label", "size": "mentions"},
+    )
+
+    assert set(G.nodes) == {1, 2, 3}
+    assert G.nodes[3] == {"label": "Acme", "type": "ORG", "size": 20}
+    assert G[1][2]["weight"] == pytest.approx(3.0)
+    assert nx.is_frozen(G)
+    assert graph.to_networkx(
+        min_weight=0.1,
+        exclude_labels=["GPE"],
+        hide_singletons=True,
+        node_attrs={"label": "name", "type": "label", "size": "mentions"},
+    ) is G
+
+
+def test_min_degree_then_singletons(graph_db):
+    graph = EntityGraphCache().get(graph_db)
+
+    # Degrees with min_weight=0.1: 1:1, 2:2, 3:2, 4:2, 5:0, 6:1
+    kept = graph.to_networkx(min_weight=0.1, min_degree=2)
+    assert set(kept.nodes) == {2, 3, 4}
+
+    # Only 1 - 2 and 3 - 4 clear 2.5; everything else is left without edges
+    kept = graph.to_networkx(min_weight=2.5, min_degree=1, hide_singletons=True)
+    assert set(kept.nodes) == {1, 2, 3, 4}
+    assert set(kept.edges) == {(1, 2), (3, 4)}
@@ -0,0 +1,56 @@
+"""
+Unit tests for the durable LLM cache.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services import llm_cache
+from app.arkham.services.db.models import LLMCacheEntry
+from app.arkham.services.llm_cache import LLMCache, prompt_key, result_key
+
+
+@pytest.fixture
+def cache(in_memory_db):
+    return LLMCache(sessionmaker(bind=in_memory_db.get_bind()), max_bytes=1000)
+
+
+def test_prompt_keys_ignore_layout_but_not_content_or_schema():
+    messages = [{"role": "user", "content": "Rate:\r\n\r\n\r\n  the   claim "}]
+    assert prompt_key("m", messages) == prompt_key("m", "Rate:\n\nthe claim")
+    assert prompt_key("m", messages) != prompt_key("m", "Rate: the claim")
+    assert prompt_key("m", messages) != prompt_key("m", messages, {"name": "s"})
+    assert prompt_key("m", messages) != prompt_key("other", messages)
+    assert result_key("timeline", 1) != result_key("timeline", 2)
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_limit(cache, in_memory_db):
+    for i in range(5):
+        cache.put(f"k{i}", "naming", "x" * 300)
+        in_memory_db.query(LLMCacheEntry).filter_by(key=f"k{i}").update(
+            {"last_used_at": datetime(2026, 1, 1) + timedelta(minutes=i)}
+        )
+        in_memory_db.commit()
+    assert cache.get("k0", "naming") == "x" * 300  # Now the most recently used
+
+    assert cache.evict() == 2  # 1500 bytes down to at most 900
+    keys = [key for (key,) in in_memory_db.query(LLMCacheEntry.key).order_by("key")]
+    assert keys == ["k0", "k3", "k4"]
+    stats = cache.stats()["naming"]
+    assert (stats["stores"], stats["hits"], stats["evictions"]) == (5, 1, 2)
+    assert (stats["entries"], stats["bytes"]) == (3, 900)
+
+
+def test_expired_results_miss_and_are_evicted(cache):
+    cache.put("summary", "fact_comparison_results", '{"n": 1}', ttl_seconds=3600)
+    found = cache.lookup("summary", "fact_comparison_results")
+    assert found.value == '{"n": 1}' and found.expires_at > found.created_at
+
+    later = datetime.utcnow() + timedelta(hours=2)
+    with patch.object(llm_cache, "datetime", MagicMock(utcnow=MagicMock(return_value=later))):
+        assert cache.get("summary", "fact_comparison_results") is None
+        assert cache.evict() == 1
+    assert cache.stats()["fact_comparison_results"]["misses"] == 1
@@ -0,0 +1,102 @@
+"""
+Unit tests for the shared LLM client.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services import llm_client
+from app.arkham.services.llm_cache import LLMCache
+from app.arkham.services.llm_scheduler import LLMScheduler
+
+
+def _completion(content, status=200):
+    response = MagicMock()
+    response.status_code = status
+    response.ok = status < 400
+    response.headers = {}
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(str(status))
+    return response
+
+
+class FakeStream:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def __iter__(self):
+        for token in self.tokens:
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def client(in_memory_db):
+    http = MagicMock()
+    scheduler = LLMScheduler(max_concurrency=2, max_retries=0, http_session=http)
+    sdk = MagicMock()
+    cache = LLMCache(sessionmaker(bind=in_memory_db.get_bind()))
+    with patch.object(llm_client, "get_llm_scheduler", return_value=scheduler), patch.object(
+        llm_client, "get_llm_client", return_value=sdk
+    ), patch.object(llm_client, "get_llm_cache", return_value=cache):
+        yield SimpleNamespace(http=http, sdk=sdk, cache=cache, scheduler=scheduler)
+
+
+def test_complete_sends_structured_output_and_caches(client):
+    client.http.post.return_value = _completion('{"ok": true}')
+    schema = {"name": "ok", "schema": {"type": "object"}}
+
+    first = llm_client.complete("Is it ok?", max_tokens=50, json_schema=schema, feature="test")
+    # Whitespace and generation settings are not part of the key
+    second = llm_client.complete(
+        "  Is it   ok?\n", max_tokens=80, temperature=0.1, json_schema=schema, feature="test"
+    )
+
+    assert first == second == '{"ok": true}'
+    assert client.http.post.call_count == 1
+    assert client.cache.stats()["test"]["hit_rate"] == 0.5
+    payload = client.http.post.call_args.kwargs["json"]
+    assert payload["messages"] == [{"role": "user", "content": "Is it ok?"}]
+    assert payload["response_format"] == {"type": "json_schema", "json_schema": schema}
+    assert client.scheduler.stats()["features"]["test"]["calls"] == 1
+
+    client.http.post.return_value = _completion("", status=500)
+    with pytest.raises(requests.exceptions.HTTPError):
+        llm_client.complete("Another question", use_cache=False)
+
+
+def test_streamed_and_plain_answers_share_the_cache(client):
+    client.sdk.chat.completions.create.return_value = FakeStream(["Paid ", None, "in cash."])
+
+    assert list(llm_client.stream_chat("Who paid?", feature="rag")) == ["Paid ", "in cash."]
+    request = client.sdk.chat.completions.create.call_args.kwargs
+    assert request["stream"] is True and "max_tokens" not in request
+
+    # Same request without streaming is answered from the cache
+    assert llm_client.complete("Who paid?") == "Paid in cash."
+    assert list(llm_client.stream_chat("Who paid?")) == ["Paid in cash."]
+    client.http.post.assert_not_called()
+    assert client.sdk.chat.completions.create.call_count == 1
+
+
+def test_answers_tied_to_sources_miss_once_the_text_changes(client):
+    client.http.post.side_effect = [_completion("Old"), _completion("New")]
+
+    assert llm_client.complete("Summarise", sources=["chunk v1"]) == "Old"
+    assert llm_client.complete("Summarise", sources=["chunk v1"]) == "Old"
+    assert llm_client.complete("Summarise", sources=["chunk v2"]) == "New"
+    assert llm_client.complete("Summarise", sources=["chunk v2"]) == "New"
+
+    stats = client.cache.stats()["chat"]
+    assert (stats["hits"], stats["misses"], stats["stale"], stats["entries"]) == (2, 1, 1, 1)
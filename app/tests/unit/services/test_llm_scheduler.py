@@ -0,0 +1,119 @@
+"""
+Unit tests for the concurrent LLM scheduler.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.arkham.services import llm_scheduler
+from app.arkham.services.llm_scheduler import LLMScheduler
+
+
+def _response(status=200, usage=None, headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.ok = status < 400
+    response.headers = headers or {}
+    response.json.return_value = {"usage": usage} if usage else {}
+    return response
+
+
+class _Probe:
+    """Tracks the most calls in flight at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = self.peak = 0
+
+    def __call__(self, scheduler, value):
+        with scheduler.slot("probe"):
+            with self.lock:
+                self.current += 1
+                self.peak = max(self.peak, self.current)
+            time.sleep(0.02)
+            with self.lock:
+                self.current -= 1
+            if value == 3:
+                raise ValueError("bad item")
+        return value * 2
+
+
+def test_map_keeps_order_and_bounds_requests_in_flight():
+    scheduler = LLMScheduler(max_concurrency=3, http_session=MagicMock())
+    probe = _Probe()
+
+    results = scheduler.map(lambda v: probe(scheduler, v), range(10), return_exceptions=True)
+
+    assert results[:3] == [0, 2, 4]
+    assert isinstance(results[3], ValueError)
+    assert results[4:] == [8, 10, 12, 14, 16, 18]
+    assert probe.peak == 3
+    stats = scheduler.stats()["features"]["probe"]
+    assert (stats["calls"], stats["errors"]) == (10, 1)
+
+    with pytest.raises(ValueError):
+        scheduler.map(lambda v: probe(scheduler, v), range(5))
+
+
+def test_saturated_server_is_retried_and_shrinks_the_window():
+    http = MagicMock()
+    http.post.side_effect = [
+        _response(429, headers={"Retry-After": "7"}),
+        _response(503),
+        _response(200, usage={"prompt_tokens": 12, "completion_tokens": 30}),
+    ]
+    scheduler = LLMScheduler(max_concurrency=8, max_retries=2, retry_backoff=0.5, http_session=http)
+
+    with patch.object(llm_scheduler.time, "sleep") as sleep:
+        response = scheduler.post("http://llm/v1/chat/completions", {}, feature="chat")
+
+    assert response.status_code == 200
+    assert [c.args[0] for c in sleep.call_args_list] == [7.0, 1.0]
+    assert scheduler.stats()["window"] == 2  # Halved twice, grown back a little
+    stats = scheduler.stats()["features"]["chat"]
+    assert (stats["retries"], stats["prompt_tokens"], stats["completion_tokens"]) == (2, 12, 30)
+
+
+def test_amap_runs_sync_and_async_functions_within_the_limit():
+    scheduler = LLMScheduler(max_concurrency=2, http_session=MagicMock())
+    running, peak = 0, 0
+
+    async def ask(value):
+        nonlocal running, peak
+        async with scheduler.aslot("async"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        return value + 1
+
+    assert asyncio.run(scheduler.amap(ask, range(6))) == [1, 2, 3, 4, 5, 6]
+    assert peak == 2
+    assert asyncio.run(scheduler.amap(lambda v: v * 3, [1, 2])) == [3, 6]
+
+
+def test_cancelled_async_waiters_never_keep_a_slot():
+    scheduler = LLMScheduler(max_concurrency=1, http_session=MagicMock())
+
+    async def main():
+        with scheduler.slot("held"):
+            waiter = asyncio.create_task(scheduler.aslot("async").__aenter__())
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        async with scheduler.aslot("async"):
+            assert scheduler.window.in_flight == 1
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert scheduler.window.in_flight == 0
+
+    # Cancelled after the waiting thread already took the slot
+    ticket = llm_scheduler._Ticket()
+    scheduler.window.acquire(ticket)
+    scheduler.window.cancel(ticket)
+    assert scheduler.window.in_flight == 0
@@ -0,0 +1,85 @@
+"""
+Unit tests for the MiniDoc completion counter under concurrent page completions.
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services.db.models import Base, MiniDoc, PageOCR
+from app.arkham.services.minidoc_progress import complete_page
+
+DOC_ID = 1
+PAGES = 400
+MINIDOC_SIZE = 20
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file database so every worker thread gets its own connection
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'progress.db'}", connect_args={"timeout": 60}
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    for start in range(1, PAGES + 1, MINIDOC_SIZE):
+        session.add(
+            MiniDoc(
+                document_id=DOC_ID,
+                minidoc_id=f"hash__part_{start:03d}",
+                page_start=start,
+                page_end=start + MINIDOC_SIZE - 1,
+            )
+        )
+    session.commit()
+    session.close()
+    yield factory
+    engine.dispose()
+
+
+def _finish_page(factory, page_num):
+    """What process_page_job does once a page is OCR'd."""
+    session = factory()
+    try:
+        session.add(PageOCR(document_id=DOC_ID, page_num=page_num, text="x"))
+        session.flush()
+        minidoc_id = complete_page(session, DOC_ID, page_num)
+        session.commit()
+        return minidoc_id
+    except IntegrityError:
+        session.rollback()
+        return None
+    finally:
+        session.close()
+
+
+def test_exactly_one_page_completes_each_minidoc(session_factory):
+    # Every page once, plus a duplicate delivery of some pages, in random order
+    pages = list(range(1, PAGES + 1)) + random.Random(0).sample(range(1, PAGES + 1), 50)
+    random.Random(1).shuffle(pages)
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        completed = list(pool.map(lambda p: _finish_page(session_factory, p), pages))
+
+    completed = [minidoc_id for minidoc_id in completed if minidoc_id]
+    session = session_factory()
+    minidocs = session.query(MiniDoc).all()
+    assert sorted(completed) == sorted(m.id for m in minidocs)
+    assert all(m.pages_done == MINIDOC_SIZE and m.status == "ocr_done" for m in minidocs)
+    assert session.query(PageOCR).count() == PAGES
+
+
+def test_reocr_of_existing_page_does_not_count_again(session_factory):
+    session = session_factory()
+    session.add(PageOCR(document_id=DOC_ID, page_num=1, text="x"))
+    session.flush()
+    assert complete_page(session, DOC_ID, 1) is None
+    # A retry of the same page neither counts nor completes an unfinished MiniDoc
+    assert complete_page(session, DOC_ID, 1, new_page=False) is None
+    assert complete_page(session, DOC_ID, PAGES + 1) is None  # No MiniDoc
+    session.commit()
+    assert session.query(MiniDoc).filter_by(page_start=1).one().pages_done == 1
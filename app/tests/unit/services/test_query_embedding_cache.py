@@ -0,0 +1,129 @@
+"""
+Unit tests for the cross-process query embedding cache.
+"""
+
+import numpy as np
+import pytest
+
+from app.arkham.services.query_embedding_cache import (
+    MemoryStore,
+    QueryEmbeddingCache,
+    RedisStore,
+    decode_embedding,
+    encode_embedding,
+)
+
+EMBEDDING = {
+    "dense": np.random.default_rng(0).uniform(-0.2, 0.2, 1024).tolist(),
+    "sparse": {"2041": 0.31, "17": 0.05, 99: 1.0},
+}
+
+
+class FakeRedis:
+    """The few Redis commands RedisStore uses, on dicts (bytes keys/values)."""
+
+    def __init__(self):
+        self.values, self.zsets, self.hashes = {}, {}, {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            for store in (self.values, self.zsets, self.hashes):
+                store.pop(key, None)
+
+    def zadd(self, name, mapping, xx=False):
+        zset = self.zsets.setdefault(name, {})
+        for member, score in mapping.items():
+            if not xx or member in zset:
+                zset[member] = score
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def zpopmin(self, name, count):
+        zset = self.zsets.get(name, {})
+        popped = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del zset[member]
+        return [(member.encode(), score) for member, score in popped]
+
+    def zrange(self, name, start, end):
+        return [m.encode() for m in sorted(self.zsets.get(name, {}), key=self.zsets[name].get)]
+
+    def hincrby(self, name, field, amount):
+        fields = self.hashes.setdefault(name, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + amount
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client, self.calls = client, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, n)(*a, **kw) for n, a, kw in self.calls]
+
+
+@pytest.mark.parametrize(
+    "dtype,item_size,tolerance", [("float16", 2, 1e-3), ("int8", 1, 2e-3)]
+)
+def test_codec_round_trip_is_compact(dtype, item_size, tolerance):
+    blob = encode_embedding(EMBEDDING, dtype)
+    decoded = decode_embedding(blob)
+
+    # 13-byte header, the dense vector, 6 bytes per sparse weight
+    assert len(blob) == 13 + 1024 * item_size + 3 * 6
+    assert np.allclose(decoded["dense"], EMBEDDING["dense"], atol=tolerance)
+    assert decoded["sparse"].keys() == {2041, 17, 99}
+    assert decoded["sparse"][99] == 1.0
+
+
+@pytest.mark.parametrize("store_factory", [
+    lambda: MemoryStore(max_entries=2),
+    lambda: RedisStore(FakeRedis(), max_entries=2),
+])
+def test_lru_eviction_and_hit_metrics(store_factory):
+    cache = QueryEmbeddingCache(store_factory(), "bge-m3:BAAI/bge-m3")
+    computed = []
+
+    def compute(text):
+        computed.append(text)
+        return EMBEDDING
+
+    first = cache.get_or_compute("  offshore   transfers ", compute)
+    first["dense"][0] = 42.0  # Callers get their own lists
+    again = cache.get_or_compute("offshore transfers", compute)
+    assert again["dense"][0] != 42.0
+    assert computed == ["offshore transfers"]
+
+    cache.get_or_compute("invoice 7", compute)
+    cache.get_or_compute("offshore transfers", compute)  # Now most recently used
+    cache.get_or_compute("wire fraud", compute)  # Evicts "invoice 7"
+    cache.get_or_compute("offshore transfers", compute)
+    cache.get_or_compute("invoice 7", compute)
+    assert computed == ["offshore transfers", "invoice 7", "wire fraud", "invoice 7"]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 4, 2)
+    assert stats["hit_rate"] == pytest.approx(3 / 7)
+
+
+def test_namespace_separates_models():
+    store = MemoryStore(max_entries=10)
+    bge = QueryEmbeddingCache(store, "bge-m3:BAAI/bge-m3")
+    minilm = QueryEmbeddingCache(store, "minilm-bm25:all-MiniLM-L6-v2", dtype="int8")
+    assert bge.key("query") != minilm.key("query")
+    assert bge.key("query") == bge.key(" query\n")
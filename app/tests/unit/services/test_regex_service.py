@@ -0,0 +1,80 @@
+"""
+Unit tests for the paged corpus-wide pattern search.
+"""
+
+import re
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects import sqlite
+
+from app.arkham.services import regex_service
+from app.arkham.services.db.models import Chunk, Document
+
+
+@pytest.fixture
+def corpus(in_memory_db):
+    in_memory_db.add(Document(id=1, path="/docs/a.pdf", title="a.pdf"))
+    for i in range(1, 41):
+        text = f"Routine note {i}."
+        if i % 4 == 0:
+            text += f" Reply to user{i}@example.com."
+        if i % 10 == 0:
+            text += " Wire ref INV-2023-0099 approved."
+        in_memory_db.add(Chunk(id=i, doc_id=1, text=text, chunk_index=i))
+    in_memory_db.commit()
+    with patch.object(regex_service, "SessionLocal", return_value=in_memory_db):
+        yield in_memory_db
+
+
+def test_pages_stream_matches_in_chunk_order(corpus):
+    pages = list(
+        regex_service.iter_pattern_matches(["email"], batch_size=8, max_results=100)
+    )
+
+    assert len(pages) == 5  # 40 chunks, 8 per page, no literal prefilter for "@"
+    assert [m["chunk_id"] for page in pages for m in page] == list(range(4, 41, 4))
+    assert pages[0][0]["document_title"] == "a.pdf"
+
+
+def test_result_cap_stops_the_scan(corpus):
+    pages = list(
+        regex_service.iter_pattern_matches(["email"], batch_size=8, max_results=3)
+    )
+
+    assert [len(page) for page in pages] == [2, 1]
+    assert len(regex_service.search_patterns_in_chunks(["email"], max_results=3)) == 3
+
+
+def test_closing_the_generator_cancels_the_search(corpus):
+    pages = regex_service.iter_pattern_matches(["email"], batch_size=8, max_results=100)
+    assert len(next(pages)) == 2
+    with patch.object(corpus, "query", side_effect=AssertionError("scanned on")):
+        pages.close()
+
+
+def test_custom_regex_literals_prefilter_chunks(corpus):
+    with patch.object(
+        regex_service, "_chunk_matches", wraps=regex_service._chunk_matches
+    ) as scanned:
+        results = regex_service.search_patterns_in_chunks(
+            [], custom_regex=r"INV-\d{4}-\d+"
+        )
+
+    assert [r["match_text"] for r in results] == ["INV-2023-0099"] * 4
+    # Only the chunks containing "INV-" were fetched and scanned
+    assert scanned.call_count == 4
+
+
+def test_literal_filter_sql():
+    condition = regex_service._literal_filter(
+        [re.compile(r"ref_100%\s+(?:paid)?"), re.compile(r"\bAKIA[0-9A-Z]{16}")]
+    )
+    sql = str(
+        condition.compile(
+            dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    assert "'%ref\\_100\\%%'" in sql and "'%AKIA%'" in sql and " OR " in sql
+    # A pattern without a 3+ character literal means every chunk is a candidate
+    assert regex_service._literal_filter([re.compile(r"\d{3}"), re.compile("AKIA")]) is None
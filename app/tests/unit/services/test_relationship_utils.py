@@ -0,0 +1,144 @@
+"""
+Unit tests for bulk co-occurrence upserts and the relationship builder.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.arkham.services.db.models import (
+    Base,
+    CanonicalEntity,
+    Document,
+    Entity,
+    EntityRelationship,
+    RelationshipBuildProgress,
+)
+from app.arkham.services.relationship_utils import (
+    MAX_STRENGTH,
+    pair_increments,
+    reassign_relationships,
+    upsert_cooccurrences,
+)
+
+
+def _add_canonicals(session, *ids):
+    for cid in ids:
+        session.add(CanonicalEntity(id=cid, canonical_name=f"E{cid}", label="ORG"))
+    session.commit()
+
+
+def _relationships(session):
+    return {
+        (r.entity1_id, r.entity2_id): r
+        for r in session.query(EntityRelationship).all()
+    }
+
+
+def test_pair_increments_uses_canonical_order():
+    increments = pair_increments([(1, [3, 1, 2]), (2, [2, 1]), (3, [5])])
+
+    assert increments == {(1, 2): [2, 1], (1, 3): [1, 1], (2, 3): [1, 1]}
+
+
+def test_upsert_inserts_then_increments(in_memory_db):
+    _add_canonicals(in_memory_db, 1, 2, 3)
+
+    upsert_cooccurrences(in_memory_db, pair_increments([(None, [1, 2, 3])]))
+    in_memory_db.commit()
+    upsert_cooccurrences(in_memory_db, pair_increments([(None, [2, 1])] * 3))
+    in_memory_db.commit()
+
+    rels = _relationships(in_memory_db)
+    assert set(rels) == {(1, 2), (1, 3), (2, 3)}
+    assert rels[(1, 2)].co_occurrence_count == 4
+    assert rels[(1, 2)].strength == pytest.approx(1.3)
+    assert rels[(1, 3)].co_occurrence_count == 1
+    assert rels[(1, 3)].strength == pytest.approx(1.0)
+
+
+def test_upsert_caps_strength(in_memory_db):
+    _add_canonicals(in_memory_db, 1, 2)
+
+    for _ in range(2):
+        upsert_cooccurrences(in_memory_db, {(1, 2): [150, None]})
+        in_memory_db.commit()
+
+    rel = _relationships(in_memory_db)[(1, 2)]
+    assert rel.co_occurrence_count == 300
+    assert rel.strength == MAX_STRENGTH
+
+
+def test_upsert_batches_large_inputs(in_memory_db):
+    _add_canonicals(in_memory_db, *range(1, 41))
+
+    pairs = upsert_cooccurrences(
+        in_memory_db, pair_increments([(None, range(1, 41))]), batch_size=7
+    )
+    in_memory_db.commit()
+
+    assert pairs == 40 * 39 // 2
+    assert in_memory_db.query(EntityRelationship).count() == pairs
+
+
+def test_reassign_folds_pairs_and_drops_self_loop(in_memory_db):
+    _add_canonicals(in_memory_db, 1, 2, 3)
+    upsert_cooccurrences(
+        in_memory_db, {(1, 3): [2, None], (2, 3): [1, None], (1, 2): [5, None]}
+    )
+    in_memory_db.commit()
+
+    moved = reassign_relationships(in_memory_db, old_id=2, new_id=1)
+    in_memory_db.commit()
+
+    rels = _relationships(in_memory_db)
+    assert moved == 2
+    assert set(rels) == {(1, 3)}
+    assert rels[(1, 3)].co_occurrence_count == 3
+
+
+@pytest.fixture
+def builder(monkeypatch, tmp_path):
+    """relationship_builder bound to a throwaway SQLite database."""
+    from app.arkham.services.workers import relationship_builder
+
+    engine = create_engine(f"sqlite:///{tmp_path}/rel.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(relationship_builder, "Session", Session)
+
+    session = Session()
+    _add_canonicals(session, 1, 2, 3)
+    for doc_id, canonical_ids in ((1, [1, 2, 3]), (2, [1, 2]), (3, [3])):
+        session.add(Document(
+                id=doc_id, title=f"doc{doc_id}", path=f"/tmp/doc{doc_id}.pdf", status="complete"
+            ))
+        for cid in canonical_ids:
+            session.add(
+                Entity(doc_id=doc_id, text=f"E{cid}", label="ORG", canonical_entity_id=cid)
+            )
+    session.commit()
+    session.close()
+
+    yield relationship_builder, Session
+    engine.dispose()
+
+
+def test_build_all_relationships_counts_each_document_once(builder):
+    relationship_builder, Session = builder
+
+    summary = relationship_builder.build_all_relationships(workers=1)
+    again = relationship_builder.build_all_relationships(workers=1)
+
+    session = Session()
+    rels = _relationships(session)
+    built = {p.doc_id for p in session.query(RelationshipBuildProgress).all()}
+    session.close()
+
+    assert summary["total_documents"] == 3
+    assert summary["documents_with_relationships"] == 2
+    assert summary["docs_per_second"] > 0
+    assert again["total_documents"] == 0
+    assert built == {1, 2, 3}
+    assert rels[(1, 2)].co_occurrence_count == 2
+    assert rels[(1, 3)].co_occurrence_count == 1
@@ -0,0 +1,85 @@
+"""
+Unit tests for search sessions: paging from a cached fused ranking.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.arkham.services import search_service
+from app.arkham.services.db.models import Document
+
+HITS = 450  # Points matching the query in the fake collection
+
+
+def _query_points(**kwargs):
+    depth = kwargs["limit"]
+    assert kwargs["with_payload"] is False
+    assert all(prefetch.limit == depth for prefetch in kwargs["prefetch"])
+    points = [SimpleNamespace(id=i, score=1.0 / (i + 1)) for i in range(min(depth, HITS))]
+    return SimpleNamespace(points=points)
+
+
+def _retrieve(collection_name, ids, with_payload, with_vectors):
+    # Qdrant returns points in no particular order
+    return [
+        SimpleNamespace(id=i, payload={"doc_id": i % 3 + 1, "text": f"chunk {i}"})
+        for i in reversed(ids)
+    ]
+
+
+@pytest.fixture
+def qdrant(in_memory_db):
+    for doc_id in (1, 2, 3):
+        in_memory_db.add(Document(id=doc_id, path=f"/docs/{doc_id}.pdf", title=f"Doc {doc_id}"))
+    in_memory_db.commit()
+
+    search_service.clear_search_sessions()
+    search_service.doc_title_cache.clear()
+    client = MagicMock()
+    client.query_points.side_effect = _query_points
+    client.retrieve.side_effect = _retrieve
+    config = {"search.session_depth": 200, "search.max_depth": 5000}
+    with patch.object(search_service, "qdrant_client", client), patch.object(
+        search_service,
+        "embed_hybrid",
+        return_value={"dense": [0.1], "sparse": {5: 1.0}},
+    ), patch.object(
+        search_service, "get_config", lambda key, default=None: config.get(key, default)
+    ), patch.object(search_service, "get_session", return_value=in_memory_db):
+        yield client
+
+
+def test_pages_come_from_one_fused_ranking(qdrant):
+    first = search_service.hybrid_search("wire transfer", limit=20)
+    second = search_service.hybrid_search("  wire   transfer", limit=20, offset=20)
+
+    assert [r["id"] for r in first] == list(range(20))
+    assert [r["id"] for r in second] == list(range(20, 40))
+    assert second[0]["score"] == pytest.approx(1 / 21)
+    assert second[0]["metadata"]["title"] == "Doc 3"
+    # One fusion for both pages; each page fetched only its own payloads
+    assert qdrant.query_points.call_count == 1
+    assert [len(c.kwargs["ids"]) for c in qdrant.retrieve.call_args_list] == [20, 20]
+
+
+def test_deep_pages_extend_the_ranking_until_exhausted(qdrant):
+    search_service.hybrid_search("wire transfer", limit=20, offset=180)
+    deep = search_service.hybrid_search("wire transfer", limit=20, offset=420)
+    past_end = search_service.hybrid_search("wire transfer", limit=20, offset=460)
+
+    assert [r["id"] for r in deep] == list(range(420, 440))
+    assert past_end == []
+    # 200 first, then 440 (past the first ranking), then 880 came back short
+    assert [c.kwargs["limit"] for c in qdrant.query_points.call_args_list] == [200, 440, 880]
+
+
+def test_filters_and_ttl_key_sessions(qdrant):
+    a = search_service.get_search_session("q", project_id=2, allowed_doc_ids=[3, 1])
+    assert search_service.get_search_session("q", project_id=2, allowed_doc_ids=[1, 3]) is a
+    assert search_service.get_search_session("q", project_id=3) is not a
+    assert a.search_filter.must[1].match.any == [3, 1]
+
+    a.created_at -= 301
+    assert search_service.get_search_session("q", project_id=2, allowed_doc_ids=[1, 3]) is not a
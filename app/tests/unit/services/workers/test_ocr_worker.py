@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch, mock_open
 from pathlib import Path
 import os
+import hashlib
 import json
 from datetime import datetime
 
@@ -120,8 +121,7 @@ def test_process_page_job_paddle_success_new_page(
             None,  # No existing PageOCR record
             None  # No existing MiniDoc
         ]
-        mock_session_instance.query.return_value.filter.return_value.first.return_value = None # For minidoc
-        mock_session_instance.query.return_value.filter.return_value.count.return_value = 0 # For completed_pages
+        mock_session_instance.execute.return_value.first.return_value = None # Page is in no MiniDoc
 
         ocr_worker.process_page_job(doc_id, doc_hash, page_num, dummy_image_path, ocr_mode)
 
@@ -260,39 +260,49 @@ def test_process_page_job_qwen_success(
 @patch('app.arkham.services.workers.ocr_worker.np.array')
 @patch('app.arkham.services.workers.ocr_worker.get_paddle_engine')
 @patch('app.arkham.services.workers.ocr_worker.compute_file_checksum', return_value="dummy_checksum")
+@patch('app.arkham.services.workers.ocr_worker.transcribe_image', return_value="")
 @patch('app.arkham.services.workers.ocr_worker.q.enqueue')
 def test_process_page_job_paddle_ocr_exception(
-    mock_enqueue, mock_checksum, mock_get_paddle_engine, mock_np_array, mock_image_open,
-    mock_json_dump, mock_builtin_open, mock_makedirs, mock_OCR_PAGES_DIR, mock_Session,
-    dummy_image_path, mock_session_instance, tmp_path
+    mock_enqueue, mock_transcribe_image, mock_checksum, mock_get_paddle_engine, mock_np_array,
+    mock_image_open, mock_json_dump, mock_builtin_open, mock_makedirs, mock_OCR_PAGES_DIR,
+    mock_Session, dummy_image_path, in_memory_db, tmp_path
 ):
     with patch('app.arkham.services.workers.ocr_worker.OCR_PAGES_DIR', str(tmp_path)):
-        mock_Session.return_value = mock_session_instance
-        
+        mock_Session.return_value = in_memory_db
+
         doc_id = 1
         doc_hash = "testhash"
         page_num = 1
         ocr_mode = "paddle"
 
-        # Mock PaddleOCR engine and its ocr method to raise an exception
+        # PaddleOCR raises and the Qwen-VL fallback returns no text
         mock_ocr_engine = MagicMock()
         mock_get_paddle_engine.return_value = mock_ocr_engine
         mock_ocr_engine.ocr.side_effect = Exception("PaddleOCR Failed")
-
         mock_image_open.return_value.__enter__.return_value = MagicMock()
 
-        # Ensure no existing PageOCR initially for error handling path
-        mock_session_instance.query.return_value.filter_by.return_value.first.return_value = None
+        minidoc = MiniDoc(
+            document_id=doc_id, minidoc_id="testhash__part_001", page_start=1, page_end=1,
+            status="pending_ocr", pages_done=0,
+        )
+        in_memory_db.add(minidoc)
+        in_memory_db.commit()
+        minidoc_id = minidoc.id
 
-        ocr_worker.process_page_job(doc_id, doc_hash, page_num, dummy_image_path, ocr_mode)
+        with patch.object(in_memory_db, "rollback", wraps=in_memory_db.rollback) as rollback:
+            ocr_worker.process_page_job(doc_id, doc_hash, page_num, dummy_image_path, ocr_mode)
+            rollback.assert_called_once()
 
-        # The worker catches the engine exception internally and returns, so rollback is NOT called
-        mock_session_instance.rollback.assert_not_called()
-        mock_session_instance.close.assert_called()
-        
-        # Verify no DB additions (since it returned early)
-        mock_session_instance.add.assert_not_called()
-        mock_session_instance.commit.assert_not_called()
+        mock_transcribe_image.assert_called_once_with(dummy_image_path)
+        # A placeholder page is saved and counted, so the MiniDoc is still parsed
+        page = in_memory_db.query(PageOCR).filter_by(document_id=doc_id, page_num=page_num).one()
+        assert page.text.startswith("[OCR FAILED]") and page.checksum == "ERROR"
+        minidoc = in_memory_db.get(MiniDoc, minidoc_id)
+        assert minidoc.status == "ocr_done" and minidoc.pages_done == 1
+        mock_enqueue.assert_called_once_with(
+            "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+            minidoc_db_id=minidoc_id,
+        )
 
 
 @patch('app.arkham.services.workers.ocr_worker.Session')
@@ -343,11 +353,9 @@ def test_process_page_job_qwen_exception(
 def test_process_page_job_minidoc_completion(
     mock_enqueue, mock_checksum, mock_get_paddle_engine, mock_np_array, mock_image_open,
     mock_json_dump, mock_builtin_open, mock_makedirs, mock_OCR_PAGES_DIR, mock_Session,
-    dummy_image_path, mock_session_instance, tmp_path
+    dummy_image_path, in_memory_db, tmp_path
 ):
     with patch('app.arkham.services.workers.ocr_worker.OCR_PAGES_DIR', str(tmp_path)):
-        mock_Session.return_value = mock_session_instance
-        
         doc_id = 1
         doc_hash = "testhash"
         page_num = 1
@@ -360,26 +368,146 @@ def test_process_page_job_minidoc_completion(
         ]
         mock_image_open.return_value.__enter__.return_value = MagicMock()
 
-        # Setup for upserting PageOCR (new page)
-        mock_session_instance.query.return_value.filter_by.return_value.first.return_value = None
+        mock_Session.return_value = in_memory_db
+        minidoc = MiniDoc(
+            document_id=doc_id, minidoc_id="testhash__part_001", page_start=1, page_end=2,
+            status="pending_ocr", pages_done=1,
+        )
+        in_memory_db.add(minidoc)
+        in_memory_db.add(PageOCR(document_id=doc_id, page_num=2, text="done", checksum="c"))
+        in_memory_db.commit()
+        minidoc_id = minidoc.id
 
-        # Setup MiniDoc
-        mock_minidoc = MagicMock(spec=MiniDoc)
-        mock_minidoc.minidoc_id = 123
-        mock_minidoc.id = 456
-        mock_minidoc.page_start = 1
-        mock_minidoc.page_end = 1
-        mock_minidoc.status = "ocr_pending"
+        with patch.object(in_memory_db, "commit", wraps=in_memory_db.commit) as commit:
+            ocr_worker.process_page_job(doc_id, doc_hash, page_num, dummy_image_path, ocr_mode)
+            commit.assert_called_once()
 
-        mock_session_instance.query.return_value.filter.return_value.first.return_value = mock_minidoc
-        mock_session_instance.query.return_value.filter.return_value.count.return_value = 1
+        minidoc = in_memory_db.get(MiniDoc, minidoc_id)
+        assert minidoc.status == "ocr_done" and minidoc.pages_done == 2
+        mock_enqueue.assert_called_once_with(
+            "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+            minidoc_db_id=minidoc_id,
+        )
 
+        # Re-OCR of a page of a complete MiniDoc (a retry) re-parses without recounting
+        mock_enqueue.reset_mock()
         ocr_worker.process_page_job(doc_id, doc_hash, page_num, dummy_image_path, ocr_mode)
+        assert in_memory_db.get(MiniDoc, minidoc_id).pages_done == 2
+        mock_enqueue.assert_called_once()
+
 
-        assert mock_minidoc.status == "ocr_done"
-        assert mock_session_instance.commit.call_count == 2
+def _done(result=None, error=None):
+    from concurrent.futures import Future
 
+    future = Future()
+    if error:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+@patch('app.arkham.services.workers.ocr_worker.Session')
+@patch('app.arkham.services.workers.ocr_worker.submit_pages')
+@patch('app.arkham.services.workers.ocr_worker.compute_file_checksum', return_value="dummy_checksum")
+@patch('app.arkham.services.workers.ocr_worker.transcribe_image', side_effect=Exception("Qwen Failed"))
+@patch('app.arkham.services.workers.ocr_worker.q.enqueue')
+def test_process_minidoc_job_saves_pages_in_order_in_one_transaction(
+    mock_enqueue, mock_transcribe_image, mock_checksum, mock_submit_pages, mock_Session,
+    in_memory_db, tmp_path
+):
+    with patch('app.arkham.services.workers.ocr_worker.OCR_PAGES_DIR', str(tmp_path)):
+        mock_Session.return_value = in_memory_db
+        minidoc = MiniDoc(document_id=7, minidoc_id="hash__part_001", page_start=1, page_end=3)
+        in_memory_db.add(minidoc)
+        in_memory_db.add(PageOCR(document_id=7, page_num=2, text="stale", checksum="old"))
+        in_memory_db.commit()
+
+        pages = [(1, "p1.png"), (2, "p2.png"), (3, "p3.png")]
+        # Page 3 finishes first and page 2 fails: results are still written in page order
+        mock_submit_pages.return_value = [
+            _done(("one\n", [{"text": "one"}])),
+            _done(error=RuntimeError("engine crashed")),
+            _done(("three\n", [{"text": "three"}])),
+        ]
+
+        with patch.object(in_memory_db, "commit", wraps=in_memory_db.commit) as commit:
+            ocr_worker.process_minidoc_job(minidoc.id, "hash", pages)
+            commit.assert_called_once()
+
+        mock_submit_pages.assert_called_once_with(["p1.png", "p2.png", "p3.png"])
+        saved = in_memory_db.query(PageOCR).order_by(PageOCR.page_num).all()
+        assert [p.text for p in saved][::2] == ["one\n", "three\n"]
+        assert saved[1].text.startswith("[OCR FAILED]") and saved[1].checksum == "old"
+        assert [p.checksum for p in saved][::2] == ["dummy_checksum"] * 2
+        assert minidoc.status == "ocr_done"
+        assert sorted(os.listdir(tmp_path / "hash")) == [
+            "page_0001.json", "page_0002.json", "page_0003.json"
+        ]
         mock_enqueue.assert_called_once_with(
-            "arkham.services.workers.parser_worker.parse_minidoc_job",
-            minidoc_db_id=mock_minidoc.id,
+            "app.arkham.services.workers.parser_worker.parse_minidoc_job",
+            minidoc_db_id=minidoc.id,
+        )
+
+
+@patch('app.arkham.services.workers.ocr_worker.Session')
+@patch('app.arkham.services.workers.ocr_worker.submit_pages')
+@patch('app.arkham.services.workers.ocr_worker.q.enqueue')
+def test_process_minidoc_job_failure_fails_the_job(
+    mock_enqueue, mock_submit_pages, mock_Session, in_memory_db, tmp_path
+):
+    with patch('app.arkham.services.workers.ocr_worker.OCR_PAGES_DIR', str(tmp_path)):
+        mock_Session.return_value = in_memory_db
+        minidoc = MiniDoc(document_id=7, minidoc_id="hash__part_001", page_start=1, page_end=1)
+        in_memory_db.add(minidoc)
+        in_memory_db.commit()
+        mock_submit_pages.return_value = [_done(("one\n", []))]
+
+        with patch.object(in_memory_db, "commit", side_effect=RuntimeError("db down")), \
+                patch.object(in_memory_db, "rollback", wraps=in_memory_db.rollback) as rollback:
+            with pytest.raises(RuntimeError, match="db down"):
+                ocr_worker.process_minidoc_job(minidoc.id, "hash", [(1, "p1.png")])
+            rollback.assert_called_once()
+
+        mock_enqueue.assert_not_called()
+
+
+@patch('app.arkham.services.workers.ocr_worker.Session')
+@patch('app.arkham.services.workers.ocr_worker.submit_pages')
+@patch('app.arkham.services.workers.ocr_worker.q.enqueue')
+def test_process_minidoc_job_streams_rendered_pages(
+    mock_enqueue, mock_submit_pages, mock_Session, in_memory_db, tmp_path
+):
+    import fitz
+
+    pdf_path = str(tmp_path / "scan.pdf")
+    pdf = fitz.open()
+    for _ in range(3):
+        pdf.new_page()
+    pdf.save(pdf_path)
+
+    submitted = []
+
+    def submit(images):
+        submitted.extend(images)
+        return [_done(("text\n", [])) for _ in submitted]
+
+    mock_submit_pages.side_effect = submit
+    with patch('app.arkham.services.workers.ocr_worker.OCR_PAGES_DIR', str(tmp_path)):
+        mock_Session.return_value = in_memory_db
+        # Page 1 came from the text layer and is already saved
+        minidoc = MiniDoc(document_id=7, minidoc_id="hash__part_001", page_start=1, page_end=3)
+        in_memory_db.add(minidoc)
+        in_memory_db.add(PageOCR(document_id=7, page_num=1, text="native", checksum="t"))
+        in_memory_db.commit()
+
+        ocr_worker.process_minidoc_job(
+            minidoc.id, "hash", [(2, None), (3, None)], pdf_path=pdf_path
         )
+
+    assert len(submitted) == 2 and all(png.startswith(b"\x89PNG") for png in submitted)
+    saved = in_memory_db.query(PageOCR).order_by(PageOCR.page_num).all()
+    assert [p.text for p in saved] == ["native", "text\n", "text\n"]
+    assert saved[1].checksum == hashlib.sha256(submitted[0]).hexdigest()
+    assert minidoc.status == "ocr_done"
+    assert not list(tmp_path.glob("**/*.png"))
@@ -0,0 +1,94 @@
+import os
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from app.arkham.services import pdf_pages
+from app.arkham.services.db.models import Document, MiniDoc, PageOCR
+from app.arkham.services.workers import splitter_worker
+
+PARAGRAPH = (
+    "The committee reviewed the quarterly statements submitted by the vendor "
+    "and found discrepancies across three invoices. "
+)
+
+
+def _image_page(pdf):
+    """A page that is one big picture of text, like a scan."""
+    source = fitz.open()
+    source.new_page().insert_textbox(fitz.Rect(50, 50, 545, 790), PARAGRAPH * 5)
+    pix = source.load_page(0).get_pixmap(dpi=30)
+    page = pdf.new_page()
+    page.insert_image(page.rect, pixmap=pix)
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    """Pages: 1-2 born-digital text, 3 blank (scan without text layer), 4 image."""
+    path = str(tmp_path / "mixed.pdf")
+    pdf = fitz.open()
+    for _ in range(2):
+        pdf.new_page().insert_textbox(fitz.Rect(50, 50, 545, 790), PARAGRAPH * 5)
+    pdf.new_page()
+    _image_page(pdf)
+    pdf.save(path)
+    return path
+
+
+def test_page_triage_routes_only_scans_and_image_pages_to_ocr(mixed_pdf):
+    pdf = fitz.open(mixed_pdf)
+    texts = [pdf_pages.page_text_layer(page, 100, 0.5) for page in pdf]
+
+    assert texts[0].startswith("The committee") and texts[1]
+    assert texts[2] is None and texts[3] is None
+    assert pdf_pages.image_coverage(pdf[3]) > 0.99
+    assert pdf_pages.text_layer_meta(pdf[0])[0]["conf"] == 1.0
+
+    (page_num, png), = pdf_pages.render_pdf_pages(mixed_pdf, [4])
+    assert page_num == 4 and png.startswith(b"\x89PNG")
+
+
+def _split(session, pdf_path, tmp_path, config):
+    session.add(Document(id=1, path=pdf_path, title="mixed.pdf", file_hash="hash"))
+    session.commit()
+    with patch.object(splitter_worker, "Session", return_value=session), patch.object(
+        splitter_worker, "RAW_PAGES_DIR", str(tmp_path)
+    ), patch.object(splitter_worker, "MINIDOC_SIZE", 2), patch.object(
+        splitter_worker, "get_config", lambda key, default=None: config.get(key, default)
+    ), patch.object(splitter_worker.q, "enqueue") as enqueue:
+        splitter_worker.split_pdf_job(1, pdf_path)
+    return enqueue
+
+
+def test_split_saves_text_pages_and_renders_the_rest(in_memory_db, mixed_pdf, tmp_path):
+    enqueue = _split(in_memory_db, mixed_pdf, tmp_path, {})
+
+    pages = in_memory_db.query(PageOCR).order_by(PageOCR.page_num).all()
+    assert [p.page_num for p in pages] == [1, 2]
+    assert pages[0].text.startswith("The committee")
+    # Only the pages that need OCR were rendered
+    assert sorted(f for f in os.listdir(tmp_path / "hash") if f.endswith(".png")) == [
+        "page_0003.png",
+        "page_0004.png",
+    ]
+
+    part1, part2 = in_memory_db.query(MiniDoc).order_by(MiniDoc.page_start).all()
+    assert part1.status == "ocr_done" and part2.status == "pending_ocr"
+    calls = [(c.args[0].rsplit(".", 1)[1], c.kwargs) for c in enqueue.call_args_list]
+    assert calls[0] == ("parse_minidoc_job", {"minidoc_db_id": part1.id})
+    assert [(name, kw["page_num"]) for name, kw in calls[1:]] == [
+        ("process_page_job", 3),
+        ("process_page_job", 4),
+    ]
+
+
+def test_split_streams_ocr_pages_in_range_mode(in_memory_db, mixed_pdf, tmp_path):
+    config = {"ocr.execution_mode": "range", "ocr.stream_pages": True}
+    enqueue = _split(in_memory_db, mixed_pdf, tmp_path, config)
+
+    assert not [f for f in os.listdir(tmp_path / "hash") if f.endswith(".png")]
+    job = enqueue.call_args_list[-1]
+    assert job.args[0].endswith("process_minidoc_job")
+    assert job.kwargs["pages"] == [(3, None), (4, None)]
+    assert job.kwargs["pdf_path"] == mixed_pdf
@@ -0,0 +1,165 @@
+"""
+Benchmark: blocking-based duplicate candidate generation.
+
+Generates a synthetic corpus of canonical entity names (people and
+organisations with typo/initial/suffix variants), then reports how many
+pairs survive blocking, how many are scored as duplicates, how long the
+first block of scored candidates takes (what the review page waits for),
+and total wall time.
+
+Usage:
+    python scripts/benchmarks/bench_entity_dedup.py
+    python scripts/benchmarks/bench_entity_dedup.py --sizes 1000 10000 --brute-force
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Setup path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.arkham.services.entity_deduplication_service import (  # noqa: E402
+    iter_candidate_blocks,
+)
+from app.arkham.services.entity_resolution import EntityResolver  # noqa: E402
+
+FIRST = [
+    "john", "jane", "robert", "maria", "ahmed", "li", "olga", "pierre",
+    "fatima", "george", "elena", "samuel", "yuki", "carlos", "anna", "ivan",
+]
+ORG_SUFFIX = ["Corporation", "Corp.", "Holdings", "Group", "Ltd", "LLC", "Partners"]
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in ("a", "e", "i", "o", "u", "ar", "en", "os")]
+
+
+def _word(rng, n_syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(n_syllables)).capitalize()
+
+
+def _typo(rng, name):
+    if len(name) < 4:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1 :]
+
+
+def make_entities(n, seed=42):
+    """Return (id, name, label) tuples; ~20% are variants of earlier names."""
+    rng = random.Random(seed)
+    entities = []
+    for entity_id in range(1, n + 1):
+        if entities and rng.random() < 0.2:
+            _, base, label = rng.choice(entities)
+            variant = rng.choice(["typo", "initial", "suffix"])
+            if variant == "typo":
+                name = _typo(rng, base)
+            elif variant == "initial" and label == "PERSON" and " " in base:
+                first, rest = base.split(" ", 1)
+                name = f"{first[0].upper()}. {rest}"
+            else:
+                name = f"{base} {rng.choice(ORG_SUFFIX)}" if label == "ORG" else base.upper()
+        elif rng.random() < 0.6:
+            label = "PERSON"
+            name = f"{rng.choice(FIRST).capitalize()} {_word(rng, rng.randint(2, 4))}"
+        else:
+            label = "ORG"
+            name = f"{_word(rng, rng.randint(2, 4))} {_word(rng, 2)}"
+        entities.append((entity_id, name, label))
+    return entities
+
+
+def score(pairs, names, labels, resolver, min_similarity=0.75):
+    """Returns (candidates above threshold, resolver auto-matches)."""
+    matches = auto_matches = 0
+    for id1, id2 in pairs:
+        n1 = resolver.normalize_text(names[id1])
+        n2 = resolver.normalize_text(names[id2])
+        similarity = resolver.similarity_score(n1, n2)
+        is_match = resolver.is_match(names[id1], names[id2], labels[id1])
+        if similarity >= min_similarity or is_match:
+            matches += 1
+        if is_match:
+            auto_matches += 1
+    return matches, auto_matches
+
+
+def run(size, brute_force):
+    resolver = EntityResolver()
+    entities = make_entities(size)
+    names = {e[0]: e[1] for e in entities}
+    labels = {e[0]: e[2] for e in entities}
+
+    # Blocks are scored as they are produced, as iter_duplicate_candidates does
+    blocked = []
+    matches = auto_matches = 0
+    blocking_time = scoring_time = 0.0
+    first_block = None
+    start = time.perf_counter()
+    blocks = iter_candidate_blocks(entities)
+    while True:
+        tick = time.perf_counter()
+        block = next(blocks, None)
+        blocking_time += time.perf_counter() - tick
+        if block is None:
+            break
+        tick = time.perf_counter()
+        found, auto = score([(p[1], p[2]) for p in block], names, labels, resolver)
+        scoring_time += time.perf_counter() - tick
+        matches += found
+        auto_matches += auto
+        blocked.extend(block)
+        if first_block is None:
+            first_block = time.perf_counter() - start
+
+    all_pairs = sum(
+        c * (c - 1) // 2
+        for c in (sum(1 for e in entities if e[2] == lbl) for lbl in set(labels.values()))
+    )
+
+    print(
+        f"{size:>8,} entities | all pairs {all_pairs:>14,} | "
+        f"scored {len(blocked):>10,} | candidates {matches:>8,} "
+        f"(auto {auto_matches:>7,}) | "
+        f"first block {first_block or 0:6.2f}s | "
+        f"blocking {blocking_time:7.2f}s | scoring {scoring_time:7.2f}s | "
+        f"total {blocking_time + scoring_time:7.2f}s"
+    )
+
+    if brute_force:
+        start = time.perf_counter()
+        ordered = sorted(entities)
+        every_pair = [
+            (a[0], b[0])
+            for i, a in enumerate(ordered)
+            for b in ordered[i + 1 :]
+            if a[2] == b[2]
+        ]
+        brute_matches, brute_auto = score(every_pair, names, labels, resolver)
+        brute_time = time.perf_counter() - start
+        recall = matches / brute_matches if brute_matches else 1.0
+        auto_recall = auto_matches / brute_auto if brute_auto else 1.0
+        print(
+            f"{'':>8} brute force: candidates {brute_matches:,} (auto {brute_auto:,}) "
+            f"in {brute_time:.2f}s | recall {recall:.1%} (auto {auto_recall:.1%})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument(
+        "--brute-force",
+        action="store_true",
+        help="Also score every pair (only practical up to ~5k entities) to measure recall",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.brute_force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: entity graph load time, per-request rebuild vs the shared cache.
+
+Fills a throwaway SQLite database with a synthetic entity graph (power-law
+degree distribution, ~5 relationships per entity), then times:
+
+- rebuild: what every Graph/Path Finder/Influence request used to do (load
+  all canonical entities, aggregate all relationships, build a NetworkX graph)
+- cold load: loading the CSR snapshot (graph_cache.load_entity_graph)
+- warm get: EntityGraphCache.get() when the graph version has not moved
+- view: building a NetworkX view from the snapshot (first call per filter set)
+- path: one shortest-path query, rebuild + NetworkX vs warm CSR search
+
+Usage:
+    python scripts/benchmarks/bench_entity_graph.py
+    python scripts/benchmarks/bench_entity_graph.py --sizes 1000 10000 --edges-per-entity 10
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Setup path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import networkx as nx  # noqa: E402
+from sqlalchemy import create_engine, func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.arkham.services.db.models import (  # noqa: E402
+    Base,
+    CanonicalEntity,
+    EntityRelationship,
+)
+from app.arkham.services.graph_cache import (  # noqa: E402
+    EntityGraphCache,
+    load_entity_graph,
+)
+from app.arkham.services.relationship_utils import bump_graph_version  # noqa: E402
+
+LABELS = ["PERSON", "ORG", "GPE", "DATE"]
+
+
+def populate(session, size, edges_per_entity, seed=42):
+    rng = random.Random(seed)
+    session.execute(
+        CanonicalEntity.__table__.insert(),
+        [
+            {
+                "id": i,
+                "canonical_name": f"Entity {i}",
+                "label": rng.choice(LABELS),
+                "total_mentions": rng.randint(1, 50),
+            }
+            for i in range(1, size + 1)
+        ],
+    )
+
+    # Preferential attachment-ish: low ids are hubs
+    pairs = set()
+    target = size * edges_per_entity
+    while len(pairs) < target:
+        a = rng.randint(1, size)
+        b = int(size ** rng.random())
+        if a != b:
+            pairs.add((min(a, b), max(a, b)))
+    session.execute(
+        EntityRelationship.__table__.insert(),
+        [
+            {
+                "entity1_id": a,
+                "entity2_id": b,
+                "relationship_type": "co-occurrence",
+                "strength": round(rng.uniform(0.5, 3.0), 2),
+                "co_occurrence_count": 1,
+            }
+            for a, b in pairs
+        ],
+    )
+    bump_graph_version(session)
+    session.commit()
+
+
+def rebuild(session, min_strength=0.1):
+    """The per-request graph build the services used before the cache."""
+    G = nx.Graph()
+    for entity in session.query(CanonicalEntity).all():
+        G.add_node(
+            entity.id,
+            name=entity.canonical_name,
+            label=entity.label,
+            mentions=entity.total_mentions or 0,
+        )
+    relationships = (
+        session.query(
+            EntityRelationship.entity1_id,
+            EntityRelationship.entity2_id,
+            func.sum(EntityRelationship.strength).label("total_strength"),
+        )
+        .group_by(EntityRelationship.entity1_id, EntityRelationship.entity2_id)
+        .having(func.sum(EntityRelationship.strength) >= min_strength)
+        .all()
+    )
+    for rel in relationships:
+        if G.has_node(rel.entity1_id) and G.has_node(rel.entity2_id):
+            G.add_edge(rel.entity1_id, rel.entity2_id, weight=rel.total_strength)
+    return G
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def run(size, edges_per_entity, workdir):
+    engine = create_engine(f"sqlite:///{workdir}/graph_{size}.db")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    populate(session, size, edges_per_entity)
+
+    rng = random.Random(7)
+    source, target = rng.randint(1, size), rng.randint(1, size)
+
+    G, rebuild_time = timed(lambda: rebuild(session))
+    fresh, cold_time = timed(lambda: load_entity_graph(session))
+    _, view_time = timed(lambda: fresh.to_networkx(min_weight=0.1))
+
+    cache = EntityGraphCache()
+    graph = cache.get(session)
+    _, warm_time = timed(lambda: cache.get(session), repeat=100)
+
+    _, old_path_time = timed(
+        lambda: nx.shortest_path(rebuild(session), source, target)
+    )
+    path, new_path_time = timed(
+        lambda: cache.get(session).shortest_path(source, target, min_weight=0.1),
+        repeat=20,
+    )
+
+    print(
+        f"{size:>8,} entities | {G.number_of_edges():>9,} edges | "
+        f"rebuild {rebuild_time * 1000:9.1f}ms | cold load {cold_time * 1000:8.1f}ms | "
+        f"warm get {warm_time * 1000:6.2f}ms | view {view_time * 1000:8.1f}ms | "
+        f"path {old_path_time * 1000:9.1f}ms -> {new_path_time * 1000:6.2f}ms "
+        f"({len(path) - 1 if path else '-'} hops)"
+    )
+
+    session.close()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--edges-per-entity", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            run(size, args.edges_per_entity, workdir)
+
+
+if __name__ == "__main__":
+    main()
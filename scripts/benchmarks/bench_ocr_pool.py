@@ -0,0 +1,132 @@
+"""
+Benchmark: OCR throughput (pages/min), one engine per job vs the OCR pool.
+
+Renders the pages of a sample PDF to PNG (as the splitter does), then times:
+
+- single: one in-process PaddleOCR engine, one page after another (what a
+  SimpleWorker does with process_page_job in page mode)
+- pool N: the same pages fanned out to N PaddleOCR processes
+  (services/ocr_pool.py, used by process_minidoc_job in range mode)
+
+Engine start-up is timed separately and excluded from pages/min, since both
+modes keep their engines for the life of the worker.
+
+Without --pdf, a text-only sample PDF is generated with PyMuPDF.
+
+Usage:
+    python scripts/benchmarks/bench_ocr_pool.py
+    python scripts/benchmarks/bench_ocr_pool.py --pdf sample.pdf --pages 40 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+# Setup path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
+
+import fitz  # noqa: E402
+
+from app.arkham.services import ocr_pool  # noqa: E402
+
+DPI = 200  # Same as the splitter
+
+SAMPLE_TEXT = (
+    "The committee reviewed the quarterly statements submitted by the vendor "
+    "on 14 March 2023 and found discrepancies totalling $48,210.55 across "
+    "three invoices. Account 4471-0093 was flagged for follow-up."
+)
+
+
+def make_sample_pdf(path, pages):
+    pdf = fitz.open()
+    for page_num in range(pages):
+        page = pdf.new_page()
+        text = f"Page {page_num + 1}\n\n" + "\n\n".join([SAMPLE_TEXT] * 12)
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), text, fontsize=10)
+    pdf.save(path)
+
+
+def render_pages(pdf_path, out_dir, max_pages):
+    pdf = fitz.open(pdf_path)
+    paths = []
+    for page_num in range(min(len(pdf), max_pages)):
+        path = os.path.join(out_dir, f"page_{page_num + 1:04d}.png")
+        pdf.load_page(page_num).get_pixmap(dpi=DPI).save(path)
+        paths.append(path)
+    return paths
+
+
+def bench_single(paths):
+    start = time.perf_counter()
+    ocr_pool._init_engine(use_gpu=False, lang="en")
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chars = sum(len(ocr_pool.ocr_image(path)[0]) for path in paths)
+    return startup, time.perf_counter() - start, chars
+
+
+def bench_pool(paths, workers):
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=ocr_pool._init_engine,
+        initargs=(False, "en"),
+    )
+    try:
+        # Warm up: start every process and load its engine
+        start = time.perf_counter()
+        list(pool.map(ocr_pool.ocr_image, paths[:workers]))
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chars = sum(len(text) for text, _ in pool.map(ocr_pool.ocr_image, paths))
+        return startup, time.perf_counter() - start, chars
+    finally:
+        pool.shutdown()
+
+
+def report(label, pages, startup, elapsed, chars):
+    print(
+        f"{label:>8} | {pages:>4} pages | start-up {startup:6.1f}s | "
+        f"{elapsed:7.1f}s | {pages / elapsed * 60:7.1f} pages/min | {chars:,} chars"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pdf", help="PDF to OCR (default: generated sample)")
+    parser.add_argument("--pages", type=int, default=20, help="Pages to OCR")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({2, ocr_pool.pool_size()}),
+        help="Pool sizes to try (default: 2 and processing.max_workers)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = os.path.join(workdir, "sample.pdf")
+            make_sample_pdf(pdf_path, args.pages)
+        paths = render_pages(pdf_path, workdir, args.pages)
+        print(f"{len(paths)} pages rendered at {DPI} DPI, {os.cpu_count()} CPUs")
+
+        report("single", len(paths), *bench_single(paths))
+        for workers in args.workers:
+            report(f"pool {workers}", len(paths), *bench_pool(paths, workers))
+
+
+if __name__ == "__main__":
+    main()